@@ -0,0 +1,20 @@
+# archive/admin.py
+from django.contrib import admin
+from .models import ArchiveBalance, FiscalArchive
+
+
+@admin.register(FiscalArchive)
+class FiscalArchiveAdmin(admin.ModelAdmin):
+    list_display = ['company', 'fiscal_year', 'period_start', 'period_end', 'status',
+                    'sales', 'purchases', 'money_receipts', 'transactions', 'completed_at']
+    list_filter = ['status', 'fiscal_year']
+    # Written by archive.archiver only (manage.py archive_fiscal_years)
+    readonly_fields = ['company', 'fiscal_year', 'period_start', 'period_end', 'status',
+                       'sales', 'purchases', 'money_receipts', 'transactions', 'started_at', 'completed_at']
+
+
+@admin.register(ArchiveBalance)
+class ArchiveBalanceAdmin(admin.ModelAdmin):
+    list_display = ['company', 'fiscal_year', 'party_type', 'party_id', 'debit', 'credit', 'documents']
+    list_filter = ['party_type', 'fiscal_year']
+    readonly_fields = ['company', 'fiscal_year', 'party_type', 'party_id', 'debit', 'credit', 'documents']
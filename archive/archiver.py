@@ -0,0 +1,397 @@
+# archive/archiver.py
+"""
+Moving documents of closed fiscal years into the archive tables.
+
+A fiscal year is archived in chunks of documents, each chunk in its own
+``serialized_write()`` transaction: rows are copied to the archive models
+with their primary keys, their totals are added to ArchiveBalance and the
+hot rows are deleted with ``_raw_delete`` (no signals and no cascades, so
+stock, account balances and document totals are left exactly as they are).
+
+Only settled documents that can move as a whole group are archived:
+
+- sales with nothing due and no sales return, with their items, batch
+  allocations, money receipts and transactions
+- purchases with nothing due and no purchase return or supplier payment,
+  with their items and transactions
+- money receipts not tied to a sale, with their transactions
+- completed or cancelled transactions not tied to a document, a receipt
+  or an account transfer
+
+A group stays hot when one of its rows is dated after the fiscal year or is
+referenced by a row that stays hot; a later run picks it up once it can move.
+
+A fiscal year is only archived once a period close (``closing``) covers
+it: balances then start from the close snapshots, which already include
+the archived rows. Documents the latest close left open stay hot as well,
+since balances read them from the live tables.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Exists, F, Min, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from account_transfer.models import AccountTransfer
+from closing.balances import latest_close
+from closing.models import OpenDocument, PeriodClose
+from core.db import serialized_write
+from money_receipts.models import MoneyReceipt
+from purchases.models import Purchase, PurchaseItem
+from returns.models import PurchaseReturn, SalesReturn
+from sales.models import Sale, SaleItem, SaleItemBatch
+from supplier_payment.models import SupplierPayment
+from transactions.models import Transaction
+
+from .models import ARCHIVE_MODELS, ArchiveBalance, FiscalArchive
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Transactions in these states are final; pending and failed ones stay hot
+ARCHIVABLE_TRANSACTION_STATUSES = ['completed', 'cancelled']
+
+# FiscalArchive counter -> document model
+COUNTED = [('sales', Sale), ('purchases', Purchase), ('money_receipts', MoneyReceipt), ('transactions', Transaction)]
+
+
+def _aware(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def archivable_years(company, today=None, keep=None):
+    """
+    Closed fiscal years of ``company`` that still have hot documents, oldest
+    first. The newest ``keep`` closed years (``ARCHIVE_KEEP_CLOSED_YEARS``,
+    default 1) stay hot for day-to-day reports.
+    """
+    keep = getattr(settings, 'ARCHIVE_KEEP_CLOSED_YEARS', 1) if keep is None else keep
+    today = today or timezone.localdate()
+    last = company.fiscal_year_of(today) - 1 - keep
+
+    firsts = [
+        Sale.objects.filter(company=company).aggregate(first=Min('sale_date'))['first'],
+        Purchase.objects.filter(company=company).aggregate(first=Min('purchase_date'))['first'],
+        MoneyReceipt.objects.filter(company=company).aggregate(first=Min('payment_date'))['first'],
+        Transaction.objects.filter(company=company).aggregate(first=Min('transaction_date'))['first'],
+    ]
+    days = [timezone.localtime(value).date() if isinstance(value, datetime) else value for value in firsts if value]
+    if not days:
+        return []
+    return list(range(company.fiscal_year_of(min(days)), last + 1))
+
+
+def archive_fiscal_year(company, year, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """
+    Archive ``company``'s settled documents of fiscal ``year`` (see module
+    docstring); returns the number of sales, purchases, money receipts and
+    transactions moved (or that would move, with ``dry_run``).
+    """
+    start, end = company.fiscal_year_bounds(year)
+    if end > timezone.localdate():
+        raise ValidationError(f'Fiscal year {year} has not closed yet (it ends {end - timedelta(days=1)})')
+    close = latest_close(company)
+    if close is None or close.closed_through < end - timedelta(days=1):
+        raise ValidationError(
+            f'Fiscal year {year} is not covered by a period close; close it through {end - timedelta(days=1)} first'
+        )
+
+    if not dry_run:
+        # Recorded before the first chunk moves, so reports read the archive from then on
+        run, _ = FiscalArchive.objects.get_or_create(
+            company=company, fiscal_year=year,
+            defaults={'period_start': start, 'period_end': end - timedelta(days=1)},
+        )
+        FiscalArchive.objects.filter(pk=run.pk).update(status='running', completed_at=None)
+
+    since, until = _aware(start), _aware(end)
+    stages = [
+        (_sale_candidates(company, since, until).exclude(pk__in=_left_open(close, 'sale')), _plan_sales),
+        (_purchase_candidates(company, start, end).exclude(pk__in=_left_open(close, 'purchase')), _plan_purchases),
+        (_receipt_candidates(company, since, until), _plan_receipts),
+        (_transaction_candidates(company, since, until).exclude(pk__in=_left_open(close, 'transaction')),
+         _plan_transactions),
+    ]
+
+    counts = {'sales': 0, 'purchases': 0, 'money_receipts': 0, 'transactions': 0}
+    for candidates, plan in stages:
+        last = 0
+        while True:
+            ids = list(candidates.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            last = ids[-1]
+
+            group = plan(ids, until)
+            moved = {name: len(group.get(model, ())) for name, model in COUNTED}
+            if not dry_run and any(moved.values()):
+                with serialized_write():
+                    _move(company, year, group)
+                    FiscalArchive.objects.filter(company=company, fiscal_year=year).update(**{
+                        name: F(name) + value for name, value in moved.items()
+                    })
+            for name, value in moved.items():
+                counts[name] += value
+
+    if not dry_run:
+        FiscalArchive.objects.filter(company=company, fiscal_year=year).update(
+            status='completed', completed_at=timezone.now()
+        )
+        logger.info('Archived fiscal year %s of company %s: %s', year, company.pk, counts)
+    return counts
+
+
+# --------------------------
+# Candidates per document type (settled, inside the fiscal year)
+# --------------------------
+def _left_open(close, document_type):
+    return close.open_documents.filter(document_type=document_type).values('document_id')
+
+
+def _sale_candidates(company, since, until):
+    return Sale.objects.filter(
+        company=company, sale_date__gte=since, sale_date__lt=until, due_amount__lte=0
+    ).exclude(Exists(SalesReturn.objects.filter(original_sale=OuterRef('pk'))))
+
+
+def _purchase_candidates(company, start, end):
+    return Purchase.objects.filter(
+        company=company, purchase_date__gte=start, purchase_date__lt=end, due_amount__lte=0
+    ).exclude(
+        Exists(PurchaseReturn.objects.filter(original_purchase=OuterRef('pk')))
+    ).exclude(
+        Exists(SupplierPayment.objects.filter(purchase=OuterRef('pk')))
+    )
+
+
+def _receipt_candidates(company, since, until):
+    return MoneyReceipt.objects.filter(
+        company=company, payment_date__gte=since, payment_date__lt=until, sale__isnull=True
+    )
+
+
+def _transaction_candidates(company, since, until):
+    return Transaction.objects.filter(
+        company=company, transaction_date__gte=since, transaction_date__lt=until,
+        status__in=ARCHIVABLE_TRANSACTION_STATUSES, is_opening_balance=False,
+        sale__isnull=True, purchase__isnull=True, money_receipt__isnull=True,
+    ).exclude(
+        Exists(MoneyReceipt.objects.filter(transaction=OuterRef('pk')))
+    ).exclude(
+        Exists(AccountTransfer.objects.filter(Q(debit_transaction=OuterRef('pk')) | Q(credit_transaction=OuterRef('pk'))))
+    )
+
+
+# --------------------------
+# Grouping: which candidates of a chunk can move, and what moves with them
+# --------------------------
+def _held_transactions(transaction_ids, receipt_ids):
+    """
+    Transactions referenced by an account transfer or by a receipt outside
+    ``receipt_ids``, or left open by their company's latest period close
+    """
+    if not transaction_ids:
+        return set()
+    newest = PeriodClose.objects.filter(company=OuterRef('period_close__company')).order_by('-closed_through')
+    held = set(OpenDocument.objects.filter(
+        document_type='transaction', document_id__in=transaction_ids, period_close=Subquery(newest.values('pk')[:1]),
+    ).values_list('document_id', flat=True))
+    transfers = AccountTransfer.objects.filter(
+        Q(debit_transaction_id__in=transaction_ids) | Q(credit_transaction_id__in=transaction_ids)
+    ).values_list('debit_transaction_id', 'credit_transaction_id')
+    for debit_id, credit_id in transfers:
+        held.update((debit_id, credit_id))
+    held.update(
+        MoneyReceipt.objects.filter(transaction_id__in=transaction_ids)
+        .exclude(pk__in=receipt_ids).values_list('transaction_id', flat=True)
+    )
+    return held
+
+
+def _transaction_ok(row, held, until):
+    return (
+        row['pk'] not in held
+        and row['transaction_date'] < until
+        and row['status'] in ARCHIVABLE_TRANSACTION_STATUSES
+    )
+
+
+def _plan_linked(anchor_ids, receipts, until, by_sale):
+    """
+    Sales (``by_sale``) or sale-less receipts with their receipts and
+    transactions. Anchors sharing a receipt or transaction are one group;
+    a group moves only when none of its rows has to stay hot.
+    """
+    anchors = set(anchor_ids)
+    receipts = {row['pk']: row for row in receipts.values('pk', 'owner', 'payment_date', 'transaction_id')}
+
+    linked = Q(money_receipt_id__in=list(receipts))
+    linked |= Q(pk__in=[row['transaction_id'] for row in receipts.values() if row['transaction_id']])
+    if by_sale:
+        linked |= Q(sale_id__in=anchor_ids)
+    transactions = list(Transaction.objects.filter(linked).values(
+        'pk', 'transaction_date', 'status', 'sale_id', 'purchase_id', 'money_receipt_id'
+    ))
+    held = _held_transactions([row['pk'] for row in transactions], list(receipts))
+
+    parent = {anchor: anchor for anchor in anchors}
+
+    def find(anchor):
+        while parent[anchor] != anchor:
+            parent[anchor] = parent[parent[anchor]]
+            anchor = parent[anchor]
+        return anchor
+
+    blocked = {row['owner'] for row in receipts.values() if row['payment_date'] >= until}
+    receipt_owners = defaultdict(set)
+    for row in receipts.values():
+        if row['transaction_id']:
+            receipt_owners[row['transaction_id']].add(row['owner'])
+
+    transaction_owner = {}
+    for row in transactions:
+        owners = set(receipt_owners.get(row['pk'], ()))
+        ok = _transaction_ok(row, held, until) and row['purchase_id'] is None
+        if row['money_receipt_id'] is not None:
+            if row['money_receipt_id'] in receipts:
+                owners.add(receipts[row['money_receipt_id']]['owner'])
+            else:
+                ok = False
+        if row['sale_id'] is not None:
+            if by_sale and row['sale_id'] in anchors:
+                owners.add(row['sale_id'])
+            else:
+                ok = False
+        if not owners:
+            continue
+        first, *rest = owners
+        for other in rest:
+            parent[find(other)] = find(first)
+        transaction_owner[row['pk']] = first
+        if not ok:
+            blocked.update(owners)
+
+    blocked_roots = {find(anchor) for anchor in blocked}
+    moving = {anchor for anchor in anchors if find(anchor) not in blocked_roots}
+    return {
+        'anchors': sorted(moving),
+        MoneyReceipt: [pk for pk, row in receipts.items() if row['owner'] in moving],
+        Transaction: [pk for pk, owner in transaction_owner.items() if owner in moving],
+    }
+
+
+def _plan_sales(ids, until):
+    receipts = MoneyReceipt.objects.filter(sale_id__in=ids).annotate(owner=F('sale_id'))
+    group = _plan_linked(ids, receipts, until, by_sale=True)
+    group[Sale] = group.pop('anchors')
+    return group
+
+
+def _plan_receipts(ids, until):
+    receipts = MoneyReceipt.objects.filter(pk__in=ids).annotate(owner=F('pk'))
+    group = _plan_linked(ids, receipts, until, by_sale=False)
+    group.pop('anchors')
+    return group
+
+
+def _plan_purchases(ids, until):
+    transactions = list(Transaction.objects.filter(purchase_id__in=ids).values(
+        'pk', 'transaction_date', 'status', 'sale_id', 'purchase_id', 'money_receipt_id'
+    ))
+    held = _held_transactions([row['pk'] for row in transactions], [])
+    blocked = {
+        row['purchase_id'] for row in transactions
+        if not _transaction_ok(row, held, until) or row['sale_id'] is not None or row['money_receipt_id'] is not None
+    }
+    return {
+        Purchase: [pk for pk in ids if pk not in blocked],
+        Transaction: [row['pk'] for row in transactions if row['purchase_id'] not in blocked],
+    }
+
+
+def _plan_transactions(ids, until):
+    return {Transaction: ids}
+
+
+# --------------------------
+# Moving one chunk
+# --------------------------
+def _move(company, year, group):
+    """Copy a planned chunk to the archive, add its closing balances and delete the hot rows"""
+    sale_ids, purchase_ids = group.get(Sale, []), group.get(Purchase, [])
+    rows = {
+        Sale: Sale.objects.filter(pk__in=sale_ids),
+        SaleItem: SaleItem.objects.filter(sale_id__in=sale_ids),
+        SaleItemBatch: SaleItemBatch.objects.filter(sale_item__sale_id__in=sale_ids),
+        Purchase: Purchase.objects.filter(pk__in=purchase_ids),
+        PurchaseItem: PurchaseItem.objects.filter(purchase_id__in=purchase_ids),
+        MoneyReceipt: MoneyReceipt.objects.filter(pk__in=group.get(MoneyReceipt, [])),
+        Transaction: Transaction.objects.filter(pk__in=group.get(Transaction, [])),
+    }
+
+    for model, queryset in rows.items():
+        archive_model = ARCHIVE_MODELS[model]
+        names = [field.attname for field in model._meta.concrete_fields]
+        archive_model.objects.bulk_create(
+            (archive_model(fiscal_year=year, **row) for row in queryset.order_by().values(*names)),
+            batch_size=500,
+        )
+
+    _add_balances(company, year, rows)
+
+    # Children before parents; the joined batch query must run before its items go
+    for model, queryset in reversed(rows.items()):
+        queryset._raw_delete(queryset.db)
+
+
+def _add_balances(company, year, rows):
+    """Add the chunk's totals per customer, supplier and account to ArchiveBalance"""
+    DEBIT, CREDIT = 0, 1
+    totals = defaultdict(lambda: [Decimal('0'), Decimal('0'), 0])
+
+    def add(party_type, queryset, party, amount, side):
+        values = (
+            queryset.order_by().exclude(**{f'{party}__isnull': True}).values(party)
+            .annotate(total=Sum(amount), documents=Count('pk')).values_list(party, 'total', 'documents')
+        )
+        for party_id, total, documents in values:
+            entry = totals[(party_type, party_id)]
+            entry[side] += total or 0
+            entry[2] += documents
+
+    add('customer', rows[Sale], 'customer_id', 'grand_total', DEBIT)
+    add('customer', rows[MoneyReceipt], 'customer_id', 'amount', CREDIT)
+    add('supplier', rows[Purchase], 'supplier_id', 'grand_total', DEBIT)
+    add('account', rows[Transaction].filter(transaction_type='debit'), 'account_id', 'amount', DEBIT)
+    add('account', rows[Transaction].filter(transaction_type='credit'), 'account_id', 'amount', CREDIT)
+    if not totals:
+        return
+
+    existing = {}
+    for party_type in {key[0] for key in totals}:
+        party_ids = [key[1] for key in totals if key[0] == party_type]
+        for balance in ArchiveBalance.objects.filter(
+            company=company, fiscal_year=year, party_type=party_type, party_id__in=party_ids
+        ):
+            existing[(party_type, balance.party_id)] = balance
+
+    created, updated = [], []
+    for (party_type, party_id), (debit, credit, documents) in totals.items():
+        balance = existing.get((party_type, party_id))
+        if balance is None:
+            created.append(ArchiveBalance(
+                company=company, fiscal_year=year, party_type=party_type, party_id=party_id,
+                debit=debit, credit=credit, documents=documents,
+            ))
+        else:
+            balance.debit += debit
+            balance.credit += credit
+            balance.documents += documents
+            updated.append(balance)
+    ArchiveBalance.objects.bulk_create(created, batch_size=500)
+    ArchiveBalance.objects.bulk_update(updated, ['debit', 'credit', 'documents'], batch_size=500)
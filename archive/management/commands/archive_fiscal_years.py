@@ -0,0 +1,59 @@
+# archive/management/commands/archive_fiscal_years.py
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Company
+
+
+class Command(BaseCommand):
+    help = (
+        'Move settled sales, purchases, money receipts and transactions of closed fiscal years '
+        'into the archive tables, in chunks, leaving closing balances per customer, supplier and '
+        'account behind. Without --year every closed year but the newest ARCHIVE_KEEP_CLOSED_YEARS '
+        'is archived. Safe to re-run: documents that could not move stay hot and are retried.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=str, help='Company id or code (default: all companies)')
+        parser.add_argument('--year', type=int, help='Fiscal year to archive, by the calendar year it starts in')
+        parser.add_argument('--keep', type=int, help='Closed fiscal years to keep hot (default: ARCHIVE_KEEP_CLOSED_YEARS)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Documents moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would move without writing')
+
+    def handle(self, *args, **options):
+        from archive.archiver import archivable_years, archive_fiscal_year
+
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        for company in self._get_companies(options['company']):
+            years = [options['year']] if options['year'] else archivable_years(company, keep=options['keep'])
+            if not years:
+                self.stdout.write(f'{company.name}: nothing to archive')
+                continue
+            for year in years:
+                try:
+                    counts = archive_fiscal_year(
+                        company, year, chunk_size=options['chunk_size'], dry_run=options['dry_run']
+                    )
+                except ValidationError as e:
+                    raise CommandError(f'{company.name}: {" ".join(e.messages)}')
+                start, end = company.fiscal_year_bounds(year)
+                self.stdout.write(
+                    f'{company.name} FY {year} ({start} - {end - timedelta(days=1)}): {verb.lower()} '
+                    + ', '.join(f'{value} {name.replace("_", " ")}' for name, value in counts.items())
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'{verb} closed fiscal years'))
+
+    def _get_companies(self, value):
+        if value:
+            lookup = {'pk': int(value)} if value.isdigit() else {'company_code': value}
+            try:
+                return [Company.objects.get(**lookup)]
+            except Company.DoesNotExist:
+                raise CommandError(f'Company {value} not found')
+        return Company.objects.order_by('id')
@@ -0,0 +1,334 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('branch_warehouse', '0001_initial'),
+        ('core', '0009_idempotencykey'),
+        ('customers', '0002_customer_company_active_index'),
+        ('expenses', '0003_alter_expense_head_alter_expense_subhead'),
+        ('income', '0002_income_payment_method'),
+        ('products', '0003_stockbatch'),
+        ('supplier_payment', '0002_initial'),
+        ('suppliers', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPurchase',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date_created', models.DateTimeField()),
+                ('date_updated', models.DateTimeField()),
+                ('purchase_date', models.DateField(default=django.utils.timezone.now)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('grand_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('due_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('change_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('overall_discount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('overall_discount_type', models.CharField(choices=[('fixed', 'Fixed'), ('percentage', 'Percentage')], default='fixed', max_length=10)),
+                ('overall_delivery_charge', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('overall_delivery_charge_type', models.CharField(choices=[('fixed', 'Fixed'), ('percentage', 'Percentage')], default='fixed', max_length=10)),
+                ('overall_service_charge', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('overall_service_charge_type', models.CharField(choices=[('fixed', 'Fixed'), ('percentage', 'Percentage')], default='fixed', max_length=10)),
+                ('vat', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('vat_type', models.CharField(choices=[('fixed', 'Fixed'), ('percentage', 'Percentage')], default='fixed', max_length=10)),
+                ('payment_method', models.CharField(blank=True, choices=[('cash', 'Cash'), ('bank', 'Bank Transfer'), ('cheque', 'Cheque'), ('digital', 'Digital Payment')], max_length=100, null=True)),
+                ('invoice_no', models.CharField(blank=True, max_length=20, null=True)),
+                ('payment_status', models.CharField(choices=[('pending', 'Pending'), ('partial', 'Partial'), ('paid', 'Paid'), ('overdue', 'Overdue'), ('cancelled', 'Cancelled')], default='pending', max_length=20)),
+                ('return_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('remark', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('reference_no', models.CharField(blank=True, max_length=50, null=True)),
+                ('expected_delivery_date', models.DateField(blank=True, null=True)),
+                ('fiscal_year', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='accounts.account')),
+                ('company', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.company')),
+                ('created_by', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('supplier', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='suppliers.supplier')),
+                ('updated_by', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('warehouse', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='branch_warehouse.warehouse')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedPurchaseItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('qty', models.PositiveIntegerField(default=1)),
+                ('price', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('discount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('discount_type', models.CharField(choices=[('fixed', 'Fixed'), ('percentage', 'Percentage')], default='fixed', max_length=10)),
+                ('batch_no', models.CharField(blank=True, max_length=50, null=True)),
+                ('expiry_date', models.DateField(blank=True, null=True)),
+                ('date_created', models.DateTimeField()),
+                ('date_updated', models.DateTimeField()),
+                ('fiscal_year', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='products.product')),
+                ('purchase', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='items', to='archive.archivedpurchase')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedSale',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('customer_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('sale_type', models.CharField(choices=[('retail', 'Retail'), ('wholesale', 'Wholesale')], default='retail', max_length=20)),
+                ('invoice_no', models.CharField(blank=True, max_length=20, null=True)),
+                ('sale_date', models.DateTimeField()),
+                ('customer_type', models.CharField(choices=[('walk_in', 'Walk-in'), ('saved_customer', 'Saved Customer')], default='walk_in', max_length=20)),
+                ('with_money_receipt', models.CharField(choices=[('Yes', 'Yes'), ('No', 'No')], default='No', max_length=3)),
+                ('remark', models.TextField(blank=True, null=True)),
+                ('payment_status', models.CharField(choices=[('pending', 'Pending'), ('partial', 'Partial'), ('paid', 'Paid'), ('overdue', 'Overdue')], default='pending', max_length=20)),
+                ('gross_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('net_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('payable_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('due_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('grand_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('change_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('overall_discount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('overall_discount_type', models.CharField(blank=True, choices=[('fixed', 'Fixed'), ('percent', 'Percent')], max_length=10, null=True)),
+                ('overall_delivery_charge', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('overall_delivery_type', models.CharField(blank=True, choices=[('fixed', 'Fixed'), ('percent', 'Percent')], max_length=10, null=True)),
+                ('overall_service_charge', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('overall_service_type', models.CharField(blank=True, choices=[('fixed', 'Fixed'), ('percent', 'Percent')], max_length=10, null=True)),
+                ('overall_vat_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('overall_vat_type', models.CharField(blank=True, choices=[('fixed', 'Fixed'), ('percent', 'Percent')], max_length=10, null=True)),
+                ('payment_method', models.CharField(blank=True, max_length=100, null=True)),
+                ('fiscal_year', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='accounts.account')),
+                ('company', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.company')),
+                ('created_by', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('customer', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='customers.customer')),
+                ('sale_by', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('warehouse', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='branch_warehouse.warehouse')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedMoneyReceipt',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('mr_no', models.CharField(blank=True, max_length=20)),
+                ('sale_invoice_no', models.CharField(blank=True, max_length=50, null=True)),
+                ('payment_type', models.CharField(choices=[('overall', 'Overall Payment'), ('specific', 'Specific Invoice Payment'), ('advance', 'Advance Payment')], default='overall', max_length=20)),
+                ('specific_invoice', models.BooleanField(default=False)),
+                ('is_advance_payment', models.BooleanField(default=False)),
+                ('payment_status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='completed', max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('payment_method', models.CharField(default='cash', max_length=100)),
+                ('payment_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('remark', models.TextField(blank=True, null=True)),
+                ('cheque_status', models.CharField(blank=True, max_length=20, null=True)),
+                ('cheque_id', models.CharField(blank=True, max_length=64, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('fiscal_year', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='accounts.account')),
+                ('company', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.company')),
+                ('created_by', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('customer', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='customers.customer')),
+                ('seller', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('sale', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='archive.archivedsale')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedSaleItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity', models.DecimalField(decimal_places=3, default=Decimal('1.00'), help_text='Quantity', max_digits=12)),
+                ('base_quantity', models.DecimalField(decimal_places=3, default=Decimal('1.00'), help_text='Quantity converted to base unit', max_digits=12)),
+                ('unit_price', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('unit_cost', models.DecimalField(blank=True, decimal_places=4, max_digits=14, null=True)),
+                ('price_type', models.CharField(choices=[('unit', 'Unit Price'), ('flat', 'Flat Price'), ('tier', 'Tier Price'), ('normal', 'Normal Price')], default='unit', max_length=10)),
+                ('flat_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('discount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('discount_type', models.CharField(choices=[('fixed', 'Fixed'), ('percent', 'Percent')], default='fixed', max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('fiscal_year', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='products.product')),
+                ('sale', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='items', to='archive.archivedsale')),
+                ('sale_mode', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='products.salemode')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedSaleItemBatch',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('fiscal_year', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('batch', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='products.stockbatch')),
+                ('sale_item', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='batch_allocations', to='archive.archivedsaleitem')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('transaction_no', models.CharField(blank=True, max_length=50)),
+                ('transaction_type', models.CharField(choices=[('debit', 'Debit'), ('credit', 'Credit')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('is_opening_balance', models.BooleanField(default=False)),
+                ('balance_already_updated', models.BooleanField(default=False)),
+                ('payment_method', models.CharField(choices=[('cash', 'Cash'), ('bank', 'Bank Transfer'), ('mobile', 'Mobile Banking'), ('card', 'Card'), ('other', 'Other')], default='cash', max_length=20)),
+                ('cheque_no', models.CharField(blank=True, max_length=100, null=True)),
+                ('reference_no', models.CharField(blank=True, max_length=100, null=True)),
+                ('transaction_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('date_updated', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='completed', max_length=20)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('fiscal_year', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='accounts.account')),
+                ('company', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.company')),
+                ('created_by', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('expense', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='expenses.expense')),
+                ('income', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='income.income')),
+                ('money_receipt', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='transactions', to='archive.archivedmoneyreceipt')),
+                ('purchase', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='transactions', to='archive.archivedpurchase')),
+                ('sale', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='transactions', to='archive.archivedsale')),
+                ('supplier_payment', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='supplier_payment.supplierpayment')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='archivedmoneyreceipt',
+            name='transaction',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='linked_money_receipt', to='archive.archivedtransaction'),
+        ),
+        migrations.CreateModel(
+            name='FiscalArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fiscal_year', models.PositiveIntegerField()),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField(help_text='Last day of the fiscal year')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed')], default='running', max_length=20)),
+                ('sales', models.PositiveIntegerField(default=0)),
+                ('purchases', models.PositiveIntegerField(default=0)),
+                ('money_receipts', models.PositiveIntegerField(default=0)),
+                ('transactions', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fiscal_archives', to='core.company')),
+            ],
+            options={
+                'ordering': ['company', '-fiscal_year'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchiveBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fiscal_year', models.PositiveIntegerField()),
+                ('party_type', models.CharField(choices=[('customer', 'Customer'), ('supplier', 'Supplier'), ('account', 'Account')], max_length=10)),
+                ('party_id', models.BigIntegerField()),
+                ('debit', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('credit', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('documents', models.PositiveIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_balances', to='core.company')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('company', 'party_type', 'party_id', 'fiscal_year'), name='archive_balance_party_year_unique')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedpurchase',
+            index=models.Index(fields=['company', 'purchase_date'], name='archive_arc_company_8d24a4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedpurchase',
+            index=models.Index(fields=['supplier', 'purchase_date'], name='archive_arc_supplie_8125e1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedpurchase',
+            index=models.Index(fields=['company', 'fiscal_year'], name='archive_arc_company_85a5e7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedpurchaseitem',
+            index=models.Index(fields=['purchase'], name='archive_arc_purchas_a4828f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedpurchaseitem',
+            index=models.Index(fields=['product', 'purchase'], name='archive_arc_product_fda5df_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedsale',
+            index=models.Index(fields=['company', 'sale_date'], name='archive_arc_company_3207d3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedsale',
+            index=models.Index(fields=['customer', 'sale_date'], name='archive_arc_custome_c1096b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedsale',
+            index=models.Index(fields=['company', 'fiscal_year'], name='archive_arc_company_1a5992_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedsaleitem',
+            index=models.Index(fields=['sale'], name='archive_arc_sale_id_940f67_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedsaleitem',
+            index=models.Index(fields=['product', 'sale'], name='archive_arc_product_2f50e7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedsaleitembatch',
+            index=models.Index(fields=['sale_item'], name='archive_arc_sale_it_1ef7dd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtransaction',
+            index=models.Index(fields=['company', 'transaction_date'], name='archive_arc_company_11f163_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtransaction',
+            index=models.Index(fields=['account', 'transaction_date'], name='archive_arc_account_8a86d8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtransaction',
+            index=models.Index(fields=['sale'], name='archive_arc_sale_id_f55cae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtransaction',
+            index=models.Index(fields=['purchase'], name='archive_arc_purchas_c8f34d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtransaction',
+            index=models.Index(fields=['money_receipt'], name='archive_arc_money_r_21666e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedmoneyreceipt',
+            index=models.Index(fields=['company', 'payment_date'], name='archive_arc_company_47ad7b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedmoneyreceipt',
+            index=models.Index(fields=['customer', 'payment_date'], name='archive_arc_custome_504cbf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedmoneyreceipt',
+            index=models.Index(fields=['sale'], name='archive_arc_sale_id_a35ca0_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='fiscalarchive',
+            constraint=models.UniqueConstraint(fields=('company', 'fiscal_year'), name='archive_company_fiscal_year_unique'),
+        ),
+    ]
@@ -0,0 +1,157 @@
+# archive/models.py
+"""
+Cold storage for documents of closed fiscal years.
+
+Each ``Archived*`` model mirrors the concrete fields of a hot model (same
+names, same primary keys) so rows are copied with ``.values()`` and the
+same filters and attribute access work on both. Links between archived
+documents point at their archived counterparts; everything else (company,
+customer, product, account, ...) points at the live table without a
+database constraint, so archived rows never block deleting a customer or
+product. Rows are only written by ``archive.archiver``.
+"""
+from django.db import models
+
+from money_receipts.models import MoneyReceipt
+from purchases.models import Purchase, PurchaseItem
+from sales.models import Sale, SaleItem, SaleItemBatch
+from transactions.models import Transaction
+
+# Hot model -> archive model name; relations between them stay relations in the archive
+ARCHIVE_NAMES = {
+    'sales.Sale': 'ArchivedSale',
+    'sales.SaleItem': 'ArchivedSaleItem',
+    'sales.SaleItemBatch': 'ArchivedSaleItemBatch',
+    'purchases.Purchase': 'ArchivedPurchase',
+    'purchases.PurchaseItem': 'ArchivedPurchaseItem',
+    'transactions.Transaction': 'ArchivedTransaction',
+    'money_receipts.MoneyReceipt': 'ArchivedMoneyReceipt',
+}
+
+
+def _target_label(model, field):
+    target = field.remote_field.model
+    if isinstance(target, str):
+        return target if '.' in target else f'{model._meta.app_label}.{target}'
+    return target._meta.label
+
+
+def mirror(model, indexes=()):
+    """Build the archive model of ``model``; ``indexes`` are field-name lists for Meta.indexes"""
+    attrs = {'__module__': __name__}
+    for field in model._meta.concrete_fields:
+        if field.primary_key:
+            attrs[field.name] = models.BigIntegerField(primary_key=True)
+            continue
+
+        if field.is_relation:
+            label = _target_label(model, field)
+            archived = label in ARCHIVE_NAMES
+            attrs[field.name] = models.ForeignKey(
+                ARCHIVE_NAMES[label] if archived else label,
+                on_delete=models.DO_NOTHING,
+                db_constraint=False,
+                db_index=False,
+                null=field.null,
+                blank=field.blank,
+                related_name=(field.remote_field.related_name if archived else '+'),
+            )
+        else:
+            # Archived values are kept as they were: no uniqueness, no auto timestamps
+            _, _, args, kwargs = field.deconstruct()
+            for key in ('unique', 'db_index', 'auto_now', 'auto_now_add'):
+                kwargs.pop(key, None)
+            attrs[field.name] = field.__class__(*args, **kwargs)
+
+    attrs['fiscal_year'] = models.PositiveIntegerField()
+    attrs['archived_at'] = models.DateTimeField(auto_now_add=True)
+    attrs['Meta'] = type('Meta', (), {'indexes': [models.Index(fields=list(fields)) for fields in indexes]})
+    attrs['__str__'] = lambda self: f'{model._meta.verbose_name} #{self.pk} (FY {self.fiscal_year})'
+    return type(ARCHIVE_NAMES[model._meta.label], (models.Model,), attrs)
+
+
+ArchivedSale = mirror(Sale, indexes=[('company', 'sale_date'), ('customer', 'sale_date'), ('company', 'fiscal_year')])
+ArchivedSaleItem = mirror(SaleItem, indexes=[('sale',), ('product', 'sale')])
+ArchivedSaleItemBatch = mirror(SaleItemBatch, indexes=[('sale_item',)])
+ArchivedPurchase = mirror(Purchase, indexes=[
+    ('company', 'purchase_date'), ('supplier', 'purchase_date'), ('company', 'fiscal_year'),
+])
+ArchivedPurchaseItem = mirror(PurchaseItem, indexes=[('purchase',), ('product', 'purchase')])
+ArchivedTransaction = mirror(Transaction, indexes=[
+    ('company', 'transaction_date'), ('account', 'transaction_date'), ('sale',), ('purchase',), ('money_receipt',),
+])
+ArchivedMoneyReceipt = mirror(MoneyReceipt, indexes=[('company', 'payment_date'), ('customer', 'payment_date'), ('sale',)])
+
+# Hot model -> archive model, in the order parents are archived
+ARCHIVE_MODELS = {
+    Sale: ArchivedSale,
+    SaleItem: ArchivedSaleItem,
+    SaleItemBatch: ArchivedSaleItemBatch,
+    Purchase: ArchivedPurchase,
+    PurchaseItem: ArchivedPurchaseItem,
+    Transaction: ArchivedTransaction,
+    MoneyReceipt: ArchivedMoneyReceipt,
+}
+
+
+class FiscalArchive(models.Model):
+    """One archiving run per company and fiscal year; reports read archived data before ``period_end``"""
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+    ]
+
+    company = models.ForeignKey('core.Company', on_delete=models.CASCADE, related_name='fiscal_archives')
+    fiscal_year = models.PositiveIntegerField()
+    period_start = models.DateField()
+    period_end = models.DateField(help_text='Last day of the fiscal year')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+
+    sales = models.PositiveIntegerField(default=0)
+    purchases = models.PositiveIntegerField(default=0)
+    money_receipts = models.PositiveIntegerField(default=0)
+    transactions = models.PositiveIntegerField(default=0)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['company', '-fiscal_year']
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'fiscal_year'], name='archive_company_fiscal_year_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.company} FY {self.fiscal_year} ({self.status})'
+
+
+class ArchiveBalance(models.Model):
+    """
+    Totals of the archived documents per party and fiscal year, left behind so
+    ledgers can bring archived years forward without reading the archive.
+    Customers: sales (debit) and money receipts (credit); suppliers: purchases
+    (debit); accounts: debit and credit transactions.
+    """
+    PARTY_CHOICES = [
+        ('customer', 'Customer'),
+        ('supplier', 'Supplier'),
+        ('account', 'Account'),
+    ]
+
+    company = models.ForeignKey('core.Company', on_delete=models.CASCADE, related_name='archive_balances')
+    fiscal_year = models.PositiveIntegerField()
+    party_type = models.CharField(max_length=10, choices=PARTY_CHOICES)
+    party_id = models.BigIntegerField()
+    debit = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    credit = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    documents = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company', 'party_type', 'party_id', 'fiscal_year'], name='archive_balance_party_year_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.party_type} #{self.party_id} FY {self.fiscal_year}: {self.debit - self.credit}'
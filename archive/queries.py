@@ -0,0 +1,52 @@
+# archive/queries.py
+"""
+Reading archived fiscal years alongside the hot tables.
+
+Reports ask ``archived(Sale, company, start)`` for the archive counterpart
+of a hot model: it is ``None`` while the requested range starts on or after
+the company's archive boundary (the day after the newest archived fiscal
+year), so ranges inside hot data never touch the archive. Otherwise it is a
+queryset of the archive model, which takes the same filters, select_related
+and prefetch_related as the hot one:
+
+    sales = list(Sale.objects.filter(lookup))
+    archived_sales = archived(Sale, company, start)
+    if archived_sales is not None:
+        sales += archived_sales.filter(lookup)
+
+``brought_forward()`` gives a party's archived totals from ArchiveBalance
+for ledgers whose range starts after the boundary.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Max, Sum
+
+from .models import ARCHIVE_MODELS, ArchiveBalance, FiscalArchive
+
+
+def boundary(company):
+    """First day that is never archived for ``company`` (None when nothing is archived)"""
+    last = FiscalArchive.objects.filter(company=company).aggregate(last=Max('period_end'))['last']
+    return last + timedelta(days=1) if last else None
+
+
+def reaches_archive(company, start):
+    """True when a range starting at ``start`` (None: unbounded) includes archived fiscal years"""
+    first_hot = boundary(company)
+    return first_hot is not None and (start is None or start < first_hot)
+
+
+def archived(model, company, start=None):
+    """Archive queryset of ``model`` for ``company`` when the range reaches the archive, else None"""
+    if not reaches_archive(company, start):
+        return None
+    return ARCHIVE_MODELS[model].objects.filter(company=company)
+
+
+def brought_forward(company, party_type, party_id):
+    """(debit, credit) of everything archived for one customer, supplier or account"""
+    totals = ArchiveBalance.objects.filter(
+        company=company, party_type=party_type, party_id=party_id
+    ).aggregate(debit=Sum('debit'), credit=Sum('credit'))
+    return totals['debit'] or Decimal('0'), totals['credit'] or Decimal('0')
@@ -0,0 +1,31 @@
+# archive/tests.py
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from closing.snapshots import close_period
+from closing.tests import ClosedYearMixin
+from sales.models import Sale
+
+from .archiver import archive_fiscal_year
+from .models import ArchivedSale
+
+
+class FiscalYearArchiveTests(ClosedYearMixin, TestCase):
+    def test_archive_keeps_balances(self):
+        before = self.balances()
+        close_period(self.company, date(self.year, 12, 31), user=self.user)
+
+        counts = archive_fiscal_year(self.company, self.year)
+
+        # The settled sale and purchase move; the open ones stay hot
+        self.assertEqual((counts['sales'], counts['purchases']), (1, 1))
+        self.assertTrue(ArchivedSale.objects.exists())
+        self.assertEqual(Sale.objects.filter(company=self.company).count(), 1)
+        self.assertEqual(self.balances(), before)
+        self.assertAuditClean()
+
+    def test_archive_needs_a_close(self):
+        with self.assertRaisesMessage(ValidationError, 'not covered by a period close'):
+            archive_fiscal_year(self.company, self.year)
@@ -1,6 +1,22 @@
 # branch_warehouse/admin.py
 from django.contrib import admin
-from .model import Branch, Warehouse
+from .models import Branch, Warehouse, WarehouseStock, WarehouseTransfer
 
 admin.site.register(Branch)
 admin.site.register(Warehouse)
+
+
+@admin.register(WarehouseStock)
+class WarehouseStockAdmin(admin.ModelAdmin):
+    list_display = ['product', 'warehouse', 'quantity', 'unrolled', 'updated_at']
+    list_filter = ['warehouse']
+    search_fields = ['product__name', 'product__sku']
+    # Moved by sales, purchases and transfers only (branch_warehouse.stock)
+    readonly_fields = ['company', 'warehouse', 'product', 'quantity', 'unrolled', 'updated_at']
+
+
+@admin.register(WarehouseTransfer)
+class WarehouseTransferAdmin(admin.ModelAdmin):
+    list_display = ['id', 'from_warehouse', 'to_warehouse', 'transfer_date', 'created_by']
+    list_filter = ['to_warehouse']
+    readonly_fields = ['company', 'from_warehouse', 'to_warehouse', 'transfer_date', 'created_by']
@@ -0,0 +1,10 @@
+# branch_warehouse/jobs.py
+from core.jobs import register
+
+
+@register('branch_warehouse.stock_rollup')
+def stock_rollup(payload):
+    """Fold a company's warehouse stock changes into Product.stock_qty (nothing to do when already folded)"""
+    from branch_warehouse.stock import rollup
+
+    rollup(payload['company_id'])
@@ -0,0 +1,98 @@
+# branch_warehouse/models.py
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+
+
+class Branch(models.Model):
+    company = models.ForeignKey('core.Company', on_delete=models.CASCADE, related_name='branches')
+    name = models.CharField(max_length=120)
+    code = models.CharField(max_length=20)
+    address = models.TextField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'code'], name='unique_company_branch_code')
+        ]
+        verbose_name_plural = "Branches"
+
+    def __str__(self):
+        return self.name
+
+
+class Warehouse(models.Model):
+    company = models.ForeignKey('core.Company', on_delete=models.CASCADE, related_name='warehouses')
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='warehouses')
+    name = models.CharField(max_length=120)
+    location = models.TextField(blank=True, null=True)
+    # Sales and purchases that name no warehouse use the company's default one
+    is_default = models.BooleanField(default=False)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company'], condition=Q(is_default=True), name='unique_company_default_warehouse'
+            )
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class WarehouseStock(models.Model):
+    """
+    Stock of one product in one warehouse (branch_warehouse.stock).
+    ``unrolled`` is the part of the quantity changes not yet added to
+    Product.stock_qty, the company total.
+    """
+    company = models.ForeignKey('core.Company', on_delete=models.CASCADE, related_name='warehouse_stock')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='stock')
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='warehouse_stock')
+    quantity = models.PositiveIntegerField(default=0)
+    unrolled = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['warehouse', 'product'], name='unique_warehouse_product_stock')
+        ]
+        indexes = [
+            models.Index(fields=['product']),
+            # Rows the rollup job still has to fold into Product.stock_qty
+            models.Index(fields=['company'], condition=~Q(unrolled=0), name='bw_stock_unrolled_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product} @ {self.warehouse}: {self.quantity}"
+
+
+class WarehouseTransfer(models.Model):
+    """Stock moved between two warehouses of a company, applied in one transaction"""
+    company = models.ForeignKey('core.Company', on_delete=models.CASCADE, related_name='warehouse_transfers')
+    # Empty: stock the company holds outside any warehouse (e.g. from before warehouses were set up)
+    from_warehouse = models.ForeignKey(
+        Warehouse, on_delete=models.PROTECT, related_name='transfers_out', null=True, blank=True
+    )
+    to_warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name='transfers_in')
+    transfer_date = models.DateTimeField(auto_now_add=True)
+    remark = models.TextField(blank=True, null=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        ordering = ['-transfer_date']
+        indexes = [
+            models.Index(fields=['company', 'transfer_date']),
+        ]
+
+    def __str__(self):
+        return f"Transfer #{self.pk}: {self.from_warehouse or 'Unassigned'} -> {self.to_warehouse}"
+
+
+class WarehouseTransferItem(models.Model):
+    transfer = models.ForeignKey(WarehouseTransfer, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey('products.Product', on_delete=models.PROTECT)
+    quantity = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.product} x {self.quantity}"
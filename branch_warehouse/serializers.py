@@ -1,11 +1,22 @@
 from rest_framework import serializers
-from .model import Branch, Warehouse
+from .models import Branch, Warehouse, WarehouseStock, WarehouseTransfer, WarehouseTransferItem
+from products.models import Product
 
 # Branch & Warehouse
 class BranchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Branch
-        fields = '__all__'
+        fields = ['id', 'name', 'code', 'address']
+
+    def validate_code(self, value):
+        request = self.context.get('request')
+        company = getattr(getattr(request, 'user', None), 'company', None)
+        duplicates = Branch.objects.filter(company=company, code=value)
+        if self.instance:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError('A branch with this code already exists.')
+        return value
 
 
 class WarehouseSerializer(serializers.ModelSerializer):
@@ -16,4 +27,74 @@ class WarehouseSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Warehouse
-        fields = ['id', 'name', 'location', 'branch', 'branch_id']
\ No newline at end of file
+        fields = ['id', 'name', 'location', 'branch', 'branch_id', 'is_default', 'is_active']
+
+    def validate_branch_id(self, value):
+        request = self.context.get('request')
+        if value.company_id != getattr(getattr(request, 'user', None), 'company_id', None):
+            raise serializers.ValidationError('Branch not found.')
+        return value
+
+
+# Warehouse stock
+class WarehouseStockSerializer(serializers.ModelSerializer):
+    warehouse_name = serializers.CharField(source='warehouse.name', read_only=True)
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    sku = serializers.CharField(source='product.sku', read_only=True)
+
+    class Meta:
+        model = WarehouseStock
+        fields = ['id', 'warehouse', 'warehouse_name', 'product', 'product_name', 'sku', 'quantity', 'updated_at']
+
+
+class WarehouseTransferItemSerializer(serializers.ModelSerializer):
+    product_id = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all(), source='product')
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    quantity = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = WarehouseTransferItem
+        fields = ['id', 'product_id', 'product_name', 'quantity']
+
+
+class WarehouseTransferSerializer(serializers.ModelSerializer):
+    from_warehouse_id = serializers.PrimaryKeyRelatedField(
+        queryset=Warehouse.objects.filter(is_active=True), source='from_warehouse', required=False, allow_null=True
+    )
+    to_warehouse_id = serializers.PrimaryKeyRelatedField(
+        queryset=Warehouse.objects.filter(is_active=True), source='to_warehouse'
+    )
+    from_warehouse_name = serializers.CharField(source='from_warehouse.name', read_only=True, allow_null=True)
+    to_warehouse_name = serializers.CharField(source='to_warehouse.name', read_only=True)
+    items = WarehouseTransferItemSerializer(many=True)
+
+    class Meta:
+        model = WarehouseTransfer
+        fields = [
+            'id', 'from_warehouse_id', 'from_warehouse_name', 'to_warehouse_id', 'to_warehouse_name',
+            'transfer_date', 'remark', 'items',
+        ]
+        read_only_fields = ['id', 'transfer_date']
+
+    def validate(self, attrs):
+        request = self.context.get('request')
+        company_id = getattr(getattr(request, 'user', None), 'company_id', None)
+        source, target = attrs.get('from_warehouse'), attrs['to_warehouse']
+
+        for field, warehouse in (('from_warehouse_id', source), ('to_warehouse_id', target)):
+            if warehouse and warehouse.company_id != company_id:
+                raise serializers.ValidationError({field: 'Warehouse not found.'})
+        if source and source.pk == target.pk:
+            raise serializers.ValidationError({'to_warehouse_id': 'Source and destination must differ.'})
+        if not attrs.get('items'):
+            raise serializers.ValidationError({'items': 'At least one item is required.'})
+        for number, item in enumerate(attrs['items'], start=1):
+            if item['product'].company_id != company_id:
+                raise serializers.ValidationError({'items': f'Item {number}: Product not found.'})
+        return attrs
+
+    def create(self, validated_data):
+        from .stock import apply_transfer
+
+        items = [WarehouseTransferItem(**item) for item in validated_data.pop('items')]
+        return apply_transfer(WarehouseTransfer(**validated_data), items)
@@ -0,0 +1,245 @@
+# branch_warehouse/stock.py
+"""
+Per-warehouse stock.
+
+``WarehouseStock`` holds each product's quantity per warehouse, and
+``Product.stock_qty`` stays the company total everything else reads. Sales
+and purchases that name a warehouse (or fall back to the company's default
+warehouse) lock and move only their (warehouse, product) rows, so branches
+selling the same SKU no longer queue on its product row:
+
+- sales change the warehouse quantity and record the change in
+  ``unrolled``; rollup() folds the unrolled changes of a company into
+  stock_qty after the sale commits (job ``branch_warehouse.stock_rollup``,
+  coalesced per company while pending)
+- purchases still update stock_qty and the moving-average cost in their own
+  transaction (they are rare next to sales) and add to the warehouse row
+  already rolled up
+- transfers move stock between two warehouses of a company, or into a
+  warehouse from the stock held outside any warehouse; the total does not
+  change, so nothing is rolled up
+- a company's first default warehouse is seeded with all the stock held
+  outside warehouses (seed_default), so the sales it starts taking do not
+  find it empty
+
+Warehouse rows hold whole units like stock_qty: fractional changes
+(0.5 KG sold) are rounded as stock_qty stores them (stock_units).
+
+Stock outside any warehouse is stock_qty minus the rolled-up part of the
+warehouse rows (quantity - unrolled). Returns, bad stock and manual stock
+edits move stock_qty only, i.e. that unassigned stock. They do not check
+it, so they can take stock_qty below the sales still waiting to be rolled
+up; rollup() then stops stock_qty at zero and logs the drift (left for the
+``products.stock_qty`` audit) rather than failing the job.
+"""
+import logging
+import math
+
+from django.core.exceptions import ValidationError
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from core.db import serialized_write
+from core.jobs import enqueue
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_JOB = 'branch_warehouse.stock_rollup'
+CHUNK = 250
+
+
+def stock_units(quantity):
+    """
+    Whole units moved by a stock change of ``quantity``, as PositiveIntegerField
+    stock_qty stores ``stock_qty - quantity``: a fraction going out takes a whole
+    unit, a fraction coming back is dropped
+    """
+    return math.floor(quantity)
+
+
+def default_warehouse_id(company_id):
+    """The company's active default warehouse, if it has one"""
+    from branch_warehouse.models import Warehouse
+
+    if company_id is None:
+        return None
+    return Warehouse.objects.filter(
+        company_id=company_id, is_default=True, is_active=True
+    ).values_list('pk', flat=True).first()
+
+
+def _shortage(warehouse_id, short):
+    from branch_warehouse.models import Warehouse
+    from products.models import Product
+
+    names = dict(Product.objects.filter(pk__in=list(short)).values_list('pk', 'name'))
+    warehouse = Warehouse.objects.filter(pk=warehouse_id).values_list('name', flat=True).first() if warehouse_id else None
+    lines = [f"{names.get(pk, pk)} (available {available}, requested {requested})" for pk, (available, requested) in short.items()]
+    where = f"in {warehouse}" if warehouse else "outside warehouses"
+    return ValidationError(f"Not enough stock {where}: {', '.join(lines)}")
+
+
+def move(company_id, warehouse_id, deltas, rollup=True):
+    """
+    Add {product_id: quantity} to one warehouse (negative quantities take
+    stock out); raises ValidationError, writing nothing, when a row would
+    go below zero. With ``rollup`` the change is also owed to
+    Product.stock_qty and a rollup is scheduled; without it the caller has
+    already moved stock_qty or the company total does not change.
+    """
+    from branch_warehouse.models import WarehouseStock
+
+    deltas = {pk: stock_units(quantity) for pk, quantity in deltas.items()}
+    deltas = {pk: quantity for pk, quantity in deltas.items() if quantity}
+    if not deltas:
+        return
+
+    rows = {
+        product_id: (pk, quantity)
+        for pk, product_id, quantity in WarehouseStock.objects.select_for_update()
+        .filter(warehouse_id=warehouse_id, product_id__in=list(deltas))
+        .values_list('pk', 'product_id', 'quantity')
+    }
+    short = {
+        pk: (rows.get(pk, (None, 0))[1], -delta)
+        for pk, delta in deltas.items() if delta < 0 and rows.get(pk, (None, 0))[1] + delta < 0
+    }
+    if short:
+        raise _shortage(warehouse_id, short)
+
+    changes = [(rows[pk][0], delta) for pk, delta in deltas.items() if pk in rows]
+    for start in range(0, len(changes), CHUNK):
+        chunk = changes[start:start + CHUNK]
+        delta = Case(
+            *(When(pk=pk, then=Value(quantity)) for pk, quantity in chunk),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        update = {'quantity': F('quantity') + delta}
+        if rollup:
+            update['unrolled'] = F('unrolled') + delta
+        WarehouseStock.objects.filter(pk__in=[pk for pk, _ in chunk]).update(**update)
+
+    WarehouseStock.objects.bulk_create([
+        WarehouseStock(
+            company_id=company_id, warehouse_id=warehouse_id, product_id=pk,
+            quantity=delta, unrolled=delta if rollup else 0,
+        )
+        for pk, delta in deltas.items() if pk not in rows
+    ])
+
+    if rollup:
+        enqueue(ROLLUP_JOB, {'company_id': company_id}, company_id=company_id, dedup_key=f'stock-rollup:{company_id}')
+
+
+def unassigned(company_id, product_ids):
+    """{product_id: stock held outside any warehouse}, products locked"""
+    from branch_warehouse.models import WarehouseStock
+    from products.models import Product
+
+    stock = dict(
+        Product.objects.select_for_update().filter(company_id=company_id, pk__in=list(product_ids))
+        .values_list('pk', 'stock_qty')
+    )
+    placed = dict(
+        WarehouseStock.objects.filter(company_id=company_id, product_id__in=list(stock))
+        .values('product_id').annotate(rolled=Sum(F('quantity') - F('unrolled')))
+        .values_list('product_id', 'rolled')
+    )
+    return {pk: qty - (placed.get(pk) or 0) for pk, qty in stock.items()}
+
+
+def apply_transfer(transfer, items):
+    """Write ``transfer`` and its (unsaved) items and move their stock, all or nothing"""
+    from branch_warehouse.models import WarehouseTransferItem
+
+    quantities = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+
+    with serialized_write():
+        if transfer.from_warehouse_id:
+            move(transfer.company_id, transfer.from_warehouse_id, {pk: -qty for pk, qty in quantities.items()}, rollup=False)
+        else:
+            available = unassigned(transfer.company_id, quantities)
+            short = {pk: (available.get(pk, 0), qty) for pk, qty in quantities.items() if available.get(pk, 0) < qty}
+            if short:
+                raise _shortage(None, short)
+        move(transfer.company_id, transfer.to_warehouse_id, quantities, rollup=False)
+
+        transfer.save()
+        for item in items:
+            item.transfer = transfer
+        WarehouseTransferItem.objects.bulk_create(items)
+    return transfer
+
+
+def seed_default(warehouse, user=None):
+    """
+    Move all stock held outside warehouses into ``warehouse`` (a company's
+    first default) with one recorded transfer; None when there is none
+    """
+    from branch_warehouse.models import WarehouseTransfer, WarehouseTransferItem
+    from products.models import Product
+
+    with serialized_write():
+        product_ids = Product.objects.filter(company_id=warehouse.company_id, stock_qty__gt=0).values_list('pk', flat=True)
+        items = [
+            WarehouseTransferItem(product_id=pk, quantity=quantity)
+            for pk, quantity in unassigned(warehouse.company_id, product_ids).items() if quantity > 0
+        ]
+        if not items:
+            return None
+        transfer = WarehouseTransfer(
+            company_id=warehouse.company_id, from_warehouse=None, to_warehouse=warehouse, created_by=user,
+            remark='Stock held outside warehouses, moved into the first default warehouse',
+        )
+        apply_transfer(transfer, items)
+    logger.info(f"Seeded default warehouse {warehouse.pk} with {len(items)} product(s) for company {warehouse.company_id}")
+    return transfer
+
+
+def rollup(company_id):
+    """Fold the company's unrolled warehouse changes into Product.stock_qty; returns the products updated"""
+    from branch_warehouse.models import WarehouseStock
+    from products.models import Product
+
+    with serialized_write():
+        rows = list(
+            WarehouseStock.objects.select_for_update().filter(company_id=company_id).exclude(unrolled=0)
+            .values_list('pk', 'product_id', 'unrolled')
+        )
+        if not rows:
+            return 0
+
+        totals = {}
+        for _, product_id, unrolled in rows:
+            totals[product_id] = totals.get(product_id, 0) + unrolled
+
+        # stock_qty cannot go below zero (CHECK): the warehouse rows already
+        # moved, so the total stops at zero instead of failing every retry
+        stock = dict(
+            Product.objects.select_for_update().filter(pk__in=[pk for pk, delta in totals.items() if delta < 0])
+            .values_list('pk', 'stock_qty')
+        )
+        drift = {pk: stock[pk] + totals[pk] for pk in stock if stock[pk] + totals[pk] < 0}
+        if drift:
+            logger.warning(
+                f"Warehouse rollup for company {company_id} would take stock_qty below zero; "
+                f"stopped at zero, shortfall by product: {drift}"
+            )
+            for pk in drift:
+                totals[pk] = -stock[pk]
+        updated = Product.objects.add_stock(totals)
+
+        for start in range(0, len(rows), CHUNK):
+            chunk = rows[start:start + CHUNK]
+            # Subtract what was folded in rather than zeroing, like add_stock adds deltas
+            WarehouseStock.objects.filter(pk__in=[pk for pk, _, _ in chunk]).update(
+                unrolled=F('unrolled') - Case(
+                    *(When(pk=pk, then=Value(unrolled)) for pk, _, unrolled in chunk),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+    logger.info(f"Rolled up warehouse stock of {updated} product(s) for company {company_id}")
+    return updated
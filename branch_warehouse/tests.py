@@ -0,0 +1,71 @@
+# branch_warehouse/tests.py
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Account
+from core.models import Company, User
+from products.models import Product
+from returns.models import PurchaseReturn, PurchaseReturnItem
+from sales.sync import CREATED, SaleSync
+from transactions.models import Transaction
+
+from . import stock
+from .models import Branch, Warehouse, WarehouseStock
+
+
+class StockRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Warehouse Co')
+        cls.user = User.objects.create_user(username='keeper', password='x', company=cls.company)
+        cls.account = Account.objects.create(company=cls.company, name='Cash')
+        Transaction.objects.create(
+            company=cls.company, account=cls.account, transaction_type='credit',
+            amount=Decimal('100.00'), status='completed',
+        )
+        cls.product = Product.objects.create(company=cls.company, name='Rice', stock_qty=10)
+        branch = Branch.objects.create(company=cls.company, name='Main', code='MAIN')
+        cls.warehouse = Warehouse.objects.create(company=cls.company, branch=branch, name='Main store', is_default=True)
+        stock.seed_default(cls.warehouse)
+
+    def sell(self, quantity):
+        # The rollup job is scheduled on commit, which a TestCase never reaches
+        [result] = SaleSync(self.user).run([
+            {'key': f'sale-{quantity}', 'items': [{'product_id': self.product.pk, 'quantity': quantity}]},
+        ])
+        self.assertEqual(result['status'], CREATED)
+
+    def return_to_supplier(self, quantity):
+        ret = PurchaseReturn.objects.create(
+            company=self.company, account=self.account, return_date=timezone.localdate(), return_amount=Decimal('5.00'),
+        )
+        PurchaseReturnItem.objects.create(purchase_return=ret, product=self.product, quantity=quantity, unit_price=Decimal('1.00'))
+        ret.approve()
+
+    def state(self):
+        self.product.refresh_from_db(fields=['stock_qty'])
+        row = WarehouseStock.objects.get(warehouse=self.warehouse, product=self.product)
+        return self.product.stock_qty, row.quantity, row.unrolled
+
+    def test_rollup_folds_warehouse_sales_into_stock_qty(self):
+        self.sell(4)
+        self.assertEqual(self.state(), (10, 6, -4))
+
+        self.assertEqual(stock.rollup(self.company.pk), 1)
+        self.assertEqual(self.state(), (6, 6, 0))
+
+    def test_rollup_stops_at_zero_after_a_purchase_return(self):
+        self.sell(8)
+        # Takes stock_qty down directly, below the 8 units waiting to be rolled up
+        self.return_to_supplier(5)
+        self.assertEqual(self.state(), (5, 2, -8))
+
+        with self.assertLogs('branch_warehouse.stock', 'WARNING') as logs:
+            stock.rollup(self.company.pk)
+
+        self.assertIn(f'{self.product.pk}: -3', logs.output[0])
+        self.assertEqual(self.state(), (0, 2, 0))
+        # Nothing is left to roll up, so the job does not keep failing
+        self.assertEqual(stock.rollup(self.company.pk), 0)
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BranchViewSet, WarehouseViewSet
+from .views import BranchViewSet, WarehouseViewSet, WarehouseStockViewSet, WarehouseTransferViewSet
 
 router = DefaultRouter()
 router.register(r'branches', BranchViewSet)
 router.register(r'warehouses', WarehouseViewSet)
+router.register(r'warehouse-stock', WarehouseStockViewSet)
+router.register(r'warehouse-transfers', WarehouseTransferViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
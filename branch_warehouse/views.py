@@ -1,13 +1,23 @@
-from rest_framework import viewsets, filters
+import logging
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import viewsets, filters, mixins, serializers, status
 from rest_framework.permissions import IsAuthenticated
-from .model import Branch, Warehouse
+
+from core.base_viewsets import BaseCompanyViewSet
+from core.db import serialized_write
+from core.pagination import CustomPageNumberPagination
+from core.utils import custom_response
+from . import stock as warehouse_stock
+from .models import Branch, Warehouse, WarehouseStock, WarehouseTransfer
 from .serializers import (
-    BranchSerializer, WarehouseSerializer
-   
+    BranchSerializer, WarehouseSerializer, WarehouseStockSerializer, WarehouseTransferSerializer
 )
 
+logger = logging.getLogger(__name__)
+
 # Branch & Warehouse
-class BranchViewSet(viewsets.ModelViewSet):
+class BranchViewSet(BaseCompanyViewSet):
     queryset = Branch.objects.all()
     serializer_class = BranchSerializer
     permission_classes = [IsAuthenticated]
@@ -15,8 +25,16 @@ class BranchViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'code', 'address']
     ordering_fields = ['name', 'code']
 
+    def perform_create(self, serializer):
+        company = self.request.user.company
+        if company is None:
+            raise serializers.ValidationError("User does not have an associated company")
+        if Branch.objects.filter(company=company).count() >= company.max_branches:
+            raise serializers.ValidationError(f"Branch limit reached ({company.max_branches})")
+        serializer.save(company=company)
+
 
-class WarehouseViewSet(viewsets.ModelViewSet):
+class WarehouseViewSet(BaseCompanyViewSet):
     queryset = Warehouse.objects.select_related('branch').all()
     serializer_class = WarehouseSerializer
     permission_classes = [IsAuthenticated]
@@ -24,3 +42,80 @@ class WarehouseViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'location', 'branch__name']
     ordering_fields = ['name']
 
+    def perform_create(self, serializer):
+        company = self.request.user.company
+        if company is None:
+            raise serializers.ValidationError("User does not have an associated company")
+        self._save_default(serializer, company=company)
+
+    def perform_update(self, serializer):
+        self._save_default(serializer)
+
+    def _save_default(self, serializer, **kwargs):
+        # One default warehouse per company: setting a new one clears the old
+        if not serializer.validated_data.get('is_default'):
+            serializer.save(**kwargs)
+            return
+        with serialized_write():
+            defaults = Warehouse.objects.filter(company=self.request.user.company, is_default=True)
+            first = not defaults.exists()
+            defaults.update(is_default=False)
+            warehouse = serializer.save(**kwargs)
+            # Sales switch to the default's rows: give it the stock they used to take
+            if first and warehouse.is_active:
+                warehouse_stock.seed_default(warehouse, user=self.request.user)
+
+
+# Warehouse stock
+class WarehouseStockViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Quantities per warehouse and product; ?warehouse= and ?product= filter"""
+    queryset = WarehouseStock.objects.select_related('warehouse', 'product').order_by('warehouse_id', 'product_id')
+    serializer_class = WarehouseStockSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CustomPageNumberPagination
+
+    def get_queryset(self):
+        company = getattr(self.request.user, 'company', None)
+        if company is None:
+            return WarehouseStock.objects.none()
+        queryset = super().get_queryset().filter(company=company)
+        for param in ('warehouse', 'product'):
+            value = self.request.query_params.get(param)
+            if value and value.isdigit():
+                queryset = queryset.filter(**{f'{param}_id': value})
+        return queryset
+
+
+class WarehouseTransferViewSet(BaseCompanyViewSet):
+    """Stock transfers between warehouses; applied when created, so they are not edited or deleted"""
+    queryset = WarehouseTransfer.objects.select_related('from_warehouse', 'to_warehouse').prefetch_related('items__product')
+    serializer_class = WarehouseTransferSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CustomPageNumberPagination
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+            transfer = serializer.save(company=request.user.company, created_by=request.user)
+            return custom_response(
+                success=True,
+                message="Stock transferred successfully",
+                data=self.get_serializer(transfer).data,
+                status_code=status.HTTP_201_CREATED
+            )
+        except serializers.ValidationError as e:
+            return custom_response(
+                success=False,
+                message="Validation Error",
+                data=e.detail,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        except DjangoValidationError as e:
+            return custom_response(
+                success=False,
+                message=" ".join(e.messages),
+                data=None,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
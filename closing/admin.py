@@ -0,0 +1,42 @@
+# closing/admin.py
+from django.contrib import admin
+from .models import AccountSnapshot, CustomerSnapshot, PeriodClose, StockSnapshot, SupplierSnapshot
+
+
+@admin.register(PeriodClose)
+class PeriodCloseAdmin(admin.ModelAdmin):
+    list_display = ['company', 'closed_through', 'created_by', 'created_at']
+    list_filter = ['closed_through']
+    # Written by closing.snapshots only (manage.py close_period)
+    readonly_fields = ['company', 'closed_through', 'cutoff', 'created_by', 'created_at']
+
+
+@admin.register(CustomerSnapshot)
+class CustomerSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['customer', 'period_close', 'sales_count', 'sales_total', 'sales_paid',
+                    'receipts_total', 'advance_receipts_total']
+    list_select_related = ['customer', 'period_close__company']
+    readonly_fields = list_display
+
+
+@admin.register(SupplierSnapshot)
+class SupplierSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['supplier', 'period_close', 'purchases_count', 'purchases_total', 'purchases_paid',
+                    'payments_total']
+    list_select_related = ['supplier', 'period_close__company']
+    readonly_fields = list_display
+
+
+@admin.register(AccountSnapshot)
+class AccountSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['account', 'period_close', 'credit_total', 'debit_total',
+                    'opening_credit_total', 'opening_debit_total']
+    list_select_related = ['account__company', 'period_close__company']
+    readonly_fields = list_display
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['product', 'period_close', 'quantity', 'unit_cost', 'value']
+    list_select_related = ['product', 'period_close__company']
+    readonly_fields = list_display
@@ -0,0 +1,10 @@
+# closing/apps.py
+from django.apps import AppConfig
+
+
+class ClosingConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'closing'
+
+    def ready(self):
+        import closing.signals
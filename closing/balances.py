@@ -0,0 +1,98 @@
+# closing/balances.py
+"""
+Reading balances as "latest snapshot + rows after the close".
+
+For one company, in Python:
+
+    close = latest_close(company)
+    snapshot = snapshot_for(close, CustomerSnapshot, customer=customer)
+    sales = after_close(Sale.objects.filter(customer=customer), close, 'sale_date', 'sale')
+
+``after_close()`` keeps the rows dated after the close plus the documents
+the close left open; without a close it returns the queryset unchanged, so
+callers need no special case. Ledgers pass ``before=start`` to pick the
+newest close that ends before their range.
+
+Audit invariants and other annotated queries work on every company at
+once and use the correlated forms: ``uncovered()`` is the same filter as a
+Q against each row's own company, ``snapshot_value()`` reads the outer
+party's row in its company's latest snapshot.
+"""
+from django.db.models import DateTimeField, Exists, F, OuterRef, Q, Subquery
+
+from .models import OpenDocument, PeriodClose
+
+
+def latest_close(company, before=None):
+    """Newest PeriodClose of ``company`` (ending before the day ``before`` when given); None without one"""
+    closes = PeriodClose.objects.filter(company=company)
+    if before is not None:
+        closes = closes.filter(closed_through__lt=before)
+    return closes.order_by('-closed_through').first()
+
+
+def snapshot_for(close, snapshot_model, **party):
+    """The party's snapshot row in ``close`` (e.g. ``customer=customer``); None when it had no activity"""
+    if close is None:
+        return None
+    return snapshot_model.objects.filter(period_close=close, **party).first()
+
+
+def _is_datetime(model, path):
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        model = field.related_model
+    return isinstance(field, DateTimeField)
+
+
+def _after(model, date_field, cutoff, closed_through):
+    if _is_datetime(model, date_field):
+        return Q(**{f'{date_field}__gte': cutoff})
+    return Q(**{f'{date_field}__gt': closed_through})
+
+
+def after_close(queryset, close, date_field, open_type=None, document_field='pk'):
+    """
+    Rows of ``queryset`` the snapshots of ``close`` do not cover: dated after
+    it, or (with ``open_type``) documents it left open, matched on ``document_field``
+    """
+    if close is None:
+        return queryset
+    covered = _after(queryset.model, date_field, close.cutoff, close.closed_through)
+    if open_type:
+        covered |= Q(**{f'{document_field}__in': close.open_documents.filter(
+            document_type=open_type
+        ).values('document_id')})
+    return queryset.filter(covered)
+
+
+# --------------------------
+# Correlated forms
+# --------------------------
+def uncovered(model, date_field, company_field='company', open_type=None, document_field='pk'):
+    """
+    Q for rows of ``model`` not covered by the latest close of their own
+    company (reached through ``company_field``); every row when it has none
+    """
+    closes = PeriodClose.objects.filter(company=OuterRef(company_field)).order_by('-closed_through')
+    bound = 'cutoff' if _is_datetime(model, date_field) else 'closed_through'
+    lookup = 'gte' if bound == 'cutoff' else 'gt'
+    q = ~Exists(closes) | Q(**{f'{date_field}__{lookup}': Subquery(closes.values(bound)[:1])})
+    if open_type:
+        newest = PeriodClose.objects.filter(company=OuterRef(OuterRef(company_field))).order_by('-closed_through')
+        q |= Exists(OpenDocument.objects.filter(
+            period_close=Subquery(newest.values('pk')[:1]),
+            document_type=open_type,
+            document_id=OuterRef(document_field),
+        ))
+    return q
+
+
+def snapshot_value(snapshot_model, party_field, value, output_field):
+    """``value`` (field or expression) from the outer party's row in its company's latest snapshot, NULL without one"""
+    closes = PeriodClose.objects.filter(company=OuterRef(OuterRef('company'))).order_by('-closed_through')
+    rows = snapshot_model.objects.filter(
+        period_close=Subquery(closes.values('pk')[:1]), **{party_field: OuterRef('pk')}
+    )
+    rows = rows.annotate(snapshot=F(value) if isinstance(value, str) else value)
+    return Subquery(rows.values('snapshot')[:1], output_field=output_field)
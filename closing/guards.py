@@ -0,0 +1,124 @@
+# closing/guards.py
+"""
+Keeping closed periods closed.
+
+The snapshots of a close hold the totals of everything dated through
+``closed_through``, so a document added, changed or deleted inside that
+period afterwards would silently disagree with them. The signals in
+``closing.signals`` reject those writes with a ``ValidationError``:
+
+- documents (sales, purchases, receipts, supplier payments, transactions,
+  returns) dated on or before the company's latest close cannot be
+  created, edited, moved out of the period or deleted
+- documents the close left open (``OpenDocument``) can still be edited,
+  which is how they get paid or completed
+- lines follow the date of their document, open or not: the stock
+  snapshot counts every line through the close
+
+Queryset ``update()``, ``bulk_create()`` and ``_raw_delete()`` (the
+archiver) bypass signals; callers writing dated rows that way check
+``covers()`` themselves, as POS sync does for ``sale_date``.
+"""
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .balances import latest_close
+
+# label: (date field, OpenDocument type the close may leave it as)
+DOCUMENTS = {
+    'sales.Sale': ('sale_date', 'sale'),
+    'purchases.Purchase': ('purchase_date', 'purchase'),
+    'money_receipts.MoneyReceipt': ('payment_date', None),
+    'supplier_payment.SupplierPayment': ('payment_date', None),
+    'transactions.Transaction': ('transaction_date', 'transaction'),
+    'returns.SalesReturn': ('return_date', None),
+    'returns.PurchaseReturn': ('return_date', None),
+}
+
+# label: document field of the line
+LINES = {
+    'sales.SaleItem': 'sale',
+    'purchases.PurchaseItem': 'purchase',
+    'returns.SalesReturnItem': 'sales_return',
+    'returns.PurchaseReturnItem': 'purchase_return',
+}
+
+
+def covers(close, value):
+    """Whether ``close`` covers a row dated ``value`` (a date or a datetime)"""
+    if close is None or value is None:
+        return False
+    if isinstance(value, datetime):
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value < close.cutoff
+    return value <= close.closed_through
+
+
+def ensure_open(company, value, close=None):
+    """Raise ValidationError when ``value`` falls inside ``company``'s latest close"""
+    close = close or latest_close(company)
+    if covers(close, value):
+        raise ValidationError(closed_message(close))
+
+
+def is_open_document(close, open_type, pk):
+    return bool(open_type) and close.open_documents.filter(document_type=open_type, document_id=pk).exists()
+
+
+def closed_message(close):
+    return (
+        f'The books are closed through {close.closed_through}; documents dated '
+        f'on or before it cannot be added, changed or deleted'
+    )
+
+
+# --------------------------
+# Checks run by the signals
+# --------------------------
+def _document_close(document):
+    """
+    latest_close() of the document's company, remembered on the instance:
+    a document is saved several times per request and each of its lines asks too
+    """
+    remembered = document.__dict__.get('_period_close')
+    if remembered is None or remembered[0] != document.company_id:
+        close = latest_close(document.company_id) if document.company_id else None
+        remembered = document._period_close = (document.company_id, close)
+    return remembered[1]
+
+
+def check_document_save(instance):
+    date_field, open_type = DOCUMENTS[instance._meta.label]
+    close = _document_close(instance)
+    if close is None:
+        return
+
+    stored = None
+    if instance.pk is not None:
+        stored = type(instance)._base_manager.filter(pk=instance.pk).values_list(date_field, flat=True).first()
+    if not (covers(close, getattr(instance, date_field)) or covers(close, stored)):
+        return
+    # New documents have no OpenDocument row; existing ones may have been left open
+    if instance.pk is not None and stored is not None and is_open_document(close, open_type, instance.pk):
+        return
+    raise ValidationError(closed_message(close))
+
+
+def check_document_delete(instance):
+    date_field, open_type = DOCUMENTS[instance._meta.label]
+    close = _document_close(instance)
+    if covers(close, getattr(instance, date_field)) and not is_open_document(close, open_type, instance.pk):
+        raise ValidationError(closed_message(close))
+
+
+def check_line(instance):
+    document = getattr(instance, LINES[instance._meta.label], None)
+    if document is None or not document.company_id:
+        return
+    date_field, _ = DOCUMENTS[document._meta.label]
+    close = _document_close(document)
+    if covers(close, getattr(document, date_field)):
+        raise ValidationError(closed_message(close))
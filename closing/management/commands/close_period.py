@@ -0,0 +1,56 @@
+# closing/management/commands/close_period.py
+from datetime import date, timedelta
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import Company
+
+
+class Command(BaseCommand):
+    help = (
+        'Close the books through a date: snapshot closing totals per customer, supplier and account '
+        'and stock per product, so balances and ledgers only read the rows after the close. '
+        'Without --through each company is closed through the end of its last finished fiscal year '
+        '(companies already closed that far are skipped).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=str, help='Company id or code (default: all companies)')
+        parser.add_argument('--through', type=date.fromisoformat, help='Last day to close, YYYY-MM-DD')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be snapshotted without writing')
+
+    def handle(self, *args, **options):
+        from closing.balances import latest_close
+        from closing.snapshots import close_period
+
+        verb = 'Would close' if options['dry_run'] else 'Closed'
+        for company in self._get_companies(options['company']):
+            through = options['through']
+            if through is None:
+                start, _ = company.fiscal_year_bounds(company.fiscal_year_of(timezone.localdate()))
+                through = start - timedelta(days=1)
+                previous = latest_close(company)
+                if previous and previous.closed_through >= through:
+                    self.stdout.write(f'{company.name}: already closed through {previous.closed_through}')
+                    continue
+            try:
+                close = close_period(company, through, dry_run=options['dry_run'])
+            except ValidationError as e:
+                raise CommandError(f'{company.name}: {" ".join(e.messages)}')
+            self.stdout.write(
+                f'{company.name} through {through}: {verb.lower()} '
+                + ', '.join(f'{value} {name.replace("_", " ")}' for name, value in close.counts.items())
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'{verb} periods'))
+
+    def _get_companies(self, value):
+        if value:
+            lookup = {'pk': int(value)} if value.isdigit() else {'company_code': value}
+            try:
+                return [Company.objects.get(**lookup)]
+            except Company.DoesNotExist:
+                raise CommandError(f'Company {value} not found')
+        return Company.objects.order_by('id')
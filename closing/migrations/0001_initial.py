@@ -0,0 +1,117 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('core', '0009_idempotencykey'),
+        ('customers', '0002_customer_company_active_index'),
+        ('products', '0003_stockbatch'),
+        ('suppliers', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodClose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('closed_through', models.DateField(help_text='Last day of the closed period')),
+                ('cutoff', models.DateTimeField(help_text='Start of the first open day; datetime-stamped rows from here on are live')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_closes', to='core.company')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['company', '-closed_through'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OpenDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_type', models.CharField(choices=[('sale', 'Sale'), ('purchase', 'Purchase'), ('transaction', 'Transaction')], max_length=20)),
+                ('document_id', models.BigIntegerField()),
+                ('period_close', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='open_documents', to='closing.periodclose')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CustomerSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sales_count', models.PositiveIntegerField(default=0)),
+                ('sales_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('sales_paid', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('receipts_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('advance_receipts_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='customers.customer')),
+                ('period_close', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customer_snapshots', to='closing.periodclose')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AccountSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('credit_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('debit_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('opening_credit_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('opening_debit_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.account')),
+                ('period_close', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='account_snapshots', to='closing.periodclose')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=3, default=0, max_digits=15)),
+                ('unit_cost', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('period_close', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='closing.periodclose')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SupplierSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purchases_count', models.PositiveIntegerField(default=0)),
+                ('purchases_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('purchases_paid', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('payments_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('period_close', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='supplier_snapshots', to='closing.periodclose')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='suppliers.supplier')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='periodclose',
+            constraint=models.UniqueConstraint(fields=('company', 'closed_through'), name='closing_company_date_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='opendocument',
+            constraint=models.UniqueConstraint(fields=('period_close', 'document_type', 'document_id'), name='closing_open_document_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='customersnapshot',
+            constraint=models.UniqueConstraint(fields=('period_close', 'customer'), name='closing_customer_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='accountsnapshot',
+            constraint=models.UniqueConstraint(fields=('period_close', 'account'), name='closing_account_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('period_close', 'product'), name='closing_product_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='suppliersnapshot',
+            constraint=models.UniqueConstraint(fields=('period_close', 'supplier'), name='closing_supplier_unique'),
+        ),
+    ]
@@ -0,0 +1,132 @@
+# closing/models.py
+"""
+Period closes and the balance snapshots they leave.
+
+A ``PeriodClose`` freezes a company's books through ``closed_through``: one
+snapshot row per customer, supplier, account and product holds the totals
+of everything dated up to that day. Balances are then the latest snapshot
+plus the rows after the close (``closing.balances``). Sales, purchases and
+transactions that were still open at the close (something due, or a
+pending transaction) are left out of the snapshot and listed as
+``OpenDocument`` rows, so later payments and status changes still count.
+"""
+from django.conf import settings
+from django.db import models
+
+MONEY = {'max_digits': 16, 'decimal_places': 2, 'default': 0}
+
+
+class PeriodClose(models.Model):
+    company = models.ForeignKey('core.Company', on_delete=models.CASCADE, related_name='period_closes')
+    closed_through = models.DateField(help_text='Last day of the closed period')
+    cutoff = models.DateTimeField(help_text='Start of the first open day; datetime-stamped rows from here on are live')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['company', '-closed_through']
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'closed_through'], name='closing_company_date_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.company} closed through {self.closed_through}'
+
+
+class CustomerSnapshot(models.Model):
+    """Settled sales and all money receipts of one customer through the close"""
+    period_close = models.ForeignKey(PeriodClose, on_delete=models.CASCADE, related_name='customer_snapshots')
+    customer = models.ForeignKey('customers.Customer', on_delete=models.CASCADE, related_name='+')
+    sales_count = models.PositiveIntegerField(default=0)
+    sales_total = models.DecimalField(**MONEY)
+    sales_paid = models.DecimalField(**MONEY)
+    receipts_total = models.DecimalField(**MONEY)
+    advance_receipts_total = models.DecimalField(**MONEY)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period_close', 'customer'], name='closing_customer_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.customer} @ {self.period_close.closed_through}'
+
+
+class SupplierSnapshot(models.Model):
+    """Settled purchases and supplier payments of one supplier through the close"""
+    period_close = models.ForeignKey(PeriodClose, on_delete=models.CASCADE, related_name='supplier_snapshots')
+    supplier = models.ForeignKey('suppliers.Supplier', on_delete=models.CASCADE, related_name='+')
+    purchases_count = models.PositiveIntegerField(default=0)
+    purchases_total = models.DecimalField(**MONEY)
+    purchases_paid = models.DecimalField(**MONEY)
+    payments_total = models.DecimalField(**MONEY)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period_close', 'supplier'], name='closing_supplier_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.supplier} @ {self.period_close.closed_through}'
+
+
+class AccountSnapshot(models.Model):
+    """Completed transactions of one account through the close"""
+    period_close = models.ForeignKey(PeriodClose, on_delete=models.CASCADE, related_name='account_snapshots')
+    account = models.ForeignKey('accounts.Account', on_delete=models.CASCADE, related_name='+')
+    credit_total = models.DecimalField(**MONEY)
+    debit_total = models.DecimalField(**MONEY)
+    opening_credit_total = models.DecimalField(**MONEY)
+    opening_debit_total = models.DecimalField(**MONEY)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period_close', 'account'], name='closing_account_unique'),
+        ]
+
+    @property
+    def balance(self):
+        return (self.credit_total + self.opening_credit_total) - (self.debit_total + self.opening_debit_total)
+
+    def __str__(self):
+        return f'{self.account} @ {self.period_close.closed_through}: {self.balance}'
+
+
+class StockSnapshot(models.Model):
+    """Stock of one product at the close: opening stock plus stock-moving lines through that day"""
+    period_close = models.ForeignKey(PeriodClose, on_delete=models.CASCADE, related_name='stock_snapshots')
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='+')
+    quantity = models.DecimalField(max_digits=15, decimal_places=3, default=0)
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    value = models.DecimalField(**MONEY)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period_close', 'product'], name='closing_product_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.product} @ {self.period_close.closed_through}: {self.quantity}'
+
+
+class OpenDocument(models.Model):
+    """A document dated inside the closed period that the snapshots leave to the live rows"""
+    TYPE_CHOICES = [
+        ('sale', 'Sale'),
+        ('purchase', 'Purchase'),
+        ('transaction', 'Transaction'),
+    ]
+
+    period_close = models.ForeignKey(PeriodClose, on_delete=models.CASCADE, related_name='open_documents')
+    document_type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    document_id = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period_close', 'document_type', 'document_id'], name='closing_open_document_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.document_type} #{self.document_id} open at {self.period_close.closed_through}'
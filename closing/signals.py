@@ -0,0 +1,45 @@
+# closing/signals.py
+"""
+Rejects writes into a closed period (``closing.guards``). Deleting a whole
+company is let through: its closes go with it.
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import pre_delete, pre_save
+
+from core.models import Company
+
+from .guards import DOCUMENTS, LINES, check_document_delete, check_document_save, check_line
+
+
+def _deleting_company(origin):
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Company
+
+
+def guard_document_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        check_document_save(instance)
+
+
+def guard_document_delete(sender, instance, origin=None, **kwargs):
+    if not _deleting_company(origin):
+        check_document_delete(instance)
+
+
+def guard_line_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        check_line(instance)
+
+
+def guard_line_delete(sender, instance, origin=None, **kwargs):
+    if not _deleting_company(origin):
+        check_line(instance)
+
+
+for label in DOCUMENTS:
+    pre_save.connect(guard_document_save, sender=label, dispatch_uid=f'closing-save:{label}')
+    pre_delete.connect(guard_document_delete, sender=label, dispatch_uid=f'closing-delete:{label}')
+
+for label in LINES:
+    pre_save.connect(guard_line_save, sender=label, dispatch_uid=f'closing-save:{label}')
+    pre_delete.connect(guard_line_delete, sender=label, dispatch_uid=f'closing-delete:{label}')
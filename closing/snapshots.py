@@ -0,0 +1,244 @@
+# closing/snapshots.py
+"""
+Closing a period: one snapshot row per party with its totals through the
+close date.
+
+A close is incremental. It starts from the previous close's snapshots and
+only reads the rows between the two closes plus the documents the previous
+close left open, so closing a year costs one year of rows however long the
+history is. Rows already moved to the archive (``archive``) are read from
+there.
+
+What goes into the snapshot:
+
+- customers: settled sales (nothing due) and every money receipt
+- suppliers: settled purchases and supplier payments
+- accounts: completed transactions, split into regular and opening balance
+- products: opening stock plus every stock-moving line through the close
+  (the formula of the ``products.stock_qty`` audit), valued at the current
+  average cost
+
+Sales and purchases with something still due, and pending transactions,
+become ``OpenDocument`` rows instead: later payments or status changes
+still count because balances read them from the live tables.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, DecimalField, Q, Sum
+from django.utils import timezone
+
+from archive.models import ARCHIVE_MODELS
+from archive.queries import reaches_archive
+from core.audit import stock_movements
+from core.db import serialized_write
+from money_receipts.models import MoneyReceipt
+from products.models import Product
+from purchases.models import Purchase
+from sales.models import Sale
+from supplier_payment.models import SupplierPayment
+from transactions.models import Transaction
+
+from .balances import _is_datetime, after_close, latest_close
+from .models import (
+    AccountSnapshot, CustomerSnapshot, OpenDocument, PeriodClose, StockSnapshot, SupplierSnapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal('0')
+
+# Same rule as Customer.is_advance_receipt and the customers.advance_balance audit
+ADVANCE_RECEIPT = Q(sale__isnull=True) | Q(payment_type='advance') | Q(is_advance_payment=True)
+
+
+def close_period(company, closed_through, user=None, dry_run=False):
+    """
+    Close ``company``'s books through ``closed_through`` (a finished day
+    after its latest close); returns the PeriodClose (unsaved with ``dry_run``)
+    with ``counts`` of the snapshot rows written.
+    """
+    if closed_through >= timezone.localdate():
+        raise ValidationError(f'{closed_through} has not finished yet; only past days can be closed')
+    previous = latest_close(company)
+    if previous and closed_through <= previous.closed_through:
+        raise ValidationError(f'{company.name} is already closed through {previous.closed_through}')
+
+    close = PeriodClose(
+        company=company, closed_through=closed_through, created_by=user,
+        cutoff=timezone.make_aware(datetime.combine(closed_through + timedelta(days=1), time.min)),
+    )
+    window = Window(company, previous, close)
+
+    customers, open_sales = _customer_totals(window)
+    suppliers, open_purchases = _supplier_totals(window)
+    accounts, open_transactions = _account_totals(window)
+    stock = _stock_totals(window)
+
+    close.counts = {
+        'customers': len(customers), 'suppliers': len(suppliers), 'accounts': len(accounts),
+        'products': len(stock), 'open_documents': len(open_sales) + len(open_purchases) + len(open_transactions),
+    }
+    if dry_run:
+        return close
+
+    with serialized_write():
+        close.save()
+        CustomerSnapshot.objects.bulk_create(
+            [CustomerSnapshot(period_close=close, customer_id=pk, **values) for pk, values in customers.items()],
+            batch_size=1000,
+        )
+        SupplierSnapshot.objects.bulk_create(
+            [SupplierSnapshot(period_close=close, supplier_id=pk, **values) for pk, values in suppliers.items()],
+            batch_size=1000,
+        )
+        AccountSnapshot.objects.bulk_create(
+            [AccountSnapshot(period_close=close, account_id=pk, **values) for pk, values in accounts.items()],
+            batch_size=1000,
+        )
+        StockSnapshot.objects.bulk_create(
+            [StockSnapshot(period_close=close, product_id=pk, **values) for pk, values in stock.items()],
+            batch_size=1000,
+        )
+        OpenDocument.objects.bulk_create(
+            [OpenDocument(period_close=close, document_type='sale', document_id=pk) for pk in open_sales]
+            + [OpenDocument(period_close=close, document_type='purchase', document_id=pk) for pk in open_purchases]
+            + [OpenDocument(period_close=close, document_type='transaction', document_id=pk) for pk in open_transactions],
+            batch_size=1000,
+        )
+    logger.info('Closed company %s through %s: %s', company.pk, closed_through, close.counts)
+    return close
+
+
+class Window:
+    """The rows a close reads: after the previous close (or left open by it) and through this one"""
+
+    def __init__(self, company, previous, close):
+        self.company, self.previous, self.close = company, previous, close
+
+    def rows(self, model, date_field, open_type=None, company_field='company'):
+        """Hot rows of ``model`` in the window, plus archived ones when anything is archived"""
+        querysets = [model.objects.all()]
+        if model in ARCHIVE_MODELS and reaches_archive(self.company, None):
+            querysets.append(ARCHIVE_MODELS[model].objects.all())
+
+        if _is_datetime(model, date_field):
+            bound = Q(**{f'{date_field}__lt': self.close.cutoff})
+        else:
+            bound = Q(**{f'{date_field}__lte': self.close.closed_through})
+        for queryset in querysets:
+            queryset = queryset.filter(bound, **{company_field: self.company})
+            # Archived rows were never open documents
+            yield after_close(queryset, self.previous, date_field, open_type if queryset.model is model else None)
+
+    def carried(self, snapshot_model, party_field, fields):
+        """{party id: {field: value}} of the previous close's snapshot"""
+        if self.previous is None:
+            return {}
+        return {
+            row.pop(f'{party_field}_id'): row
+            for row in snapshot_model.objects.filter(period_close=self.previous).values(f'{party_field}_id', *fields)
+        }
+
+
+def _add(totals, party_id, **values):
+    row = totals[party_id]
+    for name, value in values.items():
+        row[name] = row.get(name, 0) + (value or 0)
+
+
+def _nonzero(totals):
+    return {pk: row for pk, row in totals.items() if any(row.values())}
+
+
+# --------------------------
+# Per party type
+# --------------------------
+def _customer_totals(window):
+    fields = ['sales_count', 'sales_total', 'sales_paid', 'receipts_total', 'advance_receipts_total']
+    totals = defaultdict(dict, window.carried(CustomerSnapshot, 'customer', fields))
+    open_sales = []
+
+    for sales in window.rows(Sale, 'sale_date', 'sale'):
+        sales = sales.filter(customer__isnull=False)
+        if sales.model is Sale:
+            open_sales += sales.filter(due_amount__gt=0).values_list('pk', flat=True)
+        for row in sales.filter(due_amount__lte=0).values('customer_id').annotate(
+            count=Count('pk'), total=Sum('grand_total'), paid=Sum('paid_amount'),
+        ).order_by():
+            _add(totals, row['customer_id'], sales_count=row['count'], sales_total=row['total'], sales_paid=row['paid'])
+
+    for receipts in window.rows(MoneyReceipt, 'payment_date'):
+        for row in receipts.filter(customer__isnull=False).values('customer_id').annotate(
+            total=Sum('amount'), advance=Sum('amount', filter=ADVANCE_RECEIPT),
+        ).order_by():
+            _add(totals, row['customer_id'], receipts_total=row['total'], advance_receipts_total=row['advance'])
+
+    return _nonzero(totals), open_sales
+
+
+def _supplier_totals(window):
+    fields = ['purchases_count', 'purchases_total', 'purchases_paid', 'payments_total']
+    totals = defaultdict(dict, window.carried(SupplierSnapshot, 'supplier', fields))
+    open_purchases = []
+
+    for purchases in window.rows(Purchase, 'purchase_date', 'purchase'):
+        if purchases.model is Purchase:
+            open_purchases += purchases.filter(due_amount__gt=0).values_list('pk', flat=True)
+        for row in purchases.filter(due_amount__lte=0).values('supplier_id').annotate(
+            count=Count('pk'), total=Sum('grand_total'), paid=Sum('paid_amount'),
+        ).order_by():
+            _add(totals, row['supplier_id'], purchases_count=row['count'], purchases_total=row['total'],
+                 purchases_paid=row['paid'])
+
+    for payments in window.rows(SupplierPayment, 'payment_date'):
+        for row in payments.values('supplier_id').annotate(total=Sum('amount')).order_by():
+            _add(totals, row['supplier_id'], payments_total=row['total'])
+
+    return _nonzero(totals), open_purchases
+
+
+def _account_totals(window):
+    fields = ['credit_total', 'debit_total', 'opening_credit_total', 'opening_debit_total']
+    totals = defaultdict(dict, window.carried(AccountSnapshot, 'account', fields))
+    open_transactions = []
+
+    for transactions in window.rows(Transaction, 'transaction_date', 'transaction'):
+        if transactions.model is Transaction:
+            open_transactions += transactions.filter(status='pending').values_list('pk', flat=True)
+        for row in transactions.filter(status='completed', account__isnull=False).values('account_id').annotate(
+            credit=Sum('amount', filter=Q(transaction_type='credit', is_opening_balance=False)),
+            debit=Sum('amount', filter=Q(transaction_type='debit', is_opening_balance=False)),
+            opening_credit=Sum('amount', filter=Q(transaction_type='credit', is_opening_balance=True)),
+            opening_debit=Sum('amount', filter=Q(transaction_type='debit', is_opening_balance=True)),
+        ).order_by():
+            _add(totals, row['account_id'], credit_total=row['credit'], debit_total=row['debit'],
+                 opening_credit_total=row['opening_credit'], opening_debit_total=row['opening_debit'])
+
+    return _nonzero(totals), open_transactions
+
+
+def _stock_totals(window):
+    carried = window.carried(StockSnapshot, 'product', ['quantity'])
+    products = Product.objects.filter(company=window.company).values_list('pk', 'opening_stock', 'average_cost')
+    quantity = {pk: carried[pk]['quantity'] if pk in carried else Decimal(opening or 0) for pk, opening, _ in products}
+
+    for model, condition, company_field, date_field, moved, sign in stock_movements():
+        for lines in window.rows(model, date_field, company_field=company_field):
+            for product_id, total in lines.filter(condition).values('product_id').annotate(
+                total=Sum(moved, output_field=DecimalField(max_digits=15, decimal_places=3)),
+            ).order_by().values_list('product_id', 'total'):
+                if product_id in quantity:
+                    quantity[product_id] += sign * (total or ZERO)
+
+    return {
+        pk: {
+            'quantity': quantity[pk],
+            'unit_cost': cost or ZERO,
+            'value': (quantity[pk] * (cost or ZERO)).quantize(Decimal('0.01')),
+        }
+        for pk, _, cost in products
+    }
@@ -0,0 +1,115 @@
+# closing/tests.py
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Account
+from core.audit import INVARIANTS
+from core.models import Company, User
+from customers.models import Customer
+from money_receipts.models import MoneyReceipt
+from products.models import Product
+from purchases.models import Purchase
+from sales.sync import CREATED, SaleSync
+from suppliers.models import Supplier
+from transactions.models import Transaction
+
+from .models import OpenDocument
+from .snapshots import close_period
+
+BALANCES = ('customers.advance_balance', 'suppliers.totals', 'accounts.balance', 'products.stock_qty')
+
+
+def _at(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time().replace(hour=10)))
+
+
+class ClosedYearMixin:
+    """
+    Last calendar year's settled and open documents, plus rows after it; the
+    archive tests reuse it. ``balances()`` must read the same whatever is closed
+    or archived.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.year = timezone.localdate().year - 1
+        cls.company = Company.objects.create(name='Closing Co', fiscal_year_start=date(2000, 1, 1))
+        cls.user = User.objects.create_user(username='closer', password='x', company=cls.company)
+        cls.account = Account.objects.create(company=cls.company, name='Cash')
+        cls.customer = Customer.objects.create(company=cls.company, name='Regular')
+        cls.supplier = Supplier.objects.create(company=cls.company, name='Mill')
+        cls.product = Product.objects.create(company=cls.company, name='Flour', selling_price=Decimal('30.00'))
+
+        Transaction.objects.create(
+            company=cls.company, account=cls.account, transaction_type='credit', amount=Decimal('1000.00'),
+            status='completed', transaction_date=_at(date(cls.year, 1, 5)),
+        )
+        # Settled and still due purchases of the year that gets closed
+        for paid in (Decimal('200.00'), Decimal('50.00')):
+            Purchase.receive(
+                [{'product': cls.product, 'qty': 20, 'price': Decimal('10.00')}],
+                company=cls.company, supplier=cls.supplier, created_by=cls.user,
+                purchase_date=date(cls.year, 2, 1), paid_amount=paid,
+            )
+        results = SaleSync(cls.user).run([
+            {'key': 'walk-in', 'sale_date': _at(date(cls.year, 3, 1)), 'paid_amount': '90.00',
+             'items': [{'product_id': cls.product.pk, 'quantity': 3}]},
+            {'key': 'on-credit', 'sale_date': _at(date(cls.year, 3, 2)), 'customer_type': 'saved_customer',
+             'customer_id': cls.customer.pk, 'items': [{'product_id': cls.product.pk, 'quantity': 5}]},
+        ])
+        assert [result['status'] for result in results] == [CREATED, CREATED], results
+        depositor = Customer.objects.create(company=cls.company, name='Depositor')
+        MoneyReceipt.objects.create(
+            company=cls.company, customer=depositor, account=cls.account, amount=Decimal('40.00'),
+            payment_type='advance', payment_date=_at(date(cls.year, 4, 1)),
+        )
+        # And rows after the close
+        Transaction.objects.create(
+            company=cls.company, account=cls.account, transaction_type='debit', amount=Decimal('75.00'),
+            status='completed', transaction_date=timezone.now(),
+        )
+
+    def balances(self):
+        """Recomputed value of every audited balance, plus the account balance read by the ledger"""
+        values = {}
+        for name in BALANCES:
+            expected = INVARIANTS[name].expected()
+            rows = INVARIANTS[name].get_queryset(self.company.pk).annotate(
+                **{f'expected_{field}': expression for field, expression in expected.items()}
+            ).values_list('pk', *(f'expected_{field}' for field in expected))
+            values[name] = {pk: [INVARIANTS[name]._quantize(value) for value in rest] for pk, *rest in rows}
+        values['ledger'] = Transaction.get_account_balance(self.account)
+        return values
+
+    def assertAuditClean(self):
+        for name in BALANCES:
+            _, found = INVARIANTS[name].mismatches(self.company.pk)
+            self.assertEqual(found, [], name)
+
+
+class PeriodCloseTests(ClosedYearMixin, TestCase):
+    def test_close_keeps_balances(self):
+        before = self.balances()
+        self.assertAuditClean()
+
+        close = close_period(self.company, date(self.year, 12, 31), user=self.user)
+
+        self.assertEqual(
+            set(OpenDocument.objects.filter(period_close=close).values_list('document_type', flat=True)),
+            {'sale', 'purchase'},
+        )
+        self.assertEqual(self.balances(), before)
+        self.assertAuditClean()
+
+    def test_closed_period_rejects_new_documents(self):
+        close_period(self.company, date(self.year, 12, 31), user=self.user)
+
+        with self.assertRaises(ValidationError):
+            Transaction.objects.create(
+                company=self.company, account=self.account, transaction_type='credit', amount=Decimal('1.00'),
+                status='completed', transaction_date=_at(date(self.year, 6, 1)),
+            )
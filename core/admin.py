@@ -127,11 +127,7 @@ class CompanyAdmin(SuperUserAdmin):
     user_count.short_description = "Active Users"
     
     def product_count(self, obj):
-        try:
-            count = obj.products.count()
-            return count
-        except:
-            return 0
+        return obj.product_count
     product_count.short_description = "Products"
     
     def action_buttons(self, obj):
@@ -1,8 +1,14 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
 
     def ready(self):
+        import core.db
         import core.signals
+        from core.lookups import connect_signals
+        connect_signals()
+        # Job handlers live in <app>/jobs.py
+        autodiscover_modules('jobs')
@@ -0,0 +1,339 @@
+# core/audit.py
+"""
+Reconciliation audit for denormalized balances.
+
+Every ``Invariant`` compares stored columns with the value recomputed from
+their source rows, company-wide, in one annotated query:
+
+    sales.due_amount           Sale due/change amounts vs grand_total - paid_amount
+    customers.advance_balance  Customer.advance_balance vs advance receipts + sale overpayments
+    suppliers.totals           Supplier purchase totals vs their purchases
+    accounts.balance           Account.balance vs completed credit - debit transactions
+    products.stock_qty         Product.stock_qty vs opening stock and stock-moving documents
+    companies.counters         Company product/active user counter caches vs the rows
+
+Where the company has a period close (``closing``), the recomputation
+starts from its latest snapshot and only reads the rows after the close.
+
+Mismatches are kept as ``AuditFinding`` rows (open until a later run stops
+seeing them) and each run is summarized in ``AuditRun``. Run it with
+``python manage.py audit_balances``; ``--fix`` rewrites the drifted rows of
+invariants marked ``healable`` with one UPDATE each. Request paths read the
+stored values and leave the checking to the audit.
+"""
+import logging
+import time
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MONEY = DecimalField(max_digits=15, decimal_places=2)
+QUANTITY = DecimalField(max_digits=15, decimal_places=3)
+ZERO = Value(Decimal('0.00'))
+
+
+def correlated_sum(queryset, group_by, expression, output_field=MONEY):
+    """SUM(expression) over ``queryset`` (filtered on OuterRef) grouped by ``group_by``; 0 when empty"""
+    rows = queryset.order_by().values(group_by).annotate(value=Sum(expression)).values('value')
+    return Coalesce(Subquery(rows, output_field=output_field), ZERO, output_field=output_field)
+
+
+def stock_movements():
+    """
+    Document lines that move Product.stock_qty, as (model, condition,
+    company path, date path, quantity, sign); shared with period closes
+    """
+    from purchases.models import PurchaseItem
+    from returns.models import PurchaseReturnItem, SalesReturnItem
+    from sales.models import SaleItem
+
+    done = ('approved', 'completed')
+    return [
+        (PurchaseItem, Q(price__gt=0) & ~Q(purchase__payment_status='cancelled'),
+         'purchase__company', 'purchase__purchase_date', F('qty'), 1),
+        (SaleItem, Q(), 'sale__company', 'sale__sale_date', F('base_quantity'), -1),
+        (SalesReturnItem, Q(sales_return__status__in=done),
+         'sales_return__company', 'sales_return__return_date', F('quantity') - F('damage_quantity'), 1),
+        (PurchaseReturnItem, Q(purchase_return__status__in=done),
+         'purchase_return__company', 'purchase_return__return_date', F('quantity'), -1),
+    ]
+
+
+class Invariant:
+    name = None
+    model = None
+    description = ''
+    label_field = 'pk'
+    # Values compared after quantizing to this
+    precision = Decimal('0.01')
+    # Whether --fix may overwrite the stored columns with the expected values
+    healable = False
+
+    def expected(self):
+        """{stored field: expression recomputing it}"""
+        raise NotImplementedError
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+    def get_queryset(self, company_id):
+        return self.get_model()._default_manager.filter(company_id=company_id)
+
+    def mismatches(self, company_id):
+        """(rows checked, [(pk, label, field, stored, expected)]) from one query"""
+        expected = self.expected()
+        rows = self.get_queryset(company_id).order_by().annotate(
+            **{f'expected_{name}': expression for name, expression in expected.items()}
+        ).values_list('pk', self.label_field, *expected, *(f'expected_{name}' for name in expected))
+
+        checked, found = 0, []
+        for row in rows.iterator(chunk_size=2000):
+            checked += 1
+            pk, label, values = row[0], row[1], row[2:]
+            for index, name in enumerate(expected):
+                stored, actual = self._quantize(values[index]), self._quantize(values[len(expected) + index])
+                if stored != actual:
+                    found.append((pk, str(label or pk), name, stored, actual))
+        return checked, found
+
+    def heal(self, company_id, object_ids):
+        return self.get_queryset(company_id).filter(pk__in=object_ids).update(**self.expected())
+
+    def _quantize(self, value):
+        return Decimal(str(value or 0)).quantize(self.precision)
+
+
+class SaleDueInvariant(Invariant):
+    name = 'sales.due_amount'
+    model = 'sales.Sale'
+    description = 'Sale due/change amounts follow grand total and paid amount'
+    label_field = 'invoice_no'
+    healable = True
+
+    def expected(self):
+        balance = F('grand_total') - F('paid_amount')
+        return {
+            'due_amount': Greatest(balance, ZERO, output_field=MONEY),
+            'change_amount': Greatest(-balance, ZERO, output_field=MONEY),
+        }
+
+
+class CustomerAdvanceInvariant(Invariant):
+    name = 'customers.advance_balance'
+    model = 'customers.Customer'
+    description = 'Customer advance equals advance receipts plus sale overpayments'
+    label_field = 'name'
+    healable = True
+
+    def expected(self):
+        from closing.balances import snapshot_value, uncovered
+        from closing.models import CustomerSnapshot
+        from money_receipts.models import MoneyReceipt
+        from sales.models import Sale
+
+        # Same rules as Customer.is_advance_receipt/sync_advance_balance
+        sales = Sale.objects.filter(customer=OuterRef('pk'), company=OuterRef('company')).filter(
+            uncovered(Sale, 'sale_date', open_type='sale')
+        )
+        receipts = MoneyReceipt.objects.filter(customer=OuterRef('pk'), company=OuterRef('company')).filter(
+            Q(sale__isnull=True) | Q(payment_type='advance') | Q(is_advance_payment=True),
+            uncovered(MoneyReceipt, 'payment_date'),
+        )
+
+        def snapshot(field):
+            return Coalesce(snapshot_value(CustomerSnapshot, 'customer', field, MONEY), ZERO, output_field=MONEY)
+
+        overpayment = (
+            snapshot('sales_paid') + correlated_sum(sales, 'customer', 'paid_amount')
+            - snapshot('sales_total') - correlated_sum(sales, 'customer', 'grand_total')
+        )
+        return {
+            'advance_balance': Greatest(overpayment, ZERO, output_field=MONEY)
+                               + snapshot('advance_receipts_total') + correlated_sum(receipts, 'customer', 'amount'),
+        }
+
+
+class SupplierTotalsInvariant(Invariant):
+    name = 'suppliers.totals'
+    model = 'suppliers.Supplier'
+    description = 'Supplier purchase totals, paid and due match their purchases'
+    label_field = 'name'
+    healable = True
+
+    def expected(self):
+        from suppliers.models import Supplier
+        return Supplier.actual_totals()
+
+
+class AccountBalanceInvariant(Invariant):
+    """Reported only: balances also move outside Transaction rows (e.g. sale payments)"""
+    name = 'accounts.balance'
+    model = 'accounts.Account'
+    description = 'Account balance equals completed credit minus debit transactions'
+    label_field = 'name'
+
+    def expected(self):
+        from closing.balances import snapshot_value, uncovered
+        from closing.models import AccountSnapshot
+        from transactions.models import Transaction
+
+        transactions = Transaction.objects.filter(account=OuterRef('pk'), status='completed').filter(
+            uncovered(Transaction, 'transaction_date', open_type='transaction')
+        )
+        signed = Case(
+            When(transaction_type='credit', then=F('amount')),
+            When(transaction_type='debit', then=-F('amount')),
+            default=ZERO,
+            output_field=MONEY,
+        )
+        snapshot = snapshot_value(
+            AccountSnapshot, 'account',
+            F('credit_total') + F('opening_credit_total') - F('debit_total') - F('opening_debit_total'), MONEY,
+        )
+        return {'balance': Coalesce(snapshot, ZERO, output_field=MONEY) + correlated_sum(transactions, 'account', signed)}
+
+
+class ProductStockInvariant(Invariant):
+    """Reported only: stock is also set directly (imports, manual edits)"""
+    name = 'products.stock_qty'
+    model = 'products.Product'
+    description = 'Stock equals opening stock + purchases - sales + sales returns - purchase returns'
+    label_field = 'name'
+    precision = Decimal('0.001')
+
+    def expected(self):
+        from closing.balances import snapshot_value, uncovered
+        from closing.models import StockSnapshot
+
+        # Products created after the latest close have no snapshot row and start from opening stock
+        expected = Coalesce(
+            snapshot_value(StockSnapshot, 'product', 'quantity', QUANTITY), F('opening_stock'), output_field=QUANTITY,
+        )
+        for model, condition, company_field, date_field, quantity, sign in stock_movements():
+            moved = correlated_sum(
+                model.objects.filter(condition, product=OuterRef('pk')).filter(
+                    uncovered(model, date_field, company_field)
+                ),
+                'product', quantity, QUANTITY,
+            )
+            expected = expected + moved if sign > 0 else expected - moved
+        return {'stock_qty': expected}
+
+
+class CompanyCountersInvariant(Invariant):
+    name = 'companies.counters'
+    model = 'core.Company'
+    description = 'Company product and active user counters match the rows'
+    label_field = 'name'
+    precision = Decimal('1')
+    healable = True
+
+    def get_queryset(self, company_id):
+        return self.get_model()._default_manager.filter(pk=company_id)
+
+    def expected(self):
+        from core.models import Company
+        return Company.actual_counters()
+
+
+INVARIANTS = {
+    invariant.name: invariant
+    for invariant in (
+        SaleDueInvariant(), CustomerAdvanceInvariant(), SupplierTotalsInvariant(),
+        AccountBalanceInvariant(), ProductStockInvariant(), CompanyCountersInvariant(),
+    )
+}
+
+
+# --------------------------
+# Running
+# --------------------------
+def audit(company_id, invariant, fix=False):
+    """Check one invariant for one company and record its findings; returns the AuditRun (with .healed)"""
+    from core.models import AuditFinding, AuditRun
+
+    started = time.perf_counter()
+    checked, found = invariant.mismatches(company_id)
+    now = timezone.now()
+    healed = 0
+
+    with transaction.atomic():
+        if fix and found and invariant.healable:
+            healed = invariant.heal(company_id, {pk for pk, *_ in found})
+            found = []
+
+        open_findings = {
+            (finding.object_id, finding.field): finding
+            for finding in AuditFinding.objects.filter(
+                company_id=company_id, invariant=invariant.name, resolved_at__isnull=True
+            )
+        }
+        new, seen = [], []
+        for pk, label, field, stored, expected in found:
+            finding = open_findings.pop((pk, field), None)
+            if finding is None:
+                new.append(AuditFinding(
+                    company_id=company_id, invariant=invariant.name, object_id=pk, object_label=label[:255],
+                    field=field, stored=stored, expected=expected, first_seen=now, last_seen=now,
+                ))
+            else:
+                finding.object_label, finding.stored, finding.expected, finding.last_seen = label[:255], stored, expected, now
+                seen.append(finding)
+
+        AuditFinding.objects.bulk_create(new, batch_size=1000)
+        AuditFinding.objects.bulk_update(seen, ['object_label', 'stored', 'expected', 'last_seen'], batch_size=1000)
+        if open_findings:
+            AuditFinding.objects.filter(pk__in=[f.pk for f in open_findings.values()]).update(resolved_at=now)
+
+        run, _ = AuditRun.objects.update_or_create(
+            company_id=company_id, invariant=invariant.name,
+            defaults={
+                'checked': checked,
+                'mismatches': len(found),
+                'duration_ms': int((time.perf_counter() - started) * 1000),
+                'ran_at': now,
+            },
+        )
+
+    if found:
+        logger.warning(f"Audit {invariant.name} company {company_id}: {len(found)} mismatch(es) in {checked} rows")
+    run.healed = healed
+    return run
+
+
+def summary(company_id):
+    """Per invariant: last run and open findings with their total absolute difference"""
+    from django.db.models import Count
+    from django.db.models.functions import Abs
+
+    from core.models import AuditFinding, AuditRun
+
+    runs = {run.invariant: run for run in AuditRun.objects.filter(company_id=company_id)}
+    open_findings = {
+        row['invariant']: row
+        for row in AuditFinding.objects.filter(company_id=company_id, resolved_at__isnull=True)
+        .values('invariant').annotate(
+            count=Count('id'), difference=Sum(Abs(F('stored') - F('expected'))),
+        ).order_by()
+    }
+
+    result = []
+    for name, invariant in INVARIANTS.items():
+        run, findings = runs.get(name), open_findings.get(name, {})
+        result.append({
+            'invariant': name,
+            'description': invariant.description,
+            'healable': invariant.healable,
+            'last_run': run.ran_at if run else None,
+            'checked': run.checked if run else 0,
+            'duration_ms': run.duration_ms if run else None,
+            'open_findings': findings.get('count', 0),
+            'total_difference': float(findings.get('difference') or 0),
+        })
+    return result
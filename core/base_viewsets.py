@@ -15,6 +15,8 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 import logging
 
+from core.routers import ReplicaReadMixin
+
 logger = logging.getLogger(__name__)
 
 class ReportPagination(PageNumberPagination):
@@ -22,7 +24,7 @@ class ReportPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 1000
 
-class BaseReportView(APIView):
+class BaseReportView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
     filter_serializer_class = None
     cache_timeout = 300
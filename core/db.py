@@ -0,0 +1,81 @@
+# core/db.py
+"""
+Database connection tuning and write serialization.
+
+SQLite in production: every new connection gets the PRAGMAs from
+``settings.SQLITE_PRAGMAS`` (WAL journal, synchronous=NORMAL, busy timeout,
+mmap and page cache). Multi-statement postings (sale + items + transaction
++ receipt) should run inside ``serialized_write()`` so that, within one
+worker process, writers queue on a lock instead of racing for SQLite's
+single write lock, and the whole posting commits in one short
+``BEGIN IMMEDIATE`` transaction (``OPTIONS['transaction_mode']``).
+
+On other database vendors both helpers are no-ops around ``atomic()``.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_write_lock = threading.RLock()
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Apply SQLITE_PRAGMAS to every new SQLite connection"""
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        for name, value in (getattr(settings, 'SQLITE_PRAGMAS', {}) or {}).items():
+            if value is None:
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def _serialization_enabled(using):
+    return (
+        getattr(settings, 'SQLITE_SERIALIZE_WRITES', False)
+        and connections[using].vendor == 'sqlite'
+    )
+
+
+@contextmanager
+def serialized_write(using=DEFAULT_DB_ALIAS):
+    """
+    Run a multi-statement write as one atomic block, serialized per process on SQLite.
+
+    Usage:
+        with serialized_write():
+            sale = Sale.objects.create(...)
+            ...
+    """
+    if not _serialization_enabled(using):
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    with _write_lock:
+        with transaction.atomic(using=using):
+            yield
+
+
+def serialized(func=None, using=DEFAULT_DB_ALIAS):
+    """Decorator form of serialized_write()"""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            with serialized_write(using=using):
+                return view_func(*args, **kwargs)
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,161 @@
+# core/fieldsets.py
+"""
+Sparse fieldsets and opt-in expensive fields for read endpoints.
+
+    GET /api/customers/?fields=id,name,total_due
+    GET /api/customers/?expand=payment_breakdown
+    GET /api/sales/?fields=id,invoice_no,grand_total&expand=items
+
+Serializers using ``SparseFieldsetMixin`` declare what their costly fields
+need in ``Meta.field_costs``:
+
+    field_costs = {
+        'total_sales': {'annotate': {'sales_count': Count('sale', distinct=True)}},
+        'unit_info': {'select_related': ['unit']},
+        'sale_modes': {'prefetch_related': [sale_modes_prefetch]},
+        'payment_breakdown': {'expensive': True},
+    }
+
+Expensive fields are left out unless named in ``?fields=`` or ``?expand=``,
+or the view expands everything (detail actions by default, see
+``SparseFieldsetViewMixin.list_actions``). Only safe methods are narrowed:
+writes keep every field so no writable input is dropped. Views build
+their queryset through ``prepare_queryset()`` so it carries only the joins,
+prefetches and annotations the selected fields need.
+
+The mixin is meant for top-level serializers: names in ``?fields=`` are not
+qualified, so nested serializers should not use it.
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_field_list(value):
+    """'id, name,,total_due' -> {'id', 'name', 'total_due'}"""
+    return {part.strip() for part in (value or '').split(',') if part.strip()}
+
+
+class FieldSelection:
+    """The fields a request asked for: None means the serializer's defaults"""
+
+    def __init__(self, fields=None, expand=(), expand_all=False):
+        self.fields = set(fields) if fields is not None else None
+        self.expand = set(expand)
+        self.expand_all = expand_all
+
+    @classmethod
+    def from_request(cls, request, expand_all=False):
+        if request is None:
+            return cls(expand_all=True)
+
+        # Writes keep every field: pruning would drop writable (and write-only) inputs
+        if request.method not in SAFE_METHODS:
+            return cls(expand_all=True)
+
+        params = getattr(request, 'query_params', request.GET)
+        fields = parse_field_list(params.get(FIELDS_PARAM)) or None
+        return cls(fields=fields, expand=parse_field_list(params.get(EXPAND_PARAM)), expand_all=expand_all)
+
+    def includes(self, name, expensive=False):
+        if name in self.expand:
+            return True
+        if self.fields is not None:
+            return name in self.fields
+        return self.expand_all or not expensive
+
+
+class SparseFieldsetMixin:
+    """Serializer mixin: drops unselected fields and plans the queryset for the rest"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selection = self.field_selection
+        for name in list(self.fields):
+            if not selection.includes(name, self.is_expensive(name)):
+                self.fields.pop(name)
+
+    @property
+    def field_selection(self):
+        selection = self.context.get('field_selection')
+        if selection is None:
+            selection = FieldSelection.from_request(self.context.get('request'))
+        return selection
+
+    @classmethod
+    def get_field_costs(cls):
+        return getattr(cls.Meta, 'field_costs', {})
+
+    @classmethod
+    def is_expensive(cls, name):
+        return cls.get_field_costs().get(name, {}).get('expensive', False)
+
+    def wants(self, name):
+        """Whether an extra (not a declared output field, e.g. write-only items) was selected"""
+        return self.field_selection.includes(name, self.is_expensive(name))
+
+    @classmethod
+    def prepare_queryset(cls, queryset, selection=None):
+        """Add the select_related/prefetch_related/annotate the selected fields need"""
+        selection = selection or FieldSelection(expand_all=True)
+        select_related, prefetch_related, annotations = [], [], {}
+
+        for name, cost in cls.get_field_costs().items():
+            if not selection.includes(name, cost.get('expensive', False)):
+                continue
+            for relation in cost.get('select_related', ()):
+                if relation not in select_related:
+                    select_related.append(relation)
+            for lookup in cost.get('prefetch_related', ()):
+                prefetch_related.append(lookup() if callable(lookup) else lookup)
+            for alias, expression in cost.get('annotate', {}).items():
+                if alias not in queryset.query.annotations:
+                    annotations[alias] = expression
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*_unique_lookups(prefetch_related))
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset
+
+
+class SparseFieldsetViewMixin:
+    """
+    View mixin: list actions return the serializer's default fields, other
+    actions (retrieve, custom detail actions) expand expensive fields too.
+    """
+    list_actions = ('list',)
+
+    def expand_all_fields(self):
+        return getattr(self, 'action', None) not in self.list_actions
+
+    def get_field_selection(self):
+        if not hasattr(self, '_field_selection'):
+            self._field_selection = FieldSelection.from_request(
+                self.request, expand_all=self.expand_all_fields()
+            )
+        return self._field_selection
+
+    def prepare_queryset(self, queryset):
+        serializer_class = self.get_serializer_class()
+        if not hasattr(serializer_class, 'prepare_queryset'):
+            return queryset
+        return serializer_class.prepare_queryset(queryset, self.get_field_selection())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['field_selection'] = self.get_field_selection()
+        return context
+
+
+def _unique_lookups(lookups):
+    seen, unique = set(), []
+    for lookup in lookups:
+        key = getattr(lookup, 'prefetch_to', lookup)
+        if key not in seen:
+            seen.add(key)
+            unique.append(lookup)
+    return unique
@@ -0,0 +1,200 @@
+# core/jobs.py
+"""
+Database-backed queue for follow-up work that can leave the request path.
+
+Handlers live in ``<app>/jobs.py`` (imported by CoreConfig.ready) and are
+registered by name:
+
+    @register('sales.payment_documents')
+    def payment_documents(payload):
+        ...
+
+    enqueue('sales.payment_documents', {'sale_id': sale.pk},
+            company_id=sale.company_id, dedup_key=f'sale-payment:{sale.pk}')
+
+``enqueue()`` only writes the ``Job`` row once the surrounding transaction
+commits, so a rolled-back request leaves nothing behind. With
+``BACKGROUND_JOBS`` off (the default) the handler runs right after the
+commit instead, in the request, so deployments without a worker lose
+nothing; ``in_transaction=True`` runs it right away, in a savepoint of the
+caller's transaction, for follow-up writes that must commit or roll back
+with it. ``python manage.py runworker`` processes the queue:
+
+- dedup_key: while a job with the key is pending, enqueueing it again is a no-op
+- per company: a job is not started while an older job of its company is
+  pending or running, so one company's jobs run in enqueue order
+- failures are retried with exponential backoff until max_attempts, then
+  the job is left as failed (``runworker --retry-failed`` requeues them)
+- running jobs whose worker died are released after ``JOB_LOCK_TIMEOUT``
+
+Handlers must be idempotent: a job can run twice if its worker dies
+between the handler and the status update.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE = 10
+BACKOFF_MAX = 3600
+
+
+def register(name):
+    """Decorator: make ``handler(payload)`` runnable as job ``name``"""
+    def decorator(handler):
+        if name in HANDLERS and HANDLERS[name] is not handler:
+            raise ValueError(f'Job {name} is already registered')
+        HANDLERS[name] = handler
+        return handler
+    return decorator
+
+
+def enqueue(name, payload=None, company_id=None, dedup_key=None, delay=0, max_attempts=DEFAULT_MAX_ATTEMPTS,
+            in_transaction=False):
+    """Queue job ``name`` once the current transaction commits (immediately outside one)"""
+    if name not in HANDLERS:
+        raise ValueError(f'Unknown job {name}')
+    payload = payload or {}
+
+    if not getattr(settings, 'BACKGROUND_JOBS', False):
+        if in_transaction:
+            run_inline(name, payload, atomic=True)
+        else:
+            transaction.on_commit(lambda: run_inline(name, payload))
+        return
+
+    transaction.on_commit(lambda: _create(name, payload, company_id, dedup_key, delay, max_attempts))
+
+
+def _create(name, payload, company_id, dedup_key, delay, max_attempts):
+    from core.models import Job
+
+    if dedup_key and Job.objects.filter(dedup_key=dedup_key, status=Job.STATUS_PENDING).exists():
+        return None
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                name=name, payload=payload, company_id=company_id, dedup_key=dedup_key,
+                max_attempts=max_attempts, run_after=timezone.now() + timedelta(seconds=delay),
+            )
+    except IntegrityError:
+        # Lost the race against an identical pending job
+        return None
+    except Exception:
+        logger.exception(f"Could not enqueue job {name}; running it inline")
+        run_inline(name, payload)
+
+
+def run_inline(name, payload, atomic=False):
+    """Run a handler in the request; ``atomic`` rolls its writes back to a savepoint when it fails"""
+    try:
+        if atomic:
+            with transaction.atomic():
+                HANDLERS[name](payload)
+        else:
+            HANDLERS[name](payload)
+    except Exception:
+        logger.exception(f"Inline job {name} failed")
+
+
+# --------------------------
+# Worker side
+# --------------------------
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def backoff(attempts):
+    """Seconds before retry number ``attempts``: exponential, capped, with jitter"""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay + random.uniform(0, delay / 4)
+
+
+def release_stale(now=None):
+    """Put running jobs whose worker stopped answering back to pending"""
+    from core.models import Job
+
+    now = now or timezone.now()
+    timeout = getattr(settings, 'JOB_LOCK_TIMEOUT', 600)
+    return Job.objects.filter(
+        status=Job.STATUS_RUNNING, locked_at__lt=now - timedelta(seconds=timeout)
+    ).update(status=Job.STATUS_PENDING, locked_at=None, locked_by='', run_after=now)
+
+
+def claim(worker, limit=10):
+    """
+    Lock up to ``limit`` due jobs for ``worker``: at most one per company,
+    and only a company's oldest unfinished job.
+    """
+    from core.models import Job
+
+    now = timezone.now()
+    blocked = Job.objects.filter(
+        company_id=OuterRef('company_id'),
+        status__in=(Job.STATUS_PENDING, Job.STATUS_RUNNING),
+        pk__lt=OuterRef('pk'),
+    )
+    candidates = (
+        Job.objects.filter(status=Job.STATUS_PENDING, run_after__lte=now)
+        .filter(Q(company__isnull=True) | ~Exists(blocked))
+        .order_by('pk')
+        .values_list('pk', 'company_id')[:limit * 5]
+    )
+
+    claimed, companies = [], set()
+    for pk, company_id in candidates:
+        if company_id is not None and company_id in companies:
+            continue
+        # Optimistic lock: only one worker turns a pending row into running
+        if Job.objects.filter(pk=pk, status=Job.STATUS_PENDING).update(
+            status=Job.STATUS_RUNNING, locked_at=now, locked_by=worker,
+        ):
+            claimed.append(pk)
+            companies.add(company_id)
+        if len(claimed) >= limit:
+            break
+    return list(Job.objects.filter(pk__in=claimed).order_by('pk'))
+
+
+def execute(job):
+    """Run one claimed job and record the outcome; returns True on success"""
+    from core.models import Job
+
+    job.attempts += 1
+    handler = HANDLERS.get(job.name)
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for job {job.name}')
+        with transaction.atomic():
+            handler(job.payload)
+    except Exception as e:
+        job.last_error = f'{e}\n{traceback.format_exc()}'[-4000:]
+        job.locked_at, job.locked_by = None, ''
+        if job.attempts >= job.max_attempts or handler is None:
+            job.status = Job.STATUS_FAILED
+            job.finished_at = timezone.now()
+            logger.error(f"Job {job.pk} {job.name} failed for good after {job.attempts} attempt(s): {e}")
+        else:
+            job.status = Job.STATUS_PENDING
+            job.run_after = timezone.now() + timedelta(seconds=backoff(job.attempts))
+            logger.warning(f"Job {job.pk} {job.name} attempt {job.attempts} failed, retrying at {job.run_after}: {e}")
+        job.save(update_fields=['attempts', 'status', 'run_after', 'last_error', 'locked_at', 'locked_by', 'finished_at'])
+        return False
+
+    job.status = Job.STATUS_DONE
+    job.finished_at = timezone.now()
+    job.locked_at, job.locked_by = None, ''
+    job.save(update_fields=['attempts', 'status', 'finished_at', 'locked_at', 'locked_by'])
+    return True
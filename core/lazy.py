@@ -0,0 +1,21 @@
+# core/lazy.py
+"""
+Deferred URLconf loading.
+
+``include('app.urls')`` imports the module (and every view, serializer and
+filter it pulls in) as soon as the root URLconf is loaded. ``lazy_include``
+hands Django the dotted path instead; ``URLResolver`` only imports it when a
+request first resolves under that prefix or something calls ``reverse()``
+into it. Use it for rarely hit sections such as reports and the admin.
+"""
+
+
+def lazy_include(urlconf_module, app_name=None, namespace=None):
+    """
+    Usage:
+        path('reports/', lazy_include('reports.urls')),
+        path('admin/', lazy_include('inventory_api.admin_urls', app_name='admin', namespace='admin')),
+    """
+    if not isinstance(urlconf_module, str):
+        raise TypeError('lazy_include() expects a dotted module path')
+    return (urlconf_module, app_name, namespace or app_name)
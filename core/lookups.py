@@ -0,0 +1,158 @@
+# core/lookups.py
+"""
+Lookup (dropdown) data for form screens: compact ``[id, label, extra]`` rows.
+
+    GET /api/lookups/customers/?q=ra&limit=20
+    GET /api/lookups/?entities=accounts,products,sale-modes
+
+Every registered entity has a per-company ``LookupVersion`` that the
+post_save/post_delete handlers below bump when one of its rows is written
+(saves whose ``update_fields`` touch none of the lookup's columns, such as
+stock updates, are ignored). ``bulk_create()``, ``bulk_update()``,
+``queryset.update()`` and raw SQL skip those signals: code writing lookup
+rows that way calls ``bump()`` or ``bump_rows()`` afterwards (the demo data
+generator, the repair framework and the admin activate/deactivate actions
+do), otherwise the cached lists stay stale until they expire. Responses are cached under
+(entity, company, version, q, limit) and the same key is the ETag, so a
+revalidation with ``If-None-Match`` costs one version query and no
+serialization. A stale entry is never read again once the version moves;
+the cache timeout only reclaims memory.
+"""
+import hashlib
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class Lookup:
+    """How one entity is listed: label column, prefix-searched columns, extra columns, base filters"""
+
+    def __init__(self, model, label='name', search=None, extra=(), filters=None):
+        self.model_label = model
+        self.label = label
+        self.search = tuple(search or (label,))
+        self.extra = tuple(extra)
+        self.filters = filters or {}
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def watched_fields(self):
+        """Columns whose change must invalidate the lookup"""
+        fields = {self.label, 'company', 'company_id', *self.search, *self.extra, *self.filters}
+        return fields | {name[:-3] for name in fields if name.endswith('_id')}
+
+    def rows(self, company_id, prefix=None, limit=DEFAULT_LIMIT):
+        queryset = self.model.objects.filter(company_id=company_id, **self.filters)
+        if prefix:
+            match = Q()
+            for field in self.search:
+                match |= Q(**{f'{field}__istartswith': prefix})
+            queryset = queryset.filter(match)
+
+        values = queryset.order_by(self.label, 'pk').values_list('pk', self.label, *self.extra)[:limit]
+        return [[pk, label, dict(zip(self.extra, rest))] for pk, label, *rest in values]
+
+
+LOOKUPS = {
+    'customers': Lookup('customers.Customer', search=('name', 'phone'), extra=('phone', 'client_no'), filters={'is_active': True}),
+    'suppliers': Lookup('suppliers.Supplier', search=('name', 'phone', 'shop_name'), extra=('phone', 'shop_name'), filters={'is_active': True}),
+    'accounts': Lookup('accounts.Account', search=('name', 'ac_no'), extra=('ac_type', 'ac_no'), filters={'is_active': True}),
+    'products': Lookup('products.Product', search=('name', 'sku'), extra=('sku', 'unit_id', 'selling_price'), filters={'is_active': True}),
+    'categories': Lookup('products.Category', filters={'is_active': True}),
+    'brands': Lookup('products.Brand', filters={'is_active': True}),
+    'units': Lookup('products.Unit', search=('name', 'code'), extra=('code',), filters={'is_active': True}),
+    'expense-heads': Lookup('expenses.ExpenseHead', filters={'is_active': True}),
+    'sale-modes': Lookup('products.SaleMode', search=('name', 'code'), extra=('code', 'base_unit_id', 'conversion_factor', 'price_type'), filters={'is_active': True}),
+}
+
+
+def get_lookup(entity):
+    return LOOKUPS.get(entity)
+
+
+def parse_limit(value):
+    try:
+        return max(1, min(int(value), MAX_LIMIT))
+    except (TypeError, ValueError):
+        return DEFAULT_LIMIT
+
+
+def cache_key(company_id, entity, version, prefix, limit):
+    return f'lookup:{company_id}:{entity}:{version}:{limit}:{(prefix or "").lower()}'
+
+
+def etag_for(keys):
+    """Strong ETag over the cache keys of every entity in the response"""
+    digest = hashlib.sha1('|'.join(keys).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def cached_rows(key, lookup, company_id, prefix, limit):
+    rows = cache.get(key)
+    if rows is None:
+        rows = lookup.rows(company_id, prefix=prefix, limit=limit)
+        cache.set(key, rows, getattr(settings, 'LOOKUP_CACHE_TIMEOUT', 600))
+    return rows
+
+
+# -----------------------------
+# Version bumps
+# -----------------------------
+def _bump_on_write(entity, lookup):
+    def handler(sender, instance, update_fields=None, **kwargs):
+        company_id = getattr(instance, 'company_id', None)
+        if not company_id:
+            return
+        if update_fields and not set(update_fields) & lookup.watched_fields:
+            return
+
+        bump(company_id, entity)
+    return handler
+
+
+def bump(company_id, entity):
+    """Move one company's version of ``entity``: every cached list and ETag for it goes stale"""
+    from core.models import LookupVersion
+    try:
+        LookupVersion.bump(company_id, entity)
+    except Exception as e:
+        logger.error(f"Error bumping lookup version for {entity}: {e}")
+
+
+def entities_for(model, fields=None):
+    """Entities listing ``model`` whose columns include one of ``fields`` (any column when None)"""
+    return [
+        entity for entity, lookup in LOOKUPS.items()
+        if lookup.model_label == model._meta.label and (fields is None or set(fields) & lookup.watched_fields)
+    ]
+
+
+def bump_rows(queryset, fields=None):
+    """bump() after a bulk write of ``fields`` to ``queryset``: every lookup of its model, for every company it spans"""
+    entities = entities_for(queryset.model, fields)
+    if not entities:
+        return
+    for company_id in queryset.order_by().values_list('company_id', flat=True).distinct():
+        if company_id:
+            for entity in entities:
+                bump(company_id, entity)
+
+
+def connect_signals():
+    """Register version bumps for every lookup (string senders: no model imports at startup)"""
+    for entity, lookup in LOOKUPS.items():
+        handler = _bump_on_write(entity, lookup)
+        post_save.connect(handler, sender=lookup.model_label, weak=False, dispatch_uid=f'lookup-save-{entity}')
+        post_delete.connect(handler, sender=lookup.model_label, weak=False, dispatch_uid=f'lookup-delete-{entity}')
@@ -0,0 +1,60 @@
+# core/management/commands/audit_balances.py
+from django.core.management.base import BaseCommand, CommandError
+
+from core.audit import INVARIANTS, audit
+from core.models import Company
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconcile denormalized balances (sale dues, customer advances, supplier totals, '
+        'account balances, product stock, company counters) with one query per invariant and company; '
+        'mismatches are recorded as audit findings'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=str, help='Company id or code (default: all companies)')
+        parser.add_argument(
+            '--invariant', action='append', choices=sorted(INVARIANTS),
+            help='Invariant to check (repeatable; default: all)',
+        )
+        parser.add_argument('--fix', action='store_true', help='Rewrite drifted values of healable invariants')
+        parser.add_argument('--limit', type=int, default=10, help='Open findings to list per invariant and company')
+
+    def handle(self, *args, **options):
+        from core.models import AuditFinding
+
+        invariants = [INVARIANTS[name] for name in options['invariant'] or INVARIANTS]
+        total = 0
+
+        for company in self._get_companies(options['company']):
+            self.stdout.write(f'{company.name}:')
+            for invariant in invariants:
+                run = audit(company.pk, invariant, fix=options['fix'])
+                total += run.mismatches
+                line = f'  {invariant.name:<27} {run.checked:>7} checked {run.mismatches:>6} mismatched {run.duration_ms:>6}ms'
+                if run.healed:
+                    line += f' ({run.healed} fixed)'
+                self.stdout.write(self.style.WARNING(line) if run.mismatches else line)
+
+                findings = AuditFinding.objects.filter(
+                    company=company, invariant=invariant.name, resolved_at__isnull=True
+                ).order_by('object_id')[:options['limit']] if run.mismatches else []
+                for finding in findings:
+                    self.stdout.write(
+                        f'    {finding.object_label} {finding.field}: stored {finding.stored}, expected {finding.expected}'
+                    )
+
+        if total:
+            self.stdout.write(self.style.WARNING(f'{total} open finding(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No drift found'))
+
+    def _get_companies(self, value):
+        if value:
+            lookup = {'pk': int(value)} if value.isdigit() else {'company_code': value}
+            try:
+                return [Company.objects.get(**lookup)]
+            except Company.DoesNotExist:
+                raise CommandError(f'Company {value} not found')
+        return Company.objects.order_by('id')
@@ -0,0 +1,251 @@
+# core/management/commands/benchmark_endpoints.py
+import json
+import statistics
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.utils import timezone
+
+from core.models import Company
+from core.performance import record_queries
+
+User = get_user_model()
+
+DEFAULT_OUTPUT = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the key API endpoints (sales create, product list, barcode search, reports, dashboard) '
+        'against the current database and write the results to a JSON baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=str, help='Company id or code to benchmark (default: company with most sales)')
+        parser.add_argument('--username', type=str, help='User to authenticate as (default: first active admin of the company)')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per endpoint')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed runs per endpoint before measuring')
+        parser.add_argument('--only', nargs='*', help='Only run endpoints whose name contains one of these strings')
+        parser.add_argument('--output', type=str, default=str(DEFAULT_OUTPUT), help='Where to write the JSON results')
+        parser.add_argument('--compare', type=str, help='Baseline JSON to compare against')
+        parser.add_argument('--tolerance', type=float, default=20.0, help='Allowed median slowdown in percent before flagging')
+        parser.add_argument('--min-delta-ms', type=float, default=5.0, help='Ignore slowdowns smaller than this many milliseconds')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error when a regression is found')
+
+    def handle(self, *args, **options):
+        company = self._get_company(options['company'])
+        user = self._get_user(company, options['username'])
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+
+        endpoints = self._endpoints(company)
+        if options['only']:
+            endpoints = [e for e in endpoints if any(key in e['name'] for key in options['only'])]
+
+        self.stdout.write(f'Benchmarking {len(endpoints)} endpoints for {company.name} as {user.username}')
+        results = {}
+        for endpoint in endpoints:
+            results[endpoint['name']] = self._run(client, endpoint, options['warmup'], options['repeat'])
+            row = results[endpoint['name']]
+            self.stdout.write(
+                f"  {endpoint['name']:<28} {row['status']:>3}  median {row['wall_ms']['median']:>9.1f}ms  "
+                f"p95 {row['wall_ms']['p95']:>9.1f}ms  queries {row['queries']:>5}"
+            )
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'company': {'id': company.id, 'code': company.company_code},
+            'dataset': self._dataset_size(company),
+            'repeat': options['repeat'],
+            'endpoints': results,
+        }
+
+        output = Path(options['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2, default=str))
+        self.stdout.write(self.style.SUCCESS(f'Results written to {output}'))
+
+        if options['compare']:
+            regressions = self._compare(report, options['compare'], options['tolerance'], options['min_delta_ms'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} endpoint(s) regressed')
+
+    # --------------------------
+    # Setup
+    # --------------------------
+    def _get_company(self, value):
+        if value:
+            lookup = {'pk': int(value)} if value.isdigit() else {'company_code': value}
+            try:
+                return Company.objects.get(**lookup)
+            except Company.DoesNotExist:
+                raise CommandError(f'Company {value} not found')
+
+        company = Company.objects.annotate(sale_count=Count('sale')).order_by('-sale_count').first()
+        if not company:
+            raise CommandError('No companies found; run generate_erp_data first')
+        return company
+
+    def _get_user(self, company, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'User {username} not found')
+
+        user = (
+            User.objects.filter(company=company, is_active=True, role__in=[User.Role.ADMIN, User.Role.SUPER_ADMIN])
+            .order_by('id').first()
+        )
+        if not user:
+            raise CommandError(f'No active admin user for {company.name}; pass --username')
+        return user
+
+    def _endpoints(self, company):
+        from customers.models import Customer
+        from products.models import Product
+        from suppliers.models import Supplier
+
+        today = timezone.now().date()
+        period = {'start': (today - timedelta(days=365)).isoformat(), 'end': today.isoformat()}
+        product = Product.objects.filter(company=company, is_active=True).order_by('-stock_qty').first()
+        customer = Customer.objects.filter(company=company).order_by('id').first()
+        supplier = Supplier.objects.filter(company=company).order_by('id').first()
+
+        endpoints = [
+            {'name': 'product_list', 'method': 'get', 'path': '/api/products/'},
+            {'name': 'product_list_unpaginated', 'method': 'get', 'path': '/api/products/', 'data': {'no_pagination': 'true'}},
+            {'name': 'sale_list', 'method': 'get', 'path': '/api/sales/'},
+            {'name': 'customer_list', 'method': 'get', 'path': '/api/customers/'},
+            {'name': 'transaction_list', 'method': 'get', 'path': '/api/transactions/'},
+            {'name': 'dashboard_stats', 'method': 'get', 'path': '/api/dashboard/stats/'},
+            {'name': 'report_dashboard', 'method': 'get', 'path': '/api/reports/dashboard/'},
+        ]
+        for report in [
+            'sales', 'purchases', 'profit-loss', 'expenses', 'purchase-returns', 'sales-returns',
+            'top-products', 'low-stock', 'bad-stock', 'stock', 'supplier-due-advance', 'customer-due-advance',
+        ]:
+            endpoints.append({'name': f'report_{report}', 'method': 'get', 'path': f'/api/reports/{report}/', 'data': period})
+        if customer:
+            endpoints.append({
+                'name': 'report_customer-ledger', 'method': 'get', 'path': '/api/reports/customer-ledger/',
+                'data': dict(period, customer=customer.id),
+            })
+        if supplier:
+            endpoints.append({
+                'name': 'report_supplier-ledger', 'method': 'get', 'path': '/api/reports/supplier-ledger/',
+                'data': dict(period, supplier=supplier.id),
+            })
+        if product:
+            endpoints.append({
+                'name': 'barcode_search', 'method': 'get', 'path': '/api/products/barcode-search/',
+                'data': {'sku': product.sku},
+            })
+            endpoints.append({
+                'name': 'sale_create', 'method': 'post', 'path': '/api/sales/', 'write': True,
+                'data': {
+                    'customer_type': 'walk_in',
+                    'customer_name': 'Benchmark',
+                    'paid_amount': str(product.selling_price),
+                    'payment_method': 'cash',
+                    'items': [{'product_id': product.id, 'quantity': '1'}],
+                },
+            })
+        return endpoints
+
+    # --------------------------
+    # Measurement
+    # --------------------------
+    def _call(self, client, endpoint):
+        method = getattr(client, endpoint['method'])
+        if endpoint['method'] == 'get':
+            return method(endpoint['path'], endpoint.get('data') or {})
+        return method(endpoint['path'], json.dumps(endpoint.get('data') or {}), content_type='application/json')
+
+    def _timed_call(self, client, endpoint):
+        """Run one request; write endpoints are rolled back so the dataset stays unchanged"""
+        with transaction.atomic():
+            with record_queries() as recorder:
+                started = time.perf_counter()
+                response = self._call(client, endpoint)
+                elapsed = (time.perf_counter() - started) * 1000
+            if endpoint.get('write'):
+                transaction.set_rollback(True)
+        return response.status_code, elapsed, recorder.count
+
+    def _run(self, client, endpoint, warmup, repeat):
+        for _ in range(warmup):
+            self._timed_call(client, endpoint)
+
+        timings, queries, status_code = [], [], None
+        for _ in range(max(repeat, 1)):
+            status_code, elapsed, count = self._timed_call(client, endpoint)
+            timings.append(elapsed)
+            queries.append(count)
+
+        timings.sort()
+        return {
+            'method': endpoint['method'].upper(),
+            'path': endpoint['path'],
+            'status': status_code,
+            'wall_ms': {
+                'median': round(statistics.median(timings), 2),
+                'p95': round(timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))], 2),
+                'min': round(timings[0], 2),
+                'max': round(timings[-1], 2),
+            },
+            'queries': max(queries),
+        }
+
+    def _dataset_size(self, company):
+        from customers.models import Customer
+        from products.models import Product
+        from purchases.models import Purchase
+        from sales.models import Sale, SaleItem
+        from transactions.models import Transaction
+
+        return {
+            'products': Product.objects.filter(company=company).count(),
+            'customers': Customer.objects.filter(company=company).count(),
+            'sales': Sale.objects.filter(company=company).count(),
+            'sale_items': SaleItem.objects.filter(sale__company=company).count(),
+            'purchases': Purchase.objects.filter(company=company).count(),
+            'transactions': Transaction.objects.filter(company=company).count(),
+        }
+
+    def _compare(self, report, baseline_path, tolerance, min_delta_ms):
+        try:
+            baseline = json.loads(Path(baseline_path).read_text())
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read baseline {baseline_path}: {e}')
+
+        regressions = []
+        self.stdout.write(f'\nComparison against {baseline_path} (tolerance {tolerance:.0f}%):')
+        for name, current in report['endpoints'].items():
+            previous = baseline.get('endpoints', {}).get(name)
+            if not previous:
+                self.stdout.write(f'  {name:<28} new endpoint')
+                continue
+
+            before, after = previous['wall_ms']['median'], current['wall_ms']['median']
+            change = ((after - before) / before * 100) if before else 0.0
+            slower = change > tolerance and (after - before) >= min_delta_ms
+            more_queries = current['queries'] > previous['queries']
+            line = (
+                f"  {name:<28} {before:>9.1f}ms -> {after:>9.1f}ms ({change:+.0f}%)  "
+                f"queries {previous['queries']} -> {current['queries']}"
+            )
+            if slower or more_queries:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line + '  REGRESSION'))
+            else:
+                self.stdout.write(line)
+        return regressions
@@ -0,0 +1,152 @@
+# core/management/commands/explain_endpoints.py
+import json
+import re
+from pathlib import Path
+
+from django.db import connection, transaction
+
+from core.performance import fingerprint_sql
+
+from .benchmark_endpoints import Command as BenchmarkCommand
+
+# Plan lines that read a whole table, per backend: (pattern, group holding the table name)
+FULL_SCAN_PATTERNS = {
+    # SQLite: "SCAN sales_sale" (a SCAN ... USING INDEX walks an index instead, e.g. for ORDER BY)
+    'sqlite': re.compile(r'^SCAN (?:TABLE )?(\w+)(?! USING (?:COVERING )?INDEX)(?: AS \w+)?$'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Replay the endpoints of benchmark_endpoints, run EXPLAIN (EXPLAIN QUERY PLAN on SQLite) '
+        'for every distinct SELECT they issue and report the full table scans, largest tables first'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=str, help='Company id or code (default: company with most sales)')
+        parser.add_argument('--username', type=str, help='User to authenticate as (default: first active admin of the company)')
+        parser.add_argument('--only', nargs='*', help='Only run endpoints whose name contains one of these strings')
+        parser.add_argument('--min-rows', type=int, default=1000, help='Ignore scans of tables with fewer rows')
+        parser.add_argument('--plans', action='store_true', help='Print the full plan of every query with a scan')
+        parser.add_argument('--output', type=str, help='Also write the findings to this JSON file')
+
+    def handle(self, *args, **options):
+        from django.test import Client
+
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.stderr.write(self.style.WARNING(f'No scan detection for {connection.vendor}; plans are printed as-is'))
+
+        company = self._get_company(options['company'])
+        user = self._get_user(company, options['username'])
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+
+        endpoints = self._endpoints(company)
+        if options['only']:
+            endpoints = [e for e in endpoints if any(key in e['name'] for key in options['only'])]
+
+        self.stdout.write(f'Explaining {len(endpoints)} endpoints for {company.name} as {user.username}')
+        self._row_counts = {}
+        # Plans also scan subqueries and CTEs; only real tables are reported
+        self._tables = set(connection.introspection.table_names())
+        findings, seen = [], set()
+        for endpoint in endpoints:
+            queries = self._capture(client, endpoint)
+            scans = []
+            for sql, params in queries:
+                key = fingerprint_sql(sql)
+                if key in seen:
+                    continue
+                seen.add(key)
+                plan = self._explain(sql, params)
+                tables = sorted({m.group(1) for line in plan for m in [pattern.search(line)] if m}) if pattern else []
+                tables = [t for t in tables if t in self._tables and self._rows(t) >= options['min_rows']]
+                if tables or (options['plans'] and pattern is None):
+                    scans.append({'tables': tables, 'rows': {t: self._rows(t) for t in tables}, 'sql': key, 'plan': plan})
+
+            findings.extend(dict(scan, endpoint=endpoint['name']) for scan in scans)
+            line = f"  {endpoint['name']:<28} {len(queries):>4} queries  {len(scans):>3} with full scans"
+            self.stdout.write(self.style.WARNING(line) if scans else line)
+            for scan in scans:
+                tables = ', '.join(f"{table} ({scan['rows'][table]} rows)" for table in scan['tables'])
+                self.stdout.write(f"      {tables}: {scan['sql'][:160]}")
+                if options['plans']:
+                    for plan_line in scan['plan']:
+                        self.stdout.write(f'          {plan_line}')
+
+        by_table = {}
+        for finding in findings:
+            for table in finding['tables']:
+                by_table.setdefault(table, set()).add(finding['endpoint'])
+        if by_table:
+            self.stdout.write('\nFull scans by table:')
+            for table in sorted(by_table, key=lambda t: -self._rows(t)):
+                self.stdout.write(f'  {table:<36} {self._rows(table):>9} rows  {", ".join(sorted(by_table[table]))}')
+        else:
+            self.stdout.write(self.style.SUCCESS('No full scans above the row threshold'))
+
+        if options['output']:
+            output = Path(options['output'])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps({'database': connection.vendor, 'findings': findings}, indent=2, default=str))
+            self.stdout.write(f'Findings written to {output}')
+
+    def _endpoints(self, company):
+        """The benchmark endpoints plus the due and receipt lists, which filter on more than company and date"""
+        from customers.models import Customer
+        from suppliers.models import Supplier
+
+        endpoints = super()._endpoints(company)
+        endpoints.append({'name': 'sale_list_due', 'method': 'get', 'path': '/api/sales/', 'data': {'due_only': 'true'}})
+        endpoints.append({'name': 'sales_returns', 'method': 'get', 'path': '/api/sales-returns/'})
+        endpoints.append({'name': 'purchase_returns', 'method': 'get', 'path': '/api/purchase-returns/'})
+        customer = Customer.objects.filter(company=company).order_by('id').first()
+        supplier = Supplier.objects.filter(company=company).order_by('id').first()
+        if customer:
+            endpoints.append({'name': 'due_sales', 'method': 'get', 'path': '/api/due/', 'data': {'customer_id': customer.id}})
+        if supplier:
+            endpoints.append({
+                'name': 'due_purchases', 'method': 'get', 'path': '/api/purchase-due/', 'data': {'supplier_id': supplier.id},
+            })
+        return endpoints
+
+    # --------------------------
+    # Capture and explain
+    # --------------------------
+    def _capture(self, client, endpoint):
+        """SELECTs issued by one request, in order; writes are rolled back"""
+        queries = []
+
+        def recorder(execute, sql, params, many, context):
+            if not many and sql.lstrip().upper().startswith('SELECT'):
+                queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with transaction.atomic():
+            with connection.execute_wrapper(recorder):
+                self._call(client, endpoint)
+            transaction.set_rollback(True)
+        return queries
+
+    def _explain(self, sql, params):
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                rows = cursor.fetchall()
+        except Exception as e:
+            return [f'EXPLAIN failed: {e}']
+        # SQLite rows are (id, parent, notused, detail); other backends return one text column
+        return [str(row[-1]) for row in rows]
+
+    def _rows(self, table):
+        if table not in self._row_counts:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                    self._row_counts[table] = cursor.fetchone()[0]
+            except Exception:
+                self._row_counts[table] = 0
+        return self._row_counts[table]
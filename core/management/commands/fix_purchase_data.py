@@ -1,42 +1,34 @@
-# Create this as management command: fix_purchase_data.py
-from django.core.management.base import BaseCommand
-from purchases.models import Purchase
+# core/management/commands/fix_purchase_data.py
 from decimal import Decimal
 
-class Command(BaseCommand):
-    help = 'Fix purchase due_amount inconsistencies'
-    
-    def handle(self, *args, **options):
-        self.stdout.write("🔧 Fixing purchase due_amount inconsistencies...")
-        
-        # Fix all purchases where due_amount doesn't match calculation
-        purchases = Purchase.objects.all()
-        fixed_count = 0
-        
-        for purchase in purchases:
-            expected_due = max(Decimal('0.00'), purchase.grand_total - purchase.paid_amount)
-            
-            if purchase.due_amount != expected_due:
-                self.stdout.write(
-                    f"Fixing purchase {purchase.invoice_no}: "
-                    f"due_amount {purchase.due_amount} → {expected_due}"
-                )
-                
-                # Use direct update to avoid signals
-                Purchase.objects.filter(pk=purchase.pk).update(
-                    due_amount=expected_due,
-                    change_amount=max(Decimal('0.00'), purchase.paid_amount - purchase.grand_total)
-                )
-                fixed_count += 1
-        
-        self.stdout.write(
-            self.style.SUCCESS(f"SUCCESS: Fixed {fixed_count} purchase records")
+from core.repair import RepairCommand, RepairJob
+
+
+class PurchaseDueRepair(RepairJob):
+    """due_amount/change_amount must follow grand_total and paid_amount"""
+    name = 'purchases.due_amounts'
+    model = 'purchases.Purchase'
+    fields = ('due_amount', 'change_amount')
+
+    def get_queryset(self, company_id):
+        return super().get_queryset(company_id).only(
+            'id', 'invoice_no', 'grand_total', 'paid_amount', 'due_amount', 'change_amount'
         )
-        
-        # Also update all supplier totals
-        from suppliers.models import Supplier
-        Supplier.recalculate_all_supplier_totals()
-        
-        self.stdout.write(
-            self.style.SUCCESS("SUCCESS: Updated all supplier totals")
-        )
\ No newline at end of file
+
+    def fix(self, purchase, state):
+        purchase.due_amount = max(Decimal('0.00'), purchase.grand_total - purchase.paid_amount)
+        purchase.change_amount = max(Decimal('0.00'), purchase.paid_amount - purchase.grand_total)
+
+    def label(self, purchase):
+        return purchase.invoice_no or f'#{purchase.pk}'
+
+    def finish(self, company_id, result, dry_run):
+        # bulk_update skips the supplier delta signals: rebuild the company's totals in one UPDATE
+        if result.changed and company_id and not dry_run:
+            from suppliers.models import Supplier
+            Supplier.recalculate_all_supplier_totals(company=company_id)
+
+
+class Command(RepairCommand):
+    help = 'Fix purchase due_amount/change_amount inconsistencies and refresh supplier totals'
+    jobs = [PurchaseDueRepair]
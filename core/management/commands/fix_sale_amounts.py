@@ -1,54 +1,22 @@
-from django.core.management.base import BaseCommand
-from sales.models import Sale
-from decimal import Decimal, InvalidOperation
+# core/management/commands/fix_sale_amounts.py
+from decimal import Decimal
 
-class Command(BaseCommand):
-    help = 'FINAL FIX: Clean up all sales data'
+from core.repair import RepairCommand
 
-    def handle(self, *args, **options):
-        self.stdout.write('🔧 FINAL FIX: Cleaning sales data...')
-        
-        sales = Sale.objects.all()
-        fixed_count = 0
-        
-        for sale in sales:
-            try:
-                # Reset all amounts to safe values
-                sale.gross_total = Decimal('0.00')
-                sale.net_total = Decimal('0.00')
-                sale.grand_total = Decimal('0.00')
-                sale.payable_amount = Decimal('0.00')
-                sale.paid_amount = Decimal('0.00')
-                sale.due_amount = Decimal('0.00')
-                sale.change_amount = Decimal('0.00')
-                sale.overall_discount = Decimal('0.00')
-                sale.overall_delivery_charge = Decimal('0.00')
-                sale.overall_service_charge = Decimal('0.00')
-                sale.overall_vat_amount = Decimal('0.00')
-                
-                # Recalculate from items
-                items = sale.items.all()
-                if items.exists():
-                    gross = sum([item.subtotal() for item in items])
-                    sale.gross_total = gross
-                    sale.grand_total = gross
-                    sale.payable_amount = gross
-                    sale.due_amount = max(gross - sale.paid_amount, Decimal('0.00'))
-                
-                # Update payment status
-                if sale.paid_amount >= sale.payable_amount:
-                    sale.payment_status = 'paid'
-                    sale.due_amount = Decimal('0.00')
-                elif sale.paid_amount > Decimal('0.00'):
-                    sale.payment_status = 'partial'
-                else:
-                    sale.payment_status = 'pending'
-                
-                sale.save()
-                fixed_count += 1
-                self.stdout.write(f'SUCCESS: Fixed sale {sale.invoice_no}')
-                
-            except Exception as e:
-                self.stdout.write(f'ERROR:Error fixing {sale.invoice_no}: {e}')
-        
-        self.stdout.write(f'🎉 Fixed {fixed_count} sales!')
\ No newline at end of file
+from .fix_all_sales import SALE_DECIMAL_FIELDS, SaleDecimalRepair, SaleItemDecimalRepair, SaleTotalsRepair
+
+
+class SaleAmountsResetRepair(SaleTotalsRepair):
+    """Drop charges, discounts and payments and rebuild every sale from its items alone"""
+    name = 'sales.reset_amounts'
+    fields = SALE_DECIMAL_FIELDS + ('payment_status',)
+
+    def fix(self, sale, state):
+        for name in SALE_DECIMAL_FIELDS:
+            setattr(sale, name, Decimal('0.00'))
+        sale.compute_totals()
+
+
+class Command(RepairCommand):
+    help = 'FINAL FIX: reset sale charges and payments and recompute every sale from its items'
+    jobs = [SaleItemDecimalRepair, SaleDecimalRepair, SaleAmountsResetRepair]
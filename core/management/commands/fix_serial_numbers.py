@@ -1,263 +1,93 @@
 # core/management/commands/fix_serial_numbers.py
+import itertools
 
-from django.core.management.base import BaseCommand
-from django.db import transaction, connection
-from sales.models import Sale
-from purchases.models import Purchase
-from money_receipts.models import MoneyReceipt
-from expenses.models import Expense
-from core.models import Company
-import logging
-from django.db import models
-from django.db import connection
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Cast, Concat
 
-logger = logging.getLogger(__name__)
+from core.repair import RepairCommand, RepairJob
+
+FIRST_NUMBER = 1001
+
+
+class SerialNumberRepair(RepairJob):
+    """
+    Renumber ``field`` as <prefix>-1001, -1002, ... in id order. Unless the
+    numbers are already in sequence, a fresh run first parks them all on a
+    unique placeholder in one UPDATE, so chunks never collide with numbers
+    that are still to be reassigned.
+    """
+    field = None
+    prefix = None
+
+    @property
+    def fields(self):
+        return (self.field,)
+
+    def initial_state(self, company_id):
+        return {'next': FIRST_NUMBER}
+
+    def prepare(self, company_id):
+        numbers = self.get_queryset(company_id).order_by('pk').values_list(self.field, flat=True)
+        expected = (f'{self.prefix}-{number}' for number in itertools.count(FIRST_NUMBER))
+        if all(number == next(expected) for number in numbers.iterator()):
+            return
+
+        placeholder = Concat(Value('TMP-'), Cast(F('pk'), output_field=CharField()))
+        self.get_queryset(company_id).update(**{self.field: placeholder})
+
+    def get_queryset(self, company_id):
+        return super().get_queryset(company_id).only('id', self.field)
+
+    def fix(self, obj, state):
+        setattr(obj, self.field, f"{self.prefix}-{state['next']}")
+        state['next'] += 1
+
+
+class SaleNumberRepair(SerialNumberRepair):
+    name = 'sales.invoice_no'
+    model = 'sales.Sale'
+    field = 'invoice_no'
+    prefix = 'SL'
+
+
+class PurchaseNumberRepair(SerialNumberRepair):
+    name = 'purchases.invoice_no'
+    model = 'purchases.Purchase'
+    field = 'invoice_no'
+    prefix = 'PO'
+
+
+class ExpenseNumberRepair(SerialNumberRepair):
+    name = 'expenses.invoice_number'
+    model = 'expenses.Expense'
+    field = 'invoice_number'
+    prefix = 'EXP'
+
+
+class ReceiptNumberRepair(SerialNumberRepair):
+    # mr_no is unique across companies, so receipts share one sequence
+    name = 'money_receipts.mr_no'
+    model = 'money_receipts.MoneyReceipt'
+    field = 'mr_no'
+    prefix = 'MR'
+    per_company = False
+
+
+class Command(RepairCommand):
+    help = 'Reset sale, purchase and expense numbers to start from 1001 for each company (money receipts: one sequence)'
+    jobs = [SaleNumberRepair, PurchaseNumberRepair, ExpenseNumberRepair, ReceiptNumberRepair]
 
-class Command(BaseCommand):
-    help = 'Reset all serial numbers to start from 1001 for each company'
-    
     def handle(self, *args, **options):
-        self.stdout.write("🔄 Resetting all serial numbers...")
-        
-        try:
-            with transaction.atomic():
-                # Use direct SQL to avoid model save methods and constraints
-                self.fix_with_sql()
-                
-            self.stdout.write(self.style.SUCCESS("SUCCESS: All serial numbers reset successfully!"))
-            
-            # Verify the results
-            self.verify_serial_numbers()
-            
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"ERROR:Error: {str(e)}"))
-            logger.error(f"Error resetting serial numbers: {str(e)}")
-    
-    def fix_with_sql(self):
-        """Use raw SQL to reset serial numbers and avoid constraints"""
-        self.stdout.write("🔄 Using SQL approach to avoid constraints...")
-        
-        # Get database vendor
-        vendor = connection.vendor
-        
-        if vendor == 'sqlite':
-            self.fix_sqlite()
-        elif vendor == 'postgresql':
-            self.fix_postgresql()
-        else:
-            self.fix_generic()
-    
-    def fix_sqlite(self):
-        """Fix for SQLite database"""
-        with connection.cursor() as cursor:
-            # Disable foreign keys temporarily
-            cursor.execute("PRAGMA foreign_keys=OFF")
-            
-            # Reset Money Receipts
-            self.stdout.write("🔄 Fixing Money Receipts...")
-            cursor.execute("""
-                UPDATE money_receipts_moneyreceipt 
-                SET mr_no = 'MR-' || (
-                    1000 + (
-                        SELECT COUNT(*) 
-                        FROM money_receipts_moneyreceipt m2 
-                        WHERE m2.company_id = money_receipts_moneyreceipt.company_id 
-                        AND m2.id <= money_receipts_moneyreceipt.id
-                    )
-                )
-            """)
-            
-            # Reset Sales
-            self.stdout.write("🔄 Fixing Sales...")
-            cursor.execute("""
-                UPDATE sales_sale 
-                SET invoice_no = 'SL-' || (
-                    1000 + (
-                        SELECT COUNT(*) 
-                        FROM sales_sale s2 
-                        WHERE s2.company_id = sales_sale.company_id 
-                        AND s2.id <= sales_sale.id
-                    )
-                )
-            """)
-            
-            # Reset Purchases
-            self.stdout.write("🔄 Fixing Purchases...")
-            cursor.execute("""
-                UPDATE purchases_purchase 
-                SET invoice_no = 'PO-' || (
-                    1000 + (
-                        SELECT COUNT(*) 
-                        FROM purchases_purchase p2 
-                        WHERE p2.company_id = purchases_purchase.company_id 
-                        AND p2.id <= purchases_purchase.id
-                    )
-                )
-            """)
-            
-            # Reset Expenses
-            self.stdout.write("🔄 Fixing Expenses...")
-            cursor.execute("""
-                UPDATE expenses_expense 
-                SET invoice_number = 'EXP-' || (
-                    1000 + (
-                        SELECT COUNT(*) 
-                        FROM expenses_expense e2 
-                        WHERE e2.company_id = expenses_expense.company_id 
-                        AND e2.id <= expenses_expense.id
-                    )
-                )
-            """)
-            
-            # Re-enable foreign keys
-            cursor.execute("PRAGMA foreign_keys=ON")
-    
-    def fix_postgresql(self):
-        """Fix for PostgreSQL database"""
-        with connection.cursor() as cursor:
-            # Reset Money Receipts
-            self.stdout.write("🔄 Fixing Money Receipts...")
-            cursor.execute("""
-                UPDATE money_receipts_moneyreceipt 
-                SET mr_no = 'MR-' || (1000 + row_number)
-                FROM (
-                    SELECT id, ROW_NUMBER() OVER (PARTITION BY company_id ORDER BY id) as row_number
-                    FROM money_receipts_moneyreceipt
-                ) AS numbered
-                WHERE money_receipts_moneyreceipt.id = numbered.id
-            """)
-            
-            # Reset Sales
-            self.stdout.write("🔄 Fixing Sales...")
-            cursor.execute("""
-                UPDATE sales_sale 
-                SET invoice_no = 'SL-' || (1000 + row_number)
-                FROM (
-                    SELECT id, ROW_NUMBER() OVER (PARTITION BY company_id ORDER BY id) as row_number
-                    FROM sales_sale
-                ) AS numbered
-                WHERE sales_sale.id = numbered.id
-            """)
-            
-            # Reset Purchases
-            self.stdout.write("🔄 Fixing Purchases...")
-            cursor.execute("""
-                UPDATE purchases_purchase 
-                SET invoice_no = 'PO-' || (1000 + row_number)
-                FROM (
-                    SELECT id, ROW_NUMBER() OVER (PARTITION BY company_id ORDER BY id) as row_number
-                    FROM purchases_purchase
-                ) AS numbered
-                WHERE purchases_purchase.id = numbered.id
-            """)
-            
-            # Reset Expenses
-            self.stdout.write("🔄 Fixing Expenses...")
-            cursor.execute("""
-                UPDATE expenses_expense 
-                SET invoice_number = 'EXP-' || (1000 + row_number)
-                FROM (
-                    SELECT id, ROW_NUMBER() OVER (PARTITION BY company_id ORDER BY id) as row_number
-                    FROM expenses_expense
-                ) AS numbered
-                WHERE expenses_expense.id = numbered.id
-            """)
-    
-    def fix_generic(self):
-        """Generic fix for other databases"""
-        companies = Company.objects.all()
-        
-        for company in companies:
-            self.stdout.write(f"🔄 Processing {company.name}...")
-            
-            # Fix Money Receipts
-            receipts = MoneyReceipt.objects.filter(company=company).order_by('id')
-            counter = 1001
-            for receipt in receipts:
-                MoneyReceipt.objects.filter(pk=receipt.pk).update(mr_no=f"MR-{counter}")
-                counter += 1
-            
-            # Fix Sales
-            sales = Sale.objects.filter(company=company).order_by('id')
-            counter = 1001
-            for sale in sales:
-                Sale.objects.filter(pk=sale.pk).update(invoice_no=f"SL-{counter}")
-                counter += 1
-            
-            # Fix Purchases
-            purchases = Purchase.objects.filter(company=company).order_by('id')
-            counter = 1001
-            for purchase in purchases:
-                Purchase.objects.filter(pk=purchase.pk).update(invoice_no=f"PO-{counter}")
-                counter += 1
-            
-            # Fix Expenses
-            expenses = Expense.objects.filter(company=company).order_by('id')
-            counter = 1001
-            for expense in expenses:
-                Expense.objects.filter(pk=expense.pk).update(invoice_number=f"EXP-{counter}")
-                counter += 1
-    
-    def verify_serial_numbers(self):
-        """Verify that serial numbers were reset correctly"""
-        self.stdout.write("\n🔍 Verifying serial numbers...")
-        
-        companies = Company.objects.all()
-        
-        for company in companies:
-            self.stdout.write(f"\n=== {company.name} ===")
-            
-            # Check counts and ranges
-            sales = Sale.objects.filter(company=company)
-            purchases = Purchase.objects.filter(company=company)
-            receipts = MoneyReceipt.objects.filter(company=company)
-            expenses = Expense.objects.filter(company=company)
-            
-            self.stdout.write(f"Sales: {sales.count()} records")
-            if sales.exists():
-                first_sale = sales.order_by('invoice_no').first()
-                last_sale = sales.order_by('invoice_no').last()
-                self.stdout.write(f"  Range: {first_sale.invoice_no} to {last_sale.invoice_no}")
-            
-            self.stdout.write(f"Purchases: {purchases.count()} records")
-            if purchases.exists():
-                first_purchase = purchases.order_by('invoice_no').first()
-                last_purchase = purchases.order_by('invoice_no').last()
-                self.stdout.write(f"  Range: {first_purchase.invoice_no} to {last_purchase.invoice_no}")
-            
-            self.stdout.write(f"Money Receipts: {receipts.count()} records")
-            if receipts.exists():
-                first_receipt = receipts.order_by('mr_no').first()
-                last_receipt = receipts.order_by('mr_no').last()
-                self.stdout.write(f"  Range: {first_receipt.mr_no} to {last_receipt.mr_no}")
-            
-            self.stdout.write(f"Expenses: {expenses.count()} records")
-            if expenses.exists():
-                first_expense = expenses.order_by('invoice_number').first()
-                last_expense = expenses.order_by('invoice_number').last()
-                self.stdout.write(f"  Range: {first_expense.invoice_number} to {last_expense.invoice_number}")
-            
-            # Check for duplicates
-            self.check_duplicates(company)
-    
-    def check_duplicates(self, company):
-        """Check for duplicate serial numbers"""
-        # Check Money Receipt duplicates
-        receipt_duplicates = MoneyReceipt.objects.filter(
-            company=company
-        ).values('mr_no').annotate(
-            count=models.Count('id')
-        ).filter(count__gt=1)
-        
-        if receipt_duplicates.exists():
-            self.stdout.write(self.style.WARNING(f"  ⚠️  Money Receipt duplicates: {list(receipt_duplicates)}"))
-        
-        # Check Sales duplicates
-        sale_duplicates = Sale.objects.filter(
-            company=company
-        ).values('invoice_no').annotate(
-            count=models.Count('id')
-        ).filter(count__gt=1)
-        
-        if sale_duplicates.exists():
-            self.stdout.write(self.style.WARNING(f"  ⚠️  Sales duplicates: {list(sale_duplicates)}"))
\ No newline at end of file
+        super().handle(*args, **options)
+        if not options['dry_run']:
+            self.check_duplicates()
+
+    def check_duplicates(self):
+        for job in self.jobs:
+            model = job().get_model()
+            group_by = [job.field] + (['company_id'] if job.per_company else [])
+            duplicates = (
+                model.objects.values(*group_by).annotate(count=Count('id')).filter(count__gt=1).order_by()[:10]
+            )
+            if duplicates:
+                self.stdout.write(self.style.WARNING(f'{job.name} duplicates: {list(duplicates)}'))
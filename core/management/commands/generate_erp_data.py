@@ -0,0 +1,548 @@
+# core/management/commands/generate_erp_data.py
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core import lookups
+from core.models import Company
+from accounts.models import Account
+from customers.models import Customer
+from suppliers.models import Supplier
+from products.models import Category, Brand, Unit, SaleMode, ProductSaleMode, Product
+from purchases.models import Purchase, PurchaseItem
+from sales.models import Sale, SaleItem
+from money_receipts.models import MoneyReceipt
+from returns.models import SalesReturn, SalesReturnItem, PurchaseReturn, PurchaseReturnItem
+from expenses.models import ExpenseHead, ExpenseSubHead, Expense
+from transactions.models import Transaction
+
+User = get_user_model()
+
+TWO_PLACES = Decimal('0.01')
+BATCH_SIZE = 1000
+
+# (code suffix, name, conversion factor, price type)
+SALE_MODES = [
+    ('PCS', 'Piece', Decimal('1.000'), 'unit'),
+    ('DZN', 'Dozen', Decimal('12.000'), 'unit'),
+    ('BOX', 'Box', Decimal('24.000'), 'flat'),
+]
+
+
+def money(value):
+    return Decimal(value).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+@contextmanager
+def backdated(*fields):
+    """Temporarily disable auto_now/auto_now_add so bulk inserts keep historical dates"""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    try:
+        for field, _, _ in saved:
+            field.auto_now = field.auto_now_add = False
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate synthetic ERP companies with transactional volume (products, customers, '
+        'suppliers, sales, purchases, receipts, returns, expenses) using bulk inserts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=1, help='Number of companies to create')
+        parser.add_argument('--products', type=int, default=500, help='Products per company')
+        parser.add_argument('--customers', type=int, default=200, help='Customers per company')
+        parser.add_argument('--suppliers', type=int, default=30, help='Suppliers per company')
+        parser.add_argument('--sales', type=int, default=2000, help='Sales per company')
+        parser.add_argument('--max-items', type=int, default=6, help='Maximum lines per sale/purchase')
+        parser.add_argument('--purchases', type=int, default=300, help='Purchases per company')
+        parser.add_argument('--receipts', type=int, default=400, help='Standalone money receipts per company')
+        parser.add_argument('--returns', type=int, default=100, help='Sales and purchase returns per company (each)')
+        parser.add_argument('--expenses', type=int, default=300, help='Expenses per company')
+        parser.add_argument('--days', type=int, default=365, help='Spread documents over this many past days')
+        parser.add_argument('--prefix', type=str, default='Bench', help='Company name prefix')
+        parser.add_argument('--password', type=str, default='bench12345', help='Password for generated admin users')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible data')
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Allow running with DEBUG=False (never point this at production data)',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('Refusing to generate synthetic data with DEBUG=False; pass --force to override.')
+
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.now = timezone.now()
+
+        started = time.perf_counter()
+        for index in range(options['companies']):
+            company_started = time.perf_counter()
+            with transaction.atomic():
+                company = self._generate_company(index)
+            self.stdout.write(self.style.SUCCESS(
+                f'Generated {company.name} ({company.company_code}) in {time.perf_counter() - company_started:.1f}s'
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {options["companies"]} companies in {time.perf_counter() - started:.1f}s'
+        ))
+
+    # --------------------------
+    # Company setup
+    # --------------------------
+    def _generate_company(self, index):
+        opts = self.options
+        suffix = f'{int(time.time())}{index:03d}'
+        company = Company.objects.create(
+            name=f'{opts["prefix"]} {suffix}',
+            plan_type=Company.PlanType.PREMIUM,
+            max_users=50,
+            max_products=max(opts['products'] * 2, 1000),
+            max_branches=10,
+        )
+        admin = User.objects.create_user(
+            username=f'{opts["prefix"].lower()}_{suffix}',
+            password=opts['password'],
+            company=company,
+            role=User.Role.ADMIN,
+        )
+        self.company, self.admin, self.code = company, admin, company.company_code
+
+        self.accounts = self._create_accounts()
+        self.products, self.modes = self._create_catalog()
+        self.customers = self._create_customers()
+        self.suppliers = self._create_suppliers()
+
+        purchased = self._create_purchases()
+        sold = self._create_sales()
+        self._create_money_receipts()
+        returned = self._create_returns()
+        self._create_expenses()
+        self._settle_stock(purchased, sold, returned)
+        # Everything was bulk created past the counter and lookup signals
+        Company.recount_counters(company.pk)
+        for entity in lookups.LOOKUPS:
+            lookups.bump(company.pk, entity)
+        return company
+
+    def _random_datetime(self):
+        return self.now - timedelta(
+            days=self.rng.randint(0, self.options['days']),
+            seconds=self.rng.randint(0, 86399),
+        )
+
+    def _create_accounts(self):
+        Account.objects.bulk_create([
+            Account(company=self.company, name='Cash', ac_type=Account.TYPE_CASH, number=f'CASH-{self.code}',
+                    ac_no=f'AC-{self.code}-1', balance=Decimal('0.00'), created_by=self.admin),
+            Account(company=self.company, name='Bank', ac_type=Account.TYPE_BANK, number=f'BANK-{self.code}',
+                    bank_name='Bench Bank', ac_no=f'AC-{self.code}-2', balance=Decimal('0.00'), created_by=self.admin),
+        ])
+        return list(Account.objects.filter(company=self.company).order_by('id'))
+
+    def _create_catalog(self):
+        company, admin = self.company, self.admin
+        unit = Unit.objects.create(name='Piece', code='pcs', company=company, created_by=admin)
+        Category.objects.bulk_create([
+            Category(name=f'Category {i}', company=company, created_by=admin) for i in range(1, 21)
+        ])
+        Brand.objects.bulk_create([
+            Brand(name=f'Brand {i}', company=company, created_by=admin) for i in range(1, 31)
+        ])
+        categories = list(Category.objects.filter(company=company))
+        brands = list(Brand.objects.filter(company=company))
+
+        SaleMode.objects.bulk_create([
+            SaleMode(name=name, code=f'{self.code}-{code}', base_unit=unit, conversion_factor=factor,
+                     price_type=price_type, company=company, created_by=admin)
+            for code, name, factor, price_type in SALE_MODES
+        ])
+        modes = list(SaleMode.objects.filter(company=company).order_by('conversion_factor'))
+
+        products = []
+        for i in range(1, self.options['products'] + 1):
+            purchase_price = money(self.rng.uniform(5, 500))
+            products.append(Product(
+                company=company,
+                created_by=admin,
+                name=f'Product {i:05d}',
+                sku=f'PDT-{company.id}-{10000 + i}',
+                category=self.rng.choice(categories),
+                brand=self.rng.choice(brands),
+                unit=unit,
+                purchase_price=purchase_price,
+                average_cost=purchase_price,
+                selling_price=money(purchase_price * Decimal(str(self.rng.uniform(1.1, 1.6)))),
+                alert_quantity=self.rng.randint(5, 20),
+            ))
+        Product.objects.bulk_create(products, batch_size=BATCH_SIZE)
+        products = list(Product.objects.filter(company=company).order_by('id'))
+
+        product_modes = []
+        for product in products:
+            for mode in modes:
+                product_modes.append(ProductSaleMode(
+                    product=product,
+                    sale_mode=mode,
+                    unit_price=money(product.selling_price * mode.conversion_factor * Decimal('0.97')),
+                    flat_price=money(product.selling_price * mode.conversion_factor * Decimal('0.92')),
+                ))
+        ProductSaleMode.objects.bulk_create(product_modes, batch_size=BATCH_SIZE)
+        return products, modes
+
+    def _create_customers(self):
+        customers = [
+            Customer(
+                name=f'Customer {i:05d}',
+                company=self.company,
+                phone=f'9{self.company.id:05d}{i:06d}',
+                address='Synthetic address',
+                created_by=self.admin,
+                client_no=f'CU-{1000 + i}',
+            )
+            for i in range(1, self.options['customers'] + 1)
+        ]
+        Customer.objects.bulk_create(customers, batch_size=BATCH_SIZE)
+        return list(Customer.objects.filter(company=self.company).order_by('id'))
+
+    def _create_suppliers(self):
+        suppliers = [
+            Supplier(
+                company=self.company,
+                created_by=self.admin,
+                supplier_no=f'SUP-{1000 + i}',
+                name=f'Supplier {i:04d}',
+                phone=f'8{self.company.id:05d}{i:06d}',
+                shop_name=f'Supplier Shop {i}',
+            )
+            for i in range(1, self.options['suppliers'] + 1)
+        ]
+        Supplier.objects.bulk_create(suppliers, batch_size=BATCH_SIZE)
+        return list(Supplier.objects.filter(company=self.company).order_by('id'))
+
+    # --------------------------
+    # Documents
+    # --------------------------
+    def _create_purchases(self):
+        """Create purchases with items; returns {product_id: qty purchased}"""
+        if not self.suppliers or not self.products:
+            return {}
+
+        purchased = {}
+        purchases, lines = [], []
+        for i in range(1, self.options['purchases'] + 1):
+            items = []
+            for product in self.rng.sample(self.products, min(len(self.products), self.rng.randint(1, self.options['max_items']))):
+                qty = self.rng.randint(20, 200)
+                items.append((product, qty, product.purchase_price))
+                purchased[product.id] = purchased.get(product.id, 0) + qty
+            total = money(sum(price * qty for _, qty, price in items))
+            paid = self.rng.choice([total, total, money(total / 2), Decimal('0.00')])
+            purchases.append(Purchase(
+                company=self.company,
+                supplier=self.rng.choice(self.suppliers),
+                created_by=self.admin,
+                purchase_date=self._random_datetime().date(),
+                total=total,
+                grand_total=total,
+                paid_amount=paid,
+                due_amount=total - paid,
+                payment_method='cash' if paid else None,
+                account=self.accounts[0] if paid else None,
+                invoice_no=f'PO-B{i:06d}',
+                payment_status='paid' if paid == total else ('partial' if paid else 'pending'),
+            ))
+            lines.append(items)
+
+        Purchase.objects.bulk_create(purchases, batch_size=BATCH_SIZE)
+        purchase_ids = list(
+            Purchase.objects.filter(company=self.company).order_by('id').values_list('id', flat=True)
+        )
+        PurchaseItem.objects.bulk_create([
+            PurchaseItem(purchase_id=purchase_id, product=product, qty=qty, price=price)
+            for purchase_id, items in zip(purchase_ids, lines)
+            for product, qty, price in items
+        ], batch_size=BATCH_SIZE)
+
+        self._update_supplier_totals()
+        return purchased
+
+    def _update_supplier_totals(self):
+        totals = {}
+        for supplier_id, grand_total, paid, due in Purchase.objects.filter(company=self.company).values_list(
+            'supplier_id', 'grand_total', 'paid_amount', 'due_amount'
+        ):
+            row = totals.setdefault(supplier_id, [Decimal('0.00'), Decimal('0.00'), Decimal('0.00'), 0])
+            row[0] += grand_total
+            row[1] += paid
+            row[2] += due
+            row[3] += 1
+        for supplier in self.suppliers:
+            supplier.total_purchases, supplier.total_paid, supplier.total_due, supplier.purchase_count = totals.get(
+                supplier.id, [Decimal('0.00'), Decimal('0.00'), Decimal('0.00'), 0]
+            )
+        Supplier.objects.bulk_update(
+            self.suppliers, ['total_purchases', 'total_paid', 'total_due', 'purchase_count'], batch_size=BATCH_SIZE
+        )
+
+    def _create_sales(self):
+        """Create multi-line sales with sale modes; returns {product_id: base qty sold}"""
+        if not self.products:
+            return {}
+
+        sold = {}
+        sales, lines = [], []
+        for i in range(1, self.options['sales'] + 1):
+            items, gross = [], Decimal('0.00')
+            for product in self.rng.sample(self.products, min(len(self.products), self.rng.randint(1, self.options['max_items']))):
+                mode = self.rng.choice(self.modes)
+                qty = self.rng.randint(1, 3)
+                base_qty = qty * mode.conversion_factor
+                unit_price = product.selling_price
+                flat_price = None
+                if mode.price_type == 'flat':
+                    flat_price = money(unit_price * base_qty * Decimal('0.92'))
+                    subtotal = flat_price
+                else:
+                    subtotal = money(unit_price * base_qty)
+                gross += subtotal
+                items.append(SaleItem(
+                    product=product,
+                    sale_mode=mode,
+                    quantity=Decimal(qty),
+                    base_quantity=base_qty,
+                    unit_price=unit_price,
+                    unit_cost=product.current_cost(),
+                    price_type=mode.price_type,
+                    flat_price=flat_price,
+                ))
+                sold[product.id] = sold.get(product.id, 0) + int(base_qty)
+
+            walk_in = self.rng.random() < 0.4
+            paid = self.rng.choice([gross, gross, gross, money(gross / 2), Decimal('0.00')])
+            sales.append(Sale(
+                created_by=self.admin,
+                sale_by=self.admin,
+                company=self.company,
+                customer=None if walk_in else self.rng.choice(self.customers),
+                customer_name='Walk-in Customer' if walk_in else None,
+                customer_type='walk_in' if walk_in else 'saved_customer',
+                sale_type=self.rng.choice(['retail', 'retail', 'wholesale']),
+                invoice_no=f'SL-{1000 + i}',
+                sale_date=self._random_datetime(),
+                gross_total=gross,
+                net_total=gross,
+                payable_amount=gross,
+                grand_total=gross,
+                paid_amount=paid,
+                due_amount=gross - paid,
+                payment_status='paid' if paid == gross else ('partial' if paid else 'pending'),
+                payment_method='cash' if paid else None,
+                account=self.accounts[0] if paid else None,
+            ))
+            lines.append(items)
+
+        with backdated(Sale._meta.get_field('sale_date')):
+            Sale.objects.bulk_create(sales, batch_size=BATCH_SIZE)
+
+        sales = list(Sale.objects.filter(company=self.company).order_by('id'))
+        items = []
+        for sale, sale_items in zip(sales, lines):
+            for item in sale_items:
+                item.sale = sale
+                items.append(item)
+        SaleItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+
+        transactions = [
+            Transaction(
+                company=self.company,
+                transaction_no=f'TXN-{self.company.id}-S{sale.id:08d}',
+                transaction_type='credit',
+                amount=sale.paid_amount,
+                account=self.accounts[0],
+                transaction_date=sale.sale_date,
+                sale=sale,
+                description=f'Sale {sale.invoice_no}',
+                created_by=self.admin,
+            )
+            for sale in sales if sale.paid_amount > 0
+        ]
+        Transaction.objects.bulk_create(transactions, batch_size=BATCH_SIZE)
+        self.sales = sales
+        return sold
+
+    def _create_money_receipts(self):
+        due_sales = [sale for sale in self.sales if sale.due_amount > 0 and sale.customer_id]
+        receipts = []
+        for i in range(1, self.options['receipts'] + 1):
+            sale = self.rng.choice(due_sales) if due_sales and self.rng.random() < 0.7 else None
+            customer_id = sale.customer_id if sale else (self.rng.choice(self.customers).id if self.customers else None)
+            receipts.append(MoneyReceipt(
+                company=self.company,
+                mr_no=f'MR-{self.company.id}-{i:07d}',
+                customer_id=customer_id,
+                sale=sale,
+                sale_invoice_no=sale.invoice_no if sale else None,
+                payment_type='specific' if sale else 'overall',
+                specific_invoice=bool(sale),
+                amount=money(self.rng.uniform(50, 2000)),
+                payment_date=self._random_datetime(),
+                seller=self.admin,
+                account=self.accounts[0],
+                created_by=self.admin,
+            ))
+        MoneyReceipt.objects.bulk_create(receipts, batch_size=BATCH_SIZE)
+
+        receipts = MoneyReceipt.objects.filter(company=self.company).only('id', 'amount', 'payment_date', 'mr_no')
+        Transaction.objects.bulk_create([
+            Transaction(
+                company=self.company,
+                transaction_no=f'TXN-{self.company.id}-M{receipt.id:08d}',
+                transaction_type='credit',
+                amount=receipt.amount,
+                account=self.accounts[0],
+                transaction_date=receipt.payment_date,
+                money_receipt=receipt,
+                description=f'Money Receipt {receipt.mr_no}',
+                created_by=self.admin,
+            )
+            for receipt in receipts
+        ], batch_size=BATCH_SIZE)
+
+    def _create_returns(self):
+        """Create approved sales and purchase returns; returns {product_id: net qty back in stock}"""
+        returned = {}
+        count = self.options['returns']
+        if not self.sales:
+            return returned
+
+        sale_items = list(
+            SaleItem.objects.filter(sale__company=self.company).select_related('product').order_by('?')[:count]
+        )
+        sales_returns, sales_return_items = [], []
+        for i, item in enumerate(sale_items, start=1):
+            qty = max(1, int(item.base_quantity) // 2)
+            total = money(item.unit_price * qty)
+            sales_returns.append(SalesReturn(
+                receipt_no=f'SR-{self.company.id}-{i:06d}',
+                customer_name='Synthetic',
+                return_date=self._random_datetime().date(),
+                return_amount=total,
+                status='approved',
+                company=self.company,
+                created_by=self.admin,
+                original_sale_id=item.sale_id,
+            ))
+            sales_return_items.append(SalesReturnItem(
+                product=item.product, product_name=item.product.name, quantity=qty,
+                unit_price=item.unit_price, total=total,
+            ))
+            returned[item.product_id] = returned.get(item.product_id, 0) + qty
+
+        SalesReturn.objects.bulk_create(sales_returns, batch_size=BATCH_SIZE)
+        for sales_return, item in zip(SalesReturn.objects.filter(company=self.company).order_by('id'), sales_return_items):
+            item.sales_return = sales_return
+        SalesReturnItem.objects.bulk_create(sales_return_items, batch_size=BATCH_SIZE)
+
+        purchase_items = list(
+            PurchaseItem.objects.filter(purchase__company=self.company)
+            .select_related('product', 'purchase__supplier').order_by('?')[:count]
+        )
+        purchase_returns, purchase_return_items = [], []
+        for i, item in enumerate(purchase_items, start=1):
+            qty = max(1, item.qty // 10)
+            total = money(item.price * qty)
+            purchase_returns.append(PurchaseReturn(
+                supplier=item.purchase.supplier.name,
+                invoice_no=f'PR-{self.company.id}-{i:06d}',
+                return_date=self._random_datetime().date(),
+                return_amount=total,
+                status='approved',
+                company=self.company,
+                created_by=self.admin,
+                original_purchase_id=item.purchase_id,
+            ))
+            purchase_return_items.append(PurchaseReturnItem(
+                product=item.product, product_name=item.product.name, quantity=qty,
+                unit_price=item.price, total=total,
+            ))
+            returned[item.product_id] = returned.get(item.product_id, 0) - qty
+
+        PurchaseReturn.objects.bulk_create(purchase_returns, batch_size=BATCH_SIZE)
+        for purchase_return, item in zip(PurchaseReturn.objects.filter(company=self.company).order_by('id'), purchase_return_items):
+            item.purchase_return = purchase_return
+        PurchaseReturnItem.objects.bulk_create(purchase_return_items, batch_size=BATCH_SIZE)
+        return returned
+
+    def _create_expenses(self):
+        ExpenseHead.objects.bulk_create([
+            ExpenseHead(name=name, company=self.company, created_by=self.admin)
+            for name in ['Rent', 'Salary', 'Utilities', 'Transport', 'Misc']
+        ])
+        heads = list(ExpenseHead.objects.filter(company=self.company))
+        ExpenseSubHead.objects.bulk_create([
+            ExpenseSubHead(name=f'{head.name} {n}', head=head, company=self.company, created_by=self.admin)
+            for head in heads for n in range(1, 4)
+        ])
+        subheads = list(ExpenseSubHead.objects.filter(company=self.company))
+
+        expenses = []
+        for i in range(1, self.options['expenses'] + 1):
+            subhead = self.rng.choice(subheads)
+            expenses.append(Expense(
+                created_by=self.admin,
+                company=self.company,
+                head_id=subhead.head_id,
+                subhead=subhead,
+                amount=money(self.rng.uniform(100, 5000)),
+                account=self.accounts[0],
+                expense_date=self._random_datetime().date(),
+                invoice_number=f'EXP-{self.company.id}-{i:06d}',
+            ))
+        Expense.objects.bulk_create(expenses, batch_size=BATCH_SIZE)
+
+        Transaction.objects.bulk_create([
+            Transaction(
+                company=self.company,
+                transaction_no=f'TXN-{self.company.id}-E{expense.id:08d}',
+                transaction_type='debit',
+                amount=expense.amount,
+                account=self.accounts[0],
+                transaction_date=expense.date_created,
+                expense=expense,
+                description=f'Expense - {expense.invoice_number}',
+                created_by=self.admin,
+            )
+            for expense in Expense.objects.filter(company=self.company).only('id', 'amount', 'date_created', 'invoice_number')
+        ], batch_size=BATCH_SIZE)
+
+    def _settle_stock(self, purchased, sold, returned):
+        """Set stock so that it equals opening + purchased - sold + returned, never negative"""
+        for product in self.products:
+            movement = purchased.get(product.id, 0) - sold.get(product.id, 0) + returned.get(product.id, 0)
+            product.opening_stock = max(0, -movement) + self.rng.randint(0, 100)
+            product.stock_qty = product.opening_stock + movement
+
+        Product.objects.bulk_update(self.products, ['opening_stock', 'stock_qty'], batch_size=BATCH_SIZE)
+
+        balance = Decimal('0.00')
+        for transaction_type, amount in Transaction.objects.filter(account=self.accounts[0]).values_list(
+            'transaction_type', 'amount'
+        ):
+            balance += amount if transaction_type == 'credit' else -amount
+        Account.objects.filter(pk=self.accounts[0].pk).update(balance=balance)
@@ -0,0 +1,131 @@
+# core/management/commands/profile_startup.py
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter so nothing is already imported
+PROBE = r'''
+import json, os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r})
+phases = {{}}
+
+def mark(name, started):
+    phases[name] = round((time.perf_counter() - started) * 1000, 2)
+    return time.perf_counter()
+
+t = time.perf_counter()
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+t = mark('settings', t)
+django.setup()
+t = mark('apps', t)
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+t = mark('wsgi', t)
+from django.urls import get_resolver
+get_resolver().url_patterns
+t = mark('urlconf', t)
+if {warmup!r}:
+    from core.warmup import warmup
+    warmup(force=True)
+    t = mark('warmup', t)
+sys.stdout.write('\n' + json.dumps(phases) + '\n')
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure cold worker startup in a fresh interpreter: per-phase timings '
+        '(settings, app registry, WSGI handler, URLconf, optional warmup) and the slowest imports'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Cold starts to measure (median is reported)')
+        parser.add_argument('--top', type=int, default=20, help='Number of slowest imports to list')
+        parser.add_argument('--project-only', action='store_true', help='Only list imports from this project\'s apps')
+        parser.add_argument('--warmup', action='store_true', help='Include the core.warmup step in the measurement')
+        parser.add_argument(
+            '--budget-ms', type=float, default=getattr(settings, 'STARTUP_BUDGET_MS', None),
+            help='Fail when the median total startup exceeds this (default: settings.STARTUP_BUDGET_MS)',
+        )
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+
+    def handle(self, *args, **options):
+        runs, imports = [], []
+        for _ in range(max(options['repeat'], 1)):
+            phases, imports = self._probe(options['warmup'])
+            runs.append(phases)
+
+        phases = {name: round(statistics.median(run[name] for run in runs), 2) for name in runs[0]}
+        total = round(sum(phases.values()), 2)
+
+        if options['project_only']:
+            packages = self._project_packages()
+            imports = [row for row in imports if row['module'].split('.')[0] in packages]
+        imports = sorted(imports, key=lambda row: row['cumulative_ms'], reverse=True)[:options['top']]
+
+        if options['json']:
+            self.stdout.write(json.dumps({'phases_ms': phases, 'total_ms': total, 'imports': imports}, indent=2))
+        else:
+            self._print(phases, total, imports, len(runs))
+
+        budget = options['budget_ms']
+        if budget and total > budget:
+            raise CommandError(f'Startup took {total:.1f}ms, over the {budget:.0f}ms budget')
+
+    # --------------------------
+    # Measurement
+    # --------------------------
+    def _probe(self, warmup):
+        script = PROBE.format(settings_module=os.environ.get('DJANGO_SETTINGS_MODULE', 'inventory_api.settings'), warmup=warmup)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            cwd=str(settings.BASE_DIR), capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Startup probe failed:\n{result.stderr[-2000:]}')
+
+        try:
+            phases = json.loads(result.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            raise CommandError(f'Could not read probe output:\n{result.stdout[-2000:]}')
+        return phases, self._parse_importtime(result.stderr)
+
+    @staticmethod
+    def _parse_importtime(stderr):
+        """Parse `python -X importtime` lines: 'import time: self [us] | cumulative | name'"""
+        rows = []
+        for line in stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            parts = line[len('import time:'):].split('|')
+            if len(parts) != 3 or not parts[0].strip().isdigit():
+                continue
+            rows.append({
+                'module': parts[2].strip(),
+                'self_ms': round(int(parts[0]) / 1000, 2),
+                'cumulative_ms': round(int(parts[1]) / 1000, 2),
+            })
+        return rows
+
+    @staticmethod
+    def _project_packages():
+        base = Path(settings.BASE_DIR)
+        return {path.parent.name for path in base.glob('*/__init__.py')}
+
+    def _print(self, phases, total, imports, repeat):
+        self.stdout.write(f'Cold startup (median of {repeat}):')
+        for name, elapsed in phases.items():
+            self.stdout.write(f'  {name:<12} {elapsed:>9.1f}ms')
+        self.stdout.write(f'  {"total":<12} {total:>9.1f}ms')
+
+        self.stdout.write('\nSlowest imports (cumulative / self):')
+        for row in imports:
+            self.stdout.write(f"  {row['cumulative_ms']:>9.1f}ms {row['self_ms']:>8.1f}ms  {row['module']}")
@@ -0,0 +1,62 @@
+# core/management/commands/runworker.py
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import jobs
+from core.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        'Process the background job queue (core.jobs): due jobs oldest first, '
+        'one at a time per company, retrying failures with backoff'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due instead of polling')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--batch', type=int, default=10, help='Jobs to claim per poll')
+        parser.add_argument('--retry-failed', action='store_true', help='Requeue failed jobs before starting')
+
+    def handle(self, *args, **options):
+        worker = jobs.worker_id()
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        if options['retry_failed']:
+            requeued = Job.objects.filter(status=Job.STATUS_FAILED).update(
+                status=Job.STATUS_PENDING, attempts=0, finished_at=None,
+            )
+            self.stdout.write(f'Requeued {requeued} failed job(s)')
+
+        self.stdout.write(f'Worker {worker} started')
+        done = failed = 0
+        while not self._stopping:
+            close_old_connections()
+            released = jobs.release_stale()
+            if released:
+                self.stdout.write(self.style.WARNING(f'Released {released} stale job(s)'))
+
+            batch = jobs.claim(worker, limit=options['batch'])
+            if not batch:
+                if options['burst']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            for job in batch:
+                if jobs.execute(job):
+                    done += 1
+                else:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f'{job.name} #{job.pk}: {job.last_error.splitlines()[0]}'))
+
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker} stopped: {done} done, {failed} failed'))
+
+    def _stop(self, signum, frame):
+        # Finish the current batch, then exit
+        self._stopping = True
@@ -1,3 +1,9 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
 class CompanyMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -11,3 +17,101 @@ class CompanyMiddleware:
         else:
             request.company = None
         return self.get_response(request)
+
+
+class ReplicaStickinessMiddleware:
+    """
+    After a write request, keep the user's reads off the read replica for a
+    short while (see core.routers). DRF sets request.user once the view has
+    authenticated, so this looks at it after the response.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in self.SAFE_METHODS:
+            from core.routers import mark_write
+            mark_write(getattr(request, 'user', None))
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Per-request instrumentation: wall time, DB query count/time, duplicate
+    query fingerprints and query budgets. Results go to the Server-Timing
+    header and the in-process stats window (see core.performance).
+    Should be placed first in MIDDLEWARE so it measures the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from core.performance import get_config, record_queries
+
+        config = get_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        self._finalize(request, response, recorder, wall_ms, config)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._performance_view = view_func
+        return None
+
+    def _finalize(self, request, response, recorder, wall_ms, config):
+        from core.performance import (
+            enforce_query_budget, request_stats, resolve_query_budget, server_timing_header,
+        )
+
+        endpoint = self._endpoint_name(request)
+        duplicates = recorder.duplicates(config['DUPLICATE_THRESHOLD'])
+        if duplicates:
+            logger.warning(
+                "Possible N+1 on %s: %s",
+                endpoint,
+                "; ".join(f"{n}x {sql[:200]}" for sql, n in duplicates[:3]),
+            )
+
+        if wall_ms >= config['SLOW_REQUEST_MS']:
+            logger.warning(
+                "Slow request %s: %.1fms, %d queries (%.1fms in DB)",
+                endpoint, wall_ms, recorder.count, recorder.duration_ms,
+            )
+
+        if config['SERVER_TIMING']:
+            response['Server-Timing'] = server_timing_header(wall_ms, recorder, len(duplicates))
+
+        view_func = getattr(request, '_performance_view', None)
+        budget = resolve_query_budget(view_func, request) if view_func else None
+
+        request_stats.resize(config['STATS_WINDOW'])
+        try:
+            enforce_query_budget(endpoint, recorder, budget, config['BUDGET_MODE'])
+        finally:
+            request_stats.record({
+                'endpoint': endpoint,
+                'status': getattr(response, 'status_code', 0),
+                'wall_ms': wall_ms,
+                'queries': recorder.count,
+                'db_ms': recorder.duration_ms,
+                'duplicates': duplicates[:5],
+                'budget_exceeded': budget is not None and recorder.count > budget,
+            })
+
+    @staticmethod
+    def _endpoint_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and match.route:
+            # Router-generated routes are regexes, e.g. '^products/(?P<pk>[^/.]+)/$'
+            return f"{request.method} /{match.route.replace('^', '').replace('$', '')}"
+        return f"{request.method} {request.path}"
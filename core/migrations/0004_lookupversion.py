@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_rolepermission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LookupVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(max_length=50)),
+                ('version', models.PositiveBigIntegerField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lookup_versions', to='core.company')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('company', 'entity'), name='unique_lookup_version_per_company')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_repaircheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditFinding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('invariant', models.CharField(max_length=100)),
+                ('object_id', models.BigIntegerField()),
+                ('object_label', models.CharField(blank=True, max_length=255)),
+                ('field', models.CharField(max_length=100)),
+                ('stored', models.DecimalField(decimal_places=3, max_digits=18)),
+                ('expected', models.DecimalField(decimal_places=3, max_digits=18)),
+                ('first_seen', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_seen', models.DateTimeField(default=django.utils.timezone.now)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audit_findings', to='core.company')),
+            ],
+            options={
+                'ordering': ['invariant', 'object_id'],
+                'indexes': [models.Index(fields=['company', 'invariant', 'resolved_at'], name='core_auditf_company_05fd89_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AuditRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('invariant', models.CharField(max_length=100)),
+                ('checked', models.PositiveIntegerField(default=0)),
+                ('mismatches', models.PositiveIntegerField(default=0)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+                ('ran_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audit_runs', to='core.company')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('company', 'invariant'), name='unique_audit_run_per_invariant')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:24
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_rows(apps, schema_editor):
+    Company = apps.get_model('core', 'Company')
+    Product = apps.get_model('products', 'Product')
+    User = apps.get_model('core', 'User')
+
+    def count(queryset):
+        rows = queryset.order_by().values('company').annotate(n=models.Count('pk')).values('n')
+        return Coalesce(models.Subquery(rows, output_field=models.IntegerField()), 0)
+
+    Company.objects.update(
+        product_count=count(Product.objects.filter(company=models.OuterRef('pk'))),
+        active_user_count=count(User.objects.filter(company=models.OuterRef('pk'), is_active=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_audit'),
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='active_user_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_rows, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
+from django.utils import timezone
 from datetime import date, timedelta
 from decimal import Decimal
 import uuid
@@ -21,6 +23,8 @@ class Company(models.Model):
     email = models.EmailField(blank=True, null=True)
     website = models.URLField(blank=True, null=True)
     logo = models.ImageField(upload_to='company/logo/', blank=True, null=True)
+    # Resized WebP/JPEG copies of logo (image_derivatives.pipeline)
+    logo_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     
     currency = models.CharField(max_length=10, default='BDT')
     timezone = models.CharField(max_length=50, default='Asia/Dhaka')
@@ -38,6 +42,11 @@ class Company(models.Model):
     max_users = models.PositiveIntegerField(default=5)
     max_products = models.PositiveIntegerField(default=1000)
     max_branches = models.PositiveIntegerField(default=3)
+
+    # Counter caches kept by core.signals; checked by the companies.counters audit.
+    # Bulk writes of products or users skip the signals: call recount_counters() after them
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+    active_user_count = models.PositiveIntegerField(default=0, editable=False)
     
     company_code = models.CharField(max_length=10, unique=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -79,16 +88,19 @@ class Company(models.Model):
             return (self.expiry_date - date.today()).days
         return None
 
-    @property
-    def active_user_count(self):
-        return self.users.filter(is_active=True).count()
+    def fiscal_year_bounds(self, year):
+        """(first day, first day of the next year) of the fiscal year starting in calendar year ``year``"""
+        def starts(y):
+            try:
+                return self.fiscal_year_start.replace(year=y)
+            except ValueError:  # 29 February
+                return self.fiscal_year_start.replace(year=y, day=28)
+        return starts(year), starts(year + 1)
 
-    @property
-    def product_count(self):
-        try:
-            return self.products.count()
-        except:
-            return 0
+    def fiscal_year_of(self, day):
+        """Fiscal year (by the calendar year it starts in) containing ``day``"""
+        start, _ = self.fiscal_year_bounds(day.year)
+        return day.year if day >= start else day.year - 1
 
     def can_add_user(self):
         return self.active_user_count < self.max_users
@@ -96,6 +108,37 @@ class Company(models.Model):
     def can_add_product(self):
         return self.product_count < self.max_products
 
+    @classmethod
+    def adjust_counters(cls, company_id, products=0, active_users=0):
+        """Shift the counter caches in one UPDATE (never below zero)"""
+        if not company_id or not (products or active_users):
+            return
+        changes = {}
+        if products:
+            changes['product_count'] = Greatest(models.F('product_count') + products, 0)
+        if active_users:
+            changes['active_user_count'] = Greatest(models.F('active_user_count') + active_users, 0)
+        cls.objects.filter(pk=company_id).update(**changes)
+
+    @classmethod
+    def actual_counters(cls):
+        """Expressions recounting the counter caches (correlated subqueries)"""
+        from products.models import Product
+
+        def count(queryset):
+            rows = queryset.order_by().values('company').annotate(n=models.Count('pk')).values('n')
+            return Coalesce(models.Subquery(rows, output_field=models.IntegerField()), 0)
+
+        return {
+            'product_count': count(Product.objects.filter(company=models.OuterRef('pk'))),
+            'active_user_count': count(User.objects.filter(company=models.OuterRef('pk'), is_active=True)),
+        }
+
+    @classmethod
+    def recount_counters(cls, company_id):
+        """Rewrite the counter caches from the rows (actual_counters) in one UPDATE"""
+        cls.objects.filter(pk=company_id).update(**cls.actual_counters())
+
     def __str__(self):
         return f"{self.name} ({self.company_code}) - {self.get_plan_type_display()}"
 
@@ -127,6 +170,8 @@ class User(AbstractUser):
         blank=True, 
         null=True
     )
+    # Resized WebP/JPEG copies of profile_picture (image_derivatives.pipeline)
+    profile_picture_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     date_of_birth = models.DateField(blank=True, null=True)
     
     # ===== DASHBOARD PERMISSIONS =====
@@ -234,6 +279,17 @@ class User(AbstractUser):
             models.Index(fields=['permission_source']),
         ]
 
+    # Company.active_user_count follows writes (core.signals): remember the
+    # company/is_active this instance was loaded or saved with
+    COUNTED_FIELDS = ('company_id', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(name in instance.__dict__ for name in cls.COUNTED_FIELDS):
+            instance._counted = tuple(instance.__dict__[name] for name in cls.COUNTED_FIELDS)
+        return instance
+
     def save(self, *args, **kwargs):
         # সুপারইউজারের জন্য বিশেষ হ্যান্ডলিং
         if self.role == self.Role.SUPER_ADMIN:
@@ -1229,4 +1285,232 @@ class Staff(models.Model):
         user_name = self.user.get_full_name() or self.user.username
         designation = self.designation or 'Staff'
         company_name = self.company.name if self.company else 'No Company'
-        return f"{user_name} - {designation} ({company_name})"
\ No newline at end of file
+        return f"{user_name} - {designation} ({company_name})"
+
+class LookupVersion(models.Model):
+    """
+    Per-company version of a lookup entity (customers, products, ...), bumped
+    whenever one of its rows is written. Cached lookup responses and their
+    ETags are keyed on it (see core.lookups).
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='lookup_versions')
+    entity = models.CharField(max_length=50)
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'entity'], name='unique_lookup_version_per_company')
+        ]
+
+    def __str__(self):
+        return f"{self.company_id}:{self.entity} v{self.version}"
+
+    @classmethod
+    def bump(cls, company_id, entity):
+        """Increment in one UPDATE; the first write for an entity creates its row"""
+        updated = cls.objects.filter(company_id=company_id, entity=entity).update(
+            version=models.F('version') + 1, updated_at=timezone.now()
+        )
+        if not updated:
+            _, created = cls.objects.get_or_create(company_id=company_id, entity=entity)
+            if not created:
+                cls.objects.filter(company_id=company_id, entity=entity).update(version=models.F('version') + 1)
+
+    @classmethod
+    def current(cls, company_id, entities):
+        """{entity: version} in one query; entities never written are at version 0"""
+        versions = dict(
+            cls.objects.filter(company_id=company_id, entity__in=entities).values_list('entity', 'version')
+        )
+        return {entity: versions.get(entity, 0) for entity in entities}
+
+
+class RepairCheckpoint(models.Model):
+    """
+    Progress of a data repair job (core.repair) for one company: the last
+    primary key whose chunk was committed, so a killed run resumes there.
+    Advanced in the same transaction as the chunk it records.
+    """
+    STATUS_RUNNING = 'running'
+    STATUS_FAILED = 'failed'
+    STATUS_DONE = 'done'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_DONE, 'Done'),
+    ]
+
+    job = models.CharField(max_length=100)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, related_name='repair_checkpoints')
+    last_pk = models.BigIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    changed = models.PositiveIntegerField(default=0)
+    state = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['job', 'company'])]
+
+    def __str__(self):
+        return f"{self.job} [{self.company_id or '-'}] {self.status} @ {self.last_pk}"
+
+    @property
+    def resumable(self):
+        return self.status != self.STATUS_DONE and self.last_pk > 0
+
+    @classmethod
+    def open(cls, job, company_id, restart=False):
+        """The checkpoint to continue from: unfinished ones are resumed unless restart"""
+        checkpoint = cls.objects.filter(job=job, company_id=company_id).first()
+        if checkpoint is None:
+            return cls.objects.create(job=job, company_id=company_id)
+        if restart or not checkpoint.resumable:
+            checkpoint.last_pk = checkpoint.processed = checkpoint.changed = 0
+            checkpoint.state = {}
+            checkpoint.started_at = timezone.now()
+        checkpoint.status = cls.STATUS_RUNNING
+        checkpoint.error = ''
+        checkpoint.finished_at = None
+        checkpoint.save()
+        return checkpoint
+
+    def advance(self, last_pk, processed, changed, state):
+        self.last_pk = last_pk
+        self.processed += processed
+        self.changed += changed
+        self.state = state
+        self.save(update_fields=['last_pk', 'processed', 'changed', 'state', 'updated_at'])
+
+    def close(self, error=None):
+        self.status = self.STATUS_FAILED if error else self.STATUS_DONE
+        self.error = str(error or '')
+        self.finished_at = None if error else timezone.now()
+        self.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+
+
+class AuditRun(models.Model):
+    """Latest reconciliation audit (core.audit) of one invariant for one company"""
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='audit_runs')
+    invariant = models.CharField(max_length=100)
+    checked = models.PositiveIntegerField(default=0)
+    mismatches = models.PositiveIntegerField(default=0)
+    duration_ms = models.PositiveIntegerField(default=0)
+    ran_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'invariant'], name='unique_audit_run_per_invariant')
+        ]
+
+    def __str__(self):
+        return f"{self.invariant} [{self.company_id}] {self.mismatches}/{self.checked}"
+
+
+class AuditFinding(models.Model):
+    """
+    A denormalized value that disagrees with its source rows. Open while
+    the audit keeps seeing it; resolved_at is set once a run no longer does.
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='audit_findings')
+    invariant = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    object_label = models.CharField(max_length=255, blank=True)
+    field = models.CharField(max_length=100)
+    stored = models.DecimalField(max_digits=18, decimal_places=3)
+    expected = models.DecimalField(max_digits=18, decimal_places=3)
+    first_seen = models.DateTimeField(default=timezone.now)
+    last_seen = models.DateTimeField(default=timezone.now)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['invariant', 'object_id']
+        indexes = [
+            models.Index(fields=['company', 'invariant', 'resolved_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.invariant} #{self.object_id}.{self.field}: {self.stored} != {self.expected}"
+
+    @property
+    def difference(self):
+        return self.stored - self.expected
+
+
+class Job(models.Model):
+    """
+    Queued background work (core.jobs): run by ``manage.py runworker``,
+    oldest first and one at a time per company.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    dedup_key = models.CharField(max_length=200, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['company', 'status']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'], condition=models.Q(status='pending'), name='core_job_pending_dedup_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} [{self.company_id or '-'}] {self.status}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client-generated key already applied within ``scope`` (e.g. one
+    offline POS sale), with the object it created and the result returned
+    for it, so a replay answers the same result instead of writing again.
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='idempotency_keys')
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=100)
+    object_id = models.BigIntegerField(null=True, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'scope', 'key'], name='core_idempotency_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key} -> {self.object_id}"
+
+    @classmethod
+    def lookup(cls, company_id, scope, keys):
+        """{key: IdempotencyKey} for the ``keys`` already applied"""
+        return {
+            row.key: row
+            for row in cls.objects.filter(company_id=company_id, scope=scope, key__in=set(keys))
+        }
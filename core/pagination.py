@@ -1,4 +1,4 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 from rest_framework import status
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
@@ -107,4 +107,31 @@ class CustomPageNumberPagination(PageNumberPagination):
                     }
                 }
             }
-        }
\ No newline at end of file
+        }
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination: each page is one indexed range query from
+    the last row seen, with no COUNT and no OFFSET scan however deep the
+    client pages. The view's ordering (or ?ordering=) drives the keyset, so
+    it should lead with an indexed, non-null column.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+
+    def get_paginated_response(self, data, message="Data fetched successfully."):
+        return Response({
+            'status': True,
+            'message': message,
+            'data': self.get_page_data(data),
+        }, status=status.HTTP_200_OK)
+
+    def get_page_data(self, data):
+        return {
+            'page_size': self.page_size,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
@@ -0,0 +1,261 @@
+# core/performance.py
+"""
+Request performance instrumentation.
+
+Records wall time, database query count/time and duplicate query
+fingerprints (N+1 detection) for every request, keeps a rolling in-process
+window of samples per endpoint and enforces per-view query budgets.
+
+Configuration lives in ``settings.PERFORMANCE_INSTRUMENTATION``; every key is
+optional and falls back to ``DEFAULTS`` below.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    # Emit a Server-Timing header on every response
+    'SERVER_TIMING': True,
+    # Number of most recent requests kept for the stats endpoint
+    'STATS_WINDOW': 1000,
+    # Same query fingerprint repeated this many times in one request is reported as N+1
+    'DUPLICATE_THRESHOLD': 5,
+    # Budget applied to views that do not declare their own (None = unlimited)
+    'DEFAULT_QUERY_BUDGET': None,
+    # 'log' writes a warning, 'raise' raises QueryBudgetExceeded (use in tests), 'off' ignores budgets
+    'BUDGET_MODE': 'log',
+    # Requests slower than this are logged with their query breakdown
+    'SLOW_REQUEST_MS': 1000,
+}
+
+
+def get_config():
+    """Return the effective instrumentation settings"""
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'PERFORMANCE_INSTRUMENTATION', {}) or {})
+    return config
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a view issues more queries than its budget in 'raise' mode"""
+
+
+# --------------------------
+# Query fingerprinting
+# --------------------------
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?|NULL)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint_sql(sql):
+    """Normalise a SQL statement so that queries differing only by literals compare equal"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """Database execute wrapper that counts, times and fingerprints queries"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint_sql(sql)] += 1
+
+    @property
+    def duration_ms(self):
+        return self.duration * 1000
+
+    def duplicates(self, threshold):
+        """Fingerprints repeated at least ``threshold`` times, most repeated first"""
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n >= threshold]
+
+
+@contextmanager
+def record_queries(using=None):
+    """
+    Record every query run on the current thread's connections.
+
+    Usage:
+        with record_queries() as recorder:
+            ...
+        recorder.count, recorder.duration_ms, recorder.duplicates(3)
+    """
+    recorder = QueryRecorder()
+    aliases = [using] if using else list(connections)
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
+
+
+# --------------------------
+# Query budgets
+# --------------------------
+def query_budget(max_queries):
+    """
+    Declare a query budget on a function-based view.
+
+    Class-based views and viewsets declare ``query_budget`` as a class
+    attribute instead, either an int or a dict keyed by action/method name:
+
+        class SaleViewSet(viewsets.ModelViewSet):
+            query_budget = {'list': 10, 'retrieve': 8, 'create': 40}
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def resolve_query_budget(view_func, request):
+    """Find the budget that applies to ``view_func`` for this request, or None"""
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        budget = getattr(view_class, 'query_budget', None)
+
+    if isinstance(budget, dict):
+        method = request.method.lower()
+        action = (getattr(view_func, 'actions', None) or {}).get(method)
+        budget = budget.get(action, budget.get(method, budget.get('default')))
+
+    if budget is None:
+        budget = get_config()['DEFAULT_QUERY_BUDGET']
+    return budget
+
+
+def enforce_query_budget(endpoint, recorder, budget, mode):
+    """Log or raise when ``recorder`` exceeded ``budget``; returns True when exceeded"""
+    if budget is None or mode == 'off' or recorder.count <= budget:
+        return False
+
+    message = f"Query budget exceeded for {endpoint}: {recorder.count} queries (budget {budget})"
+    if mode == 'raise':
+        duplicates = recorder.duplicates(2)
+        if duplicates:
+            message += "; most repeated: " + "; ".join(f"{n}x {sql[:200]}" for sql, n in duplicates[:3])
+        raise QueryBudgetExceeded(message)
+
+    logger.warning(message)
+    return True
+
+
+# --------------------------
+# Rolling stats
+# --------------------------
+class RequestStatsStore:
+    """Thread-safe rolling window of request samples for the current process"""
+
+    def __init__(self, window):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self._started_at = time.time()
+
+    def resize(self, window):
+        with self._lock:
+            if self._samples.maxlen != window:
+                self._samples = deque(self._samples, maxlen=window)
+
+    def record(self, sample):
+        with self._lock:
+            self._samples.append(sample)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._started_at = time.time()
+
+    def snapshot(self):
+        """Aggregate the window per endpoint, slowest p95 first"""
+        with self._lock:
+            samples = list(self._samples)
+            started_at = self._started_at
+
+        grouped = defaultdict(list)
+        for sample in samples:
+            grouped[sample['endpoint']].append(sample)
+
+        endpoints = []
+        for endpoint, rows in grouped.items():
+            wall = sorted(row['wall_ms'] for row in rows)
+            queries = [row['queries'] for row in rows]
+            duplicate_counter = Counter()
+            for row in rows:
+                duplicate_counter.update(dict(row['duplicates']))
+
+            endpoints.append({
+                'endpoint': endpoint,
+                'requests': len(rows),
+                'wall_ms': {
+                    'avg': round(sum(wall) / len(wall), 2),
+                    'p50': round(_percentile(wall, 50), 2),
+                    'p95': round(_percentile(wall, 95), 2),
+                    'max': round(wall[-1], 2),
+                },
+                'queries': {
+                    'avg': round(sum(queries) / len(queries), 2),
+                    'max': max(queries),
+                },
+                'db_ms_avg': round(sum(row['db_ms'] for row in rows) / len(rows), 2),
+                'budget_violations': sum(1 for row in rows if row['budget_exceeded']),
+                'errors': sum(1 for row in rows if row['status'] >= 500),
+                'top_duplicates': [
+                    {'sql': sql, 'occurrences': n} for sql, n in duplicate_counter.most_common(5)
+                ],
+            })
+
+        endpoints.sort(key=lambda e: e['wall_ms']['p95'], reverse=True)
+        return {
+            'since': started_at,
+            'window': self._samples.maxlen,
+            'sampled_requests': len(samples),
+            'endpoints': endpoints,
+        }
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = (len(sorted_values) - 1) * percent / 100
+    lower = int(index)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (index - lower)
+
+
+request_stats = RequestStatsStore(DEFAULTS['STATS_WINDOW'])
+
+
+def server_timing_header(wall_ms, recorder, duplicate_count):
+    """Build a Server-Timing header value"""
+    parts = [
+        f'total;dur={wall_ms:.1f}',
+        f'db;dur={recorder.duration_ms:.1f};desc="{recorder.count} queries"',
+        f'app;dur={max(wall_ms - recorder.duration_ms, 0):.1f}',
+    ]
+    if duplicate_count:
+        parts.append(f'dup;desc="{duplicate_count} repeated queries"')
+    return ', '.join(parts)
@@ -0,0 +1,322 @@
+# core/repair.py
+"""
+Framework for the data repair (fix_*) management commands.
+
+A repair is a list of ``RepairJob`` subclasses run per company, in order:
+
+    class SaleTotalsRepair(RepairJob):
+        name = 'sales.totals'
+        model = 'sales.Sale'
+        fields = ('gross_total', 'grand_total', 'due_amount', 'payment_status')
+        prefetch_related = ('items',)
+
+        def fix(self, sale, state):
+            sale.compute_totals()
+
+    class Command(RepairCommand):
+        help = 'Recompute sale totals'
+        jobs = [SaleTotalsRepair]
+
+Each job walks its queryset in primary-key (keyset) chunks, lets ``fix()``
+change the instance in memory and writes the changed rows back with one
+``bulk_update`` per chunk, so model ``save()`` and signals (stock moves,
+account balances, receipts, transactions) never run; the lookup versions
+of the rows' companies are bumped once the job has written anything. Every chunk commits
+together with its ``RepairCheckpoint``; a run that is killed resumes after
+the last committed chunk (``--restart`` starts over). ``--dry-run`` writes
+nothing and prints the field-level diffs, and ``--workers`` spreads the
+companies over a process pool.
+"""
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+from core import lookups
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class RepairJob:
+    """One repair over one model: override ``fix()`` (or ``run()`` for set-based jobs)"""
+    name = None
+    model = None
+    fields = ()
+    company_field = 'company_id'
+    # Jobs that are not per company run once, over all rows, after the per-company jobs
+    per_company = True
+    select_related = ()
+    prefetch_related = ()
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, diff_limit=20):
+        self.chunk_size = chunk_size
+        self.diff_limit = diff_limit
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+    def get_queryset(self, company_id):
+        queryset = self.get_model()._default_manager.all()
+        if self.per_company:
+            queryset = queryset.filter(**{self.company_field: company_id})
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+    def initial_state(self, company_id):
+        """JSON-serializable state carried across chunks (and resumes) in the checkpoint"""
+        return {}
+
+    def prepare(self, company_id):
+        """Set-based work before the first chunk of a fresh (not resumed, not dry) run"""
+
+    def fix(self, obj, state):
+        """Change ``obj`` in memory; the changed ``fields`` are written back"""
+        raise NotImplementedError
+
+    def finish(self, company_id, result, dry_run):
+        """Set-based follow-up once every chunk is done"""
+
+    def label(self, obj):
+        return f'#{obj.pk}'
+
+    # --------------------------
+    # Execution
+    # --------------------------
+    def run(self, company_id, dry_run=False, restart=False):
+        from core.models import RepairCheckpoint
+
+        result = RepairResult(self.name, company_id)
+        checkpoint = None if dry_run else RepairCheckpoint.open(self.name, company_id, restart=restart)
+        last_pk = checkpoint.last_pk if checkpoint else 0
+        queryset = self.get_queryset(company_id).order_by('pk')
+        attnames = [self.get_model()._meta.get_field(name).attname for name in self.fields]
+
+        try:
+            if last_pk:
+                result.resumed_from = last_pk
+                state = dict(checkpoint.state)
+            else:
+                state = self.initial_state(company_id)
+                if not dry_run:
+                    self.prepare(company_id)
+
+            while True:
+                chunk = list(queryset.filter(pk__gt=last_pk)[:self.chunk_size])
+                if not chunk:
+                    break
+
+                changed = []
+                for obj in chunk:
+                    before = [getattr(obj, name) for name in attnames]
+                    self.fix(obj, state)
+                    diff = {
+                        name: (old, getattr(obj, name))
+                        for name, old in zip(attnames, before) if getattr(obj, name) != old
+                    }
+                    if diff:
+                        changed.append(obj)
+                        result.add_diff(self.label(obj), diff, self.diff_limit)
+
+                last_pk = chunk[-1].pk
+                result.processed += len(chunk)
+                result.changed += len(changed)
+                if dry_run:
+                    continue
+
+                with transaction.atomic():
+                    if changed:
+                        self.get_model()._default_manager.bulk_update(changed, self.fields, batch_size=self.chunk_size)
+                    checkpoint.advance(last_pk, len(chunk), len(changed), state)
+        except Exception as e:
+            if checkpoint:
+                checkpoint.close(error=e)
+            raise
+
+        if result.changed and not dry_run:
+            lookups.bump_rows(self.get_queryset(company_id), self.fields)
+        self.finish(company_id, result, dry_run)
+        if checkpoint:
+            checkpoint.close()
+        return result
+
+
+class NullDecimalRepair(RepairJob):
+    """
+    Set-based: zero the ``fields`` that hold NULL, '' or NaN (values Django
+    cannot even load) with one UPDATE per column, scoped by ``get_queryset``.
+    """
+
+    def run(self, company_id, dry_run=False, restart=False):
+        result = RepairResult(self.name, company_id)
+        model = self.get_model()
+        table = connection.ops.quote_name(model._meta.db_table)
+        pk = connection.ops.quote_name(model._meta.pk.column)
+        scope_sql, scope_params = self.get_queryset(company_id).values('pk').query.sql_with_params()
+
+        with connection.cursor() as cursor:
+            for name in self.fields:
+                column = connection.ops.quote_name(model._meta.get_field(name).column)
+                where = f"{pk} IN ({scope_sql}) AND ({column} IS NULL OR CAST({column} AS TEXT) IN ('', 'NaN'))"
+                if dry_run:
+                    cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}", scope_params)
+                    count = cursor.fetchone()[0]
+                else:
+                    cursor.execute(f"UPDATE {table} SET {column} = 0 WHERE {where}", scope_params)
+                    count = cursor.rowcount
+                if count:
+                    result.changed += count
+                    result.diffs.append(f'{name}: {count} NULL/NaN value(s) -> 0')
+        if result.changed and not dry_run:
+            lookups.bump_rows(self.get_queryset(company_id), self.fields)
+        return result
+
+
+class RepairResult:
+    def __init__(self, job, company_id):
+        self.job = job
+        self.company_id = company_id
+        self.processed = 0
+        self.changed = 0
+        self.resumed_from = None
+        self.diffs = []
+        self.omitted = 0
+        self.error = None
+
+    def add_diff(self, label, diff, limit):
+        if len(self.diffs) >= limit:
+            self.omitted += 1
+            return
+        changes = ', '.join(f'{name}: {old} -> {new}' for name, (old, new) in diff.items())
+        self.diffs.append(f'{label} {changes}')
+
+
+def run_jobs(job_classes, company_id, options):
+    """Run jobs in order for one company; stops at the first failing job"""
+    results = []
+    for job_class in job_classes:
+        job = job_class(chunk_size=options['chunk_size'], diff_limit=options['limit'])
+        try:
+            results.append(job.run(company_id, dry_run=options['dry_run'], restart=options['restart']))
+        except Exception as e:
+            logger.exception(f"Repair job {job.name} failed for company {company_id}")
+            result = RepairResult(job.name, company_id)
+            result.error = str(e)
+            results.append(result)
+            break
+    return results
+
+
+def _init_worker():
+    import django
+
+    # No-op in forked workers; spawned ones need the app registry
+    django.setup()
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+
+
+class RepairCommand(BaseCommand):
+    """Base command: subclasses set ``help`` and ``jobs``"""
+    jobs = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=str, help='Company id or code (default: all companies)')
+        parser.add_argument('--dry-run', action='store_true', help='Show what would change without writing')
+        parser.add_argument('--restart', action='store_true', help='Ignore unfinished checkpoints and start over')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per chunk (and transaction)')
+        parser.add_argument('--workers', type=int, default=1, help='Processes to spread companies over')
+        parser.add_argument('--limit', type=int, default=20, help='Diff lines to show per job and company')
+
+    def handle(self, *args, **options):
+        company_jobs = [job for job in self.jobs if job.per_company]
+        global_jobs = [job for job in self.jobs if not job.per_company]
+        company_ids = self._get_company_ids(options['company'])
+        names = self._company_names(company_ids)
+        # Only what the jobs need: options can hold unpicklable streams
+        options = {name: options[name] for name in ('company', 'dry_run', 'restart', 'chunk_size', 'limit', 'workers')}
+
+        failed = False
+        if company_jobs:
+            for results in self._run_companies(company_jobs, company_ids, options):
+                failed |= self._print_results(results, names, options['dry_run'])
+        if global_jobs and options['company']:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {', '.join(job.name for job in global_jobs)}: they span all companies"
+            ))
+        elif global_jobs and not failed:
+            failed |= self._print_results(run_jobs(global_jobs, None, options), names, options['dry_run'], scope='all companies')
+
+        if failed and options['dry_run']:
+            raise CommandError('Dry run failed')
+        if failed:
+            raise CommandError('Repair failed; rerun to resume from the last checkpoint')
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: nothing was written'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Repair complete'))
+
+    def _run_companies(self, job_classes, company_ids, options):
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite' and not options['dry_run']:
+            self.stdout.write(self.style.WARNING('SQLite allows one writer at a time; running with 1 worker'))
+            workers = 1
+
+        if workers <= 1 or len(company_ids) <= 1:
+            for company_id in company_ids:
+                yield run_jobs(job_classes, company_id, options)
+            return
+
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(run_jobs, job_classes, company_id, options) for company_id in company_ids]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _get_company_ids(self, value):
+        from core.models import Company
+
+        if value:
+            lookup = {'pk': int(value)} if value.isdigit() else {'company_code': value}
+            company = Company.objects.filter(**lookup).first()
+            if company is None:
+                raise CommandError(f'Company {value} not found')
+            return [company.pk]
+        # None covers rows that lost their company
+        return list(Company.objects.order_by('pk').values_list('pk', flat=True)) + [None]
+
+    def _company_names(self, company_ids):
+        from core.models import Company
+
+        names = dict(Company.objects.filter(pk__in=[pk for pk in company_ids if pk]).values_list('pk', 'name'))
+        names[None] = 'no company'
+        return names
+
+    def _print_results(self, results, names, dry_run, scope=None):
+        failed = False
+        for result in results:
+            label = scope or names.get(result.company_id, result.company_id)
+            if result.error:
+                failed = True
+                self.stdout.write(self.style.ERROR(f'{result.job} [{label}]: {result.error}'))
+                continue
+            if not result.changed and not result.resumed_from:
+                continue
+
+            scanned = f'{result.processed} scanned, ' if result.processed else ''
+            line = f'{result.job} [{label}]: {scanned}{result.changed} {"to change" if dry_run else "changed"}'
+            if result.resumed_from:
+                line += f' (resumed after pk {result.resumed_from})'
+            self.stdout.write(line)
+            if dry_run:
+                for diff in result.diffs:
+                    self.stdout.write(f'  {diff}')
+                if result.omitted:
+                    self.stdout.write(f'  ... and {result.omitted} more')
+        return failed
@@ -0,0 +1,149 @@
+# core/routers.py
+"""
+Read replica routing for report and analytics traffic.
+
+Views opt in (``ReplicaReadMixin`` on BaseReportView and the summary
+actions, ``@replica_reads`` on function views); inside them ORM reads go to
+``settings.REPLICA_DB_ALIAS`` while every write, and every read anywhere
+else, stays on ``default``. Reads fall back to ``default`` when:
+
+- no replica is configured (``DATABASES`` has no such alias), which makes
+  the whole module a no-op
+- the requesting user wrote something in the last ``REPLICA_STICKY_SECONDS``
+  (``ReplicaStickinessMiddleware`` marks users after unsafe requests), so
+  users see their own writes
+- the replica is unreachable or, on PostgreSQL, replays more than
+  ``REPLICA_MAX_LAG_SECONDS`` behind; the check is cached for
+  ``REPLICA_HEALTH_TTL`` seconds per process
+
+Stickiness is kept in the Django cache: with several server processes it
+needs a shared cache backend.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+_read_alias = ContextVar('replica_read_alias', default=None)
+_health = {}
+
+
+def replica_alias():
+    alias = getattr(settings, 'REPLICA_DB_ALIAS', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+def _sticky_key(user_id):
+    return f'replica-sticky:{user_id}'
+
+
+def mark_write(user):
+    """Keep ``user``'s reads on the primary for REPLICA_STICKY_SECONDS"""
+    if replica_alias() and user is not None and user.is_authenticated:
+        cache.set(_sticky_key(user.pk), 1, getattr(settings, 'REPLICA_STICKY_SECONDS', 10))
+
+
+def is_sticky(user):
+    return user is not None and user.is_authenticated and cache.get(_sticky_key(user.pk)) is not None
+
+
+def replica_healthy(alias):
+    """Reachable and (PostgreSQL standby) not lagging too far; cached per process"""
+    now = time.monotonic()
+    checked_at, healthy = _health.get(alias, (None, False))
+    if checked_at is not None and now - checked_at < getattr(settings, 'REPLICA_HEALTH_TTL', 5):
+        return healthy
+
+    healthy = True
+    try:
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # NULL on a database that is not a standby (e.g. a local copy)
+                cursor.execute('SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())')
+                lag = cursor.fetchone()[0]
+                max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 30)
+                if lag is not None and lag > max_lag:
+                    logger.warning(f"Replica {alias} is {lag:.0f}s behind; reading from primary")
+                    healthy = False
+            # Also fails on a replica without the schema
+            cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+    except DatabaseError as e:
+        logger.warning(f"Replica {alias} unavailable, reading from primary: {e}")
+        healthy = False
+
+    _health[alias] = (now, healthy)
+    return healthy
+
+
+def choose_read_alias(user):
+    """The alias report reads of ``user`` should use (None: primary)"""
+    alias = replica_alias()
+    if alias is None or is_sticky(user) or not replica_healthy(alias):
+        return None
+    return alias
+
+
+@contextmanager
+def use_replica(user):
+    """Route ORM reads in the block to the replica, if it is usable for ``user``"""
+    token = _read_alias.set(choose_read_alias(user))
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def replica_reads(view_func):
+    """Decorator for function views (inside @api_view, so request.user is authenticated)"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        with use_replica(getattr(request, 'user', None)):
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Reads go to the alias chosen by use_replica(); everything else to default"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """
+    DRF view mixin: safe requests (limited to ``replica_actions`` on
+    viewsets, when set) read from the replica.
+    """
+    replica_actions = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        action = getattr(self, 'action', None)
+        if request.method in ('GET', 'HEAD', 'OPTIONS') and (self.replica_actions is None or action in self.replica_actions):
+            self._replica_token = _read_alias.set(choose_read_alias(request.user))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -3,6 +3,7 @@ from .models import Company, User, StaffRole, Staff, UserPermission
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
+from image_derivatives.serializers import ImageDerivativesField
 
 
 # -----------------------------
@@ -67,12 +68,13 @@ class CompanySerializer(serializers.ModelSerializer):
     product_count = serializers.IntegerField(read_only=True)
     is_expired = serializers.BooleanField(read_only=True)
     days_until_expiry = serializers.IntegerField(read_only=True)
+    logo_derivatives = ImageDerivativesField('logo')
     
     class Meta:
         model = Company
         fields = [
             'id', 'name', 'trade_license', 'address', 'phone', 'email',
-            'website', 'logo', 'currency', 'timezone', 'fiscal_year_start',
+            'website', 'logo', 'logo_derivatives', 'currency', 'timezone', 'fiscal_year_start',
             'plan_type', 'start_date', 'expiry_date', 'is_active',
             'max_users', 'max_products', 'max_branches', 'company_code',
             'active_user_count', 'product_count', 'is_expired', 'days_until_expiry',
@@ -105,13 +107,14 @@ class UserProfileSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
     permissions = serializers.SerializerMethodField()
     custom_permissions = UserPermissionSerializer(many=True, read_only=True)
+    profile_picture_derivatives = ImageDerivativesField('profile_picture')
     
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name', 'full_name',
             'role', 'permission_source', 'company', 'company_info', 'phone', 
-            'profile_picture', 'date_of_birth', 'is_verified', 'last_login', 
+            'profile_picture', 'profile_picture_derivatives', 'date_of_birth', 'is_verified', 'last_login', 
             'date_joined', 'permissions', 'custom_permissions', 'is_active', 
             'is_staff', 'is_superuser'
         ]
@@ -1,60 +1,86 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from products.models import Product
-from returns.models import SalesReturn, PurchaseReturn, BadStock, SalesReturnItem
 
 
+# Senders are lazy "app_label.ModelName" references so that loading core
+# does not import the products/user model modules during app setup.
+#
+# Returns move stock and write bad stock when they are approved
+# (ReturnApprovalMixin.approve_many in returns.models), not on save.
 
-@receiver(post_save, sender=SalesReturn)
-def create_badstock_from_sales_return(sender, instance, created, **kwargs):
-    """
-    When a SalesReturn is created, automatically add each returned product
-    to bad stock and optionally restore it to available stock.
-    """
-    if not created:
+
+# -----------------------------
+# Company counter caches
+# -----------------------------
+# Company.product_count/active_user_count follow product and user writes by
+# delta, from the state each instance was loaded with (see the models'
+# from_db). Bulk writes bypass signals, so code that bulk creates, updates
+# or deletes products or users must call Company.recount_counters()
+# afterwards (as generate_erp_data does); the companies.counters audit
+# (core.audit) finds and fixes any drift left.
+PRODUCT_COUNTED_FIELDS = {'company', 'company_id'}
+USER_COUNTED_FIELDS = {'company', 'company_id', 'is_active'}
+
+
+def _touches(update_fields, counted):
+    return update_fields is None or bool(set(update_fields) & counted)
+
+
+@receiver(pre_save, sender='products.Product')
+def remember_product_company(sender, instance, update_fields=None, **kwargs):
+    """Instances not loaded from the database read their stored company once"""
+    if instance.pk and not hasattr(instance, '_counted_company_id') and _touches(update_fields, PRODUCT_COUNTED_FIELDS):
+        instance._counted_company_id = sender.objects.filter(pk=instance.pk).values_list('company_id', flat=True).first()
+
+
+@receiver(post_save, sender='products.Product')
+def count_product_save(sender, instance, created, update_fields=None, **kwargs):
+    from core.models import Company
+
+    if not created and not _touches(update_fields, PRODUCT_COUNTED_FIELDS):
         return
+    previous = None if created else getattr(instance, '_counted_company_id', None)
+    if previous != instance.company_id:
+        Company.adjust_counters(previous, products=-1)
+        Company.adjust_counters(instance.company_id, products=1)
+    instance._counted_company_id = instance.company_id
+
+
+@receiver(post_delete, sender='products.Product')
+def count_product_delete(sender, instance, **kwargs):
+    from core.models import Company
 
-    # Loop through all returned items
-    for item in instance.items.all():
-        if item.quantity > 0:
-            product = Product.objects.filter(id=item.product_id).first()
-            if not product:
-                continue
-
-            # SUCCESS: Create a BadStock record
-            BadStock.objects.create(
-                product=product,
-                quantity=item.quantity,
-                reason=f"Sales Return (Invoice {instance.invoice_no})"
-            )
-
-            # SUCCESS: Optional: restore returned stock to available inventory
-            product.stock += item.quantity
-            product.save()
-
-
-@receiver(post_save, sender=PurchaseReturn)
-
-@receiver(post_save, sender=PurchaseReturn)
-def create_badstock_from_purchase_return(sender, instance, created, **kwargs):
-    """
-    When a PurchaseReturn is created, add each returned product to BadStock
-    and decrease product stock_qty.
-    """
-    if not created:
+    Company.adjust_counters(getattr(instance, '_counted_company_id', instance.company_id), products=-1)
+
+
+def _counted_user_company(company_id, is_active):
+    return company_id if is_active else None
+
+
+@receiver(pre_save, sender='core.User')
+def remember_user_state(sender, instance, update_fields=None, **kwargs):
+    if instance.pk and not hasattr(instance, '_counted') and _touches(update_fields, USER_COUNTED_FIELDS):
+        instance._counted = sender.objects.filter(pk=instance.pk).values_list(*sender.COUNTED_FIELDS).first()
+
+
+@receiver(post_save, sender='core.User')
+def count_user_save(sender, instance, created, update_fields=None, **kwargs):
+    from core.models import Company
+
+    if not created and not _touches(update_fields, USER_COUNTED_FIELDS):
         return
+    previous = None if created else getattr(instance, '_counted', None)
+    before = _counted_user_company(*previous) if previous else None
+    after = _counted_user_company(instance.company_id, instance.is_active)
+    if before != after:
+        Company.adjust_counters(before, active_users=-1)
+        Company.adjust_counters(after, active_users=1)
+    instance._counted = (instance.company_id, instance.is_active)
+
+
+@receiver(post_delete, sender='core.User')
+def count_user_delete(sender, instance, **kwargs):
+    from core.models import Company
 
-    for item in instance.items.all():
-        product = item.product_ref
-        if item.qty > 0:
-            # Create BadStock record
-            BadStock.objects.create(
-                product=product,
-                qty=item.qty,
-                reason=f"Purchase Return",
-                date=instance.date.date()
-            )
-
-            # Decrease product stock
-            product.stock_qty -= item.qty
-            product.save()
\ No newline at end of file
+    previous = getattr(instance, '_counted', (instance.company_id, instance.is_active))
+    Company.adjust_counters(_counted_user_company(*previous), active_users=-1)
@@ -0,0 +1,80 @@
+# core/tests.py
+from decimal import Decimal
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from accounts.models import Account
+from core.models import Company, User
+from core.performance import (
+    DEFAULTS, QueryBudgetExceeded, QueryRecorder, enforce_query_budget, query_budget, resolve_query_budget,
+)
+from transactions.models import Transaction
+from transactions.views import TransactionViewSet
+
+RAISE_BUDGETS = {**DEFAULTS, 'BUDGET_MODE': 'raise'}
+
+
+class QueryBudgetResolutionTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_function_view_budget(self):
+        @query_budget(3)
+        def view(request):
+            return None
+
+        self.assertEqual(resolve_query_budget(view, self.factory.get('/')), 3)
+
+    def test_viewset_budget_is_per_action(self):
+        view = TransactionViewSet.as_view({'get': 'list', 'post': 'create'})
+        self.assertEqual(resolve_query_budget(view, self.factory.get('/')), 5)
+        self.assertIsNone(resolve_query_budget(view, self.factory.post('/')))
+
+    @override_settings(PERFORMANCE_INSTRUMENTATION={'DEFAULT_QUERY_BUDGET': 12})
+    def test_default_budget_applies_to_undeclared_views(self):
+        def view(request):
+            return None
+
+        self.assertEqual(resolve_query_budget(view, self.factory.get('/')), 12)
+
+    def test_enforcement_modes(self):
+        recorder = QueryRecorder()
+        recorder.count = 4
+        self.assertFalse(enforce_query_budget('GET /x/', recorder, 4, 'raise'))
+        self.assertFalse(enforce_query_budget('GET /x/', recorder, 3, 'off'))
+        with self.assertLogs('core.performance', 'WARNING'):
+            self.assertTrue(enforce_query_budget('GET /x/', recorder, 3, 'log'))
+        with self.assertRaises(QueryBudgetExceeded):
+            enforce_query_budget('GET /x/', recorder, 3, 'raise')
+
+
+@override_settings(PERFORMANCE_INSTRUMENTATION=RAISE_BUDGETS)
+class QueryBudgetMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Budget Co')
+        cls.user = User.objects.create_user(
+            username='budget', password='x', company=cls.company, role=User.Role.ADMIN,
+        )
+        account = Account.objects.create(name='Cash', company=cls.company, ac_type='cash')
+        for number in range(30):
+            Transaction.objects.create(
+                company=cls.company, account=account, transaction_type='credit',
+                amount=Decimal('10.00'), status='completed',
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_transaction_list_stays_within_budget(self):
+        # A full page of rows costs the same queries as one row
+        response = self.client.get('/api/transactions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['data']['results']), 20)
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+    def test_exceeding_the_budget_fails_the_request(self):
+        with mock.patch.object(TransactionViewSet, 'query_budget', {'list': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/transactions/')
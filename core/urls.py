@@ -23,6 +23,8 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login
 from core.froms import CompanyAdminSignupForm, UserForm
 from core.views import ProfileAPIView, UserPermissionsAPIView, user_dashboard_stats, ChangePasswordAPIView, PermissionCheckView, UserPermissionManagementView   ,ResetPermissionsAPIView
+from core.views import PerformanceStatsAPIView, LookupAPIView, AuditSummaryAPIView
+from core.lazy import lazy_include
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -88,6 +90,10 @@ urlpatterns = [
 
     path('profile/permissions/', UserPermissionsAPIView.as_view(), name='user-permissions'),
     path('dashboard/stats/', user_dashboard_stats, name='user-dashboard-stats'),
+    path('performance/stats/', PerformanceStatsAPIView.as_view(), name='performance-stats'),
+    path('lookups/', LookupAPIView.as_view(), name='lookups'),
+    path('lookups/<str:entity>/', LookupAPIView.as_view(), name='lookup'),
+    path('audit/summary/', AuditSummaryAPIView.as_view(), name='audit-summary'),
 
   path('user-permissions/', UserPermissionsAPIView.as_view(), name='user_permissions'),
     path('user-permissions/check/', PermissionCheckView.as_view(), name='permission_check'),
@@ -97,9 +103,10 @@ urlpatterns = [
     path('supplier-payments/', SupplierPaymentListCreateAPIView.as_view(), name='supplier-payment-list-create'),
     path('supplier-payments/<int:pk>/', SupplierPaymentDetailAPIView.as_view(), name='supplier-payment-detail'),
 
-    path('reports/', include('reports.urls')),
+    path('reports/', lazy_include('reports.urls')),
 
     path('expenses/', include('expenses.urls')),
+    path('', include('branch_warehouse.urls')),
     path('income/', include('income.urls')),
     
     # FIXED: Use the imported function directly, not via views.
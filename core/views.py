@@ -40,6 +40,7 @@ from .serializers import (
     PermissionCheckSerializer,
     UserPermissionSerializer
 )
+from .routers import replica_reads
 from .utils import custom_response
 
 # Import forms safely
@@ -1113,6 +1114,8 @@ class CompanyLogoUpdateAPIView(APIView):
 
             company.logo = file
             company.save()
+            # Rendered by the image_derivatives.render job (already done unless BACKGROUND_JOBS)
+            company.refresh_from_db(fields=['logo_derivatives'])
 
             serializer = CompanySerializer(company, context={'request': request})
             return custom_response(
@@ -1225,6 +1228,8 @@ class UserProfileImageUpdateAPIView(APIView):
 
             target_user.profile_picture = file
             target_user.save()
+            # Rendered by the image_derivatives.render job (already done unless BACKGROUND_JOBS)
+            target_user.refresh_from_db(fields=['profile_picture_derivatives'])
 
             serializer = UserProfileSerializer(target_user, context={'request': request})
             return custom_response(
@@ -1248,6 +1253,7 @@ class UserProfileImageUpdateAPIView(APIView):
 # --------------------------
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def user_dashboard_stats(request):
     try:
         user = request.user
@@ -1309,6 +1315,137 @@ def user_dashboard_stats(request):
         )
 
 
+# --------------------------
+# Performance Stats
+# --------------------------
+class PerformanceStatsAPIView(APIView):
+    """
+    Rolling per-endpoint latency and query statistics collected by
+    core.middleware.PerformanceMiddleware. Figures are per worker process.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != User.Role.SUPER_ADMIN:
+            return custom_response(
+                False,
+                "Only super admin can view performance statistics",
+                None,
+                status.HTTP_403_FORBIDDEN
+            )
+
+        from .performance import request_stats
+        return custom_response(
+            True,
+            "Performance statistics fetched successfully",
+            request_stats.snapshot(),
+            status.HTTP_200_OK
+        )
+
+    def delete(self, request):
+        if request.user.role != User.Role.SUPER_ADMIN:
+            return custom_response(
+                False,
+                "Only super admin can reset performance statistics",
+                None,
+                status.HTTP_403_FORBIDDEN
+            )
+
+        from .performance import request_stats
+        request_stats.reset()
+        return custom_response(True, "Performance statistics reset", None, status.HTTP_200_OK)
+
+
+class LookupAPIView(APIView):
+    """
+    Dropdown data as [id, label, extra] rows for one entity (/lookups/<entity>/)
+    or several (/lookups/?entities=a,b). ?q= filters by prefix, ?limit= caps
+    the rows per entity. Served from a per-company versioned cache with an
+    ETag; If-None-Match gets a 304 (see core.lookups).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, entity=None):
+        from . import lookups
+        from .models import LookupVersion
+
+        company_id = getattr(request.user, 'company_id', None)
+        if not company_id:
+            return custom_response(False, "User must be associated with a company", None, status.HTTP_400_BAD_REQUEST)
+
+        entities = [entity] if entity else [
+            name.strip() for name in request.query_params.get('entities', '').split(',') if name.strip()
+        ]
+        unknown = [name for name in entities if not lookups.get_lookup(name)]
+        if not entities or unknown:
+            return custom_response(
+                False,
+                f"Unknown lookup: {', '.join(unknown) or '(none)'}. Available: {', '.join(lookups.LOOKUPS)}",
+                None,
+                status.HTTP_404_NOT_FOUND if entity else status.HTTP_400_BAD_REQUEST
+            )
+
+        prefix = request.query_params.get('q', '').strip()
+        limit = lookups.parse_limit(request.query_params.get('limit'))
+        versions = LookupVersion.current(company_id, entities)
+        keys = {name: lookups.cache_key(company_id, name, versions[name], prefix, limit) for name in entities}
+        etag = lookups.etag_for(keys.values())
+
+        if etag in [tag.strip() for tag in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            results = {
+                name: {
+                    'version': versions[name],
+                    'results': lookups.cached_rows(keys[name], lookups.get_lookup(name), company_id, prefix, limit),
+                }
+                for name in entities
+            }
+            response = custom_response(
+                True,
+                "Lookup data fetched successfully",
+                results[entity] if entity else results,
+                status.HTTP_200_OK
+            )
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class AuditSummaryAPIView(APIView):
+    """
+    Reconciliation audit status for the user's company (see core.audit):
+    per invariant the last run and its open findings. ?invariant=<name>
+    lists that invariant's open findings. Super admins may pass ?company=.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        from .audit import INVARIANTS, summary
+        from .models import AuditFinding
+
+        if request.user.role not in (User.Role.SUPER_ADMIN, User.Role.ADMIN):
+            return custom_response(False, "Only admins can view the reconciliation audit", None, status.HTTP_403_FORBIDDEN)
+
+        company_id = request.user.company_id
+        if request.user.role == User.Role.SUPER_ADMIN and request.query_params.get('company', '').isdigit():
+            company_id = int(request.query_params['company'])
+        if not company_id:
+            return custom_response(False, "User must be associated with a company", None, status.HTTP_400_BAD_REQUEST)
+
+        invariant = request.query_params.get('invariant')
+        if invariant is None:
+            return custom_response(True, "Audit summary fetched successfully", summary(company_id), status.HTTP_200_OK)
+        if invariant not in INVARIANTS:
+            return custom_response(False, f"Unknown invariant: {invariant}", None, status.HTTP_400_BAD_REQUEST)
+
+        findings = AuditFinding.objects.filter(
+            company_id=company_id, invariant=invariant, resolved_at__isnull=True
+        ).values('object_id', 'object_label', 'field', 'stored', 'expected', 'first_seen', 'last_seen')[:500]
+        return custom_response(True, "Audit findings fetched successfully", list(findings), status.HTTP_200_OK)
+
+
 # --------------------------
 # Admin Web Views (Optional)
 # --------------------------
@@ -0,0 +1,100 @@
+# core/warmup.py
+"""
+Optional worker warmup.
+
+Called from the WSGI entry points after ``get_wsgi_application()`` when
+``settings.STARTUP_WARMUP`` is enabled, so the first real request does not
+pay for URLconf imports, serializer field construction and content type
+lookups. Each step is timed and failures are logged, never raised: a broken
+warmup must not stop the worker from serving.
+"""
+import logging
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _prime_urlconf():
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    # Reverse-lookup population walks every resolver, importing lazy includes too
+    resolver._populate()
+    return len(resolver.reverse_dict)
+
+
+def _iter_view_classes(patterns):
+    from django.urls import URLPattern, URLResolver
+
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_view_classes(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, 'cls', None) or getattr(pattern.callback, 'view_class', None)
+            if view_class is not None:
+                yield view_class
+
+
+def _prime_serializers():
+    """Build serializer fields once so model _meta and field lookups are cached"""
+    from django.urls import get_resolver
+
+    primed = set()
+    for view_class in _iter_view_classes(get_resolver().url_patterns):
+        serializer_class = getattr(view_class, 'serializer_class', None)
+        if serializer_class is None or serializer_class in primed:
+            continue
+        try:
+            serializer_class().fields
+        except Exception as e:
+            logger.debug("Warmup skipped %s: %s", serializer_class.__name__, e)
+        primed.add(serializer_class)
+    return len(primed)
+
+
+def _prime_caches():
+    from django.apps import apps
+    from django.contrib.contenttypes.models import ContentType
+    from django.db import connections
+
+    try:
+        content_types = ContentType.objects.get_for_models(*apps.get_models())
+    finally:
+        # Don't carry a connection opened here into request handling threads
+        connections.close_all()
+    return len(content_types)
+
+
+WARMUP_STEPS = (
+    ('urlconf', _prime_urlconf),
+    ('serializers', _prime_serializers),
+    ('caches', _prime_caches),
+)
+
+
+def warmup(force=False):
+    """
+    Prime the worker before it accepts traffic. Returns {step: elapsed_ms}.
+
+    Usage (wsgi.py):
+        application = get_wsgi_application()
+        warmup()
+    """
+    if not force and not getattr(settings, 'STARTUP_WARMUP', False):
+        return {}
+
+    timings = {}
+    for name, step in WARMUP_STEPS:
+        started = time.perf_counter()
+        try:
+            result = step()
+        except Exception:
+            logger.exception("Warmup step %s failed", name)
+            result = None
+        timings[name] = round((time.perf_counter() - started) * 1000, 2)
+        logger.debug("Warmup %s: %s in %.1fms", name, result, timings[name])
+
+    logger.info("Worker warmup finished in %.1fms", sum(timings.values()))
+    return timings
@@ -21,6 +21,11 @@ class Customer(models.Model):
     is_active = models.BooleanField(default=True)
     client_no = models.CharField(max_length=20, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'is_active']),
+        ]
+
     def save(self, *args, **kwargs):
         """Custom save method to handle client number generation"""
         is_new = self.pk is None
@@ -127,32 +132,38 @@ class Customer(models.Model):
 
     def sync_advance_balance(self):
         """Sync stored advance balance with actual advance receipts and sales overpayments"""
+        from closing.balances import after_close, latest_close, snapshot_for
+        from closing.models import CustomerSnapshot
         from sales.models import Sale
         from django.db.models import Sum
         from decimal import Decimal
         
+        # Sales and receipts covered by the latest period close come from its snapshot
+        close = latest_close(self.company)
+        snapshot = snapshot_for(close, CustomerSnapshot, customer=self)
+        
         # Calculate sales overpayment
-        sales_total = Sale.objects.filter(
+        sales_total = after_close(Sale.objects.filter(
             customer=self,
             company=self.company
-        ).aggregate(
+        ), close, 'sale_date', 'sale').aggregate(
             total_grand=Sum('grand_total'),
             total_paid=Sum('paid_amount')
         )
         
-        total_grand = float(sales_total['total_grand'] or 0)
-        total_paid = float(sales_total['total_paid'] or 0)
+        total_grand = float(sales_total['total_grand'] or 0) + float(snapshot.sales_total if snapshot else 0)
+        total_paid = float(sales_total['total_paid'] or 0) + float(snapshot.sales_paid if snapshot else 0)
         sales_overpayment = max(0.0, total_paid - total_grand)
         
         # Calculate advance from receipts
-        total_advance_from_receipts = 0.0
+        total_advance_from_receipts = float(snapshot.advance_receipts_total if snapshot else 0)
         advance_receipts_list = []
         try:
             from money_receipts.models import MoneyReceipt
-            money_receipts = MoneyReceipt.objects.filter(
+            money_receipts = after_close(MoneyReceipt.objects.filter(
                 customer=self,
                 company=self.company
-            )
+            ), close, 'payment_date')
             
             for receipt in money_receipts:
                 receipt_amount = float(receipt.amount) if receipt.amount else 0.0
@@ -227,16 +238,21 @@ class Customer(models.Model):
 
     def get_payment_summary(self):
         """Get comprehensive payment summary including advance"""
+        from closing.balances import after_close, latest_close, snapshot_for
+        from closing.models import CustomerSnapshot
         from sales.models import Sale
-        from django.db.models import Sum
+        from django.db.models import Count, Sum
         
-        # Get all sales for this customer
-        sales = Sale.objects.filter(customer=self, company=self.company)
+        # Sales covered by the latest period close come from its snapshot
+        close = latest_close(self.company)
+        snapshot = snapshot_for(close, CustomerSnapshot, customer=self)
+        sales = after_close(Sale.objects.filter(customer=self, company=self.company), close, 'sale_date', 'sale')
         
         # Calculate totals
-        total_sales = sales.count()
-        total_grand_total = sales.aggregate(total=Sum('grand_total'))['total'] or 0
-        total_paid = sales.aggregate(total=Sum('paid_amount'))['total'] or 0
+        totals = sales.aggregate(count=Count('id'), grand_total=Sum('grand_total'), paid=Sum('paid_amount'))
+        total_sales = totals['count'] + (snapshot.sales_count if snapshot else 0)
+        total_grand_total = (totals['grand_total'] or 0) + (snapshot.sales_total if snapshot else 0)
+        total_paid = (totals['paid'] or 0) + (snapshot.sales_paid if snapshot else 0)
         
         # Sync advance balance first
         sync_result = self.sync_advance_balance()
@@ -1,10 +1,17 @@
 from rest_framework import serializers
-from django.db.models import Sum, F
+from django.db.models import Sum, F, Count
 from decimal import Decimal
+from core.fieldsets import SparseFieldsetMixin
 from .models import Customer
 from sales.models import Sale
 
-class CustomerSerializer(serializers.ModelSerializer):
+SALE_TOTALS = {
+    'total_paid_amount': Sum('sale__paid_amount'),
+    'total_grand_total': Sum('sale__grand_total'),
+}
+
+
+class CustomerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     total_due = serializers.SerializerMethodField()
     total_paid = serializers.SerializerMethodField()
     amount_type = serializers.SerializerMethodField()
@@ -24,6 +31,14 @@ class CustomerSerializer(serializers.ModelSerializer):
             'customer_type'
         ]
         read_only_fields = ['date_created', 'created_by', 'customer_type']
+        # payment_breakdown loads every sale and receipt: only with ?expand=payment_breakdown
+        field_costs = {
+            'total_sales': {'annotate': {'sales_count': Count('sale', distinct=True)}},
+            'total_paid': {'annotate': SALE_TOTALS},
+            'total_due': {'annotate': SALE_TOTALS},
+            'amount_type': {'annotate': SALE_TOTALS},
+            'payment_breakdown': {'expensive': True},
+        }
 
     def get_client_no(self, obj):
         """Get client number - use existing or generate if missing"""
@@ -78,24 +93,8 @@ class CustomerSerializer(serializers.ModelSerializer):
             return 0.00
 
     def get_advance_balance(self, obj):
-        """Return CORRECT advance balance calculation"""
-        try:
-            # Sync advance balance to ensure accuracy
-            sync_result = obj.sync_advance_balance()
-            
-            if sync_result['synced']:
-                # Return the newly synced value
-                return sync_result['new_value']
-            else:
-                # Return the correct value
-                return sync_result['current_value']
-                
-        except Exception as e:
-            # Fallback to stored value
-            try:
-                return float(obj.advance_balance) if obj.advance_balance else 0.0
-            except:
-                return 0.0
+        """Stored advance balance; drift is found by the reconciliation audit (core.audit)"""
+        return float(obj.advance_balance) if obj.advance_balance else 0.0
 
     def get_total_due(self, obj):
         """Calculate total due properly considering advance"""
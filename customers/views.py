@@ -6,6 +6,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, Count, Sum, F, Case, When, Value, DecimalField
 from core.utils import custom_response
 from core.pagination import CustomPageNumberPagination
+from core.fieldsets import SparseFieldsetViewMixin
 from .models import Customer
 from .serializers import CustomerSerializer
 from decimal import Decimal
@@ -16,7 +17,7 @@ logger = logging.getLogger(__name__)
 
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     Customer ViewSet with complete company-based isolation
     """
@@ -48,7 +49,11 @@ class CustomerViewSet(viewsets.ModelViewSet):
         """
         queryset = self.get_queryset()
         
-        # Only apply expensive annotations for list/detail actions
+        # Lists only annotate what the selected fields need (see CustomerSerializer.Meta.field_costs)
+        if self.action in ['list', 'retrieve'] and not self._orders_by_balance():
+            return self.prepare_queryset(queryset)
+
+        # Summaries and balance ordering need the full set of due/advance annotations
         if self.action in ['list', 'retrieve', 'summary', 'special_summary']:
             queryset = queryset.annotate(
                 sales_count=Count('sale', distinct=True),
@@ -81,6 +86,10 @@ class CustomerViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    def _orders_by_balance(self):
+        ordering = self.request.query_params.get('ordering', '')
+        return 'net_due_amount' in ordering
+
     def get_object(self):
         """
         Secure object retrieval with company check
@@ -181,10 +190,11 @@ class CustomerViewSet(viewsets.ModelViewSet):
             
             # If no pagination, return all results
             serializer = self.get_serializer(queryset, many=True)
+            data = serializer.data
             return custom_response(
                 success=True,
-                message=f"Found {queryset.count()} customers",
-                data=serializer.data,
+                message=f"Found {len(data)} customers",
+                data=data,
                 status_code=status.HTTP_200_OK
             )
             
@@ -519,7 +529,7 @@ class CustomerViewSet(viewsets.ModelViewSet):
                 data=None,
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-class CustomerNonPaginationViewSet(viewsets.ModelViewSet):
+class CustomerNonPaginationViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
     permission_classes = [IsAuthenticated]
@@ -554,14 +564,8 @@ class CustomerNonPaginationViewSet(viewsets.ModelViewSet):
             elif customer_type.lower() == 'regular':
                 queryset = queryset.filter(special_customer=False)
         
-        # Optimize queryset with annotations
-        queryset = queryset.annotate(
-            sales_count=Count('sale', distinct=True),
-            total_paid_amount=Sum('sale__paid_amount'),
-            total_grand_total=Sum('sale__grand_total')
-        )
-        
-        return queryset
+        # Annotate only what the selected fields need
+        return self.prepare_queryset(queryset)
 
     def list(self, request, *args, **kwargs):
         try:
@@ -569,10 +573,11 @@ class CustomerNonPaginationViewSet(viewsets.ModelViewSet):
             
             # No pagination - return all results
             serializer = self.get_serializer(queryset, many=True)
+            data = serializer.data
             return custom_response(
                 success=True,
-                message=f"Found {queryset.count()} customers",
-                data=serializer.data,
+                message=f"Found {len(data)} customers",
+                data=data,
                 status_code=status.HTTP_200_OK
             )
             
@@ -0,0 +1,10 @@
+# image_derivatives/apps.py
+from django.apps import AppConfig
+
+
+class ImageDerivativesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'image_derivatives'
+
+    def ready(self):
+        import image_derivatives.signals
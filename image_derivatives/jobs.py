@@ -0,0 +1,14 @@
+# image_derivatives/jobs.py
+from core.jobs import register
+
+
+@register('image_derivatives.render')
+def render_derivatives(payload):
+    """Derivatives for one object's image (nothing to do when they are already current)"""
+    from django.apps import apps
+
+    from image_derivatives.pipeline import refresh
+
+    instance = apps.get_model(payload['model'])._default_manager.filter(pk=payload['pk']).first()
+    if instance is not None:
+        refresh(instance, payload['field'])
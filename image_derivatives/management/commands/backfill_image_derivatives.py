@@ -0,0 +1,55 @@
+# image_derivatives/management/commands/backfill_image_derivatives.py
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Company
+
+# --model choices -> model label
+MODELS = {'product': 'products.Product', 'company': 'core.Company', 'user': 'core.User'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the thumbnail, grid and detail derivatives of existing product images, company logos '
+        'and profile pictures whose derivatives are missing or belong to an older image. '
+        'Safe to re-run: current derivatives and already stored files are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=sorted(MODELS), action='append', help='Only these images (repeatable)')
+        parser.add_argument('--company', type=str, help='Company id or code (default: all companies)')
+        parser.add_argument('--force', action='store_true', help='Render again even when derivatives are current')
+        parser.add_argument('--dry-run', action='store_true', help='Count the images that need rendering without writing')
+
+    def handle(self, *args, **options):
+        from image_derivatives.pipeline import IMAGE_FIELDS, is_current, refresh
+
+        companies = self._get_companies(options['company'])
+        verb = 'Would render' if options['dry_run'] else 'Rendered'
+        for key in options['model'] or sorted(MODELS):
+            label = MODELS[key]
+            model, field_name = apps.get_model(label), IMAGE_FIELDS[label]
+            queryset = model._default_manager.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            if companies is not None:
+                queryset = queryset.filter(**({'pk__in': companies} if model is Company else {'company__in': companies}))
+
+            rendered = skipped = 0
+            for instance in queryset.order_by('pk').iterator(chunk_size=200):
+                if not options['force'] and is_current(instance, field_name):
+                    skipped += 1
+                elif options['dry_run'] or refresh(instance, field_name, force=options['force']):
+                    rendered += 1
+                else:
+                    skipped += 1
+            self.stdout.write(f'{label}.{field_name}: {verb.lower()} {rendered}, skipped {skipped}')
+
+        self.stdout.write(self.style.SUCCESS(f'{verb} image derivatives'))
+
+    def _get_companies(self, value):
+        if value:
+            lookup = {'pk': int(value)} if value.isdigit() else {'company_code': value}
+            try:
+                return [Company.objects.get(**lookup)]
+            except Company.DoesNotExist:
+                raise CommandError(f'Company {value} not found')
+        return None
@@ -0,0 +1,157 @@
+# image_derivatives/pipeline.py
+"""
+Resized copies of uploaded images for listings and grids.
+
+Each image field in ``IMAGE_FIELDS`` has a JSON column next to it
+(``<field>_derivatives``) describing its derivatives:
+
+    {
+        'source': 'inventory-products/photo.jpg',
+        'width': 4032, 'height': 3024,
+        'variants': {
+            'thumbnail': {'width': 160, 'height': 120,
+                          'webp': 'derivatives/3f/3fa2...-thumbnail.webp',
+                          'jpeg': 'derivatives/3f/3fa2...-thumbnail.jpg'},
+            'grid': {...},
+            'detail': {...},
+        },
+    }
+
+Every variant is written as WebP and as JPEG (for clients without WebP),
+after applying the EXIF orientation; metadata is not copied. File names
+start with a hash of the source bytes and the variant spec, so a URL never
+changes content and can be cached for good (serve ``MEDIA_URL/derivatives/``
+with a long ``Cache-Control`` max-age). Identical uploads share files, so
+derivatives are never deleted with their object.
+
+Uploads render in the ``image_derivatives.render`` job, queued by
+``image_derivatives.signals``; ``manage.py backfill_image_derivatives``
+renders existing media.
+"""
+import hashlib
+import io
+import logging
+import posixpath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# model label -> image field; the derivatives live in "<field>_derivatives"
+IMAGE_FIELDS = {
+    'products.Product': 'image',
+    'core.Company': 'logo',
+    'core.User': 'profile_picture',
+}
+
+# name -> bounding box (width, height); images are never enlarged
+VARIANTS = {
+    'thumbnail': (160, 160),
+    'grid': (480, 480),
+    'detail': (1200, 1200),
+}
+
+# format -> (extension, Pillow save options)
+FORMATS = {
+    'webp': ('webp', {'format': 'WEBP', 'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+DERIVATIVES_DIR = 'derivatives'
+
+# EXIF tag; values 5-8 are rotated a quarter turn
+ORIENTATION = 0x0112
+
+# Raised by sources that cannot be rendered; retrying does not help
+UNRENDERABLE = (FileNotFoundError, UnidentifiedImageError, Image.DecompressionBombError)
+
+
+def derivatives_field(field_name):
+    return f'{field_name}_derivatives'
+
+
+def is_current(instance, field_name):
+    """Whether the stored derivatives belong to the image the field holds now"""
+    name = getattr(instance, field_name).name or ''
+    return (getattr(instance, derivatives_field(field_name)) or {}).get('source', '') == name
+
+
+def _digest(content):
+    """Hash of the source bytes and the variant spec: changing either gives new file names"""
+    return hashlib.sha256(content + repr((VARIANTS, FORMATS)).encode()).hexdigest()[:24]
+
+
+def _flatten(image):
+    """RGB copy of ``image`` with any transparency laid on white (for JPEG)"""
+    if image.mode == 'RGB':
+        return image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def render(fieldfile):
+    """Write the derivatives of ``fieldfile`` (skipping files already stored); returns the JSON description"""
+    storage = fieldfile.storage
+    with fieldfile.open('rb') as source:
+        content = source.read()
+    digest = _digest(content)
+
+    image = Image.open(io.BytesIO(content))
+    width, height = image.size
+    if image.getexif().get(ORIENTATION, 1) in (5, 6, 7, 8):
+        width, height = height, width
+    # JPEGs decode straight to a reduced size (DCT scaling), much cheaper for phone photos
+    largest = max(VARIANTS.values())
+    image.draft('RGB', (largest[0] * 2, largest[1] * 2))
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    variants = {}
+    for name, box in sorted(VARIANTS.items(), key=lambda item: -item[1][0] * item[1][1]):
+        resized = image.copy()
+        resized.thumbnail(box, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        variant = {'width': resized.width, 'height': resized.height}
+        for key, (extension, options) in FORMATS.items():
+            path = posixpath.join(DERIVATIVES_DIR, digest[:2], f'{digest}-{name}.{extension}')
+            if not storage.exists(path):
+                buffer = io.BytesIO()
+                (_flatten(resized) if options['format'] == 'JPEG' else resized).save(buffer, **options)
+                path = storage.save(path, ContentFile(buffer.getvalue()))
+            variant[key] = path
+        variants[name] = variant
+        # Each smaller variant is resized from the previous one
+        image = resized
+
+    return {
+        'source': fieldfile.name,
+        'width': width,
+        'height': height,
+        'variants': {name: variants[name] for name in VARIANTS},
+    }
+
+
+def refresh(instance, field_name, force=False):
+    """
+    Render the derivatives of ``instance``'s image unless they are current
+    and store them with one UPDATE (no signals); a cleared image clears them.
+    Returns True when the column changed.
+    """
+    if not force and is_current(instance, field_name):
+        return False
+    fieldfile = getattr(instance, field_name)
+    if fieldfile:
+        try:
+            derivatives = render(fieldfile)
+        except UNRENDERABLE as e:
+            logger.warning(f"No derivatives for {instance._meta.label} {instance.pk} {fieldfile.name}: {e}")
+            return False
+    else:
+        derivatives = {}
+
+    column = derivatives_field(field_name)
+    setattr(instance, column, derivatives)
+    type(instance)._default_manager.filter(pk=instance.pk).update(**{column: derivatives})
+    return True
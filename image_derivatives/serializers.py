@@ -0,0 +1,43 @@
+# image_derivatives/serializers.py
+from rest_framework import serializers
+
+from .pipeline import derivatives_field
+
+
+class ImageDerivativesField(serializers.Field):
+    """
+    Read-only URLs of an image's derivatives, built from the JSON column
+    without touching storage:
+
+        {'thumbnail': {'width': 160, 'height': 120, 'webp': url, 'jpeg': url}, 'grid': {...}, 'detail': {...}}
+
+    None until they have been rendered; clients then fall back to the original.
+    """
+
+    def __init__(self, image_field, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        self.image_field = image_field
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        derivatives = getattr(instance, derivatives_field(self.image_field)) or {}
+        fieldfile = getattr(instance, self.image_field)
+        if not derivatives.get('variants') or derivatives.get('source') != fieldfile.name:
+            return None
+
+        request = self.context.get('request')
+        storage = fieldfile.storage
+
+        def url(path):
+            location = storage.url(path)
+            return request.build_absolute_uri(location) if request is not None else location
+
+        return {
+            name: {
+                'width': variant['width'],
+                'height': variant['height'],
+                **{key: url(path) for key, path in variant.items() if key not in ('width', 'height')},
+            }
+            for name, variant in derivatives['variants'].items()
+        }
@@ -0,0 +1,30 @@
+# image_derivatives/signals.py
+"""
+Saving a product, company or user whose image no longer matches its
+derivatives queues ``image_derivatives.render`` for it. The check reads
+only the saved instance, so saves that leave the image alone cost nothing.
+Bulk writes bypass signals: ``manage.py backfill_image_derivatives`` picks
+those images up.
+"""
+from django.db.models.signals import post_save
+
+from core.jobs import enqueue
+
+from .pipeline import IMAGE_FIELDS, is_current
+
+
+def queue_derivatives(sender, instance, update_fields=None, **kwargs):
+    field_name = IMAGE_FIELDS[sender._meta.label]
+    if update_fields is not None and field_name not in update_fields:
+        return
+    if is_current(instance, field_name):
+        return
+    enqueue(
+        'image_derivatives.render',
+        {'model': sender._meta.label, 'pk': instance.pk, 'field': field_name},
+        dedup_key=f'image-derivatives:{sender._meta.label}:{instance.pk}',
+    )
+
+
+for label in IMAGE_FIELDS:
+    post_save.connect(queue_derivatives, sender=label, dispatch_uid=f'image-derivatives:{label}')
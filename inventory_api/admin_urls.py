@@ -0,0 +1,12 @@
+# inventory_api/admin_urls.py
+"""
+Admin URLs, loaded lazily from inventory_api.urls.
+
+INSTALLED_APPS uses SimpleAdminConfig, so admin.py modules are discovered
+here on first admin request instead of during every worker's app setup.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
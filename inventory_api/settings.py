@@ -8,9 +8,6 @@ from datetime import timedelta
 BASE_DIR = Path(__file__).resolve().parent.parent
 TEMPLATES_DIR = BASE_DIR / 'templates'
 
-print(f"BASE_DIR is set to: {BASE_DIR}")
-print(f"TEMPLATES_DIR is set to: {TEMPLATES_DIR}")
-
 # -----------------------------
 # SECURITY
 # -----------------------------
@@ -35,7 +32,7 @@ LOGIN_REDIRECT_URL = '/admin/'
 # INSTALLED APPS
 # -----------------------------
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    'django.contrib.admin.apps.SimpleAdminConfig',  # admin modules load with the admin URLs
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -65,6 +62,9 @@ INSTALLED_APPS = [
     'transactions',
     'supplier_payment',
     'account_transfer',
+    'archive',
+    'closing',
+    'image_derivatives',
     'core.apps.CoreConfig',
 ]
 
@@ -72,6 +72,7 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # -----------------------------
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -82,8 +83,53 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core.middleware.CompanyMiddleware',
+    'core.middleware.ReplicaStickinessMiddleware',
 ]
 
+# -----------------------------
+# PERFORMANCE INSTRUMENTATION
+# -----------------------------
+# See core/performance.py for all keys. Set BUDGET_MODE to 'raise' in test
+# settings so views exceeding their query_budget fail loudly.
+PERFORMANCE_INSTRUMENTATION = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    'STATS_WINDOW': 1000,
+    'DUPLICATE_THRESHOLD': 5,
+    'DEFAULT_QUERY_BUDGET': None,
+    'BUDGET_MODE': 'log',
+    'SLOW_REQUEST_MS': 1000,
+}
+
+# Worker startup: warmup runs from the WSGI entry points (core.warmup);
+# profile_startup fails when a cold start exceeds the budget
+STARTUP_WARMUP = False
+STARTUP_BUDGET_MS = 1500
+
+# Transaction list: log row count and query plan per request (extra queries)
+TRANSACTION_LIST_DIAGNOSTICS = False
+
+# Lookup/dropdown responses (core.lookups): entries are keyed on a per-company
+# version, so the timeout only bounds memory, not staleness
+LOOKUP_CACHE_TIMEOUT = 600
+
+# Offline POS sync (sales.sync): sales accepted per request, and per transaction
+SALES_SYNC_MAX_BATCH = 500
+SALES_SYNC_GROUP_SIZE = 50
+
+# Returns approved per bulk-approve request (returns.views)
+RETURNS_BULK_APPROVE_MAX = 200
+
+# Background jobs (core.jobs): True queues them for `manage.py runworker`;
+# False runs them right after the request's transaction commits
+BACKGROUND_JOBS = False
+# Seconds before a running job whose worker went silent is picked up again
+JOB_LOCK_TIMEOUT = 600
+
+# Fiscal-year archive (archive.archiver): closed years kept in the hot tables
+# by `manage.py archive_fiscal_years` when no --year is given
+ARCHIVE_KEEP_CLOSED_YEARS = 1
+
 ROOT_URLCONF = 'inventory_api.urls'
 
 TEMPLATES = [
@@ -106,14 +152,59 @@ WSGI_APPLICATION = 'inventory_api.wsgi.application'
 # -----------------------------
 # DATABASE CONFIGURATION
 # -----------------------------
-# SQLite (development)
+# SQLite (development and single-server production)
+# Connections are kept open between requests; every new connection gets
+# SQLITE_PRAGMAS applied by core.db. transaction_mode IMMEDIATE makes each
+# atomic() block take the write lock up front, so concurrent POS writers
+# wait on busy_timeout instead of failing with "database is locked".
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 134217728,   # 128 MB
+    'cache_size': -20000,     # ~20 MB page cache
+    'temp_store': 'MEMORY',
+}
+
+# Serialize multi-statement postings per worker process (core.db.serialized_write)
+SQLITE_SERIALIZE_WRITES = True
+
+# Read replica for report/analytics views (core.routers). Set REPLICA_DB_NAME
+# to a second SQLite file, or with REPLICA_DB_ENGINE=django.db.backends.postgresql
+# (and REPLICA_DB_USER/PASSWORD/HOST/PORT) to a PostgreSQL replica database
+REPLICA_DB_ALIAS = 'replica'
+if os.environ.get('REPLICA_DB_NAME'):
+    _replica_engine = os.environ.get('REPLICA_DB_ENGINE', DATABASES['default']['ENGINE'])
+    DATABASES[REPLICA_DB_ALIAS] = {
+        **DATABASES['default'],
+        'ENGINE': _replica_engine,
+        'NAME': os.environ['REPLICA_DB_NAME'],
+        'OPTIONS': DATABASES['default']['OPTIONS'] if _replica_engine == DATABASES['default']['ENGINE'] else {},
+        'TEST': {'MIRROR': 'default'},
+    }
+    for _key in ('USER', 'PASSWORD', 'HOST', 'PORT'):
+        if os.environ.get(f'REPLICA_DB_{_key}'):
+            DATABASES[REPLICA_DB_ALIAS][_key] = os.environ[f'REPLICA_DB_{_key}']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Seconds a user's reads stay on the primary after one of their writes
+REPLICA_STICKY_SECONDS = 10
+# Replica health (reachable, PostgreSQL replay lag) is rechecked this often
+REPLICA_HEALTH_TTL = 5
+REPLICA_MAX_LAG_SECONDS = 30
+
 # If you use MySQL in production, enable utf8mb4 for emojis:
 # DATABASES = {
 #     'default': {
@@ -203,10 +294,6 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
-# Create dirs if missing
-os.makedirs(STATICFILES_DIRS[0], exist_ok=True)
-os.makedirs(MEDIA_ROOT, exist_ok=True)
-
 # Only use Whitenoise in production
 if not DEBUG:
     STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
@@ -8,6 +8,7 @@ from django.shortcuts import render
 from core.views import home
 from django.conf import settings
 from django.conf.urls.static import static
+from core.lazy import lazy_include
 # def home(request):
 #     return HttpResponse("""
 #     <html>
@@ -30,7 +31,7 @@ def health_check(request):
     return HttpResponse("âœ… Health Check: Server is running perfectly!", status=200)
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    path('admin/', lazy_include('inventory_api.admin_urls', app_name='admin')),
     path('health/', health_check, name='health-check'),
     path('', home, name='home'),
         path('api/', include('core.urls')),  # core app APIs
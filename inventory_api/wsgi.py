@@ -14,3 +14,6 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventory_api.settings')
 
 application = get_wsgi_application()
+
+from core.warmup import warmup  # noqa: E402
+warmup()
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('core', '0009_idempotencykey'),
+        ('customers', '0002_customer_company_active_index'),
+        ('money_receipts', '0003_initial'),
+        ('sales', '0004_sale_warehouse'),
+        ('transactions', '0003_transaction_company_account_status_date_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='moneyreceipt',
+            index=models.Index(fields=['company', 'customer'], name='money_recei_company_20bb52_idx'),
+        ),
+    ]
@@ -65,6 +65,7 @@ class MoneyReceipt(models.Model):
         indexes = [
             models.Index(fields=['company', 'payment_date']),
             models.Index(fields=['customer', 'payment_date']),
+            models.Index(fields=['company', 'customer']),
             models.Index(fields=['mr_no']),
             models.Index(fields=['is_advance_payment']),
         ]
@@ -4,6 +4,9 @@ from .models import MoneyReceipt
 from sales.models import Sale
 from customers.models import Customer
 from accounts.models import Account
+from core.db import serialized_write
+from closing.balances import latest_close
+from closing.guards import closed_message, covers
 from django.contrib.auth import get_user_model
 import logging
 
@@ -160,6 +163,12 @@ class MoneyReceiptSerializer(serializers.ModelSerializer):
                     "account": "Account must belong to your company."
                 })
 
+            # The snapshots of a close already hold every receipt dated through it
+            payment_date = attrs.get('payment_date')
+            close = latest_close(company) if payment_date else None
+            if covers(close, payment_date):
+                raise serializers.ValidationError({"payment_date": closed_message(close)})
+
         # Validate customer requirements
         if is_advance_payment and not customer:
             raise serializers.ValidationError({
@@ -207,7 +216,8 @@ class MoneyReceiptSerializer(serializers.ModelSerializer):
         
         try:
             # Create the money receipt
-            receipt = MoneyReceipt.objects.create(**validated_data)
+            with serialized_write():
+                receipt = MoneyReceipt.objects.create(**validated_data)
             return receipt
         except Exception as e:
             logger.error(f"Error creating money receipt: {e}")
@@ -26,3 +26,7 @@ os.environ['DJANGO_SETTINGS_MODULE'] = 'inventory_api.settings'
 
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
+
+# Prime URLconf/serializers before taking traffic (no-op unless STARTUP_WARMUP)
+from core.warmup import warmup
+warmup()
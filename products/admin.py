@@ -4,6 +4,7 @@ from django import forms
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from core import lookups
 from .models import Category, Unit, Brand, Product, Source, Group, ProductSaleMode, PriceTier, SaleMode
 from decimal import Decimal
 
@@ -400,10 +401,12 @@ class GroupAdmin(admin.ModelAdmin):
 # ==============================
 def activate_selected(modeladmin, request, queryset):
     queryset.update(is_active=True)
+    lookups.bump_rows(queryset, ['is_active'])
 activate_selected.short_description = "Activate selected items"
 
 def deactivate_selected(modeladmin, request, queryset):
     queryset.update(is_active=False)
+    lookups.bump_rows(queryset, ['is_active'])
 deactivate_selected.short_description = "Deactivate selected items"
 
 def create_default_sale_modes(modeladmin, request, queryset):
@@ -0,0 +1,174 @@
+# products/batches.py
+"""
+Batch- and expiry-aware stock.
+
+``StockBatch`` keeps, per product, what is left of every received batch
+(batch number and/or expiry date of the purchase line) next to
+``Product.stock_qty``, which stays the product total:
+
+- receive(): purchase lines with a batch number or expiry date add to their
+  batch: one lookup, one CASE UPDATE and one bulk_create per receipt
+- allocate(): a committed invoice takes its base quantities from the
+  products' unexpired batches, first expiry first out (FEFO), with one
+  locking SELECT for all its products, one CASE UPDATE and one bulk_create
+  of ``SaleItemBatch`` rows. Quantity no batch covers comes from untracked
+  stock; expired batches are left alone for the write-off.
+- release(): a deleted sale line gives its allocations back to their
+  batches
+- restate(): an edited or deleted purchase line moves its batch by the
+  difference, never below zero (units already sold stay sold)
+- expiring(): batches with stock expiring within N days (and, by default,
+  already expired), served by the partial (company, expiry_date) index
+
+Returns, bad stock and manual stock edits move stock_qty only.
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CHUNK = 250
+
+
+def _key(product_id, batch_no, expiry_date):
+    return product_id, batch_no or '', expiry_date
+
+
+def _add(deltas, clamp=False):
+    """quantity += delta for {batch_id: delta}, one CASE UPDATE per chunk; ``clamp`` stops at zero"""
+    from products.models import StockBatch
+
+    deltas = [(pk, delta) for pk, delta in deltas.items() if delta]
+    now = timezone.now()
+    for start in range(0, len(deltas), CHUNK):
+        chunk = deltas[start:start + CHUNK]
+        quantity = F('quantity') + Case(
+            *(When(pk=pk, then=Value(delta)) for pk, delta in chunk),
+            default=Value(Decimal('0.000')),
+            output_field=DecimalField(max_digits=12, decimal_places=3),
+        )
+        if clamp:
+            quantity = Greatest(quantity, Value(Decimal('0.000')))
+        StockBatch.objects.filter(pk__in=[pk for pk, _ in chunk]).update(quantity=quantity, updated_at=now)
+
+
+def _received(items):
+    """{batch key: quantity} the purchase lines add"""
+    incoming = {}
+    for item in items:
+        # Same rule as the stock update: free lines (price 0) do not move stock
+        if item.price > 0 and (item.batch_no or item.expiry_date):
+            key = _key(item.product_id, item.batch_no, item.expiry_date)
+            incoming[key] = incoming.get(key, Decimal('0.000')) + Decimal(item.qty)
+    return incoming
+
+
+def _apply(changes, company_id):
+    """Add {batch key: quantity} to the batches, creating missing ones; removals stop at zero"""
+    from products.models import StockBatch
+
+    changes = {key: quantity for key, quantity in changes.items() if quantity}
+    if not changes:
+        return 0
+
+    existing = {
+        _key(*row[1:]): row[0]
+        for row in StockBatch.objects.filter(
+            product_id__in={key[0] for key in changes}, batch_no__in={key[1] for key in changes},
+        ).values_list('pk', 'product_id', 'batch_no', 'expiry_date')
+    }
+    _add({existing[key]: quantity for key, quantity in changes.items() if key in existing and quantity > 0})
+    # Units of the batch already sold stay sold
+    _add({existing[key]: quantity for key, quantity in changes.items() if key in existing and quantity < 0}, clamp=True)
+    StockBatch.objects.bulk_create([
+        StockBatch(company_id=company_id, product_id=product_id, batch_no=batch_no, expiry_date=expiry_date, quantity=quantity)
+        for (product_id, batch_no, expiry_date), quantity in changes.items()
+        if quantity > 0 and (product_id, batch_no, expiry_date) not in existing
+    ])
+    return len(changes)
+
+
+def receive(items, company_id):
+    """Add received purchase lines (saved or not) to their batches; lines without batch or expiry are skipped"""
+    return _apply(_received(items), company_id)
+
+
+def restate(old_items, new_items, company_id):
+    """Move the batches from what ``old_items`` received to what ``new_items`` receive (edited or deleted lines)"""
+    changes = _received(new_items)
+    for key, quantity in _received(old_items).items():
+        changes[key] = changes.get(key, Decimal('0.000')) - quantity
+    return _apply(changes, company_id)
+
+
+def allocate(sale_items, today=None):
+    """Take saved sale lines' base quantities from their batches, FEFO; returns the SaleItemBatch rows"""
+    from products.models import StockBatch
+    from sales.models import SaleItemBatch
+
+    sale_items = [item for item in sale_items if item.base_quantity and item.base_quantity > 0]
+    if not sale_items:
+        return []
+    today = today or timezone.now().date()
+
+    available = {}
+    batches = (
+        StockBatch.objects.select_for_update()
+        .filter(product_id__in={item.product_id for item in sale_items}, quantity__gt=0)
+        .filter(Q(expiry_date__isnull=True) | Q(expiry_date__gte=today))
+        .order_by('product_id', F('expiry_date').asc(nulls_last=True), 'pk')
+        .values_list('pk', 'product_id', 'quantity')
+    )
+    for pk, product_id, quantity in batches:
+        available.setdefault(product_id, []).append([pk, quantity])
+
+    taken, allocations = {}, []
+    for item in sale_items:
+        needed = Decimal(str(item.base_quantity))
+        for entry in available.get(item.product_id, ()):
+            if needed <= 0:
+                break
+            take = min(needed, entry[1])
+            if take <= 0:
+                continue
+            entry[1] -= take
+            needed -= take
+            taken[entry[0]] = taken.get(entry[0], Decimal('0.000')) + take
+            allocations.append(SaleItemBatch(sale_item=item, batch_id=entry[0], quantity=take))
+
+    _add({pk: -quantity for pk, quantity in taken.items()})
+    SaleItemBatch.objects.bulk_create(allocations)
+    return allocations
+
+
+def release(sale_items):
+    """Give saved sale lines' allocations back to their batches and drop them; returns the quantity released"""
+    from sales.models import SaleItemBatch
+
+    allocations = SaleItemBatch.objects.filter(sale_item__in=[item.pk for item in sale_items if item.pk])
+    released = {}
+    for batch_id, quantity in allocations.values_list('batch_id', 'quantity'):
+        released[batch_id] = released.get(batch_id, Decimal('0.000')) + quantity
+    if not released:
+        return Decimal('0.000')
+    _add(released)
+    allocations.delete()
+    return sum(released.values())
+
+
+def expiring(company, days=30, include_expired=True, today=None):
+    """Batches with stock left expiring within ``days``, soonest first"""
+    from products.models import StockBatch
+
+    today = today or timezone.now().date()
+    batches = StockBatch.objects.filter(
+        company=company, quantity__gt=0, expiry_date__isnull=False, expiry_date__lte=today + timedelta(days=days),
+    )
+    if not include_expired:
+        batches = batches.filter(expiry_date__gte=today)
+    return batches.order_by('expiry_date', 'pk')
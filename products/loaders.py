@@ -0,0 +1,92 @@
+# products/loaders.py
+"""
+Batched loading of product sale mode data for serialization.
+
+A page of products is serialized with a fixed number of queries no matter
+how many products, sale modes or tiers it contains:
+
+    1. configured ProductSaleModes (+ sale_mode + base_unit) for all products
+    2. PriceTiers for those product sale modes
+    3. available SaleModes per (company, base unit)  - only when requested
+
+Results are attached to the product instances (``loaded_sale_modes`` and
+``loaded_available_sale_modes``) and nested payloads are built from them in
+memory. Loading is idempotent: already loaded products are skipped.
+"""
+from collections import defaultdict
+
+from django.db.models import Prefetch, prefetch_related_objects
+
+from .models import ProductSaleMode, SaleMode
+
+SALE_MODES_ATTR = 'loaded_sale_modes'
+AVAILABLE_SALE_MODES_ATTR = 'loaded_available_sale_modes'
+
+
+def sale_modes_prefetch():
+    """Prefetch for querysets, e.g. Product.objects.prefetch_related(sale_modes_prefetch())"""
+    return Prefetch(
+        'product_sale_modes',
+        queryset=ProductSaleMode.objects.select_related('sale_mode__base_unit').prefetch_related('tiers'),
+        to_attr=SALE_MODES_ATTR,
+    )
+
+
+def load_sale_modes(products):
+    """Attach all configured ProductSaleModes (active and inactive) with their tiers"""
+    pending = [p for p in products if p.pk and not hasattr(p, SALE_MODES_ATTR)]
+    if pending:
+        prefetch_related_objects(pending, sale_modes_prefetch())
+    return products
+
+
+def load_available_sale_modes(products):
+    """
+    Attach the sale modes a product could be sold in (same company and base
+    unit), annotated with the product's own configuration when it has one.
+    """
+    load_sale_modes(products)
+    pending = [p for p in products if p.pk and not hasattr(p, AVAILABLE_SALE_MODES_ATTR)]
+    if not pending:
+        return products
+
+    modes_by_key = defaultdict(list)
+    unit_ids = {p.unit_id for p in pending if p.unit_id}
+    if unit_ids:
+        modes = SaleMode.objects.filter(
+            company_id__in={p.company_id for p in pending},
+            base_unit_id__in=unit_ids,
+            is_active=True,
+        ).values('id', 'name', 'code', 'price_type', 'conversion_factor', 'company_id', 'base_unit_id')
+        for mode in modes:
+            # Serialized as a float, as the per-mode view always did
+            mode['conversion_factor'] = float(mode['conversion_factor'])
+            modes_by_key[(mode.pop('company_id'), mode.pop('base_unit_id'))].append(mode)
+
+    for product in pending:
+        configured = {psm.sale_mode_id: psm for psm in getattr(product, SALE_MODES_ATTR)}
+        available = []
+        for mode in modes_by_key.get((product.company_id, product.unit_id), []):
+            available.append(dict(mode, **_configuration(configured.get(mode['id']))))
+        setattr(product, AVAILABLE_SALE_MODES_ATTR, available)
+    return products
+
+
+def _configuration(product_sale_mode):
+    if product_sale_mode is None:
+        return {
+            'configured': False,
+            'is_active': False,
+            'unit_price': None,
+            'flat_price': None,
+            'discount_type': None,
+            'discount_value': None,
+        }
+    return {
+        'configured': True,
+        'is_active': product_sale_mode.is_active,
+        'unit_price': float(product_sale_mode.unit_price) if product_sale_mode.unit_price else None,
+        'flat_price': float(product_sale_mode.flat_price) if product_sale_mode.flat_price else None,
+        'discount_type': product_sale_mode.discount_type,
+        'discount_value': float(product_sale_mode.discount_value) if product_sale_mode.discount_value else None,
+    }
@@ -0,0 +1,77 @@
+# products/management/commands/seed_stock_batches.py
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db import serialized_write
+from core.models import Company
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed stock batches for products that have none yet from their newest purchase lines '
+        'with a batch number or expiry date, up to the current stock_qty (newest receipts are '
+        'assumed to be what is left on the shelf)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=str, help='Company id or code (default: all companies)')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be seeded without writing')
+
+    def handle(self, *args, **options):
+        total = 0
+        for company in self._get_companies(options['company']):
+            batches = self._plan(company)
+            total += len(batches)
+            self.stdout.write(f'{company.name}: {len(batches)} batch(es)')
+            if batches and not options['dry_run']:
+                from products.models import StockBatch
+
+                with serialized_write():
+                    StockBatch.objects.bulk_create(batches, batch_size=500)
+
+        verb = 'Would seed' if options['dry_run'] else 'Seeded'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} batch(es)'))
+
+    def _plan(self, company):
+        from products.models import Product, StockBatch
+        from purchases.models import PurchaseItem
+
+        remaining = dict(
+            Product.objects.filter(company=company, stock_qty__gt=0)
+            .exclude(pk__in=StockBatch.objects.filter(company=company).values('product_id'))
+            .values_list('pk', 'stock_qty')
+        )
+        if not remaining:
+            return []
+
+        lines = (
+            PurchaseItem.objects.filter(purchase__company=company, product_id__in=list(remaining), price__gt=0)
+            .exclude(batch_no__isnull=True, expiry_date__isnull=True)
+            .exclude(batch_no='', expiry_date__isnull=True)
+            .order_by('product_id', '-purchase__purchase_date', '-pk')
+            .values_list('product_id', 'batch_no', 'expiry_date', 'qty')
+        )
+        seeded = {}
+        for product_id, batch_no, expiry_date, qty in lines.iterator(chunk_size=2000):
+            left = remaining[product_id]
+            if left <= 0:
+                continue
+            take = Decimal(min(qty, left))
+            remaining[product_id] = left - take
+            key = (product_id, batch_no or '', expiry_date)
+            seeded[key] = seeded.get(key, Decimal('0.000')) + take
+
+        return [
+            StockBatch(company=company, product_id=product_id, batch_no=batch_no, expiry_date=expiry_date, quantity=quantity)
+            for (product_id, batch_no, expiry_date), quantity in seeded.items()
+        ]
+
+    def _get_companies(self, value):
+        if value:
+            lookup = {'pk': int(value)} if value.isdigit() else {'company_code': value}
+            try:
+                return [Company.objects.get(**lookup)]
+            except Company.DoesNotExist:
+                raise CommandError(f'Company {value} not found')
+        return Company.objects.order_by('id')
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:43
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def start_at_purchase_price(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Product.objects.update(average_cost=models.F('purchase_price'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='average_cost',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=14),
+        ),
+        migrations.RunPython(start_at_purchase_price, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:47
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_idempotencykey'),
+        ('products', '0002_product_average_cost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_no', models.CharField(blank=True, default='', max_length=50)),
+                ('expiry_date', models.DateField(blank=True, null=True)),
+                ('quantity', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=12)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.company')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batches', to='products.product')),
+            ],
+            options={
+                'ordering': ['product', 'expiry_date', 'id'],
+                'indexes': [models.Index(fields=['product', 'expiry_date'], name='products_batch_fefo_idx'), models.Index(condition=models.Q(('expiry_date__isnull', False), ('quantity__gt', 0)), fields=['company', 'expiry_date'], name='products_batch_expiring_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'batch_no', 'expiry_date'), name='products_stockbatch_unique'), models.CheckConstraint(condition=models.Q(('quantity__gte', 0)), name='products_stockbatch_quantity_gte_0')],
+            },
+        ),
+    ]
@@ -3,6 +3,7 @@ from django.db import models, transaction, IntegrityError
 from django.conf import settings
 from core.models import Company
 from decimal import Decimal
+from django.utils import timezone
 import time
 import random
 from django.db.models import Prefetch
@@ -13,22 +14,59 @@ class ProductQuerySet(models.QuerySet):
     
     def with_details(self, company=None):
         """Fetch products with all related details"""
-        # Prefetch active sale modes
-        sale_modes_prefetch = Prefetch(
-            'product_sale_modes',
-            queryset=ProductSaleMode.objects.filter(is_active=True)
-            .select_related('sale_mode')
-            .prefetch_related('tiers')
-        )
-        
+        # Sale modes and tiers in two batched queries (see products.loaders)
+        from .loaders import sale_modes_prefetch
+
         queryset = self.select_related(
             'category', 'unit', 'brand', 'group', 'source', 'created_by'
-        ).prefetch_related(sale_modes_prefetch)
+        ).prefetch_related(sale_modes_prefetch())
         
         if company:
             queryset = queryset.filter(company=company)
             
         return queryset
+
+    def add_stock(self, deltas, costs=None):
+        """
+        Add {product_id: quantity} to stock_qty with one CASE UPDATE (negative
+        quantities remove stock; the column's CHECK rejects going below zero).
+        ``costs`` ({product_id: total cost of the added quantity}) folds
+        incoming units into average_cost in the same statement. Saves and
+        signals do not run. Returns the number of products updated.
+        """
+        from django.db.models import Case, DecimalField, F, FloatField, IntegerField, Value, When
+        from django.db.models.functions import Cast
+
+        costs = costs or {}
+        deltas = [(pk, int(quantity)) for pk, quantity in deltas.items() if quantity]
+        now, updated = timezone.now(), 0
+        # Bounded so a large receipt stays well under the bound-parameter limit
+        for start in range(0, len(deltas), 250):
+            chunk = deltas[start:start + 250]
+            changes = {
+                'stock_qty': F('stock_qty') + Case(
+                    *(When(pk=pk, then=Value(quantity)) for pk, quantity in chunk),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ),
+                'updated_at': now,
+            }
+            costed = [(pk, quantity, costs[pk]) for pk, quantity in chunk if quantity > 0 and pk in costs]
+            if costed:
+                # Right-hand sides see the row before the update: the old stock and average.
+                # SQLite stores whole decimals as integers, so the divisor is cast to
+                # keep it from dividing integer by integer
+                changes['average_cost'] = Case(
+                    *(
+                        When(pk=pk, then=(F('stock_qty') * F('average_cost') + Value(Decimal(str(cost))))
+                             / Cast(F('stock_qty') + Value(quantity), FloatField()))
+                        for pk, quantity, cost in costed
+                    ),
+                    default=F('average_cost'),
+                    output_field=DecimalField(max_digits=14, decimal_places=4),
+                )
+            updated += self.filter(pk__in=[pk for pk, _ in chunk]).update(**changes)
+        return updated
 # ========== END OF ADDED CODE ==========
 
 class Category(models.Model):
@@ -276,8 +314,8 @@ class ProductSaleMode(models.Model):
         if not hasattr(self, 'tiers'):
             return self.unit_price or Decimal('0.00')
         
-        # Find appropriate tier
-        tiers = self.tiers.all().order_by('min_quantity')
+        # Find appropriate tier (Meta ordering is min_quantity, so prefetched tiers are reused)
+        tiers = self.tiers.all()
         for tier in tiers:
             if base_quantity >= tier.min_quantity:
                 if tier.max_quantity is None or base_quantity <= tier.max_quantity:
@@ -349,6 +387,9 @@ class Product(models.Model):
     source = models.ForeignKey('Source', on_delete=models.SET_NULL, null=True, blank=True)
 
     purchase_price = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    # Moving-average cost of a unit in stock: purchases and sales returns
+    # fold into it (ProductQuerySet.add_stock), sales are costed at it
+    average_cost = models.DecimalField(max_digits=14, decimal_places=4, default=Decimal('0.0000'))
     selling_price = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
    
     opening_stock = models.PositiveIntegerField(default=0)
@@ -356,6 +397,8 @@ class Product(models.Model):
     alert_quantity = models.PositiveIntegerField(default=5)
     description = models.TextField(blank=True, null=True)
     image = models.ImageField(upload_to='inventory-products/', blank=True, null=True)
+    # Resized WebP/JPEG copies of image (image_derivatives.pipeline)
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     
     discount_type = models.CharField(
@@ -382,13 +425,15 @@ class Product(models.Model):
     # ========== FIXED: KEEP ONLY THIS ONE PROPERTY ==========
     @property
     def active_sale_modes(self):
-        """Get active sale modes, using prefetched data if available"""
-        # Check if we have prefetched data
-        if hasattr(self, '_prefetched_objects_cache') and 'product_sale_modes' in self._prefetched_objects_cache:
-            # Filter prefetched data for active sale modes
-            return [psm for psm in self._prefetched_objects_cache['product_sale_modes'] if psm.is_active]
-        # Fallback to database query
-        return self.product_sale_modes.filter(is_active=True).select_related('sale_mode')
+        """Get active sale modes, using batch-loaded or prefetched data if available"""
+        cache = getattr(self, '_prefetched_objects_cache', {})
+        if not hasattr(self, 'loaded_sale_modes') and 'product_sale_modes' in cache:
+            return [psm for psm in cache['product_sale_modes'] if psm.is_active]
+
+        # Load once and keep on the instance instead of querying on every access
+        from .loaders import load_sale_modes
+        load_sale_modes([self])
+        return [psm for psm in getattr(self, 'loaded_sale_modes', []) if psm.is_active]
     # ========== END FIX ==========
 
     class Meta:
@@ -407,6 +452,15 @@ class Product(models.Model):
             )
         ]
 
+    # Company.product_count follows writes (core.signals): remember the
+    # company this instance was loaded or saved with
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'company_id' in instance.__dict__:
+            instance._counted_company_id = instance.__dict__['company_id']
+        return instance
+
     def __str__(self):
         return f"{self.name} ({self.sku})" if self.sku else self.name
 
@@ -530,6 +584,9 @@ class Product(models.Model):
         if is_new:
             if self.stock_qty == 0 and self.opening_stock > 0:
                 self.stock_qty = self.opening_stock
+            if not self.average_cost:
+                # Opening stock is valued at the purchase price
+                self.average_cost = self.purchase_price
 
             if not self.sku and self.company:
                 try:
@@ -550,6 +607,10 @@ class Product(models.Model):
                 else:
                     raise
 
+    def current_cost(self):
+        """Cost of one unit leaving stock now (purchase price until a costed receipt)"""
+        return self.average_cost or self.purchase_price
+
     def can_be_deleted(self):
         """Check if product can be safely deleted"""
         try:
@@ -644,4 +705,42 @@ class Product(models.Model):
             'is_active': self.is_active,
             'sale_modes': sale_modes_summary,
             'created_at': self.created_at.isoformat(),
-        }
\ No newline at end of file
+        }
+
+
+class StockBatch(models.Model):
+    """
+    Stock on hand of one received batch (products.batches). Purchases add
+    to it, sales consume it first-expiry-first-out; stock_qty stays the
+    product total, units received without batch or expiry are not tracked.
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='batches')
+    batch_no = models.CharField(max_length=50, blank=True, default='')
+    expiry_date = models.DateField(null=True, blank=True)
+    quantity = models.DecimalField(max_digits=12, decimal_places=3, default=Decimal('0.000'))
+    received_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['product', 'expiry_date', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'batch_no', 'expiry_date'], name='products_stockbatch_unique'),
+            models.CheckConstraint(condition=models.Q(quantity__gte=0), name='products_stockbatch_quantity_gte_0'),
+        ]
+        indexes = [
+            # FEFO allocation: a product's batches by expiry
+            models.Index(fields=['product', 'expiry_date'], name='products_batch_fefo_idx'),
+            # Near-expiry report: only batches with stock left
+            models.Index(
+                fields=['company', 'expiry_date'], name='products_batch_expiring_idx',
+                condition=models.Q(quantity__gt=0, expiry_date__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product.name} batch {self.batch_no or '-'} ({self.quantity})"
+
+    @property
+    def is_expired(self):
+        return self.expiry_date is not None and self.expiry_date < timezone.now().date()
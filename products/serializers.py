@@ -7,7 +7,11 @@ import random
 from decimal import Decimal, InvalidOperation
 import re
 import json
+from django.db import models
 from .models import Category, Unit, Brand, Group, Source, Product, ProductSaleMode, SaleMode, PriceTier
+from .loaders import load_available_sale_modes, load_sale_modes, sale_modes_prefetch, AVAILABLE_SALE_MODES_ATTR
+from core.fieldsets import SparseFieldsetMixin
+from image_derivatives.serializers import ImageDerivativesField
 
 
 # Define a fallback CompanyProductSequence class
@@ -392,7 +396,72 @@ class ProductSaleModeSimpleSerializer(serializers.ModelSerializer):
             'discount_value', 'is_active', 'tiers'  # Add tiers
         ]
         
-class ProductDetailSerializer(serializers.ModelSerializer):
+class ProductListSerializer(serializers.ListSerializer):
+    """
+    Loads sale modes, tiers and available sale modes (for whichever of them
+    the child serializes) for the whole list up front, so serializing a page costs a fixed
+    number of queries instead of several per product.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        products = list(iterable)
+        if 'sale_modes' in self.child.fields:
+            load_sale_modes(products)
+        if 'available_sale_modes' in self.child.fields:
+            load_available_sale_modes(products)
+        return super().to_representation(products)
+
+
+class ProductRelatedInfoMixin:
+    """Nested {id, name} payloads for the select_related foreign keys"""
+
+    FIELD_COSTS = {
+        'category_info': {'select_related': ['category']},
+        'unit_info': {'select_related': ['unit']},
+        'brand_info': {'select_related': ['brand']},
+        'group_info': {'select_related': ['group']},
+        'source_info': {'select_related': ['source']},
+        'created_by_info': {'select_related': ['created_by']},
+        'sale_modes': {'prefetch_related': [sale_modes_prefetch]},
+    }
+
+    def get_category_info(self, obj):
+        if obj.category:
+            return {'id': obj.category.id, 'name': obj.category.name}
+        return None
+
+    def get_unit_info(self, obj):
+        if obj.unit:
+            return {'id': obj.unit.id, 'name': obj.unit.name, 'code': obj.unit.code}
+        return None
+
+    def get_brand_info(self, obj):
+        if obj.brand:
+            return {'id': obj.brand.id, 'name': obj.brand.name}
+        return None
+
+    def get_group_info(self, obj):
+        if obj.group:
+            return {'id': obj.group.id, 'name': obj.group.name}
+        return None
+
+    def get_source_info(self, obj):
+        if obj.source:
+            return {'id': obj.source.id, 'name': obj.source.name}
+        return None
+
+    def get_created_by_info(self, obj):
+        if obj.created_by:
+            return {
+                'id': obj.created_by.id, 
+                'username': obj.created_by.username,
+                'email': obj.created_by.email
+            }
+        return None
+
+
+class ProductDetailSerializer(ProductRelatedInfoMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     """Extended product serializer with sale modes"""
     # ========== FIXED: Use the new nested serializer ==========
     sale_modes = ProductSaleModeNestedSerializer(
@@ -403,6 +472,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     # ========== END FIX ==========
     
     available_sale_modes = serializers.SerializerMethodField()
+    image_derivatives = ImageDerivativesField('image')
     base_unit_name = serializers.CharField(source='unit.name', read_only=True)
     base_unit_code = serializers.CharField(source='unit.code', read_only=True)
     
@@ -416,11 +486,12 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Product
+        list_serializer_class = ProductListSerializer
         fields = [
             'id', 'name', 'sku', 'company', 'created_by',
             'category', 'unit', 'brand', 'group', 'source',
             'purchase_price', 'selling_price', 'opening_stock',
-            'stock_qty', 'alert_quantity', 'description', 'image',
+            'stock_qty', 'alert_quantity', 'description', 'image', 'image_derivatives',
             'is_active', 'discount_type', 'discount_value',
             'discount_applied_on', 'created_at', 'updated_at',
             'stock_status', 'final_price', 'stock_status_code',
@@ -434,73 +505,20 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             'id', 'company', 'created_by', 'sku', 'stock_status',
             'final_price', 'stock_status_code', 'created_at', 'updated_at'
         ]
+        # available_sale_modes queries every sale mode of the unit: only with ?expand=available_sale_modes
+        field_costs = dict(
+            ProductRelatedInfoMixin.FIELD_COSTS,
+            base_unit_name={'select_related': ['unit']},
+            base_unit_code={'select_related': ['unit']},
+            available_sale_modes={'expensive': True},
+        )
     
     def get_available_sale_modes(self, obj):
         """Get all available sale modes for this product type"""
-        from .models import SaleMode
-        
-        sale_modes = SaleMode.objects.filter(
-            base_unit=obj.unit,
-            is_active=True,
-            company=obj.company
-        ).values('id', 'name', 'code', 'price_type', 'conversion_factor')
-        
-        for mode in sale_modes:
-            try:
-                product_sale_mode = ProductSaleMode.objects.get(
-                    product=obj,
-                    sale_mode_id=mode['id']
-                )
-                mode['configured'] = True
-                mode['is_active'] = product_sale_mode.is_active
-                mode['unit_price'] = float(product_sale_mode.unit_price) if product_sale_mode.unit_price else None
-                mode['flat_price'] = float(product_sale_mode.flat_price) if product_sale_mode.flat_price else None
-                mode['discount_type'] = product_sale_mode.discount_type
-                mode['discount_value'] = float(product_sale_mode.discount_value) if product_sale_mode.discount_value else None
-            except ProductSaleMode.DoesNotExist:
-                mode['configured'] = False
-                mode['is_active'] = False
-                mode['unit_price'] = None
-                mode['flat_price'] = None
-                mode['discount_type'] = None
-                mode['discount_value'] = None
-        
-        return list(sale_modes)
-    
-    def get_category_info(self, obj):
-        if obj.category:
-            return {'id': obj.category.id, 'name': obj.category.name}
-        return None
+        load_available_sale_modes([obj])
+        return getattr(obj, AVAILABLE_SALE_MODES_ATTR, [])
 
-    def get_unit_info(self, obj):
-        if obj.unit:
-            return {'id': obj.unit.id, 'name': obj.unit.name, 'code': obj.unit.code}
-        return None
 
-    def get_brand_info(self, obj):
-        if obj.brand:
-            return {'id': obj.brand.id, 'name': obj.brand.name}
-        return None
-
-    def get_group_info(self, obj):
-        if obj.group:
-            return {'id': obj.group.id, 'name': obj.group.name}
-        return None
-
-    def get_source_info(self, obj):
-        if obj.source:
-            return {'id': obj.source.id, 'name': obj.source.name}
-        return None
-
-    def get_created_by_info(self, obj):
-        if obj.created_by:
-            return {
-                'id': obj.created_by.id, 
-                'username': obj.created_by.username,
-                'email': obj.created_by.email
-            }
-        return None
-    
 class ProductCreateSerializer(serializers.ModelSerializer):
     discount_type = CleanedChoiceField(
         choices=Product.DISCOUNT_TYPE_CHOICES,
@@ -805,7 +823,7 @@ class ProductUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(ProductRelatedInfoMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     company = serializers.PrimaryKeyRelatedField(read_only=True)
     created_by = serializers.PrimaryKeyRelatedField(read_only=True)
     
@@ -841,6 +859,8 @@ class ProductSerializer(serializers.ModelSerializer):
         allow_null=True
     )
     
+    image_derivatives = ImageDerivativesField('image')
+    
     # Info fields
     category_info = serializers.SerializerMethodField(read_only=True)
     unit_info = serializers.SerializerMethodField(read_only=True)
@@ -878,11 +898,12 @@ class ProductSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Product
+        list_serializer_class = ProductListSerializer
         fields = [
             'id', 'company', 'created_by', 'name', 'sku', 
             'category', 'unit', 'brand', 'group', 'source',
             'purchase_price', 'selling_price', 'opening_stock', 
-            'stock_qty', 'alert_quantity', 'description', 'image',
+            'stock_qty', 'alert_quantity', 'description', 'image', 'image_derivatives',
             'is_active', 'created_at', 'updated_at',
             # Info fields
             'category_info', 'unit_info', 'brand_info', 'group_info', 
@@ -899,40 +920,7 @@ class ProductSerializer(serializers.ModelSerializer):
             'id', 'company', 'created_by', 'created_at', 'updated_at', 
             'sku', 'stock_status', 'stock_status_code', 'stock_qty', 'final_price'
         ]
-
-    def get_category_info(self, obj):
-        if obj.category:
-            return {'id': obj.category.id, 'name': obj.category.name}
-        return None
-
-    def get_unit_info(self, obj):
-        if obj.unit:
-            return {'id': obj.unit.id, 'name': obj.unit.name, 'code': obj.unit.code}
-        return None
-
-    def get_brand_info(self, obj):
-        if obj.brand:
-            return {'id': obj.brand.id, 'name': obj.brand.name}
-        return None
-
-    def get_group_info(self, obj):
-        if obj.group:
-            return {'id': obj.group.id, 'name': obj.group.name}
-        return None
-
-    def get_source_info(self, obj):
-        if obj.source:
-            return {'id': obj.source.id, 'name': obj.source.name}
-        return None
-
-    def get_created_by_info(self, obj):
-        if obj.created_by:
-            return {
-                'id': obj.created_by.id, 
-                'username': obj.created_by.username,
-                'email': obj.created_by.email
-            }
-        return None
+        field_costs = ProductRelatedInfoMixin.FIELD_COSTS
 
     def get_stock_status_display(self, obj):
         status_map = {
@@ -0,0 +1,91 @@
+# products/tests.py
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from core.models import Company, User
+from products.models import Product, ProductSaleMode, SaleMode, Unit
+
+
+class AddStockTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Stock Co')
+
+    def product(self, stock_qty=0, average_cost='0.00'):
+        return Product.objects.create(
+            company=self.company, name=f'Item {Product.objects.count()}',
+            stock_qty=stock_qty, average_cost=Decimal(average_cost),
+        )
+
+    def values(self, product):
+        product.refresh_from_db(fields=['stock_qty', 'average_cost'])
+        return product.stock_qty, product.average_cost
+
+    def test_incoming_cost_is_averaged_with_the_stock_on_hand(self):
+        product = self.product(stock_qty=10, average_cost='4.00')
+
+        Product.objects.add_stock({product.pk: 30}, {product.pk: Decimal('240.00')})
+
+        # (10 x 4.00 + 240.00) / 40
+        self.assertEqual(self.values(product), (40, Decimal('7.0000')))
+
+    def test_first_receipt_sets_the_cost(self):
+        product = self.product()
+
+        Product.objects.add_stock({product.pk: 3}, {product.pk: Decimal('10.00')})
+
+        self.assertEqual(self.values(product), (3, Decimal('3.3333')))
+
+    def test_outgoing_and_uncosted_quantities_keep_the_average(self):
+        sold = self.product(stock_qty=10, average_cost='4.00')
+        gift = self.product(stock_qty=10, average_cost='4.00')
+
+        Product.objects.add_stock({sold.pk: -4, gift.pk: 5}, {sold.pk: Decimal('99.00')})
+
+        self.assertEqual(self.values(sold), (6, Decimal('4.0000')))
+        self.assertEqual(self.values(gift), (15, Decimal('4.0000')))
+
+    def test_many_products_in_one_call(self):
+        products = [self.product(stock_qty=2, average_cost='1.00') for _ in range(260)]
+
+        updated = Product.objects.add_stock(
+            {product.pk: 2 for product in products}, {product.pk: Decimal('6.00') for product in products},
+        )
+
+        self.assertEqual(updated, 260)
+        self.assertEqual({self.values(product) for product in products[::50]}, {(4, Decimal('2.0000'))})
+
+    def test_stock_cannot_go_negative(self):
+        product = self.product(stock_qty=1)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Product.objects.add_stock({product.pk: -2})
+        self.assertEqual(self.values(product)[0], 1)
+
+
+class AvailableSaleModesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Modes Co')
+        cls.user = User.objects.create_user(username='modes', password='x', company=cls.company)
+        unit = Unit.objects.create(company=cls.company, name='Kilogram', code='KG')
+        cls.product = Product.objects.create(company=cls.company, name='Sugar', unit=unit)
+        cls.bag = SaleMode.objects.create(
+            company=cls.company, name='Bag', code='BAG', base_unit=unit, conversion_factor=Decimal('12.5'),
+        )
+        SaleMode.objects.create(company=cls.company, name='Gram', code='GRAM', base_unit=unit, conversion_factor=Decimal('0.001'))
+        ProductSaleMode.objects.create(product=cls.product, sale_mode=cls.bag, unit_price=Decimal('40.00'))
+
+    def test_numbers_are_serialized_as_floats(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(f'/api/products/{self.product.pk}/available_sale_modes/')
+
+        modes = {mode['code']: mode for mode in response.json()['data']}
+        self.assertEqual(modes['BAG']['conversion_factor'], 12.5)
+        self.assertEqual(modes['BAG']['unit_price'], 40.0)
+        self.assertTrue(modes['BAG']['configured'])
+        self.assertEqual(modes['GRAM']['conversion_factor'], 0.001)
+        self.assertFalse(modes['GRAM']['configured'])
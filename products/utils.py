@@ -2,8 +2,7 @@
 
 from decimal import Decimal
 from django.db import transaction
-from inventory_api.products.models import Product, SaleMode, ProductSaleMode
-from inventory_api.sales.models import Sale, SaleItem
+from products.models import Product, SaleMode, ProductSaleMode
 
 class SaleModeCalculator:
     """Utility class for sale mode calculations"""
@@ -99,6 +98,8 @@ class SaleProcessor:
         Returns:
             Sale instance
         """
+        from sales.models import Sale
+
         # Create sale record
         sale = Sale(
             company=company,
@@ -132,6 +133,8 @@ class SaleProcessor:
     @staticmethod
     def _process_sale_item(sale, item_data):
         """Process individual sale item"""
+        from sales.models import SaleItem
+
         product = Product.objects.get(
             id=item_data['product_id'],
             company=sale.company
@@ -20,8 +20,10 @@ from decimal import Decimal, InvalidOperation
 from django.db import transaction
 
 from products.pagination import StandardResultsSetPagination
+from .loaders import load_available_sale_modes, AVAILABLE_SALE_MODES_ATTR
 from .filters import ProductFilter
 from core.utils import custom_response
+from core.fieldsets import SparseFieldsetViewMixin
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -770,7 +772,7 @@ class PriceTierViewSet(viewsets.ModelViewSet):
         """Let serializer handle the creation"""
         serializer.save()
 
-class ProductViewSet(BaseInventoryViewSet):
+class ProductViewSet(SparseFieldsetViewMixin, BaseInventoryViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -786,6 +788,9 @@ class ProductViewSet(BaseInventoryViewSet):
     ]
     ordering = ['sku']
     pagination_class = StandardResultsSetPagination
+    # Reads only: auth/session lookups plus at most 5 queries for a page of products (see products.loaders)
+    list_actions = ('list', 'active', 'inactive')
+    query_budget = {'get': 8}
 
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -836,8 +841,10 @@ class ProductViewSet(BaseInventoryViewSet):
     def get_queryset(self):
         """Filter products by user's company with optimized queries"""
         user = self.request.user
-        if hasattr(user, 'company') and user.company:
-            return Product.objects.with_details(user.company)
+        company_id = getattr(user, 'company_id', None)
+        if company_id:
+            # Joins and sale mode prefetches only for the selected fields (?fields=)
+            return self.prepare_queryset(Product.objects.filter(company_id=company_id))
         return Product.objects.none()
 
     def retrieve(self, request, *args, **kwargs):
@@ -1535,48 +1542,10 @@ class ProductViewSet(BaseInventoryViewSet):
         """Get all available sale modes for a product"""
         try:
             product = self.get_object()
-            
-            # Get sale modes with same base unit
-            sale_modes = SaleMode.objects.filter(
-                base_unit=product.unit,
-                is_active=True
-            )
-            
-            data = []
-            for mode in sale_modes:
-                try:
-                    product_sale_mode = ProductSaleMode.objects.get(
-                        product=product,
-                        sale_mode=mode
-                    )
-                    mode_data = {
-                        'id': mode.id,
-                        'name': mode.name,
-                        'code': mode.code,
-                        'price_type': mode.price_type,
-                        'conversion_factor': float(mode.conversion_factor),
-                        'configured': True,
-                        'unit_price': float(product_sale_mode.unit_price) if product_sale_mode.unit_price else None,
-                        'flat_price': float(product_sale_mode.flat_price) if product_sale_mode.flat_price else None,
-                        'discount_type': product_sale_mode.discount_type,
-                        'discount_value': float(product_sale_mode.discount_value) if product_sale_mode.discount_value else None,
-                        'is_active': product_sale_mode.is_active
-                    }
-                except ProductSaleMode.DoesNotExist:
-                    mode_data = {
-                        'id': mode.id,
-                        'name': mode.name,
-                        'code': mode.code,
-                        'price_type': mode.price_type,
-                        'conversion_factor': float(mode.conversion_factor),
-                        'configured': False,
-                        'unit_price': None,
-                        'flat_price': None,
-                        'discount_type': None,
-                        'discount_value': None,
-                        'is_active': False
-                    }
-                data.append(mode_data)
+
+            # Sale modes with same base unit, merged with this product's configuration
+            load_available_sale_modes([product])
+            data = getattr(product, AVAILABLE_SALE_MODES_ATTR, [])
             
             return custom_response(
                 success=True,
@@ -4,6 +4,3 @@ from django.apps import AppConfig
 class PurchasesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'purchases'
-    
-    def ready(self):
-        import purchases.signals
\ No newline at end of file
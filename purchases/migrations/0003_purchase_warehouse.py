@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('branch_warehouse', '0001_initial'),
+        ('purchases', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchase',
+            name='warehouse',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='purchases', to='branch_warehouse.warehouse'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('branch_warehouse', '0001_initial'),
+        ('core', '0009_idempotencykey'),
+        ('purchases', '0003_purchase_warehouse'),
+        ('suppliers', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(condition=models.Q(('due_amount__gt', 0)), fields=['company', 'purchase_date'], name='purchases_company_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchase',
+            index=models.Index(condition=models.Q(('due_amount__gt', 0)), fields=['supplier', 'purchase_date'], name='purchases_supplier_due_idx'),
+        ),
+    ]
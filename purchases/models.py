@@ -7,6 +7,8 @@ import logging
 from django.core.exceptions import ValidationError
 from django.db import transaction as db_transaction
 from django.apps import apps  # ADD THIS IMPORT
+from products import batches
+from branch_warehouse import stock as warehouse_stock
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +56,7 @@ class Purchase(models.Model):
     
     payment_method = models.CharField(max_length=100, choices=PAYMENT_METHOD_CHOICES, blank=True, null=True)
     account = models.ForeignKey('accounts.Account', on_delete=models.SET_NULL, blank=True, null=True, related_name='purchases')
+    warehouse = models.ForeignKey('branch_warehouse.Warehouse', on_delete=models.PROTECT, blank=True, null=True, related_name='purchases')
     invoice_no = models.CharField(max_length=20, blank=True, null=True)
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='pending')
     return_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
@@ -72,11 +75,17 @@ class Purchase(models.Model):
             models.Index(fields=['invoice_no']),
             models.Index(fields=['is_active', 'payment_status']),
             models.Index(fields=['purchase_date', 'company']),
+            models.Index(fields=['company', 'purchase_date'], condition=Q(due_amount__gt=0), name='purchases_company_due_idx'),
+            models.Index(fields=['supplier', 'purchase_date'], condition=Q(due_amount__gt=0), name='purchases_supplier_due_idx'),
         ]
 
     def __str__(self):
         return f"{self.invoice_no or 'No Invoice'} - {self.supplier.name}"
 
+    # Supplier totals are kept by deltas (suppliers.signals) from the stored
+    # values of these fields, read just before each save or delete
+    SUPPLIER_TOTAL_FIELDS = ('supplier_id', 'grand_total', 'paid_amount')
+
     def clean(self):
         """Validate purchase data before saving"""
         if self.paid_amount < 0:
@@ -175,44 +184,7 @@ class Purchase(models.Model):
         logger.info(f"UPDATING: Purchase.update_totals called for purchase ID: {self.id}")
         
         try:
-            # Calculate subtotal from items
-            items_subtotal = sum(item.subtotal() for item in self.items.all())
-            subtotal = items_subtotal or Decimal('0.00')
-            subtotal = self._round_decimal(subtotal)
-
-            logger.info(f"INFO: Calculated subtotal from items: {subtotal}")
-
-            discount_amount = Decimal('0.00')
-            if self.overall_discount_type == 'percentage':
-                discount_amount = subtotal * (self.overall_discount / Decimal('100.00'))
-            elif self.overall_discount_type == 'fixed':
-                discount_amount = min(self.overall_discount, subtotal)
-            
-            discount_amount = self._round_decimal(discount_amount)
-
-            vat_amount = Decimal('0.00')
-            if self.vat_type == 'percentage':
-                vat_amount = subtotal * (self.vat / Decimal('100.00'))
-            elif self.vat_type == 'fixed':
-                vat_amount = self.vat
-            vat_amount = self._round_decimal(vat_amount)
-
-            service_amount = Decimal('0.00')
-            if self.overall_service_charge_type == 'percentage':
-                service_amount = subtotal * (self.overall_service_charge / Decimal('100.00'))
-            elif self.overall_service_charge_type == 'fixed':
-                service_amount = self.overall_service_charge
-            service_amount = self._round_decimal(service_amount)
-
-            delivery_amount = Decimal('0.00')
-            if self.overall_delivery_charge_type == 'percentage':
-                delivery_amount = subtotal * (self.overall_delivery_charge / Decimal('100.00'))
-            elif self.overall_delivery_charge_type == 'fixed':
-                delivery_amount = self.overall_delivery_charge
-            delivery_amount = self._round_decimal(delivery_amount)
-
-            total_after_discount = max(Decimal('0.00'), subtotal - discount_amount)
-            grand_total = max(Decimal('0.00'), total_after_discount + vat_amount + service_amount + delivery_amount)
+            subtotal, grand_total = self.compute_totals()
 
             needs_save = (
                 self.total != subtotal or
@@ -222,11 +194,7 @@ class Purchase(models.Model):
             )
 
             if needs_save:
-                self.total = subtotal
-                self.grand_total = grand_total
-                self.due_amount = max(Decimal('0.00'), grand_total - self.paid_amount)
-                self.change_amount = max(Decimal('0.00'), self.paid_amount - grand_total)
-                self._update_payment_status()
+                self.set_totals(subtotal, grand_total)
 
                 logger.info(f"INFO: Purchase totals updated: Subtotal={subtotal}, Grand Total={grand_total}, Paid={self.paid_amount}, Due={self.due_amount}, Change={self.change_amount}")
                 
@@ -245,6 +213,53 @@ class Purchase(models.Model):
         finally:
             self._updating_totals = False
 
+    def compute_totals(self, items=None):
+        """(subtotal, grand_total) from ``items`` (default: the saved items), without saving"""
+        items = self.items.all() if items is None else items
+        subtotal = sum(item.subtotal() for item in items) or Decimal('0.00')
+        subtotal = self._round_decimal(subtotal)
+
+        discount_amount = Decimal('0.00')
+        if self.overall_discount_type == 'percentage':
+            discount_amount = subtotal * (self.overall_discount / Decimal('100.00'))
+        elif self.overall_discount_type == 'fixed':
+            discount_amount = min(self.overall_discount, subtotal)
+        
+        discount_amount = self._round_decimal(discount_amount)
+
+        vat_amount = Decimal('0.00')
+        if self.vat_type == 'percentage':
+            vat_amount = subtotal * (self.vat / Decimal('100.00'))
+        elif self.vat_type == 'fixed':
+            vat_amount = self.vat
+        vat_amount = self._round_decimal(vat_amount)
+
+        service_amount = Decimal('0.00')
+        if self.overall_service_charge_type == 'percentage':
+            service_amount = subtotal * (self.overall_service_charge / Decimal('100.00'))
+        elif self.overall_service_charge_type == 'fixed':
+            service_amount = self.overall_service_charge
+        service_amount = self._round_decimal(service_amount)
+
+        delivery_amount = Decimal('0.00')
+        if self.overall_delivery_charge_type == 'percentage':
+            delivery_amount = subtotal * (self.overall_delivery_charge / Decimal('100.00'))
+        elif self.overall_delivery_charge_type == 'fixed':
+            delivery_amount = self.overall_delivery_charge
+        delivery_amount = self._round_decimal(delivery_amount)
+
+        total_after_discount = max(Decimal('0.00'), subtotal - discount_amount)
+        grand_total = max(Decimal('0.00'), total_after_discount + vat_amount + service_amount + delivery_amount)
+        return subtotal, grand_total
+
+    def set_totals(self, subtotal, grand_total):
+        """Apply computed totals: due/change amounts and payment status follow"""
+        self.total = subtotal
+        self.grand_total = grand_total
+        self.due_amount = max(Decimal('0.00'), grand_total - self.paid_amount)
+        self.change_amount = max(Decimal('0.00'), self.paid_amount - grand_total)
+        self._update_payment_status()
+
     def save(self, *args, **kwargs):
         """Custom save method - FIXED: No transaction creation here"""
         is_new = self.pk is None
@@ -481,24 +496,72 @@ class Purchase(models.Model):
             logger.error(f"ERROR: Error cancelling purchase: {e}")
             raise
 
+    @classmethod
+    def receive(cls, items_data, instant_pay=False, **fields):
+        """
+        Create a purchase with all its lines in one short write transaction.
+
+        Lines are validated together before anything is written, inserted
+        with one bulk_create and added to stock and the moving-average cost
+        with one UPDATE per product batch (PurchaseItem.save() does not run);
+        lines with a batch number or expiry date also go to their StockBatch
+        and, with a warehouse, to its rows. Totals are computed from
+        the lines before the single purchase INSERT, so the supplier totals
+        signal posts one delta, and the instant payment transaction is
+        created in the same transaction.
+        """
+        from core.db import serialized_write
+        from products.models import Product
+
+        items = [PurchaseItem(**item_data) for item_data in items_data]
+        errors = {}
+        for number, item in enumerate(items, start=1):
+            try:
+                item.clean()
+            except ValidationError as e:
+                errors[f'items[{number}]'] = e.messages
+        if errors:
+            raise ValidationError(errors)
+
+        purchase = cls(**fields)
+        with serialized_write():
+            purchase.set_totals(*purchase.compute_totals(items))
+            purchase.save()
+            for item in items:
+                item.purchase = purchase
+            PurchaseItem.objects.bulk_create(items)
+            Product.objects.add_stock(PurchaseItem.stock_deltas(items), PurchaseItem.stock_costs(items))
+            batches.receive(items, purchase.company_id)
+            if purchase.warehouse_id:
+                warehouse_stock.move(purchase.company_id, purchase.warehouse_id, PurchaseItem.stock_deltas(items), rollup=False)
+            logger.info(f"SUCCESS: Purchase {purchase.invoice_no} received with {len(items)} items, Grand Total: {purchase.grand_total}")
+
+            if instant_pay and purchase.paid_amount > 0 and purchase.account and purchase.payment_method:
+                purchase.create_initial_payment_transaction()
+        return purchase
+
     def add_items(self, items_data):
-        """Add multiple items to the purchase at once"""
-        from .models import PurchaseItem
-        
-        created_items = []
+        """Add multiple items to the purchase at once (one INSERT, one stock UPDATE, one totals save)"""
+        from products.models import Product
+
+        items = []
         for item_data in items_data:
+            item = PurchaseItem(purchase=self, **item_data)
             try:
-                item = PurchaseItem.objects.create(
-                    purchase=self,
-                    **item_data
-                )
-                created_items.append(item)
-            except Exception as e:
+                item.clean()
+            except ValidationError as e:
                 logger.error(f"ERROR: Error creating purchase item: {e}")
                 continue
-        
-        self.update_totals()
-        return created_items
+            items.append(item)
+
+        with db_transaction.atomic():
+            PurchaseItem.objects.bulk_create(items)
+            Product.objects.add_stock(PurchaseItem.stock_deltas(items), PurchaseItem.stock_costs(items))
+            batches.receive(items, self.company_id)
+            if self.warehouse_id:
+                warehouse_stock.move(self.company_id, self.warehouse_id, PurchaseItem.stock_deltas(items), rollup=False)
+            self.update_totals()
+        return items
 
     def instant_pay(self, payment_method, account, paid_amount=None):
         """
@@ -696,6 +759,24 @@ class PurchaseItem(models.Model):
         if self.expiry_date and self.expiry_date < timezone.now().date():
             raise ValidationError("Expiry date cannot be in the past")
 
+    @staticmethod
+    def stock_deltas(items):
+        """{product_id: received quantity} for ``items``; free lines (price 0) do not move stock, as in save()"""
+        deltas = {}
+        for item in items:
+            if item.price > 0:
+                deltas[item.product_id] = deltas.get(item.product_id, 0) + item.qty
+        return deltas
+
+    @staticmethod
+    def stock_costs(items):
+        """{product_id: net cost of the received quantity} for ``items``, for the moving-average cost"""
+        costs = {}
+        for item in items:
+            if item.price > 0:
+                costs[item.product_id] = costs.get(item.product_id, Decimal('0.00')) + item.subtotal()
+        return costs
+
     def subtotal(self):
         """Calculate item subtotal with proper rounding"""
         try:
@@ -721,6 +802,7 @@ class PurchaseItem(models.Model):
         """Custom save with stock management"""
         is_new = self.pk is None
         old_qty = 0
+        old_item = None
         
         self.clean()
         
@@ -737,12 +819,22 @@ class PurchaseItem(models.Model):
             if self.price > 0:
                 product = self.product
                 if is_new:
-                    product.stock_qty += self.qty
+                    # Stock and moving-average cost in one UPDATE
+                    type(product).objects.add_stock(self.stock_deltas([self]), self.stock_costs([self]))
+                    batches.receive([self], self.purchase.company_id)
+                    product.refresh_from_db(fields=['stock_qty', 'average_cost', 'updated_at'])
+                    stock_change = self.qty
                 else:
                     stock_change = self.qty - old_qty
                     product.stock_qty += stock_change
-                
-                product.save()
+                    product.save()
+                    # By the difference, also when the line moved to another batch or expiry
+                    batches.restate([old_item] if old_item else [], [self], self.purchase.company_id)
+                if self.purchase.warehouse_id:
+                    # stock_qty is already moved: the warehouse row changes without a rollup
+                    warehouse_stock.move(
+                        self.purchase.company_id, self.purchase.warehouse_id, {self.product_id: stock_change}, rollup=False
+                    )
                 
                 if not hasattr(self.purchase, '_updating_totals'):
                     self.purchase.update_totals()
@@ -757,8 +849,11 @@ class PurchaseItem(models.Model):
         product = self.product
         
         try:
+            if self.price > 0 and purchase.warehouse_id:
+                warehouse_stock.move(purchase.company_id, purchase.warehouse_id, {self.product_id: -self.qty}, rollup=False)
             product.stock_qty -= self.qty
             product.save()
+            batches.restate([self], [], purchase.company_id)
             
             super().delete(*args, **kwargs)
             
@@ -3,16 +3,29 @@ import traceback
 from rest_framework import serializers
 from .models import Purchase, PurchaseItem
 from products.models import Product
+from branch_warehouse import stock as warehouse_stock
+from branch_warehouse.models import Warehouse
 from accounts.models import Account
 from django.db import transaction as db_transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
 from decimal import Decimal
 from django.apps import apps  # ADD THIS IMPORT
 
 logger = logging.getLogger(__name__)
 
 
+class PurchaseProductField(serializers.PrimaryKeyRelatedField):
+    """Product of a purchase line, taken from the products PurchaseSerializer loaded for all lines at once"""
+
+    def to_internal_value(self, data):
+        products = self.context.get('purchase_products')
+        if products is not None and str(data).isdigit() and int(data) in products:
+            return products[int(data)]
+        return super().to_internal_value(data)
+
+
 class PurchaseItemSerializer(serializers.ModelSerializer):
-    product_id = serializers.PrimaryKeyRelatedField(
+    product_id = PurchaseProductField(
         queryset=Product.objects.all(), source='product', write_only=True
     )
     product_name = serializers.CharField(source='product.name', read_only=True)
@@ -20,7 +33,7 @@ class PurchaseItemSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = PurchaseItem
-        fields = ['id', 'product_id', 'product_name', 'qty', 'price', 'discount', 'discount_type', 'product_total']
+        fields = ['id', 'product_id', 'product_name', 'qty', 'price', 'discount', 'discount_type', 'batch_no', 'expiry_date', 'product_total']
         read_only_fields = ['id', 'product_name', 'product_total']
 
     def validate_price(self, value):
@@ -43,6 +56,10 @@ class PurchaseSerializer(serializers.ModelSerializer):
     )
     account_name = serializers.CharField(source='account.name', read_only=True, allow_null=True)
     payment_method = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    warehouse_id = serializers.PrimaryKeyRelatedField(
+        queryset=Warehouse.objects.filter(is_active=True), source='warehouse', allow_null=True, required=False
+    )
+    warehouse_name = serializers.CharField(source='warehouse.name', read_only=True, allow_null=True)
     
     # Payment fields
     paid_amount = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, default=0)
@@ -87,13 +104,24 @@ class PurchaseSerializer(serializers.ModelSerializer):
             'vat', 'vat_type', 'invoice_no', 'payment_status', 'return_amount',
             'account_id', 'account_name', 'payment_method', 'remark',
             'purchase_items', 'items', 'delivery_charge', 'service_charge',
-            'sub_total', 'overall_service_type', 'overall_delivery_type'
+            'sub_total', 'overall_service_type', 'overall_delivery_type',
+            'warehouse_id', 'warehouse_name'
         ]
         read_only_fields = [
             'id', 'company', 'total', 'grand_total', 'invoice_no', 'payment_status',
             'due_amount', 'change_amount', 'supplier_name', 'account_name', 'sub_total'
         ]
 
+    def to_internal_value(self, data):
+        # One query for the products of every line instead of one per line
+        items = data.get('purchase_items') if hasattr(data, 'get') else None
+        if isinstance(items, list):
+            product_ids = {str(item.get('product_id')) for item in items if isinstance(item, dict)}
+            self.context['purchase_products'] = Product.objects.in_bulk(
+                [int(pk) for pk in product_ids if pk.isdigit()]
+            )
+        return super().to_internal_value(data)
+
     def validate(self, attrs):
         request = self.context.get('request')
         user = request.user if request else None
@@ -124,6 +152,10 @@ class PurchaseSerializer(serializers.ModelSerializer):
                         "purchase_items": f"Item {i+1}: Quantity must be greater than 0 for product '{product.name}'."
                     })
         
+        warehouse = attrs.get('warehouse')
+        if warehouse and user and warehouse.company_id != getattr(user, 'company_id', None):
+            raise serializers.ValidationError({"warehouse_id": "Warehouse not found."})
+
         # Validate instant payment requirements
         instant_pay = attrs.get('instant_pay', False)
         if instant_pay:
@@ -187,72 +219,23 @@ class PurchaseSerializer(serializers.ModelSerializer):
 
             validated_data['company'] = user.company
             validated_data['created_by'] = user
+            # Purchases that name no warehouse are received into the company's default one, if any
+            if not validated_data.get('warehouse'):
+                validated_data.pop('warehouse', None)
+                validated_data['warehouse_id'] = warehouse_stock.default_warehouse_id(user.company_id)
 
-            purchase = None
-            
-            with db_transaction.atomic():
-                # Create purchase first (without items)
-                purchase = Purchase.objects.create(**validated_data)
-                logger.info(f"SUCCESS: Purchase created - Invoice: {purchase.invoice_no}, ID: {purchase.id}")
-                
-                # Create purchase items
-                for item_data in items_data:
-                    PurchaseItem.objects.create(purchase=purchase, **item_data)
-                logger.info(f"SUCCESS: Created {len(items_data)} purchase items")
-
-                # Update totals to calculate the actual totals
-                purchase.update_totals(force_update=True)
-                logger.info(f"INFO: Purchase totals updated - Grand Total: {purchase.grand_total}")
-                
-                # FIXED: Handle instant payment - ONLY create transaction if needed
-                if instant_pay and paid_amount > 0 and account and payment_method:
-                    logger.info(f"INFO: Processing instant payment for purchase {purchase.invoice_no}")
-                    logger.info(f"  Amount to pay: {paid_amount}")
-                    
-                    # Check if transaction already exists before creating
-                    Transaction = apps.get_model('transactions', 'Transaction')
-                    existing_transaction = Transaction.objects.filter(
-                        purchase=purchase,
-                        amount=paid_amount,
-                        transaction_type='debit',
-                        account=account,
-                        payment_method=payment_method,
-                        status='completed'
-                    ).first()
-                    
-                    if existing_transaction:
-                        logger.warning(f"WARNING: Transaction already exists: {existing_transaction.transaction_no}")
-                        # Just update the purchase with payment details
-                        purchase.paid_amount = paid_amount
-                        purchase.account = account
-                        purchase.payment_method = payment_method
-                        purchase.update_totals(force_update=True)
-                    else:
-                        # Update purchase with payment details
-                        purchase.paid_amount = paid_amount
-                        purchase.account = account
-                        purchase.payment_method = payment_method
-                        purchase.save(update_fields=['paid_amount', 'account', 'payment_method', 'date_updated'])
-                        
-                        # Update totals again to recalculate due_amount
-                        purchase.update_totals(force_update=True)
-                        
-                        # Create transaction (ONLY HERE - not in multiple places)
-                        transaction = purchase.create_initial_payment_transaction()
-                        if transaction:
-                            logger.info(f"SUCCESS: Payment transaction created: {transaction.transaction_no}")
-                        else:
-                            logger.warning(f"WARNING: Failed to create payment transaction")
-                
-                # Refresh purchase to get updated values
-                purchase.refresh_from_db()
-                logger.info(f"INFO: Final purchase state - Paid: {purchase.paid_amount}, Due: {purchase.due_amount}, Status: {purchase.payment_status}")
+            # Lines, stock, totals, supplier totals and the instant payment in one transaction
+            purchase = Purchase.receive(items_data, instant_pay=instant_pay, **validated_data)
+            logger.info(f"INFO: Final purchase state - Paid: {purchase.paid_amount}, Due: {purchase.due_amount}, Status: {purchase.payment_status}")
 
             return purchase
             
         except serializers.ValidationError as e:
             logger.error(f"VALIDATION ERROR: {e.detail}")
             raise e
+        except DjangoValidationError as e:
+            logger.error(f"VALIDATION ERROR: {e}")
+            raise serializers.ValidationError(e.message_dict if hasattr(e, 'error_dict') else {"error": e.messages})
         except Exception as e:
             logger.exception("ERROR: Exception in PurchaseSerializer.create")
             raise serializers.ValidationError({
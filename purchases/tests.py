@@ -0,0 +1,99 @@
+# purchases/tests.py
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Account
+from core.models import Company, User
+from products.models import Product, StockBatch
+from purchases.models import Purchase, PurchaseItem
+from suppliers.models import Supplier
+from transactions.models import Transaction
+
+
+class PurchaseReceiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Receiving Co')
+        cls.user = User.objects.create_user(username='receiver', password='x', company=cls.company)
+        cls.supplier = Supplier.objects.create(company=cls.company, name='Wholesaler')
+        cls.account = Account.objects.create(company=cls.company, name='Cash')
+        Transaction.objects.create(
+            company=cls.company, account=cls.account, transaction_type='credit',
+            amount=Decimal('1000.00'), status='completed',
+        )
+        cls.rice = Product.objects.create(company=cls.company, name='Rice', stock_qty=10, average_cost=Decimal('5.00'))
+        cls.salt = Product.objects.create(company=cls.company, name='Salt')
+
+    def receive(self, items, **fields):
+        fields = {
+            'company': self.company, 'supplier': self.supplier, 'created_by': self.user,
+            'purchase_date': timezone.localdate() - timedelta(days=1), **fields,
+        }
+        return Purchase.receive(items, **fields)
+
+    def test_totals_are_computed_from_the_lines(self):
+        purchase = self.receive([
+            {'product': self.rice, 'qty': 10, 'price': Decimal('6.00'), 'discount': Decimal('5.00')},
+            {'product': self.salt, 'qty': 4, 'price': Decimal('2.50'), 'discount': Decimal('10'), 'discount_type': 'percentage'},
+        ], overall_discount=Decimal('10'), overall_discount_type='percentage', paid_amount=Decimal('50.00'))
+
+        purchase.refresh_from_db()
+        # 55.00 + 9.00, less 10%
+        self.assertEqual(purchase.total, Decimal('64.00'))
+        self.assertEqual(purchase.grand_total, Decimal('57.60'))
+        self.assertEqual(purchase.due_amount, Decimal('7.60'))
+        self.assertEqual(purchase.items.count(), 2)
+
+        self.supplier.refresh_from_db()
+        self.assertEqual(self.supplier.total_purchases, Decimal('57.60'))
+        self.assertEqual(self.supplier.total_paid, Decimal('50.00'))
+        self.assertEqual(self.supplier.purchase_count, 1)
+
+    def test_stock_and_average_cost_follow_the_lines(self):
+        self.receive([
+            {'product': self.rice, 'qty': 10, 'price': Decimal('8.00')},
+            {'product': self.rice, 'qty': 5, 'price': Decimal('8.00'), 'batch_no': 'R-1',
+             'expiry_date': timezone.localdate() + timedelta(days=30)},
+            {'product': self.salt, 'qty': 3, 'price': Decimal('0.00')},
+        ])
+
+        self.rice.refresh_from_db()
+        self.salt.refresh_from_db()
+        self.assertEqual(self.rice.stock_qty, 25)
+        # (10 x 5.00 + 15 x 8.00) / 25
+        self.assertEqual(self.rice.average_cost, Decimal('6.8000'))
+        # Free lines do not move stock
+        self.assertEqual(self.salt.stock_qty, 0)
+        self.assertEqual(
+            list(StockBatch.objects.filter(product=self.rice).values_list('batch_no', 'quantity')),
+            [('R-1', Decimal('5.000'))],
+        )
+
+    def test_instant_payment_posts_one_transaction(self):
+        purchase = self.receive(
+            [{'product': self.rice, 'qty': 2, 'price': Decimal('10.00')}],
+            instant_pay=True, paid_amount=Decimal('20.00'), account=self.account, payment_method='cash',
+        )
+
+        payments = Transaction.objects.filter(purchase=purchase)
+        self.assertEqual(payments.count(), 1)
+        self.assertEqual(payments.get().amount, Decimal('20.00'))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('980.00'))
+
+    def test_invalid_line_writes_nothing(self):
+        with self.assertRaises(ValidationError) as raised:
+            self.receive([
+                {'product': self.rice, 'qty': 2, 'price': Decimal('10.00')},
+                {'product': self.salt, 'qty': 0, 'price': Decimal('1.00')},
+            ])
+
+        self.assertIn('items[2]', raised.exception.message_dict)
+        self.assertFalse(Purchase.objects.filter(company=self.company).exists())
+        self.assertFalse(PurchaseItem.objects.filter(product__company=self.company).exists())
+        self.rice.refresh_from_db()
+        self.assertEqual(self.rice.stock_qty, 10)
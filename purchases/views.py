@@ -2,7 +2,7 @@
 from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db.models import Q, prefetch_related_objects
 import logging
 from core.utils import custom_response
 from core.base_viewsets import BaseCompanyViewSet
@@ -102,7 +102,7 @@ def get_due_purchases(request, supplier_id=None):
 
 
 class PurchaseViewSet(BaseCompanyViewSet):
-    queryset = Purchase.objects.all().select_related('supplier', 'account')
+    queryset = Purchase.objects.all().select_related('supplier', 'account', 'warehouse')
     serializer_class = PurchaseSerializer
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = CustomPageNumberPagination
@@ -218,6 +218,8 @@ class PurchaseViewSet(BaseCompanyViewSet):
         try:
             serializer.is_valid(raise_exception=True)
             instance = serializer.save()
+            # Lines with their products in two queries for the response
+            prefetch_related_objects([instance], 'items__product')
             return custom_response(
                 success=True,
                 message="Purchase created successfully.",
@@ -579,7 +581,7 @@ class PurchaseItemViewSet(BaseCompanyViewSet):
 
 
 class PurchaseAllListViewSet(BaseCompanyViewSet):
-    queryset = Purchase.objects.all().select_related('supplier', 'account')
+    queryset = Purchase.objects.all().select_related('supplier', 'account', 'warehouse')
     serializer_class = PurchaseSerializer
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = None
@@ -694,7 +696,7 @@ class PurchaseAllListViewSet(BaseCompanyViewSet):
             purchases = Purchase.objects.filter(
                 supplier_id=supplier_id,
                 company=request.user.company
-            ).select_related('supplier', 'account').order_by('-purchase_date')
+            ).select_related('supplier', 'account', 'warehouse').order_by('-purchase_date')
             
             serializer = self.get_serializer(purchases, many=True)
             
@@ -152,6 +152,23 @@ class LowStockSerializer(serializers.Serializer):
     category = serializers.CharField(required=False)
     brand = serializers.CharField(required=False)
 
+class NearExpiryFilterSerializer(serializers.Serializer):
+    days = serializers.IntegerField(required=False, default=30, min_value=0, max_value=3650)
+    include_expired = serializers.BooleanField(required=False, default=True)
+    product = serializers.IntegerField(required=False)
+
+class NearExpirySerializer(serializers.Serializer):
+    batch_id = serializers.IntegerField()
+    product_id = serializers.IntegerField()
+    product_name = serializers.CharField()
+    sku = serializers.CharField(allow_null=True)
+    batch_no = serializers.CharField(allow_blank=True)
+    expiry_date = serializers.DateField()
+    days_left = serializers.IntegerField()
+    status = serializers.CharField()
+    quantity = serializers.FloatField()
+    stock_value = serializers.FloatField()
+
 class BadStockReportSerializer(serializers.Serializer):
     sl = serializers.IntegerField()
     product = serializers.CharField()
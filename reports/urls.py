@@ -11,6 +11,7 @@ urlpatterns = [
     path('sales-returns/', views.SalesReturnReportView.as_view(), name='sales-return-report'),
     path('top-products/', views.TopSoldProductsReportView.as_view(), name='top-products-report'),
     path('low-stock/', views.LowStockReportView.as_view(), name='low-stock-report'),
+    path('near-expiry/', views.NearExpiryReportView.as_view(), name='near-expiry-report'),
     path('bad-stock/', views.BadStockReportView.as_view(), name='bad-stock-report'),
     path('stock/', views.StockReportView.as_view(), name='stock-report'),
     path('dashboard/', views.DashboardSummaryView.as_view(), name='dashboard-summary'),
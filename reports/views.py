@@ -26,6 +26,9 @@ from django.db.models.functions import Coalesce  # Coalesce is in functions modu
 from django.db.models.expressions import ExpressionWrapper
 from django.db.models import DecimalField, IntegerField
 from core.base_viewsets import BaseReportView
+from archive.queries import archived, boundary, brought_forward
+from closing.balances import after_close, latest_close, snapshot_for
+from closing.models import CustomerSnapshot, SupplierSnapshot
 from .utils import custom_response, build_summary, build_advanced_summary
 from .serializers import (
     SalesReportSerializer, SalesReportFilterSerializer,
@@ -38,7 +41,8 @@ from .serializers import (
     SupplierDueAdvanceSerializer, 
     CustomerLedgerSerializer, SupplierLedgerSerializer,
     CustomerLedgerFilterSerializer, SupplierLedgerFilterSerializer,
-    SupplierDueAdvanceFilterSerializer, CustomerDueAdvanceFilterSerializer
+    SupplierDueAdvanceFilterSerializer, CustomerDueAdvanceFilterSerializer,
+    NearExpiryFilterSerializer, NearExpirySerializer
 )
 from django.db.models import F, Sum, ExpressionWrapper, DecimalField, IntegerField
 from django.utils.decorators import method_decorator
@@ -81,7 +85,7 @@ class SalesReportView(BaseReportView):
             sales = Sale.objects.filter(company=company).select_related(
                 'customer', 'sale_by'
             ).prefetch_related(
-                'items', 'items__product'
+                'items'
             ).order_by('-sale_date')
             
             print(f"Total sales in company (before filters): {sales.count()}")
@@ -134,6 +138,16 @@ class SalesReportView(BaseReportView):
             
             sales = sales.filter(filter_q)
             print(f"Sales after all filters: {sales.count()}")
+
+            # Sales of archived fiscal years, only when the range reaches them
+            archived_sales = archived(Sale, company, start)
+            if archived_sales is not None:
+                if start and end:
+                    archived_sales = archived_sales.filter(sale_date__range=[start_datetime, end_datetime])
+                archived_sales = archived_sales.filter(filter_q).select_related(
+                    'customer', 'sale_by'
+                ).prefetch_related('items')
+                sales = sorted([*sales, *archived_sales], key=lambda sale: sale.sale_date, reverse=True)
             
             # ===== BUILD REPORT DATA =====
             report_data = []
@@ -145,12 +159,13 @@ class SalesReportView(BaseReportView):
                 
                 # Calculate totals from items
                 for item in sale.items.all():
-                    item_sales_price = (item.quantity or 0) * (item.unit_price or 0)
+                    # Same base-unit basis as the cost below and SaleItem.subtotal()
+                    item_sales_price = (item.base_quantity or 0) * (item.unit_price or 0)
                     sales_price += float(item_sales_price)
                     
-                    if hasattr(item, 'product') and item.product:
-                        item_cost_price = (item.quantity or 0) * (item.product.purchase_price or 0)
-                        cost_price += float(item_cost_price)
+                    # Cost stamped on the line when it was sold
+                    if item.unit_cost is not None:
+                        cost_price += float(item.base_quantity * item.unit_cost)
                 
                 profit = sales_price - cost_price
                 collect_amount = float(sale.paid_amount or 0)
@@ -283,6 +298,16 @@ class PurchaseReportView(BaseReportView):
                 filter_q &= Q(invoice_no__icontains=filters['invoice_no'])
             
             purchases = purchases.filter(filter_q)
+
+            # Purchases of archived fiscal years, only when the range reaches them
+            archived_purchases = archived(Purchase, company, start)
+            if archived_purchases is not None:
+                if start and end:
+                    archived_purchases = archived_purchases.filter(purchase_date__range=[start, end])
+                archived_purchases = archived_purchases.filter(filter_q).select_related('supplier')
+                purchases = sorted(
+                    [*purchases, *archived_purchases], key=lambda purchase: purchase.purchase_date, reverse=True
+                )
             
             report_data = []
             sl_number = 1
@@ -423,6 +448,75 @@ class LowStockReportView(BaseReportView):
         except Exception as e:
             return self.handle_exception(e)
 
+# --------------------
+# Near-Expiry / Expired Batch Stock Report
+# --------------------
+class NearExpiryReportView(BaseReportView):
+    """Batches with stock expiring within ``days`` (products.batches), paginated in the database"""
+    filter_serializer_class = NearExpiryFilterSerializer
+
+    def get(self, request):
+        from products.batches import expiring
+
+        try:
+            company = self.get_company(request)
+            filters = self.get_filters(request)
+            today = timezone.now().date()
+
+            batches = expiring(company, filters['days'], filters['include_expired'], today=today)
+            if filters.get('product'):
+                batches = batches.filter(product_id=filters['product'])
+
+            value = ExpressionWrapper(
+                F('quantity') * F('product__average_cost'), output_field=DecimalField(max_digits=18, decimal_places=4)
+            )
+            expired = Q(expiry_date__lt=today)
+            totals = batches.aggregate(
+                batch_count=Count('id'),
+                expired_batches=Count('id', filter=expired),
+                total_quantity=Sum('quantity'),
+                expired_quantity=Sum('quantity', filter=expired),
+                total_value=Sum(value),
+                expired_value=Sum(value, filter=expired),
+            )
+
+            rows = batches.select_related('product').annotate(stock_value=value)
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(rows, request)
+            report_data = [
+                {
+                    'batch_id': batch.id,
+                    'product_id': batch.product_id,
+                    'product_name': batch.product.name,
+                    'sku': batch.product.sku,
+                    'batch_no': batch.batch_no,
+                    'expiry_date': batch.expiry_date,
+                    'days_left': (batch.expiry_date - today).days,
+                    'status': 'expired' if batch.expiry_date < today else 'expiring',
+                    'quantity': float(batch.quantity),
+                    'stock_value': round(float(batch.stock_value or 0), 2),
+                }
+                for batch in page
+            ]
+
+            response_data = {
+                'report': paginator.get_paginated_response(NearExpirySerializer(report_data, many=True).data).data,
+                'summary': {
+                    'days': filters['days'],
+                    'total_batches': totals['batch_count'],
+                    'expired_batches': totals['expired_batches'],
+                    'expiring_batches': totals['batch_count'] - totals['expired_batches'],
+                    'total_quantity': float(totals['total_quantity'] or 0),
+                    'expired_quantity': float(totals['expired_quantity'] or 0),
+                    'total_value': round(float(totals['total_value'] or 0), 2),
+                    'expired_value': round(float(totals['expired_value'] or 0), 2),
+                }
+            }
+            return custom_response(True, "Near-expiry stock report fetched successfully", response_data)
+
+        except Exception as e:
+            return self.handle_exception(e)
+
 # --------------------
 # Top Sold Products Report - FIXED VERSION
 # --------------------
@@ -468,7 +562,6 @@ class TopSoldProductsReportView(BaseReportView):
                 'product__id',
                 'product__name',
                 'product__selling_price',
-                'product__purchase_price',
                 'product__stock_qty'
             ).annotate(
                 total_quantity_sold=Coalesce(
@@ -480,13 +573,17 @@ class TopSoldProductsReportView(BaseReportView):
                 total_sales_amount=Coalesce(
                     Sum(
                         ExpressionWrapper(
-                            F('quantity') * F('unit_price'),
+                            F('base_quantity') * F('unit_price'),
                             output_field=DecimalField(max_digits=15, decimal_places=2)
                         )
                     ),
                     0,
                     output_field=DecimalField(max_digits=15, decimal_places=2)
-                )
+                ),
+                # At the cost stamped on each line when it was sold
+                total_cost=Sum(SaleItem.cost_expression()),
+                total_base_quantity=Sum('base_quantity', filter=Q(unit_cost__isnull=False)),
+                total_profit=Sum(SaleItem.profit_expression()),
             ).order_by('-total_quantity_sold')[:limit]
             
             print(f"Found {len(product_stats)} products with sales data")
@@ -496,11 +593,10 @@ class TopSoldProductsReportView(BaseReportView):
             sl_number = 1
             
             for stat in product_stats:
-                # Calculate profit
-                purchase_price = stat.get('product__purchase_price', 0) or 0
+                # Average cost of the units sold, from the costs stamped on the lines
                 selling_price = stat.get('product__selling_price', 0) or 0
-                profit_per_unit = selling_price - purchase_price
-                total_profit = profit_per_unit * stat['total_quantity_sold']
+                purchase_price = (stat['total_cost'] / stat['total_base_quantity']) if stat['total_base_quantity'] else 0
+                total_profit = stat['total_profit'] or 0
                 
                 report_data.append({
                     'sl': sl_number,
@@ -685,8 +781,16 @@ class SupplierLedgerReportView(BaseReportView):
                 
                 if start and end:
                     purchases = purchases.filter(purchase_date__range=[start, end])
+                purchases = list(purchases.order_by('purchase_date'))
+
+                archived_purchases = archived(Purchase, company, start)
+                if archived_purchases is not None:
+                    archived_purchases = archived_purchases.filter(supplier=supplier)
+                    if start and end:
+                        archived_purchases = archived_purchases.filter(purchase_date__range=[start, end])
+                    purchases = [*archived_purchases.order_by('purchase_date'), *purchases]
                 
-                for purchase in purchases.order_by('purchase_date'):
+                for purchase in purchases:
                     running_balance += float(purchase.grand_total)
                     
                     ledger_entries.append({
@@ -802,23 +906,42 @@ class SupplierLedgerReportView(BaseReportView):
                 # Calculate opening balance before the start date
                 opening_balance = 0
                 
+                # Start from the newest period close before the range; only later rows are read
+                close = latest_close(company, before=start)
+                snapshot = snapshot_for(close, SupplierSnapshot, supplier=supplier)
+                if snapshot:
+                    opening_balance += float(snapshot.purchases_total)
+                
                 # Purchases before start date
-                opening_purchases = Purchase.objects.filter(
+                opening_purchases = after_close(Purchase.objects.filter(
                     company=company,
                     supplier=supplier
-                )
+                ), close, 'purchase_date', 'purchase')
                 if start:
                     opening_purchases = opening_purchases.filter(purchase_date__lt=start)
                 for purchase in opening_purchases:
                     opening_balance += float(purchase.grand_total)
+
+                # Archived purchases (covered by any close): read before a start inside the archive, else brought forward
+                archived_opening = archived(Purchase, company, start) if close is None else None
+                if archived_opening is not None:
+                    archived_opening = archived_opening.filter(supplier=supplier)
+                    if start:
+                        archived_opening = archived_opening.filter(purchase_date__lt=start)
+                    opening_balance += float(archived_opening.aggregate(total=Sum('grand_total'))['total'] or 0)
+                elif close is None:
+                    debit, credit = brought_forward(company, 'supplier', supplier.id)
+                    opening_balance += float(debit - credit)
                 
                 # Payments before start date
                 try:
                     from suppliers.models import SupplierPayment
-                    opening_payments = SupplierPayment.objects.filter(
+                    if snapshot:
+                        opening_balance -= float(snapshot.payments_total)
+                    opening_payments = after_close(SupplierPayment.objects.filter(
                         company=company,
                         supplier=supplier
-                    )
+                    ), close, 'payment_date')
                     if start:
                         opening_payments = opening_payments.filter(payment_date__lt=start)
                     for payment in opening_payments:
@@ -835,6 +958,7 @@ class SupplierLedgerReportView(BaseReportView):
                 elif hasattr(PurchaseReturn, 'supplier'):
                     opening_returns = opening_returns.filter(supplier=supplier)
                 
+                opening_returns = after_close(opening_returns, close, 'return_date')
                 if start:
                     opening_returns = opening_returns.filter(return_date__lt=start)
                 
@@ -1098,16 +1222,23 @@ class CustomerLedgerReportView(BaseReportView):
             ledger_entries = []
             running_balance = 0.0
             sl_number = 1
+
+            # Rows up to the newest period close before the range come from its snapshot;
+            # without one, archived fiscal years are listed when the range reaches them, else brought forward
+            close = latest_close(company, before=start)
+            archived_sales = archived(Sale, company, start) if close is None else None
             
             # 1. Sale transactions - NO DATE FILTER FOR NOW
             if filters.get('transaction_type') in ['all', 'sale']:
-                sales = Sale.objects.filter(
+                sales = after_close(Sale.objects.filter(
                     company=company, 
                     customer=customer
-                ).select_related('customer').order_by('sale_date')
+                ), close, 'sale_date', 'sale').select_related('customer').order_by('sale_date')
                 
                 print(f"\n--- SALES FOR CUSTOMER ---")
                 print(f"Total sales count: {sales.count()}")
+                if archived_sales is not None:
+                    sales = [*archived_sales.filter(customer=customer).select_related('customer').order_by('sale_date'), *sales]
                 
                 # Show all sales without date filter
                 sale_counter = 0
@@ -1176,10 +1307,15 @@ class CustomerLedgerReportView(BaseReportView):
                         print(f"MoneyReceipt model doesn't have customer-related fields")
                         payments = MoneyReceipt.objects.none()
                     
+                    payments = after_close(payments, close, 'payment_date')
                     print(f"Total payments count: {payments.count()}")
+                    payments = list(payments.order_by('id'))
+                    if archived_sales is not None:
+                        archived_payments = archived(MoneyReceipt, company, start).filter(customer=customer)
+                        payments = [*archived_payments.order_by('id'), *payments]
                     
                     payment_counter = 0
-                    for payment in payments.order_by('id'):
+                    for payment in payments:
                         payment_counter += 1
                         payment_amount = 0.0
                         if hasattr(payment, 'amount') and payment.amount:
@@ -1249,6 +1385,7 @@ class CustomerLedgerReportView(BaseReportView):
                     print(f"No customer relationship found in SalesReturn model")
                     sales_returns = SalesReturn.objects.none()
                 
+                sales_returns = after_close(sales_returns, close, 'return_date')
                 print(f"Total returns count: {sales_returns.count()}")
                 
                 return_counter = 0
@@ -1293,6 +1430,44 @@ class CustomerLedgerReportView(BaseReportView):
                 
                 if return_counter == 0:
                     print("No returns found for this customer")
+
+            snapshot = snapshot_for(close, CustomerSnapshot, customer=customer)
+            first_hot = boundary(company) if archived_sales is None and close is None else None
+            if snapshot and filters.get('transaction_type') == 'all':
+                debit, credit = snapshot.sales_total, snapshot.receipts_total
+                running_balance += float(debit - credit)
+                ledger_entries.append({
+                    'sl': 0,
+                    'voucher_no': 'OPENING',
+                    'date': close.closed_through,
+                    'particular': 'Opening Balance',
+                    'details': f'Balance at period close {close.closed_through}',
+                    'type': 'Opening',
+                    'method': 'N/A',
+                    'debit': round(float(debit), 2),
+                    'credit': round(float(credit), 2),
+                    'due': round(float(debit - credit), 2),
+                    'customer_id': customer.id,
+                    'customer_name': customer.name
+                })
+            elif first_hot and filters.get('transaction_type') == 'all':
+                debit, credit = brought_forward(company, 'customer', customer.id)
+                if debit or credit:
+                    running_balance += float(debit - credit)
+                    ledger_entries.append({
+                        'sl': 0,
+                        'voucher_no': 'OPENING',
+                        'date': first_hot - timedelta(days=1),
+                        'particular': 'Opening Balance',
+                        'details': 'Archived fiscal years brought forward',
+                        'type': 'Opening',
+                        'method': 'N/A',
+                        'debit': round(float(debit), 2),
+                        'credit': round(float(credit), 2),
+                        'due': round(float(debit - credit), 2),
+                        'customer_id': customer.id,
+                        'customer_name': customer.name
+                    })
             
             # Sort all entries by date
             ledger_entries.sort(key=lambda x: x['date'])
@@ -1452,6 +1627,22 @@ class ProfitLossReportView(BaseReportView):
                 total_purchase=Sum('grand_total'),
                 total_purchase_count=Count('id')
             )
+
+            # Archived fiscal years inside the range
+            archived_sales = archived(Sale, company, start)
+            if archived_sales is not None:
+                if start and end:
+                    archived_sales = archived_sales.filter(sale_date__range=[start, end])
+                totals = archived_sales.aggregate(total=Sum('grand_total'), count=Count('id'))
+                sales_data['total_sales'] = (sales_data['total_sales'] or 0) + (totals['total'] or 0)
+                sales_data['total_sales_count'] += totals['count']
+            archived_purchases = archived(Purchase, company, start)
+            if archived_purchases is not None:
+                if start and end:
+                    archived_purchases = archived_purchases.filter(purchase_date__range=[start, end])
+                totals = archived_purchases.aggregate(total=Sum('grand_total'), count=Count('id'))
+                purchase_data['total_purchase'] = (purchase_data['total_purchase'] or 0) + (totals['total'] or 0)
+                purchase_data['total_purchase_count'] += totals['count']
             
             # Expense data
             expenses = Expense.objects.filter(company=company)
@@ -1868,16 +2059,12 @@ class DashboardSummaryView(BaseReportView):
                 total_quantity=Sum('quantity'),
                 total_base_quantity=Sum('base_quantity')
             )
-            sale_items = SaleItem.objects.filter(
+            # At the cost stamped on each line when it was sold
+            total_profit = SaleItem.objects.filter(
                 sale__company=company,
                 sale__sale_date__gte=start_datetime,
                 sale__sale_date__lte=end_datetime
-            ).select_related('product')
-            total_profit = Decimal('0.00')
-            for item in sale_items:
-                purchase_price = item.product.purchase_price if item.product and item.product.purchase_price else Decimal('0.00')
-                profit_per_item = (Decimal(str(item.unit_price)) - purchase_price) * Decimal(str(item.base_quantity))
-                total_profit += profit_per_item
+            ).aggregate(profit=Sum(SaleItem.profit_expression()))['profit'] or Decimal('0.00')
 
             # --- SALES RETURNS ---
             try:
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('core', '0009_idempotencykey'),
+        ('purchases', '0004_purchase_due_indexes'),
+        ('returns', '0002_initial'),
+        ('sales', '0004_sale_warehouse'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchasereturn',
+            index=models.Index(fields=['company', 'return_date'], name='returns_pur_company_3b85a1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesreturn',
+            index=models.Index(fields=['company', 'return_date'], name='returns_sal_company_d324b5_idx'),
+        ),
+    ]
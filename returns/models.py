@@ -1,19 +1,85 @@
 # returns/models.py - COMPLETE FIXED VERSION
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
+from django.db.models import prefetch_related_objects
 from decimal import Decimal
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from django.db.models import F  # IMPORTANT: Add this import
 from core.models import Company
 from products.models import Product
 from accounts.models import Account
 from transactions.models import Transaction
 from django.conf import settings
+from core.db import serialized_write
 import logging
 
 logger = logging.getLogger(__name__)
 
-class SalesReturn(models.Model):
+
+class ReturnApprovalMixin:
+    """
+    Batched approval shared by SalesReturn and PurchaseReturn. Subclasses
+    give the stock change (``_stock_deltas``), the cost of units coming back
+    (``_stock_costs``) and bad stock rows (``_bad_stock_entries``) of one
+    return, and post its transaction.
+    """
+    approval_prefetch = ('items__product',)
+
+    @classmethod
+    def approve_many(cls, returns):
+        """
+        Approve pending ``returns`` together, all or nothing: items are read in
+        one query, stock moves with one grouped UPDATE, bad stock is written
+        with one bulk_create and each return posts one transaction.
+        """
+        returns = list(returns)
+        for ret in returns:
+            if ret.status != 'pending':
+                raise ValidationError(f"Cannot approve {ret.status} return")
+            if not ret.account:
+                raise ValidationError("Account is required for transaction")
+        if not returns:
+            return returns
+
+        with serialized_write():
+            # Claims the returns: one that was approved meanwhile fails the batch
+            approved = cls.objects.filter(pk__in=[ret.pk for ret in returns], status='pending').update(status='approved')
+            if approved != len(returns):
+                raise ValidationError("Some returns are no longer pending")
+
+            prefetch_related_objects(returns, *cls.approval_prefetch)
+            deltas, costs, bad_stock = {}, {}, []
+            for ret in returns:
+                for product_id, quantity in ret._stock_deltas().items():
+                    deltas[product_id] = deltas.get(product_id, 0) + quantity
+                for product_id, cost in ret._stock_costs().items():
+                    costs[product_id] = costs.get(product_id, Decimal('0.00')) + cost
+                bad_stock.extend(ret._bad_stock_entries())
+
+            try:
+                with transaction.atomic():
+                    Product.objects.add_stock(deltas, costs)
+            except IntegrityError:
+                raise ValidationError("Not enough stock to return these items")
+            BadStock.objects.bulk_create(bad_stock)
+
+            for ret in returns:
+                ret._create_transaction()
+        for ret in returns:
+            ret.status = 'approved'
+        return returns
+
+    def _stock_costs(self):
+        """{product_id: cost of the units put back}; outgoing units leave the average unchanged"""
+        return {}
+
+    def _reverse_stock(self):
+        """Undo the stock change of an approved return"""
+        Product.objects.add_stock({
+            product_id: -quantity for product_id, quantity in self._stock_deltas().items()
+        })
+
+
+class SalesReturn(ReturnApprovalMixin, models.Model):
     RETURN_STATUS = [
         ('pending', 'Pending'),
         ('approved', 'Approved'),
@@ -35,9 +101,14 @@ class SalesReturn(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     original_sale = models.ForeignKey('sales.Sale', on_delete=models.SET_NULL, null=True, blank=True, related_name='sales_returns')
+
+    approval_prefetch = ('items__product', 'original_sale__items')
     
     class Meta:
         ordering = ['-return_date', '-id']
+        indexes = [
+            models.Index(fields=['company', 'return_date']),
+        ]
 
     def __str__(self):
         return f"SalesReturn #{self.id} - {self.receipt_no or 'No Receipt'}"
@@ -101,25 +172,9 @@ class SalesReturn(models.Model):
             
         return total + return_charge_amount
     
-    @transaction.atomic
     def approve(self):
         """Approve the sales return"""
-        if self.status != 'pending':
-            raise ValidationError(f"Cannot approve {self.status} return")
-        
-        # Update product stock
-        self._update_product_stock()
-        
-        # Create transaction
-        self._create_transaction()
-        
-        # Create bad stock entries
-        self._create_bad_stock()
-        
-        # Update status
-        self.status = 'approved'
-        self.save(update_fields=['status'])
-        
+        type(self).approve_many([self])
         return True
     
     @transaction.atomic
@@ -142,26 +197,30 @@ class SalesReturn(models.Model):
         self.save(update_fields=['status'])
         return True
     
-    def _update_product_stock(self):
-        """Update product stock_qty for returned items"""
+    def _stock_deltas(self):
+        """Good (non-damaged) returned units go back to stock"""
+        deltas = {}
         for item in self.items.all():
-            # Calculate good quantity (non-damaged)
             good_quantity = item.quantity - item.damage_quantity
-            
             if good_quantity > 0:
-                # FIXED: Use stock_qty instead of stock
-                Product.objects.filter(id=item.product.id).update(
-                    stock_qty=F('stock_qty') + good_quantity
-                )
-                
-                # Optional: Create stock movement
-                self._create_stock_movement(item.product, good_quantity, 'in', 'sales_return')
-    
-    def _create_stock_movement(self, product, quantity, movement_type, reference_type):
-        """Create stock movement record"""
-        # Implement based on your stock movement model
-        pass
-    
+                deltas[item.product_id] = deltas.get(item.product_id, 0) + good_quantity
+        return deltas
+
+    def _stock_costs(self):
+        """Good units come back at the cost stamped on the original sale line, else at the current cost"""
+        sold_at = {}
+        if self.original_sale_id and self.original_sale:
+            for sale_item in self.original_sale.items.all():
+                if sale_item.unit_cost is not None:
+                    sold_at.setdefault(sale_item.product_id, sale_item.unit_cost)
+        costs = {}
+        for item in self.items.all():
+            good_quantity = item.quantity - item.damage_quantity
+            if good_quantity > 0:
+                unit_cost = sold_at.get(item.product_id, item.product.current_cost())
+                costs[item.product_id] = costs.get(item.product_id, Decimal('0.00')) + unit_cost * good_quantity
+        return costs
+
     def _create_transaction(self):
         """Create transaction for the return amount"""
         if not self.account:
@@ -181,19 +240,20 @@ class SalesReturn(models.Model):
             is_opening_balance=False
         )
     
-    def _create_bad_stock(self):
-        """Create bad stock entries for damaged items"""
-        for item in self.items.all():
-            if item.damage_quantity > 0:
-                BadStock.objects.create(
-                    product=item.product,
-                    quantity=item.damage_quantity,
-                    company=self.company,
-                    reason=f"Damaged in sales return {self.receipt_no} - {self.reason or 'No reason provided'}",
-                    reference_type='sales_return',
-                    reference_id=self.id,
-                    date=self.return_date
-                )
+    def _bad_stock_entries(self):
+        """Unsaved bad stock entries for damaged items"""
+        return [
+            BadStock(
+                product=item.product,
+                quantity=item.damage_quantity,
+                company=self.company,
+                reason=f"Damaged in sales return {self.receipt_no} - {self.reason or 'No reason provided'}",
+                reference_type='sales_return',
+                reference_id=self.id,
+                date=self.return_date
+            )
+            for item in self.items.all() if item.damage_quantity > 0
+        ]
     
     @transaction.atomic
     def delete(self, *args, **kwargs):
@@ -201,13 +261,7 @@ class SalesReturn(models.Model):
         try:
             if self.status == 'approved':
                 # Reverse stock updates
-                for item in self.items.all():
-                    good_quantity = item.quantity - item.damage_quantity
-                    if good_quantity > 0:
-                        # FIXED: Use stock_qty instead of stock
-                        Product.objects.filter(id=item.product.id).update(
-                            stock_qty=F('stock_qty') - good_quantity
-                        )
+                self._reverse_stock()
                 
                 # Delete related bad stock
                 BadStock.objects.filter(reference_type='sales_return', reference_id=self.id).delete()
@@ -257,7 +311,7 @@ class SalesReturnItem(models.Model):
         return f"{self.product_name} ({self.quantity} units, {self.damage_quantity} damaged)"
 
 
-class PurchaseReturn(models.Model):
+class PurchaseReturn(ReturnApprovalMixin, models.Model):
     RETURN_STATUS = [
         ('pending', 'Pending'),
         ('approved', 'Approved'),
@@ -282,6 +336,9 @@ class PurchaseReturn(models.Model):
     
     class Meta:
         ordering = ['-return_date', '-id']
+        indexes = [
+            models.Index(fields=['company', 'return_date']),
+        ]
 
     def __str__(self):
         return f"PurchaseReturn #{self.id} - {self.invoice_no or 'No Invoice'}"
@@ -345,25 +402,9 @@ class PurchaseReturn(models.Model):
             
         return total - return_charge_amount  # Note: minus charge
     
-    @transaction.atomic
     def approve(self):
         """Approve the purchase return"""
-        if self.status != 'pending':
-            raise ValidationError(f"Cannot approve {self.status} return")
-        
-        # Update product stock (decrease)
-        self._update_product_stock()
-        
-        # Create transaction (credit - money coming in)
-        self._create_transaction()
-        
-        # Create bad stock entries if needed
-        self._create_bad_stock()
-        
-        # Update status
-        self.status = 'approved'
-        self.save(update_fields=['status'])
-        
+        type(self).approve_many([self])
         return True
     
     @transaction.atomic
@@ -386,22 +427,13 @@ class PurchaseReturn(models.Model):
         self.save(update_fields=['status'])
         return True
     
-    def _update_product_stock(self):
-        """Decrease product stock_qty for returned items"""
+    def _stock_deltas(self):
+        """Returned units leave stock (items going back to supplier)"""
+        deltas = {}
         for item in self.items.all():
-            # Decrease product stock_qty (items going back to supplier)
-            # FIXED: Use stock_qty instead of stock
-            Product.objects.filter(id=item.product.id).update(
-                stock_qty=F('stock_qty') - item.quantity
-            )
-            
-            # Optional: Create stock movement
-            self._create_stock_movement(item.product, item.quantity, 'out', 'purchase_return')
-    
-    def _create_stock_movement(self, product, quantity, movement_type, reference_type):
-        """Create stock movement record"""
-        pass
-    
+            deltas[item.product_id] = deltas.get(item.product_id, 0) - item.quantity
+        return deltas
+
     def _create_transaction(self):
         """Create transaction for the return amount"""
         if not self.account:
@@ -421,10 +453,10 @@ class PurchaseReturn(models.Model):
             is_opening_balance=False
         )
     
-    def _create_bad_stock(self):
-        """Create bad stock entries for returned items"""
-        for item in self.items.all():
-            BadStock.objects.create(
+    def _bad_stock_entries(self):
+        """Unsaved bad stock entries for returned items"""
+        return [
+            BadStock(
                 product=item.product,
                 quantity=item.quantity,
                 company=self.company,
@@ -433,6 +465,8 @@ class PurchaseReturn(models.Model):
                 reference_id=self.id,
                 date=self.return_date
             )
+            for item in self.items.all()
+        ]
     
     @transaction.atomic
     def delete(self, *args, **kwargs):
@@ -440,11 +474,7 @@ class PurchaseReturn(models.Model):
         try:
             if self.status == 'approved':
                 # Reverse stock updates
-                for item in self.items.all():
-                    # FIXED: Use stock_qty instead of stock
-                    Product.objects.filter(id=item.product.id).update(
-                        stock_qty=F('stock_qty') + item.quantity
-                    )
+                self._reverse_stock()
                 
                 # Delete related bad stock
                 BadStock.objects.filter(reference_type='purchase_return', reference_id=self.id).delete()
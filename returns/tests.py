@@ -0,0 +1,107 @@
+# returns/tests.py
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Account
+from core.models import Company
+from products.models import Product
+from returns.models import BadStock, PurchaseReturn, PurchaseReturnItem, SalesReturn, SalesReturnItem
+from transactions.models import Transaction
+
+
+class ApproveManyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Returns Co')
+        cls.account = Account.objects.create(company=cls.company, name='Cash')
+        Transaction.objects.create(
+            company=cls.company, account=cls.account, transaction_type='credit',
+            amount=Decimal('1000.00'), status='completed',
+        )
+        cls.soap = Product.objects.create(company=cls.company, name='Soap', stock_qty=10, average_cost=Decimal('4.00'))
+        cls.oil = Product.objects.create(company=cls.company, name='Oil', stock_qty=5, average_cost=Decimal('20.00'))
+
+    def sales_return(self, amount, *lines):
+        ret = SalesReturn.objects.create(
+            company=self.company, account=self.account, return_date=timezone.localdate(), return_amount=amount,
+        )
+        for product, quantity, damaged in lines:
+            SalesReturnItem.objects.create(
+                sales_return=ret, product=product, quantity=quantity, damage_quantity=damaged, unit_price=Decimal('10.00'),
+            )
+        return ret
+
+    def purchase_return(self, amount, *lines):
+        ret = PurchaseReturn.objects.create(
+            company=self.company, account=self.account, return_date=timezone.localdate(), return_amount=amount,
+        )
+        for product, quantity in lines:
+            PurchaseReturnItem.objects.create(
+                purchase_return=ret, product=product, quantity=quantity, unit_price=Decimal('10.00'),
+            )
+        return ret
+
+    def stock(self, product):
+        product.refresh_from_db(fields=['stock_qty'])
+        return product.stock_qty
+
+    def test_sales_returns_are_approved_together(self):
+        first = self.sales_return(Decimal('30.00'), (self.soap, 3, 1))
+        second = self.sales_return(Decimal('50.00'), (self.soap, 2, 0), (self.oil, 3, 3))
+
+        SalesReturn.approve_many(SalesReturn.objects.filter(pk__in=[first.pk, second.pk]))
+
+        self.assertEqual(set(SalesReturn.objects.values_list('status', flat=True)), {'approved'})
+        # Good units go back to stock, damaged ones become bad stock
+        self.assertEqual(self.stock(self.soap), 14)
+        self.assertEqual(self.stock(self.oil), 5)
+        self.assertEqual(
+            sorted(BadStock.objects.filter(company=self.company).values_list('product_id', 'quantity')),
+            sorted([(self.soap.pk, 1), (self.oil.pk, 3)]),
+        )
+        debits = Transaction.objects.filter(account=self.account, transaction_type='debit')
+        self.assertEqual(sorted(debits.values_list('amount', flat=True)), [Decimal('30.00'), Decimal('50.00')])
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('920.00'))
+
+    def test_returned_units_come_back_at_the_current_cost(self):
+        ret = self.sales_return(Decimal('20.00'), (self.soap, 2, 0))
+
+        SalesReturn.approve_many([ret])
+
+        self.soap.refresh_from_db()
+        self.assertEqual((self.soap.stock_qty, self.soap.average_cost), (12, Decimal('4.0000')))
+
+    def test_purchase_returns_take_stock_out(self):
+        ret = self.purchase_return(Decimal('40.00'), (self.soap, 4), (self.oil, 1))
+
+        PurchaseReturn.approve_many([ret])
+
+        self.assertEqual((self.stock(self.soap), self.stock(self.oil)), (6, 4))
+        self.assertTrue(Transaction.objects.filter(account=self.account, transaction_type='credit', amount=Decimal('40.00')).exists())
+
+    def test_batch_is_all_or_nothing(self):
+        fits = self.purchase_return(Decimal('10.00'), (self.soap, 4))
+        too_many = self.purchase_return(Decimal('10.00'), (self.soap, 7))
+
+        with self.assertRaisesMessage(ValidationError, 'Not enough stock'):
+            PurchaseReturn.approve_many([fits, too_many])
+
+        self.assertEqual(set(PurchaseReturn.objects.values_list('status', flat=True)), {'pending'})
+        self.assertEqual(self.stock(self.soap), 10)
+        self.assertFalse(BadStock.objects.filter(company=self.company).exists())
+
+    def test_returns_no_longer_pending_fail_the_batch(self):
+        pending = self.sales_return(Decimal('10.00'), (self.soap, 1, 0))
+        stale = self.sales_return(Decimal('10.00'), (self.soap, 1, 0))
+        SalesReturn.objects.filter(pk=stale.pk).update(status='approved')
+
+        with self.assertRaisesMessage(ValidationError, 'no longer pending'):
+            SalesReturn.approve_many([pending, stale])
+
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'pending')
+        self.assertEqual(self.stock(self.soap), 10)
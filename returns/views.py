@@ -2,10 +2,11 @@
 from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, Sum, Count
+from django.db.models import F, Q, Sum, Count
 from django.db import transaction as db_transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.conf import settings
 from core.utils import custom_response
 from core.pagination import CustomPageNumberPagination
 from .models import SalesReturn, PurchaseReturn, BadStock, SalesReturnItem, PurchaseReturnItem
@@ -76,7 +77,73 @@ class BaseCompanyViewSet(viewsets.ModelViewSet):
         return {}
 
 
-class SalesReturnViewSet(BaseCompanyViewSet):
+def _error_text(error):
+    if isinstance(error, ValidationError):
+        return '; '.join(error.messages)
+    return str(error)
+
+
+class BulkApproveMixin:
+    """POST <returns>/bulk-approve/ {"ids": [...]}: approve many pending returns in one request"""
+
+    @action(detail=False, methods=['post'], url_path='bulk-approve')
+    def bulk_approve(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        max_batch = getattr(settings, 'RETURNS_BULK_APPROVE_MAX', 200)
+        if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+            return custom_response(
+                success=False,
+                message="'ids' must be a non-empty list of return ids",
+                data=None,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if len(ids) > max_batch:
+            return custom_response(
+                success=False,
+                message=f"At most {max_batch} returns per request",
+                data=None,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.get_queryset()
+        found = queryset.filter(pk__in=ids).select_related('account', 'company', 'created_by').in_bulk()
+        results, pending = {}, []
+        for pk in dict.fromkeys(ids):
+            instance = found.get(pk)
+            if instance is None:
+                results[pk] = 'Return not found'
+            elif instance.status != 'pending':
+                results[pk] = f"Cannot approve {instance.status} return"
+            elif not instance.account:
+                results[pk] = "Account is required for transaction"
+            else:
+                pending.append(instance)
+
+        try:
+            queryset.model.approve_many(pending)
+        except Exception as e:
+            # Find the returns that cannot be approved; the others still are
+            logger.warning(f"Bulk approval of {len(pending)} returns failed ({_error_text(e)}), approving one by one")
+            for instance in pending:
+                try:
+                    instance.approve()
+                except Exception as error:
+                    results[instance.pk] = _error_text(error)
+
+        data = [
+            {'id': pk, 'status': 'approved'} if pk not in results else {'id': pk, 'status': 'rejected', 'error': results[pk]}
+            for pk in dict.fromkeys(ids)
+        ]
+        approved = sum(1 for row in data if row['status'] == 'approved')
+        return custom_response(
+            success=approved == len(data),
+            message=f"Approved {approved} of {len(data)} returns",
+            data=data,
+            status_code=status.HTTP_200_OK
+        )
+
+
+class SalesReturnViewSet(BulkApproveMixin, BaseCompanyViewSet):
     serializer_class = SalesReturnSerializer
     model = SalesReturn
 
@@ -148,8 +215,10 @@ class SalesReturnViewSet(BaseCompanyViewSet):
             company = user.company
             
             # Get products and accounts
-            products = Product.objects.filter(company=company).values('id', 'name', 'price', 'stock_qty', 'code')
-            accounts = Account.objects.filter(company=company).values('id', 'name', 'balance', 'account_type')
+            products = Product.objects.filter(company=company).values(
+                'id', 'name', 'stock_qty', price=F('selling_price'), code=F('sku')
+            )
+            accounts = Account.objects.filter(company=company).values('id', 'name', 'balance', account_type=F('ac_type'))
             
             # Get recent sales for reference
             recent_sales = []
@@ -453,7 +522,7 @@ class SalesReturnViewSet(BaseCompanyViewSet):
             )
 
 
-class PurchaseReturnViewSet(BaseCompanyViewSet):
+class PurchaseReturnViewSet(BulkApproveMixin, BaseCompanyViewSet):
     serializer_class = PurchaseReturnSerializer
     model = PurchaseReturn
 
@@ -525,8 +594,10 @@ class PurchaseReturnViewSet(BaseCompanyViewSet):
             company = user.company
             
             # Get products and accounts
-            products = Product.objects.filter(company=company).values('id', 'name', 'cost_price', 'stock_qty', 'code')
-            accounts = Account.objects.filter(company=company).values('id', 'name', 'balance', 'account_type')
+            products = Product.objects.filter(company=company).values(
+                'id', 'name', 'stock_qty', cost_price=F('purchase_price'), code=F('sku')
+            )
+            accounts = Account.objects.filter(company=company).values('id', 'name', 'balance', account_type=F('ac_type'))
             
             # Get recent purchases for reference
             recent_purchases = []
@@ -0,0 +1,16 @@
+# sales/jobs.py
+from core.jobs import register
+
+
+@register('sales.payment_documents')
+def payment_documents(payload):
+    """Money receipt or transaction for a sale's payment (both skip what already exists)"""
+    from sales.models import Sale
+
+    sale = Sale.objects.select_related('company', 'customer', 'account').filter(pk=payload['sale_id']).first()
+    if sale is None or sale.paid_amount <= 0:
+        return
+    if sale.with_money_receipt == 'Yes':
+        sale.create_money_receipt()
+    else:
+        sale.create_transaction()
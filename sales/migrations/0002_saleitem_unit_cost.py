@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:43
+
+from django.db import migrations, models
+
+
+def cost_existing_lines(apps, schema_editor):
+    # Past lines keep the cost reports used so far: the product's purchase price
+    Product = apps.get_model('products', 'Product')
+    SaleItem = apps.get_model('sales', 'SaleItem')
+    SaleItem.objects.update(unit_cost=models.Subquery(
+        Product.objects.filter(pk=models.OuterRef('product_id')).values('purchase_price')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='saleitem',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=14, null=True),
+        ),
+        migrations.RunPython(cost_existing_lines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_stockbatch'),
+        ('sales', '0002_saleitem_unit_cost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaleItemBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='products.stockbatch')),
+                ('sale_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batch_allocations', to='sales.saleitem')),
+            ],
+            options={
+                'verbose_name': 'Sale Item Batch',
+                'verbose_name_plural': 'Sale Item Batches',
+                'ordering': ['id'],
+            },
+        ),
+    ]
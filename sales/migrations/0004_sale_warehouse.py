@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('branch_warehouse', '0001_initial'),
+        ('sales', '0003_saleitembatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='warehouse',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='sales', to='branch_warehouse.warehouse'),
+        ),
+    ]
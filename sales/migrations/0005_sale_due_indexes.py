@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('branch_warehouse', '0001_initial'),
+        ('core', '0009_idempotencykey'),
+        ('customers', '0002_customer_company_active_index'),
+        ('products', '0003_stockbatch'),
+        ('sales', '0004_sale_warehouse'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(condition=models.Q(('due_amount__gt', 0)), fields=['company', 'sale_date'], name='sales_sale_company_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(condition=models.Q(('due_amount__gt', 0)), fields=['customer', 'sale_date'], name='sales_sale_customer_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saleitem',
+            index=models.Index(fields=['product', 'sale'], name='sales_salei_product_be8a4f_idx'),
+        ),
+    ]
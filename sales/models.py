@@ -6,9 +6,40 @@ from django.conf import settings
 from decimal import Decimal, ROUND_HALF_UP
 import logging
 
+from core.jobs import enqueue
+from branch_warehouse import stock as warehouse_stock
+from products import batches
+
 logger = logging.getLogger(__name__)
 
 
+class SaleQuerySet(models.QuerySet):
+    """Query plans for sale listings (header only) and detail/expanded output (with items)"""
+
+    HEADER_RELATIONS = ('customer', 'account', 'sale_by', 'created_by', 'warehouse')
+    SUMMARY_FIELDS = (
+        'id', 'invoice_no', 'sale_date', 'sale_type', 'customer_type', 'customer_name',
+        'gross_total', 'net_total', 'grand_total', 'payable_amount',
+        'paid_amount', 'due_amount', 'change_amount',
+        'overall_discount', 'overall_discount_type',
+        'overall_delivery_charge', 'overall_delivery_type',
+        'overall_service_charge', 'overall_service_type',
+        'overall_vat_amount', 'overall_vat_type',
+        'payment_method', 'with_money_receipt', 'remark', 'payment_status',
+        'customer__name', 'account__name', 'sale_by__username', 'created_by__username', 'warehouse__name',
+    )
+
+    def summary(self):
+        """Header fields and the related names shown in lists, in a single query"""
+        return self.select_related(*self.HEADER_RELATIONS).only(*self.SUMMARY_FIELDS)
+
+    def with_items(self):
+        """Header relations plus items with product and sale mode, in two queries"""
+        return self.select_related(*self.HEADER_RELATIONS).prefetch_related(
+            models.Prefetch('items', queryset=SaleItem.objects.select_related('product', 'sale_mode'))
+        )
+
+
 class Sale(models.Model):
     SALE_TYPE_CHOICES = [('retail', 'Retail'), ('wholesale', 'Wholesale')]
     CUSTOMER_TYPE_CHOICES = [('walk_in', 'Walk-in'), ('saved_customer', 'Saved Customer')]
@@ -57,6 +88,10 @@ class Sale(models.Model):
 
     payment_method = models.CharField(max_length=100, blank=True, null=True)
     account = models.ForeignKey('accounts.Account', on_delete=models.SET_NULL, blank=True, null=True, related_name='sales')
+    # Stock comes out of this warehouse's rows (branch_warehouse.stock) instead of Product.stock_qty
+    warehouse = models.ForeignKey('branch_warehouse.Warehouse', on_delete=models.PROTECT, blank=True, null=True, related_name='sales')
+
+    objects = SaleQuerySet.as_manager()
 
     class Meta:
         ordering = ['-sale_date', '-id']
@@ -64,6 +99,9 @@ class Sale(models.Model):
             models.Index(fields=['company', 'sale_date']),
             models.Index(fields=['customer', 'sale_date']),
             models.Index(fields=['invoice_no']),
+            # Due lists (?due_only=true, customer due invoices) only read open invoices
+            models.Index(fields=['company', 'sale_date'], condition=models.Q(due_amount__gt=0), name='sales_sale_company_due_idx'),
+            models.Index(fields=['customer', 'sale_date'], condition=models.Q(due_amount__gt=0), name='sales_sale_customer_due_idx'),
         ]
 
     def __str__(self):
@@ -149,44 +187,7 @@ class Sale(models.Model):
     def calculate_totals(self):
         """Compute gross/net/payable/grand totals, due/change and update payment status."""
         try:
-            # Calculate total from items
-            items_total = sum(item.subtotal() for item in self.items.all())
-            self.gross_total = self._round_decimal(items_total)
-            self.net_total = self.gross_total
-
-            # Calculate charges using the actual stored values
-            vat_amount = self._calculate_charge(
-                self.overall_vat_amount, 
-                self.overall_vat_type, 
-                self.net_total
-            )
-            service_amount = self._calculate_charge(
-                self.overall_service_charge, 
-                self.overall_service_type, 
-                self.net_total
-            )
-            delivery_amount = self._calculate_charge(
-                self.overall_delivery_charge, 
-                self.overall_delivery_type, 
-                self.net_total
-            )
-            overall_discount_amount = self._calculate_charge(
-                self.overall_discount, 
-                self.overall_discount_type, 
-                self.net_total
-            )
-
-            total_charges = vat_amount + service_amount + delivery_amount
-            self.payable_amount = self.net_total + total_charges - overall_discount_amount
-            
-            if self.payable_amount < Decimal('0.00'):
-                self.payable_amount = Decimal('0.00')
-
-            self.grand_total = self.payable_amount
-            self.due_amount = max(Decimal('0.00'), self.grand_total - self.paid_amount)
-            self.change_amount = max(Decimal('0.00'), self.paid_amount - self.grand_total)
-
-            self._update_payment_status()
+            vat_amount, service_amount, delivery_amount = self.compute_totals()
 
             # Save calculated fields
             update_fields = [
@@ -208,6 +209,52 @@ class Sale(models.Model):
             logger.exception("Error calculating totals")
             raise
 
+    def compute_totals(self):
+        """
+        Set the calculated totals and payment status on the instance without
+        saving; returns the (vat, service, delivery) charge amounts. Uses
+        prefetched items when present.
+        """
+        # Calculate total from items
+        items_total = sum(item.subtotal() for item in self.items.all())
+        self.gross_total = self._round_decimal(items_total)
+        self.net_total = self.gross_total
+
+        # Calculate charges using the actual stored values
+        vat_amount = self._calculate_charge(
+            self.overall_vat_amount, 
+            self.overall_vat_type, 
+            self.net_total
+        )
+        service_amount = self._calculate_charge(
+            self.overall_service_charge, 
+            self.overall_service_type, 
+            self.net_total
+        )
+        delivery_amount = self._calculate_charge(
+            self.overall_delivery_charge, 
+            self.overall_delivery_type, 
+            self.net_total
+        )
+        overall_discount_amount = self._calculate_charge(
+            self.overall_discount, 
+            self.overall_discount_type, 
+            self.net_total
+        )
+
+        total_charges = vat_amount + service_amount + delivery_amount
+        self.payable_amount = self.net_total + total_charges - overall_discount_amount
+        
+        if self.payable_amount < Decimal('0.00'):
+            self.payable_amount = Decimal('0.00')
+
+        self.grand_total = self.payable_amount
+        self.due_amount = max(Decimal('0.00'), self.grand_total - self.paid_amount)
+        self.change_amount = max(Decimal('0.00'), self.paid_amount - self.grand_total)
+
+        self._update_payment_status()
+        return vat_amount, service_amount, delivery_amount
+
     def _calculate_charge(self, amount, charge_type, base_amount):
         """Calculate charge amount based on type (fixed or percent)"""
         if not amount or amount <= 0:
@@ -241,7 +288,7 @@ class Sale(models.Model):
             self.payment_status = 'pending'
 
     def _handle_payment_processing(self, is_new):
-        """If paid_amount > 0, update account and create transaction/receipt."""
+        """If paid_amount > 0, update account and queue the transaction/receipt (sales.jobs)."""
         if self.paid_amount <= 0:
             return
 
@@ -253,10 +300,15 @@ class Sale(models.Model):
             except Exception:
                 logger.exception("Error updating account balance")
 
-        if self.with_money_receipt == 'Yes':
-            self.create_money_receipt()
-        else:
-            self.create_transaction()
+        # Sale.save() runs several times per create: queue once per paid amount.
+        # Without a worker the documents are written now, in the sale's transaction
+        if getattr(self, '_payment_documents_for', None) == self.paid_amount:
+            return
+        self._payment_documents_for = self.paid_amount
+        enqueue(
+            'sales.payment_documents', {'sale_id': self.pk},
+            company_id=self.company_id, dedup_key=f'sale-payment:{self.pk}', in_transaction=True,
+        )
 
     def create_transaction(self):
         """Create transaction for the sale"""
@@ -401,6 +453,8 @@ class SaleItem(models.Model):
     
     # Price fields
     unit_price = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    # Product.average_cost per base unit when the line was sold (NULL: not costed)
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True)
     price_type = models.CharField(
         max_length=10, 
         choices=[
@@ -434,12 +488,37 @@ class SaleItem(models.Model):
         ordering = ['id']
         verbose_name = "Sale Item"
         verbose_name_plural = "Sale Items"
+        indexes = [
+            # Per-product report and audit joins reach the sale without touching the item rows
+            models.Index(fields=['product', 'sale']),
+        ]
     
     def __str__(self):
         if self.sale_mode:
             return f"{self.product.name} - {self.quantity} {self.sale_mode.name}"
         return f"{self.product.name} - {self.quantity} {self.product.unit.name if self.product.unit else 'units'}"
     
+    @staticmethod
+    def cost_expression():
+        """Cost of goods sold of a line, for SUM() over SaleItem rows"""
+        return models.ExpressionWrapper(
+            models.F('base_quantity') * models.F('unit_cost'),
+            output_field=models.DecimalField(max_digits=18, decimal_places=4),
+        )
+
+    @staticmethod
+    def profit_expression():
+        """Gross profit of a line at its stamped cost: base_quantity * (unit_price - unit_cost)"""
+        return models.ExpressionWrapper(
+            models.F('base_quantity') * (models.F('unit_price') - models.F('unit_cost')),
+            output_field=models.DecimalField(max_digits=18, decimal_places=4),
+        )
+
+    def stamp_cost(self):
+        """Record the product's current cost on a new line"""
+        if self.unit_cost is None:
+            self.unit_cost = self.product.current_cost()
+
     @property
     def sale_quantity(self):
         return self.quantity
@@ -488,7 +567,12 @@ class SaleItem(models.Model):
                 self.unit_price = self.product.selling_price
         
         # Validate stock before saving
-        if is_new:
+        if is_new and self.sale.warehouse_id:
+            self.stamp_cost()
+            # Checked and taken from the warehouse row; raises ValidationError when short
+            warehouse_stock.move(self.sale.company_id, self.sale.warehouse_id, {self.product_id: -self.base_quantity})
+        elif is_new:
+            self.stamp_cost()
             base_quantity_decimal = Decimal(str(self.base_quantity))
             product_stock = Decimal(str(self.product.stock_qty))
             
@@ -502,7 +586,7 @@ class SaleItem(models.Model):
         super().save(*args, **kwargs)
         
         # Update product stock if new item
-        if is_new:
+        if is_new and not self.sale.warehouse_id:
             try:
                 self.product.stock_qty -= float(self.base_quantity)
                 self.product.save(update_fields=['stock_qty', 'updated_at'])
@@ -559,10 +643,14 @@ class SaleItem(models.Model):
     
     def delete(self, *args, **kwargs):
         """Override delete to return stock"""
-        # Return stock to product
+        # Return stock to product (or to the warehouse it came from), and to the batches it took
         try:
-            self.product.stock_qty += float(self.base_quantity)
-            self.product.save(update_fields=['stock_qty', 'updated_at'])
+            batches.release([self])
+            if self.sale.warehouse_id:
+                warehouse_stock.move(self.sale.company_id, self.sale.warehouse_id, {self.product_id: self.base_quantity})
+            else:
+                self.product.stock_qty += float(self.base_quantity)
+                self.product.save(update_fields=['stock_qty', 'updated_at'])
         except Exception as e:
             logger.exception(f"Error returning stock for {self.product.name}: {e}")
         
@@ -574,4 +662,19 @@ class SaleItem(models.Model):
         try:
             sale.calculate_totals()
         except Exception:
-            pass
\ No newline at end of file
+            pass
+
+
+class SaleItemBatch(models.Model):
+    """Quantity (base units) of a sale line taken from one stock batch (products.batches.allocate)"""
+    sale_item = models.ForeignKey(SaleItem, on_delete=models.CASCADE, related_name='batch_allocations')
+    batch = models.ForeignKey('products.StockBatch', on_delete=models.CASCADE, related_name='allocations')
+    quantity = models.DecimalField(max_digits=12, decimal_places=3)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Sale Item Batch"
+        verbose_name_plural = "Sale Item Batches"
+
+    def __str__(self):
+        return f"{self.sale_item_id} <- batch {self.batch_id}: {self.quantity}"
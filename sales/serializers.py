@@ -2,9 +2,14 @@
 from rest_framework import serializers
 from .models import Sale, SaleItem
 from products.models import Product, SaleMode, ProductSaleMode
+from products import batches
+from branch_warehouse import stock as warehouse_stock
+from branch_warehouse.models import Warehouse
 from accounts.models import Account
 from customers.models import Customer
 from django.db import transaction
+from core.db import serialized_write
+from core.fieldsets import SparseFieldsetMixin
 from django.contrib.auth import get_user_model
 from decimal import Decimal
 import logging
@@ -13,6 +18,22 @@ User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
+def normalize_discount_type(value):
+    """Normalize discount_type values"""
+    if value is None or value == '':
+        return 'fixed'
+    if not isinstance(value, str):
+        raise serializers.ValidationError('Invalid discount_type.')
+
+    v = value.strip().lower()
+    if v == 'percentage':
+        return 'percent'
+    if v in ('percent', 'fixed'):
+        return v
+
+    raise serializers.ValidationError('Invalid discount_type. Allowed: fixed, percent, percentage')
+
+
 class SaleItemSerializer(serializers.ModelSerializer):
     product_id = serializers.PrimaryKeyRelatedField(
         queryset=Product.objects.all(),
@@ -80,19 +101,7 @@ class SaleItemSerializer(serializers.ModelSerializer):
         ]
 
     def validate_discount_type(self, value):
-        """Normalize discount_type values"""
-        if value is None or value == '':
-            return 'fixed'
-        if not isinstance(value, str):
-            raise serializers.ValidationError('Invalid discount_type.')
-
-        v = value.strip().lower()
-        if v == 'percentage':
-            return 'percent'
-        if v in ('percent', 'fixed'):
-            return v
-
-        raise serializers.ValidationError('Invalid discount_type. Allowed: fixed, percent, percentage')
+        return normalize_discount_type(value)
 
     def validate(self, data):
         """Validate sale item"""
@@ -135,8 +144,8 @@ class SaleItemSerializer(serializers.ModelSerializer):
         else:
             base_quantity = final_quantity
         
-        # Check stock
-        if product and base_quantity > Decimal(str(product.stock_qty)):
+        # Check stock (warehouse sales are checked against the warehouse when the items are saved)
+        if product and not self.context.get('warehouse_sale') and base_quantity > Decimal(str(product.stock_qty)):
             raise serializers.ValidationError({
                 'quantity': f"Insufficient stock. Available: {product.stock_qty} {product.unit.name if product.unit else 'units'}, "
                           f"Requested: {final_quantity} {sale_mode.name if sale_mode else product.unit.name if product.unit else 'units'}"
@@ -176,7 +185,7 @@ class SaleItemSerializer(serializers.ModelSerializer):
         return representation
 
 
-class SaleSerializer(serializers.ModelSerializer):
+class SaleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     # Foreign key fields
     customer_id = serializers.PrimaryKeyRelatedField(
         queryset=Customer.objects.all(),
@@ -200,6 +209,13 @@ class SaleSerializer(serializers.ModelSerializer):
     )
     sale_by_name = serializers.CharField(source='sale_by.username', read_only=True)
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
+    warehouse_id = serializers.PrimaryKeyRelatedField(
+        queryset=Warehouse.objects.filter(is_active=True),
+        source='warehouse',
+        required=False,
+        allow_null=True
+    )
+    warehouse_name = serializers.CharField(source='warehouse.name', read_only=True)
     
     # Sale items
     items = SaleItemSerializer(many=True, write_only=True)
@@ -257,6 +273,7 @@ class SaleSerializer(serializers.ModelSerializer):
             'overall_vat_amount', 'overall_vat_type',
             'payment_method', 'account_id', 'account_name',
             'with_money_receipt', 'remark', 'items', 'payment_status',
+            'warehouse_id', 'warehouse_name',
             # Add the write-only fields that frontend sends
             'vat', 'service_charge', 'delivery_charge'
         ]
@@ -265,6 +282,23 @@ class SaleSerializer(serializers.ModelSerializer):
             'gross_total', 'net_total', 'grand_total', 'payable_amount',
             'due_amount', 'change_amount', 'created_by_name', 'sale_by_name'
         ]
+        # Line items are output by to_representation; lists leave them out unless ?expand=items
+        field_costs = {
+            'items': {'expensive': True},
+        }
+
+    def _default_warehouse_id(self):
+        if not hasattr(self, '_default_warehouse'):
+            request = self.context.get('request')
+            company_id = getattr(getattr(request, 'user', None), 'company_id', None)
+            self._default_warehouse = warehouse_stock.default_warehouse_id(company_id)
+        return self._default_warehouse
+
+    def to_internal_value(self, data):
+        # Read by SaleItemSerializer: stock of warehouse sales is not checked against Product.stock_qty
+        named = hasattr(data, 'get') and data.get('warehouse_id')
+        self.context['warehouse_sale'] = bool(named) or self._default_warehouse_id() is not None
+        return super().to_internal_value(data)
 
     def validate(self, attrs):
         """Validate sale-level data"""
@@ -272,6 +306,11 @@ class SaleSerializer(serializers.ModelSerializer):
         
         if not items:
             raise serializers.ValidationError({'items': 'At least one item is required.'})
+
+        warehouse = attrs.get('warehouse')
+        request = self.context.get('request')
+        if warehouse and request and warehouse.company_id != getattr(request.user, 'company_id', None):
+            raise serializers.ValidationError({'warehouse_id': 'Warehouse not found.'})
         
         # Validate each item
         for i, item in enumerate(items):
@@ -327,23 +366,32 @@ class SaleSerializer(serializers.ModelSerializer):
             if hasattr(request.user, 'company') and request.user.company:
                 validated_data['company'] = request.user.company
 
+        # Sales that name no warehouse sell from the company's default warehouse, if it has one
+        if not validated_data.get('warehouse'):
+            validated_data.pop('warehouse', None)
+            validated_data['warehouse_id'] = self._default_warehouse_id()
+
         # Handle walk-in defaults
         if validated_data.get('customer_type') == 'walk_in':
             validated_data['customer'] = None
             validated_data.setdefault('customer_name', 'Walk-in Customer')
 
         try:
-            with transaction.atomic():
+            with serialized_write():
                 # Create the sale
                 sale = Sale.objects.create(**validated_data)
 
                 # Create items
+                items = []
                 for item_data in items_data:
                     # Handle sale_quantity to quantity conversion
                     if 'sale_quantity' in item_data and 'quantity' not in item_data:
                         item_data['quantity'] = item_data.pop('sale_quantity')
                     
-                    SaleItem.objects.create(sale=sale, **item_data)
+                    items.append(SaleItem.objects.create(sale=sale, **item_data))
+
+                # Consume stock batches first-expiry-first-out, once for the invoice
+                batches.allocate(items)
 
                 # Recalculate totals
                 sale.calculate_totals()
@@ -362,9 +410,11 @@ class SaleSerializer(serializers.ModelSerializer):
         """Return sale representation including item details"""
         rep = super().to_representation(instance)
         
-        # Add item details
-        rep['items'] = SaleItemSerializer(instance.items.all(), many=True).data
-        rep['customer_name'] = instance.get_customer_display()
+        # Add item details (list views leave them out unless ?expand=items)
+        if self.wants('items'):
+            rep['items'] = SaleItemSerializer(instance.items.all(), many=True).data
+        if 'customer_name' in self.fields:
+            rep['customer_name'] = instance.get_customer_display()
 
         # Convert Decimal fields to float
         decimal_fields = [
@@ -377,4 +427,62 @@ class SaleSerializer(serializers.ModelSerializer):
             if field in rep and rep[field] is not None:
                 rep[field] = float(rep[field])
                 
-        return rep
\ No newline at end of file
+        return rep
+
+# -----------------------------
+# Offline POS sync (sales.sync)
+# -----------------------------
+class SaleSyncItemSerializer(serializers.Serializer):
+    """Shape of one synced line: ids are resolved in bulk by sales.sync, not here"""
+    product_id = serializers.IntegerField()
+    sale_mode_id = serializers.IntegerField(required=False, allow_null=True)
+    quantity = serializers.DecimalField(max_digits=12, decimal_places=3, required=False, min_value=Decimal('0.001'))
+    sale_quantity = serializers.DecimalField(max_digits=12, decimal_places=3, required=False, min_value=Decimal('0.001'))
+    unit_price = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, allow_null=True)
+    flat_price = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, allow_null=True)
+    discount = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, default=Decimal('0.00'))
+    discount_type = serializers.CharField(required=False, default='fixed')
+
+    def validate_discount_type(self, value):
+        return normalize_discount_type(value)
+
+    def validate(self, data):
+        sale_quantity = data.pop('sale_quantity', None)
+        if sale_quantity is not None:
+            data['quantity'] = sale_quantity
+        data.setdefault('quantity', Decimal('1.00'))
+        return data
+
+
+class SaleSyncSerializer(serializers.Serializer):
+    """One sale recorded offline by a till, identified by its idempotency key"""
+    CHARGE_TYPES = (('fixed', 'Fixed'), ('percent', 'Percent'))
+
+    key = serializers.CharField(max_length=100)
+    sale_date = serializers.DateTimeField(required=False)
+    customer_type = serializers.ChoiceField(choices=Sale.CUSTOMER_TYPE_CHOICES, default='walk_in')
+    customer_id = serializers.IntegerField(required=False, allow_null=True)
+    customer_name = serializers.CharField(max_length=100, required=False, allow_blank=True, allow_null=True)
+    sale_type = serializers.ChoiceField(choices=Sale.SALE_TYPE_CHOICES, default='retail')
+    sale_by = serializers.IntegerField(required=False, allow_null=True)
+    paid_amount = serializers.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), min_value=Decimal('0.00'))
+    payment_method = serializers.CharField(max_length=100, required=False, allow_blank=True, allow_null=True)
+    account_id = serializers.IntegerField(required=False, allow_null=True)
+    warehouse_id = serializers.IntegerField(required=False, allow_null=True)
+    with_money_receipt = serializers.ChoiceField(choices=Sale.MONEY_RECEIPT_CHOICES, default='No')
+    remark = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    overall_discount = serializers.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), min_value=Decimal('0.00'))
+    overall_discount_type = serializers.ChoiceField(choices=CHARGE_TYPES, required=False, allow_null=True)
+    overall_delivery_type = serializers.ChoiceField(choices=CHARGE_TYPES, required=False, allow_null=True)
+    overall_service_type = serializers.ChoiceField(choices=CHARGE_TYPES, required=False, allow_null=True)
+    overall_vat_type = serializers.ChoiceField(choices=CHARGE_TYPES, required=False, allow_null=True)
+    # Same names as SaleSerializer: mapped to the overall_* amounts
+    vat = serializers.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), min_value=Decimal('0.00'))
+    service_charge = serializers.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), min_value=Decimal('0.00'))
+    delivery_charge = serializers.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), min_value=Decimal('0.00'))
+    items = SaleSyncItemSerializer(many=True, allow_empty=False)
+
+    def validate(self, attrs):
+        if attrs['customer_type'] == 'saved_customer' and not attrs.get('customer_id'):
+            raise serializers.ValidationError({'customer_id': 'Saved customer sales need a customer.'})
+        return attrs
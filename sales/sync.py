@@ -0,0 +1,351 @@
+# sales/sync.py
+"""
+Batch ingest of sales recorded by offline POS tills.
+
+    POST /api/sales/sync/
+    {"sales": [{"key": "till-3-000124", "sale_date": "...", "paid_amount": 250,
+                "items": [{"product_id": 7, "quantity": 2}, ...]}, ...]}
+
+Every sale carries a client-generated idempotency ``key``. Keys already
+applied (``core.IdempotencyKey``, scope ``sales.sync``) answer ``duplicate``
+with the original invoice, so a till that timed out can replay its whole
+backlog. Products, sale modes, prices, customers, accounts and sellers are
+resolved for the whole batch up front; sales then commit in groups of
+``SALES_SYNC_GROUP_SIZE``, each in its own savepoint so one rejected sale
+does not fail the others. Items are bulk inserted and stock is written
+once per product per group, so SaleItem.save() and its per-item signals do
+not run; invoice numbers, totals and payment processing still go through
+Sale.save(). Stock and price rules are the ones SaleSerializer applies, and
+each sale consumes stock batches FEFO (products.batches.allocate). Sales of
+a warehouse (named, or the company's default) take their stock from the
+warehouse rows instead (branch_warehouse.stock.move).
+"""
+import logging
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from branch_warehouse import stock as warehouse_stock
+from closing.balances import latest_close
+from closing.guards import closed_message, covers
+from core.db import serialized_write
+from core.models import IdempotencyKey
+from products import batches
+from sales.models import Sale, SaleItem
+from sales.serializers import SaleSyncSerializer
+
+logger = logging.getLogger(__name__)
+
+SCOPE = 'sales.sync'
+CREATED = 'created'
+DUPLICATE = 'duplicate'
+REJECTED = 'rejected'
+FAILED = 'failed'
+
+
+class SyncRejected(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class SaleSync:
+    """Ingest one batch of synced sales for ``user``'s company"""
+
+    def __init__(self, user, group_size=None):
+        self.user = user
+        self.company = user.company
+        self.group_size = group_size or getattr(settings, 'SALES_SYNC_GROUP_SIZE', 50)
+
+    def run(self, rows):
+        """Per-sale results, in input order: {'key', 'status', 'id'/'invoice_no' or 'errors'}"""
+        results = [None] * len(rows)
+        pending, first_index = [], {}
+
+        valid = []
+        for index, row in enumerate(rows):
+            serializer = SaleSyncSerializer(data=row if isinstance(row, dict) else {})
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                key = row.get('key') if isinstance(row, dict) else None
+                results[index] = {'key': key, 'status': REJECTED, 'errors': serializer.errors}
+
+        applied = IdempotencyKey.lookup(self.company.pk, SCOPE, [data['key'] for _, data in valid])
+        for index, data in valid:
+            key = data['key']
+            if key in applied:
+                results[index] = {'key': key, 'status': DUPLICATE, **applied[key].result}
+            elif key in first_index:
+                # Same key twice in one batch: answered from the first occurrence below
+                results[index] = {'key': key, 'status': DUPLICATE, 'of': first_index[key]}
+            else:
+                first_index[key] = index
+                pending.append((index, data))
+
+        self._resolve(data for _, data in pending)
+        planned = []
+        for index, data in pending:
+            try:
+                planned.append((index, data, self._plan(data)))
+            except SyncRejected as e:
+                results[index] = {'key': data['key'], 'status': REJECTED, 'errors': e.errors}
+
+        for start in range(0, len(planned), self.group_size):
+            self._commit_group(planned[start:start + self.group_size], results)
+
+        for index, result in enumerate(results):
+            if result['status'] == DUPLICATE and 'of' in result:
+                original = results[result.pop('of')]
+                results[index] = {**original, 'status': DUPLICATE} if original['status'] in (CREATED, DUPLICATE) else {
+                    'key': result['key'], 'status': original['status'], 'errors': original.get('errors'),
+                }
+        return results
+
+    # --------------------------
+    # Bulk resolution
+    # --------------------------
+    def _resolve(self, sales):
+        from accounts.models import Account
+        from branch_warehouse.models import Warehouse
+        from customers.models import Customer
+        from products.models import Product, ProductSaleMode, SaleMode
+
+        sales = list(sales)
+        items = [item for data in sales for item in data['items']]
+        product_ids = {item['product_id'] for item in items}
+        mode_ids = {item['sale_mode_id'] for item in items if item.get('sale_mode_id')}
+
+        self.products = Product.objects.filter(company=self.company).select_related('unit').in_bulk(product_ids)
+        self.sale_modes = SaleMode.objects.filter(
+            Q(company=self.company) | Q(company__isnull=True)
+        ).in_bulk(mode_ids)
+
+        # Default mode of a unit: SaleItemSerializer takes the first by name
+        self.default_modes = {}
+        unit_ids = {product.unit_id for product in self.products.values() if product.unit_id}
+        for mode in SaleMode.objects.filter(base_unit_id__in=unit_ids, conversion_factor=Decimal('1.00'), price_type='unit'):
+            self.default_modes.setdefault(mode.base_unit_id, mode)
+
+        self.product_sale_modes = {
+            (psm.product_id, psm.sale_mode_id): psm
+            for psm in ProductSaleMode.objects.filter(product_id__in=list(self.products), is_active=True)
+            .select_related('sale_mode').prefetch_related('tiers')
+        }
+        self.customers = Customer.objects.filter(company=self.company).in_bulk(
+            {data['customer_id'] for data in sales if data.get('customer_id')}
+        )
+        self.accounts = Account.objects.filter(company=self.company).in_bulk(
+            {data['account_id'] for data in sales if data.get('account_id')}
+        )
+        self.sellers = get_user_model().objects.filter(company=self.company).in_bulk(
+            {data['sale_by'] for data in sales if data.get('sale_by')}
+        )
+        self.warehouses = Warehouse.objects.filter(company=self.company, is_active=True).in_bulk(
+            {data['warehouse_id'] for data in sales if data.get('warehouse_id')}
+        )
+        self.default_warehouse_id = warehouse_stock.default_warehouse_id(self.company.pk) if sales else None
+        # sale_date is written with update(), past the closing.guards signals
+        self.close = latest_close(self.company) if sales else None
+
+    def _plan(self, data):
+        """Unsaved Sale and SaleItems for one synced sale"""
+        errors = {}
+        customer = account = seller = None
+        warehouse_id = self.default_warehouse_id
+        if data['customer_type'] == 'saved_customer':
+            customer = self.customers.get(data['customer_id'])
+            if customer is None:
+                errors['customer_id'] = f"Customer {data['customer_id']} not found"
+        if data.get('account_id'):
+            account = self.accounts.get(data['account_id'])
+            if account is None:
+                errors['account_id'] = f"Account {data['account_id']} not found"
+        if data.get('sale_by'):
+            seller = self.sellers.get(data['sale_by'])
+            if seller is None:
+                errors['sale_by'] = f"User {data['sale_by']} not found"
+        if data.get('warehouse_id'):
+            warehouse_id = data['warehouse_id']
+            if warehouse_id not in self.warehouses:
+                errors['warehouse_id'] = f"Warehouse {warehouse_id} not found"
+        if covers(self.close, data.get('sale_date')):
+            errors['sale_date'] = closed_message(self.close)
+
+        items = []
+        for number, item in enumerate(data['items'], start=1):
+            try:
+                items.append(self._plan_item(item))
+            except SyncRejected as e:
+                errors[f'items[{number}]'] = e.errors
+        if errors:
+            raise SyncRejected(errors)
+
+        sale = Sale(
+            company=self.company,
+            created_by=self.user,
+            sale_by=seller or self.user,
+            customer=customer,
+            customer_type=data['customer_type'],
+            customer_name=data.get('customer_name') or ('Walk-in Customer' if data['customer_type'] == 'walk_in' else None),
+            sale_type=data['sale_type'],
+            paid_amount=data['paid_amount'],
+            payment_method=data.get('payment_method'),
+            account=account,
+            warehouse_id=warehouse_id,
+            with_money_receipt=data['with_money_receipt'],
+            remark=data.get('remark'),
+            overall_discount=data['overall_discount'],
+            overall_discount_type=data.get('overall_discount_type'),
+            overall_delivery_type=data.get('overall_delivery_type'),
+            overall_service_type=data.get('overall_service_type'),
+            overall_vat_type=data.get('overall_vat_type'),
+            overall_vat_amount=data['vat'],
+            overall_service_charge=data['service_charge'],
+            overall_delivery_charge=data['delivery_charge'],
+        )
+        return sale, items
+
+    def _plan_item(self, data):
+        product = self.products.get(data['product_id'])
+        if product is None:
+            raise SyncRejected(f"Product {data['product_id']} not found")
+
+        if data.get('sale_mode_id'):
+            sale_mode = self.sale_modes.get(data['sale_mode_id'])
+            if sale_mode is None:
+                raise SyncRejected(f"Sale mode {data['sale_mode_id']} not found")
+        else:
+            sale_mode = self.default_modes.get(product.unit_id)
+
+        quantity = data['quantity']
+        base_quantity = sale_mode.convert_to_base(quantity) if sale_mode else quantity
+        unit_price, flat_price = data.get('unit_price'), data.get('flat_price')
+
+        if not unit_price:
+            product_sale_mode = self.product_sale_modes.get((product.pk, sale_mode.pk)) if sale_mode else None
+            if product_sale_mode is None:
+                unit_price = product.selling_price
+            elif sale_mode.price_type == 'flat' and product_sale_mode.flat_price:
+                flat_price = product_sale_mode.flat_price
+                unit_price = product_sale_mode.flat_price / quantity
+            elif sale_mode.price_type == 'tier':
+                unit_price = product_sale_mode.get_tier_price(base_quantity)
+            else:
+                unit_price = product_sale_mode.get_unit_price()
+
+        item = SaleItem(
+            product=product,
+            sale_mode=sale_mode,
+            quantity=quantity,
+            base_quantity=base_quantity,
+            price_type=sale_mode.price_type if sale_mode else 'normal',
+            unit_price=Decimal(str(unit_price or 0)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            flat_price=flat_price,
+            discount=data['discount'],
+            discount_type=data['discount_type'],
+        )
+        item.stamp_cost()
+        return item
+
+    # --------------------------
+    # Writing
+    # --------------------------
+    def _commit_group(self, planned, results):
+        from products.models import Product
+
+        # Warehouse sales lock their warehouse rows instead (in _create)
+        product_ids = {
+            item.product_id for _, _, (sale, items) in planned if not sale.warehouse_id for item in items
+        }
+        group_results = {}
+        try:
+            with serialized_write():
+                locked = dict(
+                    Product.objects.select_for_update().filter(pk__in=product_ids).values_list('pk', 'stock_qty')
+                )
+                stock = dict(locked)
+                for index, data, (sale, items) in planned:
+                    group_results[index] = self._create(data, sale, items, stock)
+
+                now = timezone.now()
+                Product.objects.bulk_update(
+                    [Product(pk=pk, stock_qty=qty, updated_at=now) for pk, qty in stock.items() if qty != locked[pk]],
+                    ['stock_qty', 'updated_at'],
+                )
+        except Exception as e:
+            logger.exception(f"POS sync group failed for company {self.company.pk}")
+            for index, data, (sale, _) in planned:
+                self._discard(sale)
+                results[index] = {'key': data['key'], 'status': FAILED, 'errors': str(e)}
+            return
+
+        for index, result in group_results.items():
+            results[index] = result
+
+    def _create(self, data, sale, items, stock):
+        """One sale in its own savepoint; ``stock`` is only changed when it commits"""
+        key = data['key']
+        available = dict(stock)
+        # Warehouse sales are checked against their warehouse rows by move()
+        checked = () if sale.warehouse_id else items
+        try:
+            for item in checked:
+                on_hand = available[item.product_id]
+                if Decimal(str(item.base_quantity)) > Decimal(str(on_hand)):
+                    raise SyncRejected({'stock': (
+                        f"Insufficient stock for {item.product.name}. "
+                        f"Available: {on_hand}, Requested: {item.quantity}"
+                    )})
+                # Same rounding as SaleItem.save() storing stock_qty - base_quantity
+                available[item.product_id] = on_hand + warehouse_stock.stock_units(-item.base_quantity)
+
+            with transaction.atomic():
+                if sale.warehouse_id:
+                    deltas = {}
+                    for item in items:
+                        deltas[item.product_id] = deltas.get(item.product_id, 0) - Decimal(str(item.base_quantity))
+                    warehouse_stock.move(self.company.pk, sale.warehouse_id, deltas)
+                # Sale.save() computes its totals from these in-memory items
+                sale._prefetched_objects_cache = {'items': items}
+                sale.save()
+                for item in items:
+                    item.sale = sale
+                SaleItem.objects.bulk_create(items)
+                batches.allocate(items)
+                if data.get('sale_date'):
+                    Sale.objects.filter(pk=sale.pk).update(sale_date=data['sale_date'])
+                result = {'id': sale.pk, 'invoice_no': sale.invoice_no}
+                IdempotencyKey.objects.create(
+                    company=self.company, scope=SCOPE, key=key, object_id=sale.pk, result=result,
+                )
+        except SyncRejected as e:
+            return {'key': key, 'status': REJECTED, 'errors': e.errors}
+        except ValidationError as e:
+            self._discard(sale)
+            return {'key': key, 'status': REJECTED, 'errors': {'stock': e.messages}}
+        except IntegrityError:
+            self._discard(sale)
+            # Another request applied the same key first
+            applied = IdempotencyKey.lookup(self.company.pk, SCOPE, [key]).get(key)
+            if applied is not None:
+                return {'key': key, 'status': DUPLICATE, **applied.result}
+            logger.exception(f"POS sync sale {key} failed")
+            return {'key': key, 'status': REJECTED, 'errors': 'Could not save sale'}
+        except Exception as e:
+            self._discard(sale)
+            logger.exception(f"POS sync sale {key} failed")
+            return {'key': key, 'status': REJECTED, 'errors': str(e)}
+
+        stock.update(available)
+        return {'key': key, 'status': CREATED, **result}
+
+    def _discard(self, sale):
+        """Undo in-memory effects of a rolled back Sale.save() on the shared account instance"""
+        if sale.account_id:
+            sale.account.refresh_from_db(fields=['balance'])
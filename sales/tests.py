@@ -0,0 +1,73 @@
+# sales/tests.py
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.models import Company, IdempotencyKey, User
+from products.models import Product
+from sales.models import Sale
+from sales.sync import CREATED, DUPLICATE, REJECTED, SCOPE, SaleSync
+
+
+class SaleSyncIdempotencyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(name='Till Co')
+        cls.user = User.objects.create_user(username='till', password='x', company=cls.company)
+        cls.product = Product.objects.create(
+            company=cls.company, name='Tea', selling_price=Decimal('25.00'), stock_qty=50,
+        )
+
+    def sync(self, *rows):
+        return SaleSync(self.user).run(list(rows))
+
+    def sale(self, key, quantity=2, **fields):
+        return {'key': key, 'items': [{'product_id': self.product.pk, 'quantity': quantity}], **fields}
+
+    def stock(self):
+        self.product.refresh_from_db(fields=['stock_qty'])
+        return self.product.stock_qty
+
+    def test_replayed_key_answers_the_original_sale(self):
+        [first] = self.sync(self.sale('till-1-0001'))
+        [replay] = self.sync(self.sale('till-1-0001', quantity=5))
+
+        self.assertEqual(first['status'], CREATED)
+        self.assertEqual(replay['status'], DUPLICATE)
+        self.assertEqual((replay['id'], replay['invoice_no']), (first['id'], first['invoice_no']))
+        self.assertEqual(Sale.objects.filter(company=self.company).count(), 1)
+        self.assertEqual(self.stock(), 48)
+        self.assertEqual(IdempotencyKey.objects.filter(company=self.company, scope=SCOPE).count(), 1)
+
+    def test_same_key_twice_in_one_batch_is_applied_once(self):
+        first, second = self.sync(self.sale('till-1-0002'), self.sale('till-1-0002'))
+
+        self.assertEqual(first['status'], CREATED)
+        self.assertEqual(second['status'], DUPLICATE)
+        self.assertEqual(second['id'], first['id'])
+        self.assertEqual(self.stock(), 48)
+
+    def test_rejected_sale_does_not_fail_the_batch_and_can_be_retried(self):
+        ok, short = self.sync(self.sale('till-1-0003'), self.sale('till-1-0004', quantity=100))
+
+        self.assertEqual(ok['status'], CREATED)
+        self.assertEqual(short['status'], REJECTED)
+        self.assertIn('stock', short['errors'])
+        self.assertEqual(self.stock(), 48)
+
+        # A rejected key was never applied, so the corrected sale goes through
+        [retry] = self.sync(self.sale('till-1-0004', quantity=3))
+        self.assertEqual(retry['status'], CREATED)
+        self.assertEqual(self.stock(), 45)
+
+    def test_sync_endpoint_replay(self):
+        self.client.force_login(self.user)
+        payload = {'sales': [self.sale('till-1-0005')]}
+
+        first = self.client.post('/api/sales/sync/', payload, content_type='application/json')
+        replay = self.client.post('/api/sales/sync/', payload, content_type='application/json')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay.json()['data']['results'][0]['status'], DUPLICATE)
+        self.assertEqual(Sale.objects.filter(company=self.company).count(), 1)
@@ -7,6 +7,7 @@ from rest_framework.response import Response
 from django.db import models
 from django.db.models import Q, F, Sum, Value, Count
 from django.db.models.functions import Coalesce
+from django.conf import settings
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -15,6 +16,7 @@ import logging
 from core.utils import custom_response
 from core.pagination import CustomPageNumberPagination    
 from core.base_viewsets import BaseCompanyViewSet
+from core.fieldsets import SparseFieldsetViewMixin
 from sales.models import Sale, SaleItem
 from .serializers import SaleSerializer, SaleItemSerializer
 from customers.models import Customer
@@ -61,14 +63,14 @@ def get_due_sales(request):
             queryset = queryset.filter(due_amount__gt=0)
         
         # Order by sale date
-        queryset = queryset.order_by('sale_date')
+        queryset = queryset.with_items().order_by('sale_date')
         
-        serializer = SaleSerializer(queryset, many=True)
+        data = SaleSerializer(queryset, many=True).data
         
         return Response({
             "status": True,
-            "message": f"Found {queryset.count()} due sales for {customer.name}",
-            "data": serializer.data
+            "message": f"Found {len(data)} due sales for {customer.name}",
+            "data": data
         })
         
     except Exception as e:
@@ -83,16 +85,36 @@ def get_due_sales(request):
 # -----------------------------
 # Sale ViewSet
 # -----------------------------
-class SaleViewSet(BaseCompanyViewSet):
+class SaleQueryPlanMixin(SparseFieldsetViewMixin):
+    """
+    List actions return sale headers only (one query per page); detail views
+    and lists requested with ?expand=items add line items through a fixed
+    prefetch plan (see SaleQuerySet). ?fields= narrows the serialized output.
+    """
+    list_actions = ('list',)
+
+    def expand_items(self):
+        return self.get_field_selection().includes('items', expensive=True)
+
+    def apply_query_plan(self, queryset):
+        if self.expand_items():
+            return queryset.with_items()
+        return queryset.summary()
+
+
+class SaleViewSet(SaleQueryPlanMixin, BaseCompanyViewSet):
     queryset = Sale.objects.all()
     serializer_class = SaleSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = CustomPageNumberPagination
+    list_actions = ('list', 'due_sales', 'today_sales')
+    # Reads only: auth lookups + count + page (+ items prefetch when expanded)
+    query_budget = {'get': 8}
 
     def get_queryset(self):
         queryset = super().get_queryset()
         queryset = self.apply_filters(queryset)
-        return queryset
+        return self.apply_query_plan(queryset)
 
     def apply_filters(self, queryset):
         """Apply comprehensive filtering to sales queryset"""
@@ -291,11 +313,12 @@ class SaleViewSet(BaseCompanyViewSet):
                 return self.get_paginated_response(serializer.data)
             
             serializer = self.get_serializer(queryset, many=True)
+            data = serializer.data
             
             return custom_response(
                 success=True,
-                message=f"Found {queryset.count()} sales",
-                data=serializer.data,
+                message=f"Found {len(data)} sales",
+                data=data,
                 status_code=status.HTTP_200_OK
             )
             
@@ -362,6 +385,48 @@ class SaleViewSet(BaseCompanyViewSet):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['post'], url_path='sync')
+    def sync(self, request):
+        """Batch ingest of sales queued by offline POS tills (see sales.sync)"""
+        from sales.sync import SaleSync, CREATED, DUPLICATE
+
+        rows = request.data.get('sales') if isinstance(request.data, dict) else None
+        max_batch = getattr(settings, 'SALES_SYNC_MAX_BATCH', 500)
+        if not isinstance(rows, list) or not rows:
+            return custom_response(
+                success=False,
+                message="'sales' must be a non-empty list",
+                data=None,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if len(rows) > max_batch:
+            return custom_response(
+                success=False,
+                message=f"At most {max_batch} sales per request",
+                data=None,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        if not getattr(request.user, 'company', None):
+            return custom_response(
+                success=False,
+                message="User does not have an associated company",
+                data=None,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = SaleSync(request.user).run(rows)
+        counts = {}
+        for result in results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+        synced = counts.get(CREATED, 0) + counts.get(DUPLICATE, 0)
+
+        return custom_response(
+            success=synced == len(results),
+            message=f"Synced {synced} of {len(results)} sales",
+            data={'counts': counts, 'results': results},
+            status_code=status.HTTP_200_OK
+        )
+
     @action(detail=True, methods=['post'])
     def add_payment(self, request, pk=None):
         """Add payment to existing sale"""
@@ -471,16 +536,17 @@ class SaleItemViewSet(BaseCompanyViewSet):
 # -----------------------------
 # SaleAllListViewSet
 # -----------------------------
-class SaleAllListViewSet(BaseCompanyViewSet):
+class SaleAllListViewSet(SaleQueryPlanMixin, BaseCompanyViewSet):
     queryset = Sale.objects.all()
     serializer_class = SaleSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = None
+    query_budget = {'get': 6}
 
     def get_queryset(self):
         queryset = super().get_queryset()
         queryset = self.apply_filters(queryset)
-        return queryset
+        return self.apply_query_plan(queryset)
 
     def apply_filters(self, queryset):
         """Apply filtering to sales queryset"""
@@ -580,11 +646,12 @@ class SaleAllListViewSet(BaseCompanyViewSet):
         try:
             queryset = self.filter_queryset(self.get_queryset())
             serializer = self.get_serializer(queryset, many=True)
+            data = serializer.data
         
             return custom_response(
                 success=True,
-                message=f"Found {queryset.count()} sales",
-                data=serializer.data,
+                message=f"Found {len(data)} sales",
+                data=data,
                 status_code=status.HTTP_200_OK
             )
 
@@ -303,13 +303,10 @@ class SupplierPayment(models.Model):
         """Process advance payment to supplier"""
         logger.info(f"💰 Processing ADVANCE payment: {self.amount}")
         
-        # Refresh supplier to get latest data
-        self.supplier.refresh_from_db()
         old_advance = self.supplier.advance_balance
         
         # Increase supplier's advance balance
-        self.supplier.advance_balance += self.amount
-        self.supplier.save(update_fields=['advance_balance', 'updated_at'])
+        self.supplier.adjust_advance_balance(self.amount)
         
         logger.info(f"SUCCESS: Advance balance updated: {old_advance} -> {self.supplier.advance_balance}")
         
@@ -347,9 +344,7 @@ class SupplierPayment(models.Model):
                 raise ValueError(f"Advance balance insufficient: {advance_used} > {self.supplier.advance_balance}")
             
             # Use advance for payment
-            old_advance = self.supplier.advance_balance
-            self.supplier.advance_balance -= advance_used
-            self.supplier.save(update_fields=['advance_balance', 'updated_at'])
+            self.supplier.adjust_advance_balance(-advance_used)
             logger.info(f"💰 Advance used: {advance_used}, New balance: {self.supplier.advance_balance}")
             
             # Apply advance to purchase
@@ -420,8 +415,7 @@ class SupplierPayment(models.Model):
             logger.info(f"🎁 Converting remaining amount {remaining_total} to advance")
             
             old_advance = self.supplier.advance_balance
-            self.supplier.advance_balance += remaining_total
-            self.supplier.save(update_fields=['advance_balance', 'updated_at'])
+            self.supplier.adjust_advance_balance(remaining_total)
             
             logger.info(f"SUCCESS: Added remaining to advance: {remaining_total}, Balance: {old_advance} -> {self.supplier.advance_balance}")
 
@@ -453,8 +447,7 @@ class SupplierPayment(models.Model):
         actual_used = advance_amount - remaining
         if actual_used > 0:
             old_advance = self.supplier.advance_balance
-            self.supplier.advance_balance -= actual_used
-            self.supplier.save(update_fields=['advance_balance', 'updated_at'])
+            self.supplier.adjust_advance_balance(-actual_used)
             logger.info(f"💰 Advance used: {actual_used}, Balance: {old_advance} -> {self.supplier.advance_balance}")
         
         return remaining
@@ -560,8 +553,7 @@ class SupplierPayment(models.Model):
         """Reverse advance payment effects"""
         # Decrease supplier advance balance (reverse the increase)
         old_advance = self.supplier.advance_balance
-        self.supplier.advance_balance -= self.amount
-        self.supplier.save(update_fields=['advance_balance', 'updated_at'])
+        self.supplier.adjust_advance_balance(-self.amount)
         
         # Increase account balance if account was used (reverse the decrease)
         if self.account:
@@ -0,0 +1,4 @@
+# supplier_payment/models.py
+# The model lives in model.py; Django's app loading imports <app>.models,
+# so re-export it here to register SupplierPayment independently of other apps.
+from .model import SupplierPayment  # noqa: F401
@@ -1,49 +1,56 @@
-# management/commands/fix_supplier_totals.py
-from django.core.management.base import BaseCommand
+# suppliers/management/commands/update_all_supplier_totals.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Company
 from suppliers.models import Supplier
-from purchases.models import Purchase
-from decimal import Decimal
+
 
 class Command(BaseCommand):
-    help = 'Fix all supplier purchase totals with detailed calculation'
-    
+    help = (
+        'Recompute supplier purchase totals from purchases with one set-based UPDATE per company; '
+        '--dry-run only reports suppliers whose stored totals have drifted'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=str, help='Company id or code (default: all companies)')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without updating anything')
+        parser.add_argument('--limit', type=int, default=50, help='Drifted suppliers to list per company')
+
     def handle(self, *args, **options):
-        self.stdout.write("🔄 Fixing ALL supplier purchase totals...")
-        
-        suppliers = Supplier.objects.all()
-        
-        for supplier in suppliers:
-            self.stdout.write(f"\n📊 Processing: {supplier.name} (ID: {supplier.id})")
-            
-            # Get all purchases for this supplier
-            purchases = Purchase.objects.filter(supplier_id=supplier.id)
-            self.stdout.write(f"   Found {purchases.count()} purchases")
-            
-            # Manual calculation
-            total_purchases = Decimal('0')
-            total_paid = Decimal('0')
-            
-            for purchase in purchases:
-                self.stdout.write(f"   Purchase {purchase.id}: {purchase.invoice_no} - "
-                                f"Total: {purchase.grand_total}, Paid: {purchase.paid_amount}")
-                total_purchases += purchase.grand_total
-                total_paid += purchase.paid_amount
-            
-            purchase_count = purchases.count()
-            total_due = total_purchases - total_paid
-            
-            # Update supplier
-            supplier.total_purchases = total_purchases
-            supplier.total_paid = total_paid
-            supplier.total_due = total_due
-            supplier.purchase_count = purchase_count
-            
-            supplier.save(update_fields=[
-                'total_purchases', 'total_paid', 'total_due', 'purchase_count'
-            ])
-            
-            self.stdout.write(
-                self.style.SUCCESS(f"   SUCCESS: Fixed: Purchases=${total_purchases}, Due=${total_due}, Count={purchase_count}")
+        companies = self._get_companies(options['company'])
+        total_drifted = 0
+
+        for company in companies:
+            report = Supplier.drift_report(company=company)
+            total_drifted += len(report)
+            self._print_report(company, report, options['limit'])
+
+            if report and not options['dry_run']:
+                with transaction.atomic():
+                    Supplier.recalculate_all_supplier_totals(company=company)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Dry run: {total_drifted} supplier(s) drifted, nothing updated'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Recalculated totals; {total_drifted} supplier(s) were drifted'))
+
+    def _get_companies(self, value):
+        if value:
+            lookup = {'pk': int(value)} if value.isdigit() else {'company_code': value}
+            try:
+                return [Company.objects.get(**lookup)]
+            except Company.DoesNotExist:
+                raise CommandError(f'Company {value} not found')
+        return Company.objects.filter(suppliers__isnull=False).distinct().order_by('id')
+
+    def _print_report(self, company, report, limit):
+        self.stdout.write(f'{company.name}: {len(report)} drifted supplier(s)')
+        for row in report[:limit]:
+            supplier = row['supplier']
+            changes = ', '.join(
+                f'{name} {stored} -> {actual}' for name, (stored, actual) in row['fields'].items()
             )
-        
-        self.stdout.write(self.style.SUCCESS("\n🎉 All suppliers fixed successfully!"))
\ No newline at end of file
+            self.stdout.write(f'  {supplier.supplier_no or supplier.pk} {supplier.name}: {changes}')
+        if len(report) > limit:
+            self.stdout.write(f'  ... and {len(report) - limit} more')
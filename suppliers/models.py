@@ -1,7 +1,8 @@
 # suppliers/models.py
 from django.db import models
-from django.db.models import Sum, Count
-from django.db.models.functions import Coalesce
+from django.db.models import Sum, Count, F, Q, Value, OuterRef, Subquery, DecimalField, IntegerField
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
 from core.models import Company
 from django.conf import settings
 from django.core.exceptions import ValidationError
@@ -73,16 +74,25 @@ class Supplier(models.Model):
     def update_purchase_totals(self):
         """Update purchase statistics - FIXED VERSION"""
         try:
+            from closing.balances import after_close, latest_close, snapshot_for
+            from closing.models import SupplierSnapshot
             from purchases.models import Purchase
             
-            aggregates = Purchase.objects.filter(
+            # Purchases covered by the latest period close come from its snapshot
+            close = latest_close(self.company)
+            snapshot = snapshot_for(close, SupplierSnapshot, supplier=self)
+            aggregates = after_close(Purchase.objects.filter(
                 supplier=self,
                 company=self.company
-            ).aggregate(
+            ), close, 'purchase_date', 'purchase').aggregate(
                 total_purchases=Coalesce(Sum('grand_total'), Decimal('0.00')),
                 total_paid=Coalesce(Sum('paid_amount'), Decimal('0.00')),
                 purchase_count=Coalesce(Count('id'), 0)
             )
+            if snapshot:
+                aggregates['total_purchases'] += snapshot.purchases_total
+                aggregates['total_paid'] += snapshot.purchases_paid
+                aggregates['purchase_count'] += snapshot.purchases_count
             
             # Convert None to 0 and ensure Decimal values
             self.total_purchases = aggregates['total_purchases'] or Decimal('0.00')
@@ -106,21 +116,120 @@ class Supplier(models.Model):
             logger.error(f"ERROR:Error updating supplier totals for {self.name}: {e}")
             return False
         
+    # -----------------------------
+    # Incremental totals
+    # -----------------------------
+    @classmethod
+    def apply_purchase_delta(cls, supplier_id, total=Decimal('0.00'), paid=Decimal('0.00'), count=0):
+        """
+        Shift the stored purchase totals by a delta in one UPDATE, without
+        reading other purchases. Called from suppliers.signals on purchase
+        create/update/delete; update_purchase_totals() remains the full recompute.
+        """
+        if not supplier_id or (not total and not paid and not count):
+            return 0
+        return cls.objects.filter(pk=supplier_id).update(
+            total_purchases=F('total_purchases') + total,
+            total_paid=F('total_paid') + paid,
+            total_due=Greatest(
+                F('total_purchases') + total - F('total_paid') - paid,
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            ),
+            purchase_count=F('purchase_count') + count,
+            updated_at=timezone.now(),
+        )
+
+    def adjust_advance_balance(self, delta):
+        """Add (or with a negative delta, use) advance in one UPDATE and refresh the instance"""
+        Supplier.objects.filter(pk=self.pk).update(
+            advance_balance=F('advance_balance') + delta,
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=['advance_balance', 'updated_at'])
+        return self.advance_balance
+
+    # -----------------------------
+    # Set-based recalculation
+    # -----------------------------
+    @classmethod
+    def actual_totals(cls):
+        """
+        Expressions recomputing each supplier's totals from its purchases
+        (correlated subqueries), starting from the latest period close snapshot
+        """
+        from closing.balances import snapshot_value, uncovered
+        from closing.models import SupplierSnapshot
+        from purchases.models import Purchase
+
+        purchases = Purchase.objects.filter(
+            supplier=OuterRef('pk'), company=OuterRef('company')
+        ).filter(uncovered(Purchase, 'purchase_date', open_type='purchase')).order_by().values('supplier')
+        money = DecimalField(max_digits=15, decimal_places=2)
+
+        def total(expression, output_field):
+            return Subquery(purchases.annotate(value=expression).values('value'), output_field=output_field)
+
+        def snapshot(field, output_field, zero):
+            return Coalesce(snapshot_value(SupplierSnapshot, 'supplier', field, output_field), zero, output_field=output_field)
+
+        total_purchases = (
+            snapshot('purchases_total', money, Value(Decimal('0.00')))
+            + Coalesce(total(Sum('grand_total'), money), Value(Decimal('0.00')), output_field=money)
+        )
+        total_paid = (
+            snapshot('purchases_paid', money, Value(Decimal('0.00')))
+            + Coalesce(total(Sum('paid_amount'), money), Value(Decimal('0.00')), output_field=money)
+        )
+        return {
+            'total_purchases': total_purchases,
+            'total_paid': total_paid,
+            'total_due': Greatest(total_purchases - total_paid, Value(Decimal('0.00')), output_field=money),
+            'purchase_count': snapshot('purchases_count', IntegerField(), Value(0))
+                              + Coalesce(total(Count('id'), IntegerField()), Value(0)),
+        }
+
+    @classmethod
+    def drift_report(cls, company=None):
+        """
+        Suppliers whose stored totals differ from their purchases, from a
+        single annotated query: [{'supplier': <Supplier>, 'fields': {name: (stored, actual)}}]
+        """
+        suppliers = cls.objects.all()
+        if company:
+            suppliers = suppliers.filter(company=company)
+        fields = list(cls.actual_totals())
+        suppliers = suppliers.annotate(
+            **{f'actual_{name}': expression for name, expression in cls.actual_totals().items()}
+        ).order_by('company_id', 'id')
+
+        report = []
+        for supplier in suppliers:
+            drift = {}
+            for name in fields:
+                stored, actual = getattr(supplier, name), getattr(supplier, f'actual_{name}')
+                if name != 'purchase_count':
+                    stored, actual = Decimal(stored).quantize(Decimal('0.01')), Decimal(actual).quantize(Decimal('0.01'))
+                if stored != actual:
+                    drift[name] = (stored, actual)
+            if drift:
+                report.append({'supplier': supplier, 'fields': drift})
+        return report
+
     @classmethod
     def recalculate_all_supplier_totals(cls, company=None):
-        """Recalculate totals for all suppliers - useful for fixing data"""
+        """Recalculate totals for all suppliers (one UPDATE per company) - useful for fixing data"""
         try:
-            suppliers = cls.objects.all()
-            if company:
-                suppliers = suppliers.filter(company=company)
-            
-            for supplier in suppliers:
-                logger.info(f"Recalculating totals for supplier: {supplier.name}")
-                supplier.update_purchase_totals()
-                
-            logger.info(f"SUCCESS: Recalculated totals for {suppliers.count()} suppliers")
+            companies = [company] if company else Company.objects.filter(suppliers__isnull=False).distinct()
+            updated = 0
+            for current in companies:
+                updated += cls.objects.filter(company=current).update(
+                    updated_at=timezone.now(), **cls.actual_totals()
+                )
+
+            logger.info(f"SUCCESS: Recalculated totals for {updated} suppliers")
             return True
-            
+
         except Exception as e:
             logger.error(f"ERROR:Error recalculating supplier totals: {e}")
             return False
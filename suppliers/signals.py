@@ -1,27 +1,107 @@
 # suppliers/signals.py
-from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
-from purchases.models import Purchase
+"""
+Supplier purchase totals follow purchase writes by delta: each save shifts
+the supplier's stored totals by the difference from the purchase's stored
+values in one F() UPDATE, so a purchase save no longer re-aggregates the
+supplier's whole history. The stored values are read by primary key just
+before the write (one query), never taken from the instance: a stale copy
+of a purchase saved after another copy would otherwise apply the same
+delta twice.
+`update_all_supplier_totals` recomputes and reports drift.
+"""
+from decimal import Decimal
 import logging
 
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
 logger = logging.getLogger(__name__)
 
-@receiver(post_save, sender=Purchase)
-def update_supplier_on_purchase_save(sender, instance, **kwargs):
-    """Update supplier totals when purchase is saved"""
+ZERO = Decimal('0.00')
+
+
+def _money(value):
+    return Decimal(str(value)) if value is not None else ZERO
+
+
+def _saved_totals(instance, previous, update_fields):
+    """(supplier_id, grand_total, paid_amount) as stored after this save"""
+    current = (instance.supplier_id, instance.grand_total, instance.paid_amount)
+    if update_fields is None or previous is None:
+        return current
+    written = {'supplier_id': 'supplier' in update_fields or 'supplier_id' in update_fields,
+               'grand_total': 'grand_total' in update_fields,
+               'paid_amount': 'paid_amount' in update_fields}
+    return tuple(
+        value if written[name] else old
+        for name, value, old in zip(('supplier_id', 'grand_total', 'paid_amount'), current, previous)
+    )
+
+
+def _stored_totals(sender, instance):
+    if not instance.pk:
+        return None
+    return sender._base_manager.filter(pk=instance.pk).values_list(*sender.SUPPLIER_TOTAL_FIELDS).first()
+
+
+@receiver(pre_save, sender='purchases.Purchase')
+def remember_purchase_totals(sender, instance, **kwargs):
+    """The supplier/grand_total/paid_amount the database holds before this save"""
+    instance._supplier_totals = _stored_totals(sender, instance)
+
+
+@receiver(pre_delete, sender='purchases.Purchase')
+def remember_deleted_purchase_totals(sender, instance, **kwargs):
+    instance._supplier_totals = _stored_totals(sender, instance)
+
+
+@receiver(post_save, sender='purchases.Purchase')
+def update_supplier_on_purchase_save(sender, instance, created, update_fields=None, **kwargs):
+    """Shift supplier totals by what this save changed"""
+    from .models import Supplier
+
     try:
-        if instance.supplier:
-            print(f"🔄 Updating supplier totals for {instance.supplier.name}")
-            instance.supplier.update_purchase_totals()
+        previous = None if created else getattr(instance, '_supplier_totals', None)
+        supplier_id, total, paid = _saved_totals(instance, previous, update_fields)
+
+        if previous and previous[0] == supplier_id:
+            deltas = {supplier_id: (_money(total) - _money(previous[1]), _money(paid) - _money(previous[2]), 0)}
+        else:
+            deltas = {supplier_id: (_money(total), _money(paid), 1)}
+            if previous and previous[0]:
+                deltas[previous[0]] = (-_money(previous[1]), -_money(previous[2]), -1)
+
+        for target, (total_delta, paid_delta, count_delta) in deltas.items():
+            Supplier.apply_purchase_delta(target, total_delta, paid_delta, count_delta)
+            _sync_cached_supplier(instance, target, total_delta, paid_delta, count_delta)
     except Exception as e:
         logger.error(f"Error updating supplier on purchase save: {str(e)}")
 
-@receiver(post_delete, sender=Purchase)
+
+@receiver(post_delete, sender='purchases.Purchase')
 def update_supplier_on_purchase_delete(sender, instance, **kwargs):
-    """Update supplier totals when purchase is deleted"""
+    """Remove the deleted purchase from its supplier's totals"""
+    from .models import Supplier
+
     try:
-        if instance.supplier:
-            print(f"🔄 Updating supplier totals after delete for {instance.supplier.name}")
-            instance.supplier.update_purchase_totals()
+        supplier_id, total, paid = getattr(instance, '_supplier_totals', None) or (
+            instance.supplier_id, instance.grand_total, instance.paid_amount
+        )
+        Supplier.apply_purchase_delta(supplier_id, -_money(total), -_money(paid), -1)
     except Exception as e:
-        logger.error(f"Error updating supplier on purchase delete: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error updating supplier on purchase delete: {str(e)}")
+
+
+def _sync_cached_supplier(purchase, supplier_id, total_delta, paid_delta, count_delta):
+    """Keep an already loaded purchase.supplier in step with the UPDATE, without re-reading it"""
+    if not _supplier_is_cached(purchase) or purchase.supplier.pk != supplier_id:
+        return
+    supplier = purchase.supplier
+    supplier.total_purchases = _money(supplier.total_purchases) + total_delta
+    supplier.total_paid = _money(supplier.total_paid) + paid_delta
+    supplier.total_due = max(ZERO, supplier.total_purchases - supplier.total_paid)
+    supplier.purchase_count += count_delta
+
+
+def _supplier_is_cached(purchase):
+    return type(purchase).supplier.is_cached(purchase)
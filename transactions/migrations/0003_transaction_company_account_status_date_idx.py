@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_transaction_income'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['company', 'account', 'status', 'transaction_date'], name='transaction_company_89316d_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_transaction_company_account_status_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['company', 'status', 'transaction_type', 'transaction_date'], name='transaction_company_6cc389_idx'),
+        ),
+    ]
@@ -5,8 +5,6 @@ from decimal import Decimal
 from core.models import Company
 from accounts.models import Account
 from django.conf import settings
-from purchases.models import Purchase
-from supplier_payment.model import SupplierPayment
 
 
 from django.db.models import Q  
@@ -91,7 +89,7 @@ class Transaction(models.Model):
     )
     
     supplier_payment = models.ForeignKey(
-    SupplierPayment,
+    'supplier_payment.SupplierPayment',
     on_delete=models.SET_NULL,
     null=True,
     blank=True,
@@ -107,6 +105,8 @@ class Transaction(models.Model):
         ordering = ['-transaction_date', '-id']
         indexes = [
             models.Index(fields=['company', 'transaction_date']),
+            models.Index(fields=['company', 'account', 'status', 'transaction_date']),
+            models.Index(fields=['company', 'status', 'transaction_type', 'transaction_date']),
             models.Index(fields=['account', 'transaction_date']),
             models.Index(fields=['transaction_no']),
             models.Index(fields=['supplier_payment']),
@@ -490,36 +490,48 @@ class Transaction(models.Model):
     @classmethod
     def get_account_balance(cls, account):
         """Calculate account balance from transactions (for verification)"""
+        from closing.balances import after_close, latest_close, snapshot_for
+        from closing.models import AccountSnapshot
+
         try:
-            credits = cls.objects.filter(
-                account=account, 
+            # Transactions covered by the latest period close come from its snapshot
+            close = latest_close(account.company)
+            snapshot = snapshot_for(close, AccountSnapshot, account=account)
+            transactions = after_close(
+                cls.objects.filter(account=account), close, 'transaction_date', 'transaction'
+            )
+
+            credits = transactions.filter(
                 status='completed',
                 transaction_type='credit',
                 is_opening_balance=False
             ).aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
             
-            debits = cls.objects.filter(
-                account=account, 
+            debits = transactions.filter(
                 status='completed',
                 transaction_type='debit', 
                 is_opening_balance=False
             ).aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
             
             # Opening balance transactions (both debit and credit affect balance)
-            opening_credits = cls.objects.filter(
-                account=account,
+            opening_credits = transactions.filter(
                 status='completed', 
                 transaction_type='credit',
                 is_opening_balance=True
             ).aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
             
-            opening_debits = cls.objects.filter(
-                account=account,
+            opening_debits = transactions.filter(
                 status='completed',
                 transaction_type='debit',
                 is_opening_balance=True
             ).aggregate(total=models.Sum('amount'))['total'] or Decimal('0.00')
             
+            if snapshot:
+                credits += snapshot.credit_total
+                debits += snapshot.debit_total
+                opening_credits += snapshot.opening_credit_total
+                opening_debits += snapshot.opening_debit_total
+            
             total_balance = (credits + opening_credits) - (debits + opening_debits)
             
             logger.info(f" Account Balance Calculation for {account.name}:")
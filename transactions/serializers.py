@@ -8,8 +8,23 @@ from datetime import datetime, timedelta
 from rest_framework import serializers
 from .models import Transaction
 from accounts.models import Account
+from closing.balances import latest_close
+from closing.guards import closed_message, covers
 
-class TransactionCreateSerializer(serializers.ModelSerializer):
+
+class ClosedPeriodMixin:
+    """Rejects a transaction_date inside the company's latest period close"""
+
+    def validate_transaction_date(self, value):
+        request = self.context.get('request')
+        company = getattr(request.user, 'company', None) if request else None
+        close = latest_close(company) if company and value else None
+        if covers(close, value):
+            raise serializers.ValidationError(closed_message(close))
+        return value
+
+
+class TransactionCreateSerializer(ClosedPeriodMixin, serializers.ModelSerializer):
     class Meta:
         model = Transaction
         fields = [
@@ -22,7 +37,7 @@ class TransactionCreateSerializer(serializers.ModelSerializer):
         # Add any validation logic here
         return data
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(ClosedPeriodMixin, serializers.ModelSerializer):
     account_name = serializers.CharField(source='account.name', read_only=True)
     company_name = serializers.CharField(source='company.name', read_only=True)
     # date_updated = serializers.DateTimeField(read_only=True, required=False)
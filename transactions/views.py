@@ -2,6 +2,7 @@ from django.shortcuts import render
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Sum, Q, Count
 from django.utils import timezone
@@ -20,74 +21,111 @@ from .serializers import (
 import logging
 
 from core.utils import custom_response
+from core.pagination import KeysetPagination
+from core.routers import ReplicaReadMixin
 
 logger = logging.getLogger(__name__)
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
     queryset = Transaction.objects.all()
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['transaction_no', 'description', 'account__name']
     ordering_fields = ['transaction_date', 'amount', 'created_at', 'transaction_no']
-    ordering = ['-transaction_no'] 
-    
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        
-        # Apply filters
-        account_id = self.request.query_params.get('account_id')
-        transaction_type = self.request.query_params.get('transaction_type')
-        status_filter = self.request.query_params.get('status')
-        start_date = self.request.query_params.get('start_date')
-        end_date = self.request.query_params.get('end_date')
+    ordering = ['-transaction_no']
+    # Keyset pages walk the (company, account, status, transaction_date) index newest first
+    keyset_ordering = ['-transaction_date', '-id']
+    # List: auth lookups + the COUNT + one page query
+    query_budget = {'list': 5}
+    replica_actions = ('summary', 'daily_summary')
+
+    def uses_keyset(self):
+        """Keyset pages are opt-in (?keyset=1, or a ?cursor= from a previous keyset page)"""
+        if self.request is None:
+            return False
+        params = self.request.query_params
+        return 'cursor' in params or params.get('keyset') == '1'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.uses_keyset():
+            # The ordering filter and the cursor both read the view's ordering
+            self.ordering = self.keyset_ordering
 
-        # AUTO GET COMPANY FROM AUTHENTICATED USER
+    @property
+    def paginator(self):
+        """The counted page-number response by default; KeysetPagination when opted in"""
+        if not hasattr(self, '_paginator') and self.uses_keyset():
+            self._paginator = KeysetPagination()
+        return super().paginator
+
+    def get_queryset(self):
         user = self.request.user
-        if hasattr(user, 'company') and user.company:
-            queryset = queryset.filter(company=user.company)
-            logger.info(f"🔍 TRANSACTION FILTER DEBUG:")
-            logger.info(f"  - User: {user.username}")
-            logger.info(f"  - Company: {user.company.id} - {user.company.name}")
-            logger.info(f"  - Transactions before filter: {super().get_queryset().count()}")
-            logger.info(f"  - Transactions after company filter: {queryset.count()}")
-        else:
+        company_id = getattr(user, 'company_id', None)
+        if not company_id:
             logger.warning(f"ERROR:No company found for user: {user}")
             return Transaction.objects.none()
-        
+
+        # Filters compose lazily: nothing is evaluated until the page query
+        queryset, filters_applied = self.apply_filters(Transaction.objects.filter(company_id=company_id))
+        queryset = queryset.select_related('account', 'created_by', 'company')
+
+        if self.diagnostics_enabled():
+            self._log_diagnostics(queryset, filters_applied)
+        return queryset
+
+    def apply_filters(self, queryset):
+        """Apply the query param filters in index order (account, status, then date)"""
+        params = self.request.query_params
+        filters_applied = []
+
+        account_id = params.get('account_id')
         if account_id:
             queryset = queryset.filter(account_id=account_id)
-            logger.info(f"  - After account filter: {queryset.count()}")
-        
-        if transaction_type:
-            queryset = queryset.filter(transaction_type=transaction_type)
-            logger.info(f"  - After type filter: {queryset.count()}")
-        
+            filters_applied.append(f"account_id={account_id}")
+
+        status_filter = params.get('status')
         if status_filter:
             queryset = queryset.filter(status=status_filter)
-            logger.info(f"  - After status filter: {queryset.count()}")
-        
+            filters_applied.append(f"status={status_filter}")
+
+        transaction_type = params.get('transaction_type')
+        if transaction_type:
+            queryset = queryset.filter(transaction_type=transaction_type)
+            filters_applied.append(f"transaction_type={transaction_type}")
+
         # Date range filter
+        start_date = params.get('start_date')
+        end_date = params.get('end_date')
         if start_date and end_date:
             try:
-                start_date = datetime.strptime(start_date, '%Y-%m-%d')
-                end_date = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
-                queryset = queryset.filter(transaction_date__range=[start_date, end_date])
-                logger.info(f"  - After date filter: {queryset.count()}")
+                start = datetime.strptime(start_date, '%Y-%m-%d')
+                end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+                queryset = queryset.filter(transaction_date__range=[start, end])
+                filters_applied.append(f"date={start_date}..{end_date}")
             except ValueError:
                 pass
-        
-        # FIXED: Use only essential select_related to avoid problematic joins
-        queryset = queryset.select_related(
-            'account', 'created_by', 'company'
+
+        return queryset, filters_applied
+
+    # -----------------------------
+    # Diagnostics (off by default)
+    # -----------------------------
+    def diagnostics_enabled(self):
+        return getattr(settings, 'TRANSACTION_LIST_DIAGNOSTICS', False)
+
+    def _log_diagnostics(self, queryset, filters_applied):
+        """Row count and query plan for the filtered list; costs extra queries, so opt-in only"""
+        user = self.request.user
+        logger.info(
+            f"Transaction list diagnostics: user={user.username} company={user.company_id} "
+            f"filters=[{', '.join(filters_applied)}] rows={queryset.count()}"
         )
-        # Remove problematic relationships: 'sale', 'money_receipt', 'expense', 'purchase'
-        # Add them back when the database schema is fixed
-        
-        logger.info(f"  - Final transaction count: {queryset.count()}")
-        logger.info(f"🔍 END DEBUG")
-        
-        return queryset
-    
+        try:
+            logger.info(f"Transaction list plan:\n{queryset.explain()}")
+        except Exception as e:
+            logger.info(f"Transaction list plan unavailable: {e}")
+
     def get_serializer_class(self):
         if self.action == 'create':
             return TransactionCreateSerializer
@@ -187,6 +225,15 @@ class TransactionViewSet(viewsets.ModelViewSet):
             page = self.paginate_queryset(queryset)
             if page is not None:
                 serializer = self.get_serializer(page, many=True)
+
+                if isinstance(self.paginator, KeysetPagination):
+                    return custom_response(
+                        success=True,
+                        message="Transactions fetched successfully.",
+                        data=self.paginator.get_page_data(serializer.data),
+                        status_code=status.HTTP_200_OK
+                    )
+
                 paginated_response = self.get_paginated_response(serializer.data)
                 
                 return custom_response(